@@ -0,0 +1,173 @@
+"""
+Verificação concorrente de páginas de artigos (ArticleWebPage)
+
+As requisições são feitas com aiohttp, limitando o total de conexões
+simultâneas e a quantidade por host. Páginas já verificadas guardam ETag e
+Last-Modified em ``detail``; na próxima verificação, estes valores são enviados
+como If-None-Match / If-Modified-Since e a resposta 304 dispensa o download
+e a comparação do conteúdo.
+
+Páginas que não são html/xml (pdf) são verificadas com HEAD.
+
+Este módulo não acessa o banco de dados: recebe e retorna dicionários.
+A leitura e a gravação (em lote) das páginas ficam em
+``ArticleWebPage.check_pages``.
+"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+from django.conf import settings
+
+from article.page_checker import check_content
+
+ARTICLE_PAGE_CHECK_MAX_CONNECTIONS = getattr(
+    settings, "ARTICLE_PAGE_CHECK_MAX_CONNECTIONS", 50
+)
+ARTICLE_PAGE_CHECK_LIMIT_PER_HOST = getattr(
+    settings, "ARTICLE_PAGE_CHECK_LIMIT_PER_HOST", 8
+)
+
+CONTENT_FORMATS = ("html", "xml")
+
+# resultado de fetch_page
+FETCH_OK = "ok"
+FETCH_NOT_MODIFIED = "not_modified"
+FETCH_ERROR = "error"
+
+
+def get_conditional_headers(validators):
+    """
+    Retorna os cabeçalhos de requisição condicional a partir de
+    {"etag": ..., "last_modified": ...}
+    """
+    headers = {}
+    if not validators:
+        return headers
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def get_validators(response_headers):
+    validators = {}
+    if response_headers.get("ETag"):
+        validators["etag"] = response_headers["ETag"]
+    if response_headers.get("Last-Modified"):
+        validators["last_modified"] = response_headers["Last-Modified"]
+    return validators
+
+
+async def fetch_page(session, item, timeout):
+    """
+    Obtém a página descrita por item
+
+    Args:
+        item: {"url": ..., "fmt": ..., "validators": {"etag", "last_modified"}}
+
+    Returns:
+        {"result": FETCH_OK | FETCH_NOT_MODIFIED | FETCH_ERROR,
+         "http_status": int, "content": bytes | None, "validators": dict,
+         "error": str}
+    """
+    url = item.get("url")
+    if not url:
+        return {"result": FETCH_ERROR, "error": "URL is required for availability check."}
+
+    headers = get_conditional_headers(item.get("validators"))
+    method = "GET" if item.get("fmt") in CONTENT_FORMATS else "HEAD"
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with session.request(
+            method, url, headers=headers, timeout=client_timeout
+        ) as response:
+            if response.status == 405 and method == "HEAD":
+                # servidor não aceita HEAD
+                item = dict(item, fmt=CONTENT_FORMATS[0])
+                return await fetch_page(session, item, timeout)
+
+            data = {
+                "http_status": response.status,
+                "validators": get_validators(response.headers),
+            }
+            if response.status == 304:
+                data["result"] = FETCH_NOT_MODIFIED
+                data["validators"] = data["validators"] or item.get("validators")
+                return data
+            if response.status >= 400:
+                data["result"] = FETCH_ERROR
+                data["error"] = f"{response.status} {response.reason}"
+                return data
+            data["result"] = FETCH_OK
+            if method == "GET":
+                data["content"] = await response.read()
+            return data
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return {"result": FETCH_ERROR, "error": str(e) or type(e).__name__}
+
+
+async def check_page(session, item, timeout):
+    """
+    Obtém a página e, se for html/xml, compara o conteúdo com
+    item["article_metadata"]
+    """
+    response = await fetch_page(session, item, timeout)
+    content = response.pop("content", None)
+    if response["result"] == FETCH_OK and item.get("fmt") in CONTENT_FORMATS:
+        # check_content consome CPU; não bloqueia as demais requisições
+        response["content_check"] = await asyncio.to_thread(
+            check_content, item.get("article_metadata"), content, item["fmt"]
+        )
+    response["id"] = item.get("id")
+    return response
+
+
+async def check_pages_async(
+    items, timeout=None, max_connections=None, limit_per_host=None
+):
+    connector = aiohttp.TCPConnector(
+        limit=max_connections or ARTICLE_PAGE_CHECK_MAX_CONNECTIONS,
+        limit_per_host=limit_per_host or ARTICLE_PAGE_CHECK_LIMIT_PER_HOST,
+    )
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(
+            *(check_page(session, item, timeout or 30) for item in items)
+        )
+
+
+def check_pages(items, timeout=None, max_connections=None, limit_per_host=None):
+    """
+    Verifica as páginas concorrentemente
+
+    Args:
+        items: lista de {"id", "url", "fmt", "validators", "article_metadata"}
+
+    Returns:
+        (lista de respostas na mesma ordem de items, estatísticas)
+    """
+    started = time.monotonic()
+    responses = []
+    if items:
+        responses = asyncio.run(
+            check_pages_async(items, timeout, max_connections, limit_per_host)
+        )
+    elapsed = time.monotonic() - started
+
+    stats = {
+        "total": len(items),
+        "not_modified": 0,
+        "errors": 0,
+        "elapsed": round(elapsed, 3),
+        "pages_per_second": round(len(items) / elapsed, 2) if elapsed else 0,
+    }
+    for response in responses:
+        if response["result"] == FETCH_NOT_MODIFIED:
+            stats["not_modified"] += 1
+        elif response["result"] == FETCH_ERROR:
+            stats["errors"] += 1
+    logging.info(f"check_pages: {stats}")
+    return responses, stats
@@ -2,9 +2,10 @@ import logging
 import traceback
 from datetime import datetime, timezone
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError, models
-from django.db.models import Count, Q
+from django.db.models import Count, Q, prefetch_related_objects
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
@@ -17,6 +18,7 @@ from wagtailautocomplete.edit_handlers import AutocompletePanel
 from core.widgets import ReadOnlyPrettyJSONWidget
 from migration import choices as migration_choices
 from migration.models import ClassicWebsiteConfiguration
+from article import async_page_checker
 from article.page_checker import check_url, check_content, format_url, format_classic_url
 from article.forms import ArticleForm, RelatedItemForm, RequestArticleChangeForm
 from collection.choices import PUBLIC
@@ -836,15 +838,17 @@ class Article(ClusterableModel, CommonControlField):
         if collection:
             qs = qs.filter(collection=collection)
         logging.info("article_collections: {}".format(qs.count()))
-        response = []
+        pages = []
         for art_col in qs:
             if not art_col.pages.exists() and not force_update:
                 force_update = True
-            for resp in art_col.check_pages(
-                user=user, purpose=purpose, force_update=force_update, timeout=timeout
-            ):
-                response.append(resp)
-        return response
+            pages.extend(
+                art_col.get_pages_to_check(force_update=force_update, purpose=purpose)
+            )
+        response = ArticleWebPage.check_pages(
+            user, pages, timeout=timeout, force_update=force_update
+        )
+        return response["pages"]
 
     @property
     def availability(self):
@@ -1396,9 +1400,16 @@ class ArticleCollection(CommonControlField):
         purpose : str, optional
             Se informado, verifica apenas páginas desse purpose.
         """
-        response = []
-        article_metadata = self.article.get_metadata_by_lang()
+        pages = self.get_pages_to_check(force_update=force_update, purpose=purpose)
+        response = ArticleWebPage.check_pages(
+            user, pages, timeout=timeout, force_update=force_update
+        )
+        return response["pages"]
 
+    def get_pages_to_check(self, force_update=None, purpose=None):
+        """
+        Retorna as páginas desta coleção que devem ser verificadas.
+        """
         pages = self.pages.all()
         if purpose:
             pages = pages.filter(purpose=purpose)
@@ -1407,24 +1418,14 @@ class ArticleCollection(CommonControlField):
         # páginas clássicas — algumas coleções não têm site clássico
         if not self.classic_website:
             if purpose == choices.ARTICLE_WEBPAGE_PURPOSE_CLASSIC:
-                return response
+                return pages.none()
             pages = pages.exclude(purpose=choices.ARTICLE_WEBPAGE_PURPOSE_CLASSIC)
 
         if not force_update:
             pages = pages.exclude(
                 status=choices.ARTICLE_WEBPAGE_STATUS_VALID_CONTENT
             )
-        for page in pages.select_related("lang"):
-            lang_code = page.lang.code2 if page.lang else None
-            response.append(
-                page.check_page(
-                    user,
-                    timeout,
-                    article_metadata=article_metadata.get(lang_code),
-                    force_update=force_update,
-                )
-            )
-        return response
+        return pages
 
 
 # ============================================================
@@ -1595,6 +1596,135 @@ class ArticleWebPage(CommonControlField):
         logging.info(f"data: {self.data}")
         return self.data
 
+    # ── Verificação concorrente ──
+
+    @property
+    def validators(self):
+        """
+        ETag / Last-Modified da última verificação, se o resultado dela pode
+        ser reaproveitado quando o servidor responde 304 (Not Modified)
+        """
+        if self.status == choices.ARTICLE_WEBPAGE_STATUS_VALID_CONTENT or (
+            self.fmt not in async_page_checker.CONTENT_FORMATS
+            and self.status == choices.ARTICLE_WEBPAGE_STATUS_AVAILABLE
+        ):
+            return (self.detail or {}).get("validators")
+
+    def set_check_response(self, user, response):
+        """
+        Atualiza status e detail a partir do resultado de
+        async_page_checker.check_pages, sem gravar
+        """
+        if response["result"] == async_page_checker.FETCH_NOT_MODIFIED:
+            detail = dict(self.detail or {})
+            detail["http_status"] = response["http_status"]
+            detail["validators"] = response["validators"]
+        elif response["result"] == async_page_checker.FETCH_ERROR:
+            self.status = choices.ARTICLE_WEBPAGE_STATUS_UNAVAILABLE
+            detail = {"error": response["error"]}
+            if response.get("http_status"):
+                detail["http_status"] = response["http_status"]
+        else:
+            self.status = choices.ARTICLE_WEBPAGE_STATUS_AVAILABLE
+            detail = {
+                "http_status": response["http_status"],
+                "validators": response["validators"],
+            }
+            content_check = response.get("content_check")
+            if content_check is not None:
+                detail.update(content_check)
+                if "rate" not in content_check:
+                    detail["error"] = "Unable to check content"
+                elif content_check["rate"] >= 0.5:
+                    self.status = choices.ARTICLE_WEBPAGE_STATUS_VALID_CONTENT
+                else:
+                    self.status = choices.ARTICLE_WEBPAGE_STATUS_CONTENT_MISMATCH
+        self.detail = detail
+        self.updated_by = user
+        self.updated = datetime.now(timezone.utc)
+
+    @classmethod
+    def check_pages(
+        cls,
+        user,
+        pages,
+        timeout=None,
+        force_update=None,
+        batch_size=None,
+    ):
+        """
+        Verifica as páginas concorrentemente (aiohttp), com limite de conexões
+        por host, e grava os resultados em lote (bulk_update).
+
+        Páginas com ETag / Last-Modified de uma verificação válida são
+        consultadas com requisição condicional; se o servidor responde 304,
+        o status anterior é mantido. Com force_update, a requisição não é
+        condicional (o conteúdo é sempre verificado).
+
+        Returns
+        -------
+        dict
+            {"pages": [page.data, ...], "total", "not_modified", "errors",
+             "elapsed", "pages_per_second"}
+        """
+        batch_size = batch_size or getattr(
+            settings, "ARTICLE_PAGE_CHECK_BATCH_SIZE", 200
+        )
+        pages = [
+            page
+            for page in pages
+            if force_update
+            or page.status != choices.ARTICLE_WEBPAGE_STATUS_VALID_CONTENT
+        ]
+        prefetch_related_objects(pages, "article", "lang")
+
+        metadata = {}
+        result = {
+            "pages": [],
+            "total": 0,
+            "not_modified": 0,
+            "errors": 0,
+            "elapsed": 0,
+        }
+        for start in range(0, len(pages), batch_size):
+            batch = pages[start : start + batch_size]
+            items = []
+            for page in batch:
+                item = {
+                    "id": page.id,
+                    "url": page.url,
+                    "fmt": page.fmt,
+                    "validators": None if force_update else page.validators,
+                }
+                if page.fmt in async_page_checker.CONTENT_FORMATS:
+                    lang_code = page.lang.code2 if page.lang else None
+                    key = (page.article_id, lang_code)
+                    if key not in metadata:
+                        metadata[key] = page.article.get_metadata_items(lang_code)
+                    item["article_metadata"] = metadata[key]
+                items.append(item)
+
+            responses, stats = async_page_checker.check_pages(items, timeout)
+            for page, response in zip(batch, responses):
+                page.set_check_response(user, response)
+            try:
+                cls.objects.bulk_update(
+                    batch, ["status", "detail", "updated", "updated_by"]
+                )
+            except Exception as e:
+                logging.info("Erro ao salvar ArticleWebPage")
+                logging.exception(e)
+
+            result["pages"].extend(page.data for page in batch)
+            for name in ("total", "not_modified", "errors", "elapsed"):
+                result[name] += stats[name]
+
+        result["elapsed"] = round(result["elapsed"], 3)
+        result["pages_per_second"] = (
+            round(result["total"] / result["elapsed"], 2) if result["elapsed"] else 0
+        )
+        return result
+
     # ── Factory ──
 
     @classmethod
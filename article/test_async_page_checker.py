@@ -0,0 +1,135 @@
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import AsyncMock, patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from article import async_page_checker
+
+ETAG = '"v1"'
+HTML = b"<html><body><h1>Article title</h1> S0001-37652020000100001</body></html>"
+
+
+async def html_page(request):
+    if request.headers.get("If-None-Match") == ETAG:
+        return web.Response(status=304, headers={"ETag": ETAG})
+    return web.Response(body=HTML, content_type="text/html", headers={"ETag": ETAG})
+
+
+async def pdf_page(request):
+    if request.method != "HEAD":
+        return web.Response(status=500)
+    return web.Response(content_type="application/pdf")
+
+
+async def no_head_page(request):
+    if request.method == "HEAD":
+        return web.Response(status=405)
+    return web.Response(body=b"%PDF", content_type="application/pdf")
+
+
+class CheckPagesAsyncTest(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.requests = []
+
+        @web.middleware
+        async def register(request, handler):
+            self.requests.append((request.method, request.path))
+            return await handler(request)
+
+        app = web.Application(middlewares=[register])
+        app.router.add_get("/html", html_page)
+        app.router.add_route("*", "/pdf", pdf_page)
+        app.router.add_route("*", "/no-head", no_head_page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    def url(self, path):
+        return str(self.server.make_url(path))
+
+    async def test_html_page_content_is_checked(self):
+        items = [
+            {
+                "id": 1,
+                "url": self.url("/html"),
+                "fmt": "html",
+                "article_metadata": [
+                    ("title.1", "Article title"),
+                    ("pid_v2", "S0001-37652020000100001"),
+                ],
+            }
+        ]
+        responses = await async_page_checker.check_pages_async(items, timeout=5)
+        self.assertEqual(responses[0]["result"], async_page_checker.FETCH_OK)
+        self.assertEqual(responses[0]["validators"], {"etag": ETAG})
+        self.assertEqual(responses[0]["content_check"]["rate"], 1.0)
+        self.assertNotIn("content", responses[0])
+
+    async def test_unchanged_page_is_not_downloaded(self):
+        items = [
+            {
+                "id": 1,
+                "url": self.url("/html"),
+                "fmt": "html",
+                "validators": {"etag": ETAG},
+                "article_metadata": [("title.1", "Article title")],
+            }
+        ]
+        responses = await async_page_checker.check_pages_async(items, timeout=5)
+        self.assertEqual(responses[0]["result"], async_page_checker.FETCH_NOT_MODIFIED)
+        self.assertNotIn("content_check", responses[0])
+
+    async def test_pdf_page_is_checked_with_head(self):
+        items = [{"id": 1, "url": self.url("/pdf"), "fmt": "pdf"}]
+        responses = await async_page_checker.check_pages_async(items, timeout=5)
+        self.assertEqual(responses[0]["result"], async_page_checker.FETCH_OK)
+        self.assertEqual(self.requests, [("HEAD", "/pdf")])
+
+    async def test_falls_back_to_get_if_head_is_not_allowed(self):
+        items = [{"id": 1, "url": self.url("/no-head"), "fmt": "pdf"}]
+        responses = await async_page_checker.check_pages_async(items, timeout=5)
+        self.assertEqual(responses[0]["result"], async_page_checker.FETCH_OK)
+        self.assertEqual(
+            self.requests, [("HEAD", "/no-head"), ("GET", "/no-head")]
+        )
+
+    async def test_unavailable_page(self):
+        items = [
+            {"id": 1, "url": self.url("/missing"), "fmt": "pdf"},
+            {"id": 2, "url": None, "fmt": "pdf"},
+        ]
+        responses = await async_page_checker.check_pages_async(items, timeout=5)
+        self.assertEqual(responses[0]["result"], async_page_checker.FETCH_ERROR)
+        self.assertEqual(responses[0]["http_status"], 404)
+        self.assertEqual(responses[1]["result"], async_page_checker.FETCH_ERROR)
+
+
+class CheckPagesTest(TestCase):
+    @patch("article.async_page_checker.check_pages_async", new_callable=AsyncMock)
+    def test_stats(self, mock_check):
+        mock_check.return_value = [
+            {"id": 1, "result": async_page_checker.FETCH_OK},
+            {"id": 2, "result": async_page_checker.FETCH_NOT_MODIFIED},
+            {"id": 3, "result": async_page_checker.FETCH_ERROR},
+        ]
+        responses, stats = async_page_checker.check_pages([{}, {}, {}])
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(stats["total"], 3)
+        self.assertEqual(stats["not_modified"], 1)
+        self.assertEqual(stats["errors"], 1)
+        self.assertIn("pages_per_second", stats)
+
+    def test_conditional_headers(self):
+        self.assertEqual(
+            async_page_checker.get_conditional_headers(
+                {"etag": ETAG, "last_modified": "Wed, 21 Oct 2015 07:28:00 GMT"}
+            ),
+            {
+                "If-None-Match": ETAG,
+                "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
+        self.assertEqual(async_page_checker.get_conditional_headers(None), {})
@@ -1,7 +1,8 @@
 import unittest
 from unittest.mock import MagicMock, Mock, patch
 
-from article.models import Article
+from article import choices
+from article.models import Article, ArticleWebPage
 from migration.models import MigratedArticle
 
 
@@ -260,3 +261,38 @@ class ArticleGetTestCase(unittest.TestCase):
         mock_queryset.order_by.assert_called_with("-updated")
         mock_ordered_qs.exclude.assert_called_once_with(pk=mock_recent.pk)
         mock_exclude_qs.delete.assert_called_once()
+
+
+class ArticleWebPageCheckPagesTestCase(unittest.TestCase):
+    """Test cases for ArticleWebPage.check_pages() conditional requests."""
+
+    def get_page(self):
+        page = Mock(
+            id=1,
+            url="https://www.scielo.br/a.pdf",
+            fmt="pdf",
+            status=choices.ARTICLE_WEBPAGE_STATUS_VALID_CONTENT,
+            validators={"etag": '"v1"'},
+        )
+        return page
+
+    def check_pages(self, page, force_update):
+        with patch("article.models.prefetch_related_objects"), patch.object(
+            ArticleWebPage, "objects"
+        ), patch("article.models.async_page_checker.check_pages") as mock_check:
+            mock_check.return_value = (
+                [{"id": 1}],
+                {"total": 1, "not_modified": 0, "errors": 0, "elapsed": 0},
+            )
+            ArticleWebPage.check_pages(None, [page], force_update=force_update)
+        return mock_check.call_args[0][0]
+
+    def test_force_update_does_not_send_validators(self):
+        items = self.check_pages(self.get_page(), force_update=True)
+        self.assertIsNone(items[0]["validators"])
+
+    def test_validators_of_pages_with_invalid_status(self):
+        page = self.get_page()
+        page.status = None
+        items = self.check_pages(page, force_update=False)
+        self.assertEqual({"etag": '"v1"'}, items[0]["validators"])
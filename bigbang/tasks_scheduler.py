@@ -72,6 +72,9 @@ RETRY_XML_URLS_BY_STATUS_PRIORITY = 5
 LOAD_RECORDS_FROM_COUNTER_DICT_MINUTES = MINUTES[10]
 LOAD_RECORDS_FROM_COUNTER_DICT_PRIORITY = 5
 
+PRUNE_EVENTS_MINUTES = "0"
+PRUNE_EVENTS_PRIORITY = 9
+
 MIGRATION_PRIORITY = ISSUE_DB_MIGRATION_PRIORITY + 1
 
 
@@ -117,6 +120,29 @@ def schedule_subtasks(username):
     _schedule_try_fetch_and_register_press_release(username, enabled)
     _schedule_retry_xml_urls_by_status(username, enabled)
     _schedule_load_records_from_counter_dict(username, enabled)
+    _schedule_prune_events(username, enabled)
+
+
+def _schedule_prune_events(username, enabled=False):
+    """
+    Agenda a tarefa de apagar eventos antigos (retenção)
+    Deixa a tarefa desabilitada por padrão
+    """
+    schedule_task(
+        task="proc.tasks.task_prune_events",
+        name="prune_events",
+        kwargs=dict(
+            username=username,
+            days=None,
+        ),
+        description=_("Apaga eventos antigos"),
+        priority=PRUNE_EVENTS_PRIORITY,
+        enabled=enabled,
+        run_once=False,
+        day_of_week="*",
+        hour="3",
+        minute=PRUNE_EVENTS_MINUTES,
+    )
 
 
 def _schedule_check_article_availability(username, enabled=False):
@@ -2,6 +2,7 @@ from django.conf import settings
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
 from core.api.v1.views import PressReleaseViewSet
+from pid_provider.api.v1.views import PidProviderBatchViewSet
 
 app_name = "pid_provider"
 
@@ -11,6 +12,9 @@ else:
     router = SimpleRouter()
 
 router.register("pressrelease", PressReleaseViewSet, basename="press-release")
+router.register(
+    "pid_provider_batch", PidProviderBatchViewSet, basename="pid-provider-batch"
+)
 
 
 urlpatterns = router.urls
@@ -2,11 +2,23 @@
 
 import logging
 
-from celery.signals import task_postrun, task_prerun, worker_process_init
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from django.conf import settings
 from django.db import close_old_connections
 
+from core.utils import query_budget
+from tracker import event_buffer
+
 logger = logging.getLogger(__name__)
 
+# grava periodicamente as métricas de profiling do processo (profiling_metrics)
+_metrics_dump = None
+
 
 def _close_old_connections():
     try:
@@ -24,6 +36,26 @@ def close_connections(**kwargs):
     _close_old_connections()
 
 
+@worker_process_init.connect
+def start_profiling_metrics_dump(**kwargs):
+    """Inicia a gravação periódica das métricas de profiling do processo"""
+    global _metrics_dump
+
+    interval = getattr(settings, "PROFILING_METRICS_DUMP_INTERVAL", 0)
+    if not getattr(settings, "PROFILING_ENABLED", False) or not interval:
+        return
+
+    from core.utils.profiling_metrics import PeriodicDump, registry
+
+    _metrics_dump = PeriodicDump(
+        registry,
+        interval,
+        logging.getLogger("profiling"),
+        folder=getattr(settings, "PROFILING_METRICS_DUMP_DIR", None),
+    )
+    _metrics_dump.start()
+
+
 @task_prerun.connect
 def close_connections_task_prerun(**kwargs):
     """Fecha conexões antes de cada task"""
@@ -33,3 +65,28 @@ def close_connections_task_prerun(**kwargs):
 @task_postrun.connect
 def close_connections_task_postrun(**kwargs):
     _close_old_connections()
+
+
+@task_prerun.connect
+def start_task_query_budget(task_id=None, task=None, **kwargs):
+    """Conta as consultas da task (QUERY_BUDGET_ENABLED)"""
+    query_budget.start_task_budget(task_id, task.name)
+
+
+@task_postrun.connect
+def finish_task_query_budget(task_id=None, **kwargs):
+    """Verifica o orçamento de consultas da task"""
+    query_budget.finish_task_budget(task_id)
+
+
+@worker_process_shutdown.connect
+def flush_event_buffers(**kwargs):
+    """Grava os eventos acumulados (tracker.event_buffer) antes de encerrar"""
+    event_buffer.flush_all()
+
+
+@worker_process_shutdown.connect
+def stop_profiling_metrics_dump(**kwargs):
+    """Grava as métricas de profiling acumuladas antes de encerrar"""
+    if _metrics_dump:
+        _metrics_dump.stop()
@@ -200,6 +200,7 @@ MIDDLEWARE = [
     "wagtail.contrib.redirects.middleware.RedirectMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "core.utils.profiling_tools.LightweightProfilingMiddleware",
+    "core.utils.query_budget.QueryBudgetMiddleware",
 ]
 
 # STATIC
@@ -429,3 +430,134 @@ PROFILING_LOG_SLOW_REQUESTS = env.float(
 )
 PROFILING_LOG_HIGH_MEMORY = env.int("DJANGO_PROFILING_LOG_HIGH_MEMORY", default=20)
 PROFILING_LOG_ALL = env.bool("DJANGO_PROFILING_LOG_ALL", default=True)
+# agrega as métricas dos decoradores de profiling (core.utils.profiling_metrics)
+PROFILING_METRICS_ENABLED = env.bool("DJANGO_PROFILING_METRICS_ENABLED", default=True)
+# token (Authorization: Bearer) aceito pelo endpoint /profiling/metrics/
+PROFILING_METRICS_TOKEN = env.str("DJANGO_PROFILING_METRICS_TOKEN", default="")
+# intervalo (segundos) de gravação das métricas pelos processos do Celery (0 desativa)
+PROFILING_METRICS_DUMP_INTERVAL = env.int(
+    "DJANGO_PROFILING_METRICS_DUMP_INTERVAL", default=300
+)
+# diretório dos arquivos .prom (textfile collector do node_exporter); vazio: somente log
+PROFILING_METRICS_DUMP_DIR = env.str("DJANGO_PROFILING_METRICS_DUMP_DIR", default="")
+# orçamento de consultas SQL por tarefa Celery e por requisição (core.utils.query_budget)
+QUERY_BUDGET_ENABLED = env.bool("DJANGO_QUERY_BUDGET_ENABLED", default=False)
+# total de consultas permitido (0: sem limite)
+QUERY_BUDGET_MAX_QUERIES = env.int("DJANGO_QUERY_BUDGET_MAX_QUERIES", default=0)
+# repetições de um mesmo formato de SQL a partir das quais indica N+1 (0: sem limite)
+QUERY_BUDGET_MAX_REPEATED = env.int("DJANGO_QUERY_BUDGET_MAX_REPEATED", default=50)
+# "log" registra no log profiling; "raise" levanta QueryBudgetExceeded
+QUERY_BUDGET_MODE = env.str("DJANGO_QUERY_BUDGET_MODE", default="log")
+
+# migration
+# ------------------------------------------------------------------------------
+# quantidade de IdFileRecord gravados por comando em import_journal_acron_id_records
+ID_FILE_RECORD_BATCH_SIZE = env.int("DJANGO_ID_FILE_RECORD_BATCH_SIZE", default=1000)
+
+# core.utils.xml_cache: XMLWithPre interpretados mantidos em memória por processo
+XML_WITH_PRE_CACHE_MAX_ITEMS = env.int("DJANGO_XML_WITH_PRE_CACHE_MAX_ITEMS", default=256)
+XML_WITH_PRE_CACHE_MAX_BYTES = env.int(
+    "DJANGO_XML_WITH_PRE_CACHE_MAX_BYTES", default=64 * 1024 * 1024
+)
+
+# files_storage: quantidade de envios simultâneos de componentes de um pacote
+MINIO_UPLOAD_MAX_WORKERS = env.int("DJANGO_MINIO_UPLOAD_MAX_WORKERS", default=4)
+
+# article.async_page_checker: verificação concorrente de ArticleWebPage
+ARTICLE_PAGE_CHECK_MAX_CONNECTIONS = env.int(
+    "DJANGO_ARTICLE_PAGE_CHECK_MAX_CONNECTIONS", default=50
+)
+ARTICLE_PAGE_CHECK_LIMIT_PER_HOST = env.int(
+    "DJANGO_ARTICLE_PAGE_CHECK_LIMIT_PER_HOST", default=8
+)
+# páginas gravadas por bulk_update e artigos por task_check_articles_webpages
+ARTICLE_PAGE_CHECK_BATCH_SIZE = env.int("DJANGO_ARTICLE_PAGE_CHECK_BATCH_SIZE", default=200)
+ARTICLE_PAGE_CHECK_ARTICLES_PER_TASK = env.int(
+    "DJANGO_ARTICLE_PAGE_CHECK_ARTICLES_PER_TASK", default=100
+)
+
+# core.utils.requester: sessões HTTP (keep-alive) por host e por processo
+HTTP_POOL_CONNECTIONS = env.int("DJANGO_HTTP_POOL_CONNECTIONS", default=4)
+HTTP_POOL_MAXSIZE = env.int("DJANGO_HTTP_POOL_MAXSIZE", default=10)
+# respostas de GET condicional (ETag / Last-Modified) mantidas em memória
+HTTP_CONDITIONAL_CACHE_MAX_ITEMS = env.int(
+    "DJANGO_HTTP_CONDITIONAL_CACHE_MAX_ITEMS", default=128
+)
+
+# tracker.event_buffer: gravação em lote de eventos (opcional)
+TRACKER_EVENT_BUFFER_ENABLED = env.bool("DJANGO_TRACKER_EVENT_BUFFER_ENABLED", default=False)
+TRACKER_EVENT_BUFFER_MAX_SIZE = env.int("DJANGO_TRACKER_EVENT_BUFFER_MAX_SIZE", default=500)
+TRACKER_EVENT_BUFFER_MAX_SECONDS = env.int(
+    "DJANGO_TRACKER_EVENT_BUFFER_MAX_SECONDS", default=30
+)
+# proc.tasks.task_prune_events: idade (dias) dos eventos apagados
+TRACKER_EVENT_RETENTION_DAYS = env.int("DJANGO_TRACKER_EVENT_RETENTION_DAYS", default=90)
+
+# proc.models.IssueProc.migrate_document_records: registros de artigo
+# processados por lote (0 = registro a registro)
+DOCUMENT_RECORDS_BATCH_SIZE = env.int("DJANGO_DOCUMENT_RECORDS_BATCH_SIZE", default=200)
+
+# migration.file_migration: threads por fascículo e uso de hardlink
+# (no lugar da cópia) quando o storage é um sistema de arquivos
+MIGRATE_ISSUE_FILES_MAX_WORKERS = env.int("DJANGO_MIGRATE_ISSUE_FILES_MAX_WORKERS", default=4)
+MIGRATED_FILE_HARDLINK = env.bool("DJANGO_MIGRATED_FILE_HARDLINK", default=False)
+
+# Tempo (segundos) em que a instância de ClassicWebsite fica em cache no
+# processo; 0 desativa o cache
+CLASSIC_WEBSITE_CACHE_TIMEOUT = env.int("DJANGO_CLASSIC_WEBSITE_CACHE_TIMEOUT", default=600)
+
+# pid_provider.models.PidV3Pool: v3 reservados por consulta, tempo (segundos)
+# em que um v3 reservado pode ser usado pelo processo e idade (dias) das
+# reservas apagadas por task_prune_pid_v3_reservations
+PID_V3_RESERVATION_BATCH_SIZE = env.int("DJANGO_PID_V3_RESERVATION_BATCH_SIZE", default=50)
+PID_V3_RESERVATION_TTL = env.int("DJANGO_PID_V3_RESERVATION_TTL", default=3600)
+PID_V3_RESERVATION_RETENTION_DAYS = env.int(
+    "DJANGO_PID_V3_RESERVATION_RETENTION_DAYS", default=7
+)
+
+# proc.models.ArticleProc.migrate_articles: artigos cujos PIDs v3 são
+# solicitados ao Core em uma mesma requisição (pid_provider_batch);
+# 0 desativa o lote (um artigo por requisição)
+PID_PROVIDER_BATCH_SIZE = env.int("DJANGO_PID_PROVIDER_BATCH_SIZE", default=20)
+
+# package.models.generate_html_pages: threads que geram o HTML dos idiomas
+# de um artigo (1 = sequencial)
+HTML_GENERATION_MAX_WORKERS = env.int("DJANGO_HTML_GENERATION_MAX_WORKERS", default=2)
+
+# proc.tasks.task_publish_issue_articles: máximo de lotes de artigos
+# publicados em paralelo, por fascículo e por coleção; por coleção: "scl=8,spa=2"
+PUBLISH_ISSUE_ARTICLES_CONCURRENCY = env.int(
+    "DJANGO_PUBLISH_ISSUE_ARTICLES_CONCURRENCY", default=4
+)
+PUBLISH_ISSUE_ARTICLES_CONCURRENCY_BY_COLLECTION = env.dict(
+    "DJANGO_PUBLISH_ISSUE_ARTICLES_CONCURRENCY_BY_COLLECTION",
+    cast={"value": int},
+    default={},
+)
+# segundos somados ao time_limit da tarefa para a vaga de um lote expirar
+# (worker interrompido) e intervalo entre as tentativas de obter uma vaga
+PUBLISH_ISSUE_ARTICLES_SLOT_TIMEOUT_MARGIN = env.int(
+    "DJANGO_PUBLISH_ISSUE_ARTICLES_SLOT_TIMEOUT_MARGIN", default=60
+)
+PUBLISH_ISSUE_ARTICLES_SLOT_RETRY_DELAY = env.int(
+    "DJANGO_PUBLISH_ISSUE_ARTICLES_SLOT_RETRY_DELAY", default=30
+)
+
+# publication.api.publication.PublicationClient: validade (segundos) do token
+# em cache, se o website não informa expires_in
+PUBLICATION_API_TOKEN_TTL = env.int("DJANGO_PUBLICATION_API_TOKEN_TTL", default=3000)
+# requisições simultâneas de PublicationClient.post_many
+PUBLICATION_API_MAX_WORKERS = env.int("DJANGO_PUBLICATION_API_MAX_WORKERS", default=4)
+
+# pid_provider.tasks.task_load_records_from_counter_dict: páginas do OPAC
+# obtidas em paralelo e documentos carregados por subtarefa
+OPAC_HARVEST_MAX_PREFETCH = env.int("DJANGO_OPAC_HARVEST_MAX_PREFETCH", default=4)
+XML_URL_LOAD_CHUNK_SIZE = env.int("DJANGO_XML_URL_LOAD_CHUNK_SIZE", default=20)
+# pid_provider.tasks.task_load_records_from_xml_urls: tempo (segundos) por
+# documento do lote; o time_limit da subtarefa soma a margem a este tempo
+XML_URL_LOAD_SECONDS_PER_DOCUMENT = env.int(
+    "DJANGO_XML_URL_LOAD_SECONDS_PER_DOCUMENT", default=15
+)
+XML_URL_LOAD_TIME_LIMIT_MARGIN = env.int(
+    "DJANGO_XML_URL_LOAD_TIME_LIMIT_MARGIN", default=60
+)
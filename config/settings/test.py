@@ -28,3 +28,6 @@ EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# orçamentos de consultas (core.utils.query_budget) falham os testes
+QUERY_BUDGET_ENABLED = True
+QUERY_BUDGET_MODE = "raise"
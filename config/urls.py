@@ -11,6 +11,7 @@ from wagtail.documents import urls as wagtaildocs_urls
 from wagtailautocomplete.urls.admin import urlpatterns as autocomplete_admin_urls
 
 from core.api.wagtail.api import api_router
+from core.views import profiling_metrics
 
 from core.search import views as search_views  # noqa isort:skip
 
@@ -27,6 +28,8 @@ urlpatterns = [
     # Wagtail Admin
     path(settings.WAGTAIL_ADMIN_URL, include(wagtailadmin_urls)),
     re_path(r"^documents/", include(wagtaildocs_urls)),
+    # Métricas agregadas de profiling (formato Prometheus)
+    path("profiling/metrics/", profiling_metrics, name="profiling_metrics"),
     # API V1 endpoint to custom models
     path("api/v1/", include("config.api_router")),
     # Your stuff: custom urls includes go here
@@ -0,0 +1,78 @@
+"""
+Mede o custo por chamada dos decoradores de profiling_tools: sem profiling
+(PROFILING_ENABLED=False, a função é devolvida sem wrapper), com profiling e
+sem agregação e com profiling e agregação (profiling_metrics)
+
+python manage.py runscript bench_profiling_overhead --script-args 100000
+
+Os logs por chamada ficam desativados durante a medição, para que o custo
+medido seja o dos decoradores e não o do logging.
+"""
+
+import time
+from unittest.mock import patch
+
+from core.utils import profiling_tools
+from core.utils.profiling_metrics import MetricsRegistry
+
+
+def work(value):
+    return value + 1
+
+
+def decorate(decorator, enabled):
+    # PROFILING_ENABLED é consultado ao decorar; PROFILING_METRICS_ENABLED, a
+    # cada chamada
+    with patch.object(profiling_tools, "PROFILING_ENABLED", enabled):
+        return decorator(work)
+
+
+def measure(label, func, total, baseline=None):
+    started = time.perf_counter()
+    for i in range(total):
+        func(i)
+    elapsed = time.perf_counter() - started
+    per_call = elapsed * 1_000_000 / total
+    overhead = f" (+{per_call - baseline:.2f} µs)" if baseline is not None else ""
+    print(f"{label}: {total} chamadas, {per_call:.2f} µs/chamada{overhead}")
+    return per_call
+
+
+def run(total="100000"):
+    total = int(total)
+    registry = MetricsRegistry()
+    with patch.multiple(
+        profiling_tools,
+        PROFILING_LOG_ALL=False,
+        PROFILING_LOG_SLOW_REQUESTS=3600,
+        PROFILING_LOG_HIGH_MEMORY=10**6,
+        metrics_registry=registry,
+    ):
+        baseline = measure("sem decorador", work, total)
+        measure(
+            "PROFILING_ENABLED=False",
+            decorate(profiling_tools.profile_function, False),
+            total,
+            baseline,
+        )
+        for metrics_enabled in (False, True):
+            with patch.object(
+                profiling_tools, "PROFILING_METRICS_ENABLED", metrics_enabled
+            ):
+                for decorator in (
+                    profiling_tools.profile_function,
+                    profiling_tools.profile_property,
+                ):
+                    measure(
+                        f"{decorator.__name__} "
+                        f"PROFILING_METRICS_ENABLED={metrics_enabled}",
+                        decorate(decorator, True),
+                        total,
+                        baseline,
+                    )
+        measure(
+            "MetricsRegistry.record",
+            lambda i: registry.record("bench", 0.001, 0.1, 1),
+            total,
+        )
+    print(registry.snapshot().get(f"{__name__}.work"))
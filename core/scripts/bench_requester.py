@@ -0,0 +1,55 @@
+"""
+Compara o custo por chamada de requests.get (nova conexão a cada chamada)
+com fetch_data (sessão com conexões reaproveitadas) contra um servidor HTTP
+local com keep-alive
+
+python manage.py runscript bench_requester --script-args 500
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from core.utils import requester
+
+BODY = b'{"status": "ok"}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.send_header("ETag", '"bench"')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(label, func, total):
+    started = time.monotonic()
+    for _ in range(total):
+        func()
+    elapsed = time.monotonic() - started
+    print(f"{label}: {total} chamadas, {elapsed * 1000 / total:.3f} ms/chamada")
+
+
+def run(total=None):
+    total = int(total or 500)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}/api"
+    try:
+        measure("requests.get", lambda: requests.get(url, timeout=5).content, total)
+        measure("fetch_data", lambda: requester.fetch_data(url, timeout=5), total)
+        print(requester.get_stats())
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,6 +1,8 @@
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, Generator, Optional
+from typing import Any, Dict, Generator, List, Optional, Tuple
 from urllib.parse import urlencode
 
 from core.utils.requester import fetch_data
@@ -23,6 +25,7 @@ class OPACHarvester:
         limit: int = 100,
         timeout: int = 5,
         journal_acron: Optional[str] = None,
+        max_prefetch: int = 1,
     ):
         """
         Inicializa o harvester do OPAC.
@@ -35,6 +38,8 @@ class OPACHarvester:
             limit: Número de documentos por página
             timeout: Timeout em segundos para requisições
             journal_acron: Acrônimo do periódico para filtrar (ex: 'rsp')
+            max_prefetch: Máximo de páginas obtidas simultaneamente, à frente
+                da página em processamento
         """
         if not domain.startswith("http"):
             domain = f"http://{domain}"
@@ -45,6 +50,7 @@ class OPACHarvester:
         self.until_date = until_date or datetime.now(timezone.utc).isoformat()[:10]
         self.limit = limit
         self.timeout = timeout
+        self.max_prefetch = max(max_prefetch or 1, 1)
         self.base_url = (
             f"{self.domain}/api/v1/counter_dict?"
             f"end_date={self.until_date}&begin_date={self.from_date}"
@@ -71,30 +77,49 @@ class OPACHarvester:
                 - origin_date: Data de origem
                 - metadata: Metadados adicionais do documento
         """
-        page = 1
-        total_pages = 0
-
-        while True:
-            # Constrói URL
-            url = f"{self.base_url}&page={page}"
-
-            logger.info(f"Fetching OPAC documents from: {url}")
-            response = fetch_data(url, json=True, timeout=self.timeout)
-
-            total_pages = total_pages or response.get("pages") or 0
-            if not total_pages:
-                break
-            
-            documents = response.get("documents", {})
-            if not documents:
-                break
-
-            yield from documents.items()
-
-            page += 1
-            if total_pages and page > total_pages:
-                logger.info(f"Finish to process {total_pages}")
-                break
+        for documents in self.harvest_pages():
+            yield from documents
+
+    def fetch_page(self, page: int) -> Dict[str, Any]:
+        url = f"{self.base_url}&page={page}"
+        logger.info(f"Fetching OPAC documents from: {url}")
+        return fetch_data(url, json=True, timeout=self.timeout)
+
+    def harvest_pages(self) -> Generator[List[Tuple[str, Dict[str, Any]]], None, None]:
+        """
+        Função geradora que retorna, em ordem, os documentos de cada página
+        como lista de tuplas (pid_v3, item).
+
+        A primeira página informa o total de páginas; enquanto uma página é
+        processada por quem consome o gerador, até max_prefetch páginas
+        seguintes são obtidas em paralelo. Termina na primeira página sem
+        documentos.
+        """
+        response = self.fetch_page(1)
+        total_pages = response.get("pages") or 0
+        documents = response.get("documents") or {}
+        if not total_pages or not documents:
+            return
+
+        next_page = 2
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_prefetch) as executor:
+            try:
+                while True:
+                    while next_page <= total_pages and len(pending) < self.max_prefetch:
+                        pending.append(executor.submit(self.fetch_page, next_page))
+                        next_page += 1
+                    yield list(documents.items())
+
+                    if not pending:
+                        break
+                    documents = pending.popleft().result().get("documents") or {}
+                    if not documents:
+                        break
+            finally:
+                for future in pending:
+                    future.cancel()
+        logger.info(f"Finish to process {total_pages}")
 
     def format_raw(self, pid_v3, item):
         journal_acron = item.get("journal_acronym")
@@ -0,0 +1,345 @@
+"""
+Métricas agregadas dos decoradores de profiling_tools
+
+Cada processo (worker do gunicorn ou processo filho do Celery) mantém o seu
+próprio registro (registry) com, por função decorada: total de chamadas e de
+erros, histograma de duração, soma e máximo da variação de memória (RSS) e
+total de consultas ao banco de dados.
+
+O conteúdo é exportado no formato texto do Prometheus (to_prometheus) ou
+como dicionário (snapshot), com p50 e p95 estimados a partir do histograma.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+# limites superiores (segundos) das faixas do histograma de duração
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS_PREFIX = "scms_profiling"
+
+
+class CallableMetrics:
+    """
+    Métricas acumuladas de uma função decorada
+    """
+
+    __slots__ = (
+        "count",
+        "errors",
+        "duration_sum",
+        "duration_max",
+        "buckets",
+        "rss_delta_sum",
+        "rss_delta_max",
+        "queries_sum",
+    )
+
+    def __init__(self, total_buckets):
+        self.count = 0
+        self.errors = 0
+        self.duration_sum = 0.0
+        self.duration_max = 0.0
+        # contagem por faixa (não cumulativa); a última é +Inf
+        self.buckets = [0] * (total_buckets + 1)
+        self.rss_delta_sum = 0.0
+        self.rss_delta_max = 0.0
+        self.queries_sum = 0
+
+
+class MetricsRegistry:
+    """
+    Registro, por processo, das métricas das funções decoradas
+
+    O registro é zerado quando o processo muda (fork), para que os processos
+    filhos não herdem as métricas do processo pai.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            self._metrics = {}
+            self._pid = os.getpid()
+
+    def _get_bucket_index(self, duration):
+        for i, limit in enumerate(self.buckets):
+            if duration <= limit:
+                return i
+        return len(self.buckets)
+
+    def record(self, name, duration, rss_delta=0, queries=0, failed=False):
+        """
+        Acumula uma chamada de name
+
+        Parameters
+        ----------
+        name : str
+            identificação da função (módulo.nome qualificado)
+        duration : float
+            segundos
+        rss_delta : float
+            variação de memória (RSS) em MB
+        queries : int
+            consultas ao banco de dados
+        failed : bool
+            a chamada terminou com exceção
+        """
+        index = self._get_bucket_index(duration)
+        with self._lock:
+            self._check_pid()
+            try:
+                item = self._metrics[name]
+            except KeyError:
+                item = self._metrics[name] = CallableMetrics(len(self.buckets))
+            item.count += 1
+            if failed:
+                item.errors += 1
+            item.duration_sum += duration
+            if duration > item.duration_max:
+                item.duration_max = duration
+            item.buckets[index] += 1
+            item.rss_delta_sum += rss_delta
+            if rss_delta > item.rss_delta_max:
+                item.rss_delta_max = rss_delta
+            item.queries_sum += queries
+
+    def _copy(self):
+        with self._lock:
+            self._check_pid()
+            return {
+                name: (
+                    item.count,
+                    item.errors,
+                    item.duration_sum,
+                    item.duration_max,
+                    list(item.buckets),
+                    item.rss_delta_sum,
+                    item.rss_delta_max,
+                    item.queries_sum,
+                )
+                for name, item in self._metrics.items()
+            }
+
+    def quantile(self, q, buckets, duration_max):
+        """
+        Estima o quantil q (0 a 1) a partir das contagens por faixa,
+        interpolando linearmente dentro da faixa (como histogram_quantile do
+        Prometheus); na faixa +Inf usa a maior duração observada
+        """
+        total = sum(buckets)
+        if not total:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(buckets):
+            upper = self.buckets[i] if i < len(self.buckets) else duration_max
+            if count and cumulative + count >= rank:
+                upper = min(upper, duration_max)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return duration_max
+
+    def snapshot(self):
+        """
+        Retorna {nome: métricas} com médias, p50 e p95 calculados
+        """
+        data = {}
+        for name, values in self._copy().items():
+            (
+                count,
+                errors,
+                duration_sum,
+                duration_max,
+                buckets,
+                rss_delta_sum,
+                rss_delta_max,
+                queries_sum,
+            ) = values
+            data[name] = {
+                "count": count,
+                "errors": errors,
+                "duration_sum": round(duration_sum, 6),
+                "duration_avg": round(duration_sum / count, 6),
+                "duration_p50": round(self.quantile(0.5, buckets, duration_max), 6),
+                "duration_p95": round(self.quantile(0.95, buckets, duration_max), 6),
+                "duration_max": round(duration_max, 6),
+                "rss_delta_sum": round(rss_delta_sum, 3),
+                "rss_delta_max": round(rss_delta_max, 3),
+                "queries_sum": queries_sum,
+                "queries_avg": round(queries_sum / count, 3),
+            }
+        return data
+
+    def to_prometheus(self, prefix=METRICS_PREFIX):
+        """
+        Retorna as métricas no formato texto de exposição do Prometheus
+        """
+        items = sorted(self._copy().items())
+        pid = str(self._pid)
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def labels(callable_name, **extra):
+            values = {"callable": callable_name, "pid": pid, **extra}
+            return ",".join(
+                f'{key}="{escape_label_value(value)}"' for key, value in values.items()
+            )
+
+        family("calls_total", "counter", "Total de chamadas")
+        for name, values in items:
+            lines.append(f"{prefix}_calls_total{{{labels(name)}}} {values[0]}")
+
+        family("errors_total", "counter", "Total de chamadas com exceção")
+        for name, values in items:
+            lines.append(f"{prefix}_errors_total{{{labels(name)}}} {values[1]}")
+
+        family("duration_seconds", "histogram", "Duração das chamadas")
+        for name, values in items:
+            cumulative = 0
+            for i, count in enumerate(values[4]):
+                cumulative += count
+                le = format_bound(self.buckets[i]) if i < len(self.buckets) else "+Inf"
+                lines.append(
+                    f"{prefix}_duration_seconds_bucket{{{labels(name, le=le)}}} "
+                    f"{cumulative}"
+                )
+            lines.append(
+                f"{prefix}_duration_seconds_sum{{{labels(name)}}} {values[2]:.6f}"
+            )
+            lines.append(f"{prefix}_duration_seconds_count{{{labels(name)}}} {values[0]}")
+
+        family(
+            "rss_delta_megabytes_sum", "gauge", "Soma da variação de memória (RSS)"
+        )
+        for name, values in items:
+            lines.append(
+                f"{prefix}_rss_delta_megabytes_sum{{{labels(name)}}} {values[5]:.3f}"
+            )
+
+        family(
+            "rss_delta_megabytes_max", "gauge", "Maior variação de memória (RSS)"
+        )
+        for name, values in items:
+            lines.append(
+                f"{prefix}_rss_delta_megabytes_max{{{labels(name)}}} {values[6]:.3f}"
+            )
+
+        family("queries_total", "counter", "Total de consultas ao banco de dados")
+        for name, values in items:
+            lines.append(f"{prefix}_queries_total{{{labels(name)}}} {values[7]}")
+
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._metrics = {}
+
+    @property
+    def stats(self):
+        with self._lock:
+            self._check_pid()
+            return {
+                "callables": len(self._metrics),
+                "calls": sum(item.count for item in self._metrics.values()),
+            }
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_bound(value):
+    return repr(float(value))
+
+
+def write_textfile(path, content):
+    """
+    Grava content em path de forma atômica (arquivo temporário + rename),
+    como esperado pelo textfile collector do node_exporter
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".metrics.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "w") as fp:
+            fp.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class PeriodicDump:
+    """
+    Grava periodicamente, em uma thread do próprio processo, as métricas do
+    registro no log (JSON) e, se informado, em um arquivo .prom por processo
+    """
+
+    def __init__(self, registry, interval, logger, folder=None, name="celery"):
+        self.registry = registry
+        self.interval = interval
+        self.logger = logger
+        self.folder = folder
+        self.name = name
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def path(self):
+        if self.folder:
+            return os.path.join(self.folder, f"{self.name}-{os.getpid()}.prom")
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="profiling-metrics-dump", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def stop(self):
+        self._stop.set()
+        self.dump()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def dump(self):
+        try:
+            snapshot = self.registry.snapshot()
+            if not snapshot:
+                return
+            self.logger.warning(
+                f"metrics | pid: {os.getpid()} | "
+                f"{json.dumps(snapshot, sort_keys=True)}"
+            )
+            if self.path:
+                write_textfile(self.path, self.registry.to_prometheus())
+        except Exception as e:
+            self.logger.error(f"Unable to dump profiling metrics: {e}")
+
+
+registry = MetricsRegistry()
+
+
+def metrics_stats():
+    return registry.stats
@@ -7,6 +7,10 @@ import time
 import psutil
 from django.conf import settings
 from django.db import connection
+from django.utils.module_loading import import_string
+
+from core.utils.profiling_metrics import registry as metrics_registry
+from core.utils.query_budget import QueryCounter
 
 # Ativa/desativa profiling via settings
 PROFILING_ENABLED = getattr(settings, "PROFILING_ENABLED", False)
@@ -15,12 +19,65 @@ PROFILING_LOG_SLOW_REQUESTS = getattr(
     settings, "PROFILING_LOG_SLOW_REQUESTS", 0.4
 )  # segundos
 PROFILING_LOG_HIGH_MEMORY = getattr(settings, "PROFILING_LOG_HIGH_MEMORY", 40)  # MB
+# agrega duração, memória e consultas por função decorada (profiling_metrics)
+PROFILING_METRICS_ENABLED = getattr(settings, "PROFILING_METRICS_ENABLED", True)
+# funções que retornam estatísticas dos caches por processo
+PROFILING_CACHE_STATS = getattr(
+    settings,
+    "PROFILING_CACHE_STATS",
+    [
+        "core.utils.xml_cache.cache_stats",
+        "migration.cache.cache_stats",
+        "pid_provider.models.cache_stats",
+        "core.utils.profiling_metrics.metrics_stats",
+        "publication.api.publication.cache_stats",
+    ],
+)
 
 profiling_logger = logging.getLogger("profiling")
 profiling_logger.warning(f"PROFILING_ENABLED={PROFILING_ENABLED}")
 profiling_logger.warning(f"PROFILING_LOG_ALL={PROFILING_LOG_ALL}")
 profiling_logger.warning(f"PROFILING_LOG_SLOW_REQUESTS={PROFILING_LOG_SLOW_REQUESTS}")
 profiling_logger.warning(f"PROFILING_LOG_HIGH_MEMORY={PROFILING_LOG_HIGH_MEMORY}")
+profiling_logger.warning(f"PROFILING_METRICS_ENABLED={PROFILING_METRICS_ENABLED}")
+
+
+def get_metric_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def record_metrics(name, duration, memory_used=0, queries_count=0, failed=False):
+    """
+    Acumula a chamada no registro de métricas do processo
+    """
+    if PROFILING_METRICS_ENABLED:
+        metrics_registry.record(name, duration, memory_used, queries_count, failed)
+
+
+def count_queries():
+    """
+    Conta as consultas do bloco com connection.execute_wrapper, que, ao
+    contrário de connection.queries, não depende de DEBUG
+    Uso:
+        with count_queries() as query_counter:
+            result = func()
+        query_counter.total
+    """
+    return QueryCounter(track_shapes=False)
+
+
+def get_cache_stats():
+    """
+    Retorna {nome do módulo: estatísticas} dos caches de PROFILING_CACHE_STATS
+    """
+    stats = {}
+    for path in PROFILING_CACHE_STATS:
+        name = path.rsplit(".", 1)[0]
+        try:
+            stats[name] = import_string(path)()
+        except Exception as e:
+            stats[name] = {"error": str(e)}
+    return stats
 
 
 def profile_endpoint(func):
@@ -31,6 +88,8 @@ def profile_endpoint(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(self, request, *args, **kwargs):
         # Dados iniciais
@@ -41,7 +100,8 @@ def profile_endpoint(func):
 
         try:
             # Executa função original
-            response = func(self, request, *args, **kwargs)
+            with count_queries() as query_counter:
+                response = func(self, request, *args, **kwargs)
 
             # Coleta métricas finais
             end_time = time.time()
@@ -51,7 +111,8 @@ def profile_endpoint(func):
             # Calcula diferenças
             duration = end_time - start_time
             memory_used = end_memory - start_memory
-            queries_count = end_queries - start_queries
+            queries_count = query_counter.total
+            record_metrics(metric_name, duration, memory_used, queries_count)
 
             msg = (
                 f"request detected | "
@@ -94,6 +155,7 @@ def profile_endpoint(func):
         except Exception as e:
             # Log erro mas não interfere
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Request failed | endpoint: {request.path} | "
                 f"duration: {duration:.2f}s | error: {str(e)}"
@@ -110,6 +172,8 @@ def profile_classmethod(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(cls, *args, **kwargs):
         # Extrai informações específicas para PidProviderXML.register
@@ -138,15 +202,16 @@ def profile_classmethod(func):
         process = psutil.Process()
         start_time = time.time()
         start_memory = process.memory_info().rss / 1024 / 1024
-        start_queries = len(connection.queries)
 
         try:
-            result = func(cls, *args, **kwargs)
+            with count_queries() as query_counter:
+                result = func(cls, *args, **kwargs)
 
             # Métricas
             duration = time.time() - start_time
             memory_used = process.memory_info().rss / 1024 / 1024 - start_memory
-            queries_count = len(connection.queries) - start_queries
+            queries_count = query_counter.total
+            record_metrics(metric_name, duration, memory_used, queries_count)
 
             # Log
             msg = (
@@ -168,6 +233,7 @@ def profile_classmethod(func):
 
         except Exception as e:
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Classmethod failed | "
                 f"{method_info['class']}.{method_info['method']} | "
@@ -188,6 +254,8 @@ def profile_method(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         # Informações do método
@@ -204,12 +272,14 @@ def profile_method(func):
         start_queries = len(connection.queries)
 
         try:
-            result = func(self, *args, **kwargs)
+            with count_queries() as query_counter:
+                result = func(self, *args, **kwargs)
 
             # Métricas
             duration = time.time() - start_time
             memory_used = process.memory_info().rss / 1024 / 1024 - start_memory
-            queries_count = len(connection.queries) - start_queries
+            queries_count = query_counter.total
+            record_metrics(metric_name, duration, memory_used, queries_count)
 
             # Log
             msg = (
@@ -229,9 +299,7 @@ def profile_method(func):
                 # Log queries lentas se muito devagar
                 if duration > PROFILING_LOG_SLOW_REQUESTS * 2 and queries_count > 0:
                     slow_queries = sorted(
-                        connection.queries[
-                            start_queries : start_queries + queries_count
-                        ],
+                        connection.queries[start_queries:],
                         key=lambda x: float(x.get("time", 0)),
                         reverse=True,
                     )[:3]
@@ -247,6 +315,7 @@ def profile_method(func):
 
         except Exception as e:
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Method failed | "
                 f"{method_info['class']}.{method_info['method']} | "
@@ -270,6 +339,8 @@ def profile_property(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(self):
         # Informações da property
@@ -281,14 +352,15 @@ def profile_property(func):
 
         # Profiling leve para properties (sem psutil a cada chamada)
         start_time = time.time()
-        start_queries = len(connection.queries)
 
         try:
-            result = func(self)
+            with count_queries() as query_counter:
+                result = func(self)
 
             # Métricas
             duration = time.time() - start_time
-            queries_count = len(connection.queries) - start_queries
+            queries_count = query_counter.total
+            record_metrics(metric_name, duration, queries_count=queries_count)
 
             # Log apenas se lento (properties devem ser rápidas)
             if (
@@ -312,6 +384,7 @@ def profile_property(func):
 
         except Exception as e:
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Property failed | "
                 f"{prop_info['class']}.{prop_info['property']} | "
@@ -337,6 +410,8 @@ def profile_cached_property(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(self):
         # Verifica se já está em cache
@@ -355,14 +430,15 @@ def profile_cached_property(func):
             return func(self)
 
         start_time = time.time()
-        start_queries = len(connection.queries) if not is_cached else 0
 
         try:
-            result = func(self)
+            with count_queries() as query_counter:
+                result = func(self)
 
             if not is_cached:  # Log apenas no primeiro cálculo
                 duration = time.time() - start_time
-                queries_count = len(connection.queries) - start_queries
+                queries_count = query_counter.total
+                record_metrics(metric_name, duration, queries_count=queries_count)
 
                 msg = (
                     f"cached_property (first call) | "
@@ -381,6 +457,7 @@ def profile_cached_property(func):
 
         except Exception as e:
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Cached property failed | "
                 f"{prop_info['class']}.{prop_info['property']} | "
@@ -403,6 +480,8 @@ def profile_function(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Informações da função
@@ -430,12 +509,14 @@ def profile_function(func):
         start_queries = len(connection.queries)
 
         try:
-            result = func(*args, **kwargs)
+            with count_queries() as query_counter:
+                result = func(*args, **kwargs)
 
             # Métricas
             duration = time.time() - start_time
             memory_used = process.memory_info().rss / 1024 / 1024 - start_memory
-            queries_count = len(connection.queries) - start_queries
+            queries_count = query_counter.total
+            record_metrics(metric_name, duration, memory_used, queries_count)
 
             # Informações adicionais sobre o resultado
             result_info = ""
@@ -472,9 +553,7 @@ def profile_function(func):
                 # Log queries lentas
                 if duration > PROFILING_LOG_SLOW_REQUESTS * 2 and queries_count > 0:
                     slow_queries = sorted(
-                        connection.queries[
-                            start_queries : start_queries + queries_count
-                        ],
+                        connection.queries[start_queries:],
                         key=lambda x: float(x.get("time", 0)),
                         reverse=True,
                     )[:3]
@@ -490,6 +569,7 @@ def profile_function(func):
 
         except Exception as e:
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Function failed | "
                 f"{func_info['module']}.{func_info['function']} | "
@@ -514,6 +594,8 @@ def profile_staticmethod(func):
     if not PROFILING_ENABLED:
         return func
 
+    metric_name = get_metric_name(func)
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Para staticmethod, não temos self/cls
@@ -522,14 +604,15 @@ def profile_staticmethod(func):
         process = psutil.Process()
         start_time = time.time()
         start_memory = process.memory_info().rss / 1024 / 1024
-        start_queries = len(connection.queries)
 
         try:
-            result = func(*args, **kwargs)
+            with count_queries() as query_counter:
+                result = func(*args, **kwargs)
 
             duration = time.time() - start_time
             memory_used = process.memory_info().rss / 1024 / 1024 - start_memory
-            queries_count = len(connection.queries) - start_queries
+            queries_count = query_counter.total
+            record_metrics(metric_name, duration, memory_used, queries_count)
 
             msg = (
                 f"staticmethod | "
@@ -550,6 +633,7 @@ def profile_staticmethod(func):
 
         except Exception as e:
             duration = time.time() - start_time
+            record_metrics(metric_name, duration, failed=True)
             profiling_logger.error(
                 f"Staticmethod failed | "
                 f"{method_info['module']}.{method_info['function']} | "
@@ -561,6 +645,16 @@ def profile_staticmethod(func):
     return wrapper
 
 
+def get_request_metric_name(request):
+    """
+    Identifica a requisição pela view (e não pelo path), para que o número
+    de séries das métricas não cresça com cada URL acessada
+    """
+    match = getattr(request, "resolver_match", None)
+    view_name = match and (match.view_name or match._func_path)
+    return f"{request.method} {view_name or 'unresolved'}"
+
+
 # middleware.py - Alternativa ao decorador
 class LightweightProfilingMiddleware:
     """
@@ -583,17 +677,28 @@ class LightweightProfilingMiddleware:
         start_time = time.time()
         start_memory = self.process.memory_info().rss / 1024 / 1024
 
-        response = self.get_response(request)
+        with count_queries() as query_counter:
+            response = self.get_response(request)
 
         duration = time.time() - start_time
         memory_delta = self.process.memory_info().rss / 1024 / 1024 - start_memory
+        record_metrics(
+            get_request_metric_name(request),
+            duration,
+            memory_delta,
+            query_counter.total,
+            failed=response.status_code >= 500,
+        )
 
         # Log apenas requisições problemáticas
         if duration > PROFILING_LOG_SLOW_REQUESTS:
             profiling_logger.warning(
                 f"Slow: {request.method} {request.path} - "
-                f"{duration:.2f}s - {memory_delta:+.1f}MB"
+                f"{duration:.2f}s - {memory_delta:+.1f}MB - "
+                f"caches: {get_cache_stats()}"
             )
+        elif PROFILING_LOG_ALL:
+            profiling_logger.info(f"caches: {get_cache_stats()}")
 
         return response
 
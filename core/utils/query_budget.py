@@ -0,0 +1,309 @@
+"""
+Orçamento de consultas SQL por tarefa Celery, por requisição ou por trecho
+de código
+
+As consultas são contadas com connection.execute_wrapper (não dependem de
+DEBUG) e agrupadas pelo "formato" do SQL (parâmetros e listas IN/VALUES
+normalizados). Um mesmo formato repetido muitas vezes indica N+1.
+
+Uso:
+    with query_budget("migrate_document_records", max_queries=200):
+        issue_proc.migrate_document_records(user)
+
+    @celery_app.task(bind=True)
+    @task_query_budget(max_queries=50, max_repeated=5)
+    def task_xxx(self, ...):
+        ...
+
+Excedido o orçamento, registra no log "profiling" (QUERY_BUDGET_MODE="log")
+ou levanta QueryBudgetExceeded (QUERY_BUDGET_MODE="raise", usado nos testes).
+"""
+
+import functools
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+QUERY_BUDGET_MODE_LOG = "log"
+QUERY_BUDGET_MODE_RAISE = "raise"
+
+# quantos formatos de SQL repetidos aparecem na mensagem
+REPORTED_SHAPES = 3
+
+profiling_logger = logging.getLogger("profiling")
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)+\s*\)")
+REPEATED_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+
+class QueryBudgetExceeded(Exception): ...
+
+
+def get_sql_shape(sql):
+    """
+    Normaliza sql para que consultas que diferem somente nos valores
+    tenham o mesmo formato
+    """
+    sql = STRING_LITERAL.sub("%s", sql)
+    sql = NUMBER_LITERAL.sub("%s", sql)
+    sql = PLACEHOLDER_LIST.sub("(%s, ...)", sql)
+    return REPEATED_GROUPS.sub(r"\1, ...", sql)
+
+
+def get_budget_settings():
+    return {
+        "enabled": getattr(settings, "QUERY_BUDGET_ENABLED", False),
+        "max_queries": getattr(settings, "QUERY_BUDGET_MAX_QUERIES", 0) or None,
+        "max_repeated": getattr(settings, "QUERY_BUDGET_MAX_REPEATED", 0) or None,
+        "mode": getattr(settings, "QUERY_BUDGET_MODE", QUERY_BUDGET_MODE_LOG),
+    }
+
+
+class QueryCounter:
+    """
+    Conta, enquanto ativo, as consultas executadas na conexão using
+
+    Com track_shapes=False, somente total e duration (sem normalizar o SQL)
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, track_shapes=True):
+        self.using = using
+        self.track_shapes = track_shapes
+        self.total = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.total += 1
+            if self.track_shapes:
+                self.shapes[get_sql_shape(sql)] += 1
+
+    def start(self):
+        connections[self.using].execute_wrappers.append(self)
+        return self
+
+    def stop(self):
+        wrappers = connections[self.using].execute_wrappers
+        if self in wrappers:
+            wrappers.remove(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def repeated(self, min_total):
+        """
+        Formatos de SQL executados min_total vezes ou mais
+        """
+        return [
+            (shape, total)
+            for shape, total in self.shapes.most_common()
+            if total >= min_total
+        ]
+
+
+class QueryBudget:
+    """
+    Verifica, ao final do bloco, se o total de consultas e as repetições de
+    um mesmo formato de SQL estão dentro do orçamento
+
+    Parameters
+    ----------
+    name : str
+        identificação do bloco (tarefa, view, função)
+    max_queries : int
+        total de consultas permitido (None: sem limite)
+    max_repeated : int
+        repetições permitidas de um mesmo formato de SQL (None: sem limite)
+    mode : str
+        QUERY_BUDGET_MODE_LOG ou QUERY_BUDGET_MODE_RAISE
+        (padrão: QUERY_BUDGET_MODE)
+    """
+
+    def __init__(
+        self,
+        name,
+        max_queries=None,
+        max_repeated=None,
+        mode=None,
+        using=DEFAULT_DB_ALIAS,
+    ):
+        self.name = name
+        self.max_queries = max_queries
+        self.max_repeated = max_repeated
+        self.mode = mode or get_budget_settings()["mode"]
+        self.counter = QueryCounter(using)
+
+    def __enter__(self):
+        self.counter.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.counter.stop()
+        # não encobre a exceção do bloco
+        if exc_type is None:
+            self.check()
+
+    @property
+    def total(self):
+        return self.counter.total
+
+    @property
+    def stats(self):
+        return {
+            "queries": self.counter.total,
+            "duration": round(self.counter.duration, 6),
+            "shapes": len(self.counter.shapes),
+        }
+
+    def violations(self):
+        items = []
+        if self.max_queries is not None and self.counter.total > self.max_queries:
+            items.append(f"queries: {self.counter.total} > {self.max_queries}")
+        if self.max_repeated is not None:
+            repeated = self.counter.repeated(self.max_repeated + 1)
+            for shape, total in repeated[:REPORTED_SHAPES]:
+                items.append(
+                    f"possible N+1: {total} x {shape[:200]} > {self.max_repeated}"
+                )
+        return items
+
+    def check(self):
+        violations = self.violations()
+        if not violations:
+            return
+        msg = (
+            f"Query budget exceeded | {self.name} | "
+            f"queries: {self.counter.total} | "
+            f"duration: {self.counter.duration:.2f}s | " + " | ".join(violations)
+        )
+        if self.mode == QUERY_BUDGET_MODE_RAISE:
+            raise QueryBudgetExceeded(msg)
+        profiling_logger.warning(msg)
+
+
+def query_budget(name, max_queries=None, max_repeated=None, mode=None, using=DEFAULT_DB_ALIAS):
+    """
+    Context manager que aplica o orçamento de consultas ao bloco
+    """
+    return QueryBudget(name, max_queries, max_repeated, mode, using)
+
+
+def task_query_budget(max_queries=None, max_repeated=None, mode=None):
+    """
+    Decorador que aplica o orçamento de consultas a cada execução da tarefa
+    (ou de qualquer função); inativo se QUERY_BUDGET_ENABLED=False
+
+    Os limites não informados são os de QUERY_BUDGET_MAX_QUERIES e
+    QUERY_BUDGET_MAX_REPEATED.
+    """
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            budget_settings = get_budget_settings()
+            if not budget_settings["enabled"]:
+                return func(*args, **kwargs)
+            with QueryBudget(
+                name,
+                max_queries or budget_settings["max_queries"],
+                max_repeated or budget_settings["max_repeated"],
+                mode,
+            ):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    """
+    Aplica QUERY_BUDGET_MAX_QUERIES e QUERY_BUDGET_MAX_REPEATED a cada
+    requisição; inativo se QUERY_BUDGET_ENABLED=False
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget_settings = get_budget_settings()
+        if not budget_settings["enabled"]:
+            return self.get_response(request)
+
+        budget = QueryBudget(
+            request.path,
+            budget_settings["max_queries"],
+            budget_settings["max_repeated"],
+        )
+        with budget:
+            response = self.get_response(request)
+            # identifica pela view, resolvida durante get_response
+            match = getattr(request, "resolver_match", None)
+            if match and match.view_name:
+                budget.name = f"{request.method} {match.view_name} ({request.path})"
+        return response
+
+
+# orçamentos das tarefas em execução, por task_id (sinais do Celery)
+_running_task_budgets = {}
+
+
+def start_task_budget(task_id, task_name):
+    budget_settings = get_budget_settings()
+    if not budget_settings["enabled"]:
+        return
+    budget = QueryBudget(
+        task_name,
+        budget_settings["max_queries"],
+        budget_settings["max_repeated"],
+        # exceções nos sinais não interrompem a tarefa; somente registra
+        QUERY_BUDGET_MODE_LOG,
+    )
+    _running_task_budgets[task_id] = budget.__enter__()
+
+
+def finish_task_budget(task_id):
+    budget = _running_task_budgets.pop(task_id, None)
+    if budget:
+        budget.__exit__(None, None, None)
+
+
+class QueryBudgetTestMixin:
+    """
+    Mixin para TestCase
+    Uso:
+        with self.assertQueryBudget(max_queries=3, max_repeated=1):
+            list(sps_pkg.pdfs)
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=None, max_repeated=None, using=DEFAULT_DB_ALIAS):
+        budget = QueryBudget(
+            self.id(), max_queries, max_repeated, QUERY_BUDGET_MODE_RAISE, using
+        )
+        budget.counter.start()
+        try:
+            yield budget
+        finally:
+            budget.counter.stop()
+        try:
+            budget.check()
+        except QueryBudgetExceeded as e:
+            self.fail(str(e))
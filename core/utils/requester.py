@@ -1,7 +1,16 @@
+import json as jsonlib
 import logging
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlencode, urlsplit
 
 import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -12,6 +21,12 @@ from urllib3.util import Retry
 
 logger = logging.getLogger(__name__)
 
+HTTP_POOL_CONNECTIONS = getattr(settings, "HTTP_POOL_CONNECTIONS", 4)
+HTTP_POOL_MAXSIZE = getattr(settings, "HTTP_POOL_MAXSIZE", 10)
+HTTP_CONDITIONAL_CACHE_MAX_ITEMS = getattr(
+    settings, "HTTP_CONDITIONAL_CACHE_MAX_ITEMS", 128
+)
+
 
 class RetryableError(Exception):
     """Recoverable error without having to modify the data state on the client
@@ -25,6 +40,178 @@ class NonRetryableError(Exception):
     """
 
 
+class SessionPool:
+    """
+    Uma requests.Session por host (scheme + netloc) e por processo
+
+    As conexões ficam abertas (keep-alive) e são reaproveitadas pelas
+    chamadas seguintes ao mesmo host. As tentativas ficam a cargo de
+    tenacity (post_data e fetch_data), por isso o adapter não repete
+    requisições (Retry(0, read=False), o padrão de requests).
+
+    As sessões são compartilhadas por chamadores diferentes e, por isso,
+    não guardam cookies (os informados na requisição continuam valendo).
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None):
+        self.pool_connections = pool_connections or HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or HTTP_POOL_MAXSIZE
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._sessions = {}
+        self._latency = {}
+
+    def _create_session(self):
+        session = requests.Session()
+        # recusa os cookies das respostas: não passam de um chamador a outro
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=Retry(0, read=False),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_session(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if self._pid != os.getpid():
+                # processo filho (fork, ex.: workers do celery):
+                # não compartilha os sockets do processo pai
+                self._pid = os.getpid()
+                self._sessions = {}
+                self._latency = {}
+            try:
+                return self._sessions[host]
+            except KeyError:
+                session = self._sessions[host] = self._create_session()
+                return session
+
+    def add_latency(self, url, elapsed):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            item = self._latency.setdefault(
+                host, {"requests": 0, "total_time": 0.0, "max_time": 0.0}
+            )
+            item["requests"] += 1
+            item["total_time"] += elapsed
+            item["max_time"] = max(item["max_time"], elapsed)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._latency = {}
+
+    @property
+    def stats(self):
+        """
+        Por host: requisições, conexões abertas, conexões reaproveitadas
+        e latência (segundos)
+        """
+        data = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                connections = 0
+                pool_requests = 0
+                adapter = session.get_adapter(host)
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool:
+                        connections += pool.num_connections
+                        pool_requests += pool.num_requests
+                latency = self._latency.get(host) or {}
+                total = latency.get("requests") or 0
+                data[host] = {
+                    "requests": total,
+                    "connections": connections,
+                    "reused_connections": max(pool_requests - connections, 0),
+                    "avg_time": (
+                        round(latency["total_time"] / total, 6) if total else 0
+                    ),
+                    "max_time": round(latency.get("max_time") or 0, 6),
+                }
+        return data
+
+
+session_pool = SessionPool()
+
+
+def get_session(url):
+    return session_pool.get_session(url)
+
+
+def get_stats():
+    return session_pool.stats
+
+
+class ConditionalGetCache:
+    """
+    Guarda, para GET idempotentes, o conteúdo e os validadores
+    (ETag / Last-Modified) da última resposta, para que a próxima requisição
+    seja condicional e uma resposta 304 reaproveite o conteúdo
+    """
+
+    def __init__(self, max_items=None):
+        self.max_items = max_items or HTTP_CONDITIONAL_CACHE_MAX_ITEMS
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    @staticmethod
+    def get_key(url, params):
+        if not params:
+            return url
+        return f"{url}?{urlencode(sorted(dict(params).items()))}"
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item:
+                self._items.move_to_end(key)
+            return item
+
+    def get_headers(self, key):
+        item = self.get(key)
+        headers = {}
+        if not item:
+            return headers
+        if item.get("etag"):
+            headers["If-None-Match"] = item["etag"]
+        if item.get("last_modified"):
+            headers["If-Modified-Since"] = item["last_modified"]
+        return headers
+
+    def put(self, key, response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._items[key] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content": response.content,
+            }
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+
+
+conditional_get_cache = ConditionalGetCache()
+
+
 def _add_param(params, name, value):
     if value:
         params[name] = value
@@ -70,7 +257,9 @@ def post_data(
         params = _add_param(params, "auth", auth)
         params = _add_param(params, "files", files)
         params = _add_param(params, "data", data)
-        response = requests.post(url, **params)
+        started = time.monotonic()
+        response = get_session(url).post(url, **params)
+        session_pool.add_latency(url, time.monotonic() - started)
     except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
         logger.error(
             "Erro posting data (timeout=%s): %s, retry..., erro: %s"
@@ -120,7 +309,15 @@ def is_http_error_json_response(json, response):
     wait=wait_exponential(multiplier=1, min=1, max=5),
     stop=stop_after_attempt(5),
 )
-def fetch_data(url, params=None, headers=None, json=False, timeout=2, verify=True):
+def fetch_data(
+    url,
+    params=None,
+    headers=None,
+    json=False,
+    timeout=2,
+    verify=True,
+    conditional=False,
+):
     """
     Get the resource with HTTP
     Retry: Wait 2^x * 1 second between each retry starting with 4 seconds,
@@ -130,16 +327,24 @@ def fetch_data(url, params=None, headers=None, json=False, timeout=2, verify=Tru
         headers: HTTP headers
         json: True|False
         verify: Verify the SSL.
+        conditional: True para reaproveitar o conteúdo obtido anteriormente
+            se o servidor responder 304 (Not Modified)
     Returns:
         Return a requests.response object.
     Except:
         Raise a RetryableError to retry.
     """
+    cache_key = None
+    if conditional:
+        cache_key = ConditionalGetCache.get_key(url, params)
+        headers = {**conditional_get_cache.get_headers(cache_key), **(headers or {})}
 
     try:
-        response = requests.get(
+        started = time.monotonic()
+        response = get_session(url).get(
             url, params=params, headers=headers, timeout=timeout, verify=verify
         )
+        session_pool.add_latency(url, time.monotonic() - started)
     except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
         logger.error("Erro fetching the content: %s, retry..., erro: %s" % (url, exc))
         raise RetryableError(exc) from exc
@@ -161,11 +366,22 @@ def fetch_data(url, params=None, headers=None, json=False, timeout=2, verify=Tru
         else:
             raise
 
+    content = response.content
+    if cache_key:
+        cached = response.status_code == 304 and conditional_get_cache.get(cache_key)
+        if cached:
+            conditional_get_cache.hits += 1
+            content = cached["content"]
+        else:
+            conditional_get_cache.put(cache_key, response)
+
     if not json:
-        return response.content
+        return content
 
     try:
-        return response.json()
+        if content is response.content:
+            return response.json()
+        return jsonlib.loads(content)
     except ValueError as exc:
         raise NonRetryableError(
             "Invalid JSON response (status=%s, length=%s) from %s: %s"
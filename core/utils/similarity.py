@@ -7,3 +7,14 @@ def is_similar(str1, str2, min_ratio=0.7):
 
 def how_similar(str1, str2):
     return SequenceMatcher(None, str1, str2).ratio()
+
+
+def get_title_tokens(titles):
+    """
+    Retorna as palavras (sem repetição e ordenadas) dos títulos
+    separadas por espaço
+    """
+    words = set()
+    for item in titles or []:
+        words.update(item.split())
+    return " ".join(sorted(words))
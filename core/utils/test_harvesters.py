@@ -1,3 +1,5 @@
+import threading
+import time
 from unittest import TestCase
 from unittest.mock import patch
 
@@ -281,4 +283,77 @@ class ParseGmtDateTest(TestCase):
         self.assertIsNone(self.harvester._parse_gmt_date(""))
 
     def test_returns_none_for_invalid_format(self):
-        self.assertIsNone(self.harvester._parse_gmt_date("2024-01-15"))
\ No newline at end of file
+        self.assertIsNone(self.harvester._parse_gmt_date("2024-01-15"))
+
+
+# ---------------------------------------------------------------------------
+# harvest_pages
+# ---------------------------------------------------------------------------
+
+class HarvestPagesTest(TestCase):
+    """Testa a obtenção antecipada (prefetch) das páginas."""
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.pages = []
+
+    def fake_fetch(self, total_pages, empty_pages=()):
+        def fetch(url, json=True, timeout=None):
+            page = int(url.rsplit("page=", 1)[1])
+            with self.lock:
+                self.pages.append(page)
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.01)
+            with self.lock:
+                self.active -= 1
+            documents = {} if page in empty_pages else {f"pid{page}": ITEM_JTEST}
+            return {"pages": total_pages, "documents": documents}
+
+        return fetch
+
+    @patch("core.utils.harvesters.fetch_data")
+    def test_pages_are_yielded_in_order(self, mock_fetch):
+        mock_fetch.side_effect = self.fake_fetch(8)
+        harvester = _make_harvester(max_prefetch=3)
+
+        pages = list(harvester.harvest_pages())
+
+        self.assertEqual(
+            [[(f"pid{page}", ITEM_JTEST)] for page in range(1, 9)], pages
+        )
+        self.assertEqual(list(range(1, 9)), sorted(self.pages))
+
+    @patch("core.utils.harvesters.fetch_data")
+    def test_prefetch_is_bounded(self, mock_fetch):
+        mock_fetch.side_effect = self.fake_fetch(20)
+        harvester = _make_harvester(max_prefetch=3)
+
+        for page in harvester.harvest_pages():
+            time.sleep(0.02)
+
+        self.assertGreater(self.max_active, 1)
+        self.assertLessEqual(self.max_active, 3)
+
+    @patch("core.utils.harvesters.fetch_data")
+    def test_stops_at_first_empty_page(self, mock_fetch):
+        mock_fetch.side_effect = self.fake_fetch(10, empty_pages=(3,))
+        harvester = _make_harvester(max_prefetch=2)
+
+        pages = list(harvester.harvest_pages())
+
+        self.assertEqual(2, len(pages))
+        self.assertLessEqual(max(self.pages), 5)
+
+    @patch("core.utils.harvesters.fetch_data")
+    def test_closing_the_generator_cancels_pending_pages(self, mock_fetch):
+        mock_fetch.side_effect = self.fake_fetch(50)
+        harvester = _make_harvester(max_prefetch=4)
+
+        pages = harvester.harvest_pages()
+        next(pages)
+        pages.close()
+
+        self.assertLessEqual(len(self.pages), 5)
@@ -0,0 +1,94 @@
+import logging
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from core.utils.profiling_metrics import MetricsRegistry, PeriodicDump
+
+
+class MetricsRegistryTest(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.1, 1, 10))
+
+    def test_record_accumulates_per_callable(self):
+        self.registry.record("a.f", 0.05, rss_delta=2, queries=3)
+        self.registry.record("a.f", 0.5, rss_delta=-1, queries=1, failed=True)
+        self.registry.record("a.g", 2)
+
+        snapshot = self.registry.snapshot()
+
+        self.assertEqual({"a.f", "a.g"}, set(snapshot))
+        self.assertEqual(2, snapshot["a.f"]["count"])
+        self.assertEqual(1, snapshot["a.f"]["errors"])
+        self.assertEqual(0.55, snapshot["a.f"]["duration_sum"])
+        self.assertEqual(0.5, snapshot["a.f"]["duration_max"])
+        self.assertEqual(1, snapshot["a.f"]["rss_delta_sum"])
+        self.assertEqual(2, snapshot["a.f"]["rss_delta_max"])
+        self.assertEqual(4, snapshot["a.f"]["queries_sum"])
+        self.assertEqual({"callables": 2, "calls": 3}, self.registry.stats)
+
+    def test_percentiles_are_estimated_from_histogram(self):
+        for _ in range(90):
+            self.registry.record("a.f", 0.05)
+        for _ in range(10):
+            self.registry.record("a.f", 5)
+
+        snapshot = self.registry.snapshot()["a.f"]
+
+        self.assertLessEqual(snapshot["duration_p50"], 0.1)
+        self.assertGreater(snapshot["duration_p95"], 1)
+        self.assertLessEqual(snapshot["duration_p95"], 5)
+
+    def test_slowest_bucket_is_limited_by_max_duration(self):
+        self.registry.record("a.f", 30)
+        snapshot = self.registry.snapshot()["a.f"]
+        self.assertGreater(snapshot["duration_p95"], 10)
+        self.assertLessEqual(snapshot["duration_p95"], 30)
+
+    def test_to_prometheus(self):
+        self.registry.record('a.f "x"', 0.05, queries=2)
+        self.registry.record('a.f "x"', 3, failed=True)
+
+        text = self.registry.to_prometheus(prefix="test")
+
+        labels = f'callable="a.f \\"x\\"",pid="{os.getpid()}"'
+        self.assertIn("# TYPE test_duration_seconds histogram", text)
+        self.assertIn(f"test_calls_total{{{labels}}} 2", text)
+        self.assertIn(f"test_errors_total{{{labels}}} 1", text)
+        self.assertIn(f'test_duration_seconds_bucket{{{labels},le="0.1"}} 1', text)
+        self.assertIn(f'test_duration_seconds_bucket{{{labels},le="10.0"}} 2', text)
+        self.assertIn(f'test_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f"test_duration_seconds_count{{{labels}}} 2", text)
+        self.assertIn(f"test_queries_total{{{labels}}} 2", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_registry_is_reset_in_forked_process(self):
+        self.registry.record("a.f", 0.05)
+        with patch("os.getpid", return_value=os.getpid() + 1):
+            self.assertEqual({}, self.registry.snapshot())
+
+    def test_clear(self):
+        self.registry.record("a.f", 0.05)
+        self.registry.clear()
+        self.assertEqual({}, self.registry.snapshot())
+
+
+class PeriodicDumpTest(TestCase):
+    def test_dump_writes_log_and_textfile(self):
+        registry = MetricsRegistry()
+        registry.record("a.f", 0.05)
+        with tempfile.TemporaryDirectory() as folder:
+            dump = PeriodicDump(
+                registry, 60, logging.getLogger("profiling"), folder=folder
+            )
+            with self.assertLogs("profiling", level="WARNING") as logs:
+                dump.dump()
+
+            self.assertIn('"a.f"', logs.output[0])
+            with open(dump.path) as fp:
+                self.assertEqual(registry.to_prometheus(), fp.read())
+
+            with self.assertLogs("profiling", level="WARNING"):
+                dump.stop()
+            self.assertEqual([], os.listdir(folder))
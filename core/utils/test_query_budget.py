@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.utils.query_budget import (
+    QUERY_BUDGET_MODE_LOG,
+    QUERY_BUDGET_MODE_RAISE,
+    QueryBudgetExceeded,
+    QueryBudgetTestMixin,
+    QueryCounter,
+    get_sql_shape,
+    query_budget,
+    task_query_budget,
+)
+
+User = get_user_model()
+
+
+class GetSqlShapeTest(TestCase):
+    def test_values_are_normalized(self):
+        self.assertEqual(
+            get_sql_shape("SELECT * FROM t WHERE a = 'x' AND b = 10"),
+            get_sql_shape("SELECT * FROM t WHERE a = 'y''s' AND b = 20"),
+        )
+
+    def test_in_lists_are_normalized(self):
+        self.assertEqual(
+            "SELECT * FROM t WHERE id IN (%s, ...)",
+            get_sql_shape("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+        )
+        self.assertEqual(
+            get_sql_shape("INSERT INTO t (a, b) VALUES (%s, %s)"),
+            get_sql_shape("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)"),
+        )
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertEqual(
+            'SELECT "T3"."id" FROM t2 AS "T3"',
+            get_sql_shape('SELECT "T3"."id" FROM t2 AS "T3"'),
+        )
+
+
+class QueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass")
+            for i in range(5)
+        ]
+
+    def test_counts_queries_and_shapes(self):
+        with query_budget("test") as budget:
+            for user in self.users:
+                User.objects.get(pk=user.pk)
+            User.objects.count()
+        self.assertEqual(6, budget.total)
+        self.assertEqual(2, budget.stats["shapes"])
+
+    @override_settings(DEBUG=False)
+    def test_counter_without_shapes(self):
+        with QueryCounter(track_shapes=False) as counter:
+            for user in self.users:
+                User.objects.get(pk=user.pk)
+        self.assertEqual(5, counter.total)
+        self.assertEqual(0, len(counter.shapes))
+
+    def test_raise_mode_detects_repeated_queries(self):
+        with self.assertRaises(QueryBudgetExceeded) as exc:
+            with query_budget("n_plus_1", max_repeated=2, mode=QUERY_BUDGET_MODE_RAISE):
+                for user in self.users:
+                    User.objects.get(pk=user.pk)
+        self.assertIn("possible N+1: 5 x", str(exc.exception))
+
+    def test_raise_mode_detects_total(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget("total", max_queries=1, mode=QUERY_BUDGET_MODE_RAISE):
+                User.objects.count()
+                User.objects.exists()
+
+    def test_log_mode(self):
+        with self.assertLogs("profiling", level="WARNING") as logs:
+            with query_budget("total", max_queries=0, mode=QUERY_BUDGET_MODE_LOG):
+                User.objects.count()
+        self.assertIn("Query budget exceeded | total", logs.output[0])
+
+    def test_exception_of_the_block_is_not_hidden(self):
+        with self.assertRaises(ValueError):
+            with query_budget("total", max_queries=0, mode=QUERY_BUDGET_MODE_RAISE):
+                User.objects.count()
+                raise ValueError("block error")
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_MODE="raise")
+    def test_task_query_budget(self):
+        @task_query_budget(max_queries=1)
+        def task_count():
+            return User.objects.count() + User.objects.count()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            task_count()
+
+    @override_settings(QUERY_BUDGET_ENABLED=False)
+    def test_task_query_budget_disabled(self):
+        @task_query_budget(max_queries=0)
+        def task_count():
+            return User.objects.count()
+
+        self.assertEqual(5, task_count())
+
+    def test_assert_query_budget(self):
+        with self.assertQueryBudget(max_queries=1):
+            list(User.objects.all())
+        with self.assertRaises(AssertionError):
+            with self.assertQueryBudget(max_queries=1, max_repeated=1):
+                for user in User.objects.all():
+                    User.objects.get(pk=user.pk)
@@ -1,13 +1,16 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
-from core.utils.requester import NonRetryableError, fetch_data
+from core.utils import requester
+from core.utils.requester import NonRetryableError, SessionPool, fetch_data
 
 
 class FetchDataJsonDecodeErrorTest(TestCase):
     """Tests for fetch_data handling of invalid JSON responses."""
 
-    @patch("core.utils.requester.requests.get")
+    @patch("core.utils.requester.requests.Session.get")
     def test_fetch_data_raises_non_retryable_error_on_empty_json_response(
         self, mock_get
     ):
@@ -25,7 +28,7 @@ class FetchDataJsonDecodeErrorTest(TestCase):
         with self.assertRaises(NonRetryableError):
             fetch_data("https://example.com/api", json=True)
 
-    @patch("core.utils.requester.requests.get")
+    @patch("core.utils.requester.requests.Session.get")
     def test_fetch_data_raises_non_retryable_error_on_html_json_response(
         self, mock_get
     ):
@@ -43,7 +46,7 @@ class FetchDataJsonDecodeErrorTest(TestCase):
 
         self.assertIn("Invalid JSON response", str(ctx.exception))
 
-    @patch("core.utils.requester.requests.get")
+    @patch("core.utils.requester.requests.Session.get")
     def test_fetch_data_returns_json_on_valid_response(self, mock_get):
         """When json=True and response body is valid JSON, return parsed dict."""
         expected = {"documents": {}, "pages": 1}
@@ -57,7 +60,7 @@ class FetchDataJsonDecodeErrorTest(TestCase):
 
         self.assertEqual(result, expected)
 
-    @patch("core.utils.requester.requests.get")
+    @patch("core.utils.requester.requests.Session.get")
     def test_fetch_data_returns_content_when_json_false(self, mock_get):
         """When json=False, return raw response content."""
         mock_response = Mock()
@@ -69,3 +72,99 @@ class FetchDataJsonDecodeErrorTest(TestCase):
         result = fetch_data("https://example.com/api", json=False)
 
         self.assertEqual(result, b"raw content")
+
+
+class SessionPoolTest(TestCase):
+    def test_reuses_session_for_the_same_host(self):
+        pool = SessionPool()
+        first = pool.get_session("https://example.com/api/v1/a")
+        second = pool.get_session("https://example.com/api/v1/b")
+        other = pool.get_session("https://example.org/")
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    @patch("core.utils.requester.os.getpid")
+    def test_creates_new_sessions_after_fork(self, mock_getpid):
+        mock_getpid.return_value = 1
+        pool = SessionPool()
+        first = pool.get_session("https://example.com/")
+        mock_getpid.return_value = 2
+        self.assertIsNot(first, pool.get_session("https://example.com/"))
+
+    def test_cookies_are_not_kept(self):
+        class CookieHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                content = (self.headers.get("Cookie") or "").encode()
+                self.send_response(200)
+                self.send_header("Set-Cookie", "sessionid=abc; Path=/")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), CookieHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        url = f"http://{host}:{port}/"
+
+        pool = SessionPool()
+        session = pool.get_session(url)
+        session.get(url, timeout=5)
+
+        self.assertEqual(0, len(session.cookies))
+        self.assertEqual(b"", session.get(url, timeout=5).content)
+        self.assertEqual(
+            b"lang=pt", session.get(url, cookies={"lang": "pt"}, timeout=5).content
+        )
+        pool.close()
+
+    def test_stats(self):
+        pool = SessionPool()
+        pool.get_session("https://example.com/")
+        pool.add_latency("https://example.com/a", 0.5)
+        pool.add_latency("https://example.com/b", 0.1)
+        stats = pool.stats["https://example.com"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["avg_time"], 0.3)
+        self.assertEqual(stats["max_time"], 0.5)
+
+
+class FetchDataConditionalTest(TestCase):
+    def setUp(self):
+        requester.conditional_get_cache.clear()
+
+    def tearDown(self):
+        requester.conditional_get_cache.clear()
+
+    def _response(self, status_code, content, headers):
+        mock_response = Mock()
+        mock_response.status_code = status_code
+        mock_response.content = content
+        mock_response.headers = headers
+        mock_response.raise_for_status.return_value = None
+        return mock_response
+
+    @patch("core.utils.requester.requests.Session.get")
+    def test_returns_cached_content_if_not_modified(self, mock_get):
+        mock_get.side_effect = [
+            self._response(200, b"content", {"ETag": '"v1"'}),
+            self._response(304, b"", {"ETag": '"v1"'}),
+        ]
+        url = "https://example.com/api"
+        self.assertEqual(fetch_data(url, conditional=True), b"content")
+        self.assertEqual(fetch_data(url, conditional=True), b"content")
+        self.assertEqual(
+            mock_get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'}
+        )
+        self.assertEqual(requester.conditional_get_cache.hits, 1)
+
+    @patch("core.utils.requester.requests.Session.get")
+    def test_does_not_send_validators_if_not_conditional(self, mock_get):
+        mock_get.return_value = self._response(200, b"content", {"ETag": '"v1"'})
+        fetch_data("https://example.com/api")
+        fetch_data("https://example.com/api")
+        self.assertIsNone(mock_get.call_args.kwargs["headers"])
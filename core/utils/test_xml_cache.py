@@ -0,0 +1,96 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from lxml import etree
+
+from core.utils import xml_cache
+from core.utils.xml_cache import XMLWithPreCache
+
+
+class FakeXMLWithPre:
+    def __init__(self, xmltree):
+        self.xmltree = xmltree
+
+
+class XMLWithPreCacheTest(TestCase):
+    def test_get_counts_hits_and_misses(self):
+        cache = XMLWithPreCache(max_items=10, max_bytes=1000)
+        self.assertIsNone(cache.get(("a.xml", 1)))
+        cache.put(("a.xml", 1), "A", 10)
+        self.assertEqual(cache.get(("a.xml", 1)), "A")
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_evicts_least_recently_used_by_number_of_items(self):
+        cache = XMLWithPreCache(max_items=2, max_bytes=1000)
+        cache.put(("a.xml", 1), "A", 10)
+        cache.put(("b.xml", 1), "B", 10)
+        cache.get(("a.xml", 1))
+        cache.put(("c.xml", 1), "C", 10)
+        self.assertIsNone(cache.get(("b.xml", 1)))
+        self.assertEqual(cache.get(("a.xml", 1)), "A")
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_evicts_by_memory_budget(self):
+        cache = XMLWithPreCache(max_items=10, max_bytes=100)
+        cache.put(("a.xml", 1), "A", 60)
+        cache.put(("b.xml", 1), "B", 60)
+        self.assertIsNone(cache.get(("a.xml", 1)))
+        self.assertEqual(cache.stats["bytes"], 60)
+
+    def test_invalidate_removes_all_versions_of_path(self):
+        cache = XMLWithPreCache(max_items=10, max_bytes=1000)
+        cache.put(("a.xml", 1), "A1", 10)
+        cache.put(("a.xml", 2), "A2", 10)
+        cache.put(("b.xml", 1), "B", 10)
+        cache.invalidate("a.xml")
+        self.assertEqual(cache.stats["items"], 1)
+        self.assertEqual(cache.stats["bytes"], 10)
+
+
+class GetXMLWithPreTest(TestCase):
+    def setUp(self):
+        xml_cache.xml_with_pre_cache.clear()
+        fd, self.path = tempfile.mkstemp(suffix=".xml")
+        os.close(fd)
+        with open(self.path, "w") as fp:
+            fp.write("<article/>")
+
+    def tearDown(self):
+        os.unlink(self.path)
+        xml_cache.xml_with_pre_cache.clear()
+
+    def _xml_with_pre(self):
+        return FakeXMLWithPre(etree.fromstring("<article/>").getroottree())
+
+    @patch("core.utils.xml_cache.deepcopy", side_effect=lambda x: x)
+    @patch("core.utils.xml_cache.XMLWithPre.create")
+    def test_parses_once_while_file_is_unchanged(self, mock_create, mock_copy):
+        mock_create.side_effect = lambda path: iter([self._xml_with_pre()])
+        xml_cache.get_xml_with_pre(self.path)
+        xml_cache.get_xml_with_pre(self.path)
+        self.assertEqual(mock_create.call_count, 1)
+        self.assertEqual(xml_cache.cache_stats()["hits"], 1)
+
+    @patch("core.utils.xml_cache.deepcopy", side_effect=lambda x: x)
+    @patch("core.utils.xml_cache.XMLWithPre.create")
+    def test_parses_again_after_invalidate(self, mock_create, mock_copy):
+        mock_create.side_effect = lambda path: iter([self._xml_with_pre()])
+        xml_cache.get_xml_with_pre(self.path)
+        xml_cache.invalidate(self.path)
+        xml_cache.get_xml_with_pre(self.path)
+        self.assertEqual(mock_create.call_count, 2)
+
+    @patch("core.utils.xml_cache.XMLWithPre.create")
+    def test_returns_a_copy(self, mock_create):
+        mock_create.side_effect = lambda path: iter([self._xml_with_pre()])
+        first = xml_cache.get_xml_with_pre(self.path)
+        second = xml_cache.get_xml_with_pre(self.path)
+        self.assertIsNot(first, second)
+
+    @patch("core.utils.xml_cache.XMLWithPre.create")
+    def test_returns_none_if_there_is_no_xml(self, mock_create):
+        mock_create.return_value = iter([])
+        self.assertIsNone(xml_cache.get_xml_with_pre(self.path))
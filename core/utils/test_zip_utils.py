@@ -0,0 +1,112 @@
+import os
+import tempfile
+import zipfile
+from unittest import TestCase
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+from core.utils import zip_utils
+from core.utils.zip_utils import replace_zip_members
+
+
+class ReplaceZipMembersTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.zip_path = os.path.join(self.tmpdir.name, "pkg.zip")
+        self.members = {
+            "a.xml": b"<article>a</article>",
+            "a.pdf": os.urandom(50000),
+            "a-g1.jpg": b"jpg" * 10000,
+        }
+        with ZipFile(self.zip_path, "w", compression=ZIP_DEFLATED) as zf:
+            for name, content in self.members.items():
+                zf.writestr(name, content)
+            zf.writestr(zipfile.ZipInfo("stored.txt"), b"stored")
+
+    def read_all(self):
+        with ZipFile(self.zip_path) as zf:
+            self.assertIsNone(zf.testzip())
+            return {name: zf.read(name) for name in zf.namelist()}
+
+    def test_replaces_only_target_member(self):
+        stats = replace_zip_members(self.zip_path, {"a.xml": "<article>b</article>"})
+
+        self.assertEqual({"copied": 3, "replaced": 1, "added": 0}, stats)
+        content = self.read_all()
+        self.assertEqual(b"<article>b</article>", content["a.xml"])
+        self.assertEqual(self.members["a.pdf"], content["a.pdf"])
+        self.assertEqual(self.members["a-g1.jpg"], content["a-g1.jpg"])
+        self.assertEqual(b"stored", content["stored.txt"])
+        self.assertEqual(
+            ["a.xml", "a.pdf", "a-g1.jpg", "stored.txt"], list(content)
+        )
+
+    def test_keeps_compression_of_copied_members(self):
+        with ZipFile(self.zip_path) as zf:
+            before = {
+                info.filename: (info.compress_type, info.compress_size, info.CRC)
+                for info in zf.infolist()
+            }
+        replace_zip_members(self.zip_path, {"a.xml": b"<article/>"})
+        with ZipFile(self.zip_path) as zf:
+            after = {
+                info.filename: (info.compress_type, info.compress_size, info.CRC)
+                for info in zf.infolist()
+            }
+        for name in ("a.pdf", "a-g1.jpg", "stored.txt"):
+            self.assertEqual(before[name], after[name])
+        self.assertEqual(ZIP_STORED, after["stored.txt"][0])
+
+    def test_does_not_decompress_copied_members(self):
+        with patch("zipfile.ZipExtFile") as mock_zip_ext_file:
+            replace_zip_members(self.zip_path, {"a.xml": b"<article/>"})
+            mock_zip_ext_file.assert_not_called()
+
+    def test_adds_new_member(self):
+        stats = replace_zip_members(self.zip_path, {"b.xml": b"<article/>"})
+        self.assertEqual(1, stats["added"])
+        self.assertEqual(b"<article/>", self.read_all()["b.xml"])
+
+    def test_copies_members_with_data_descriptor(self):
+        # zip gravado em stream (não seekable) usa data descriptor
+        with open(self.zip_path, "wb") as fp:
+            with ZipFile(NonSeekable(fp), "w", compression=ZIP_DEFLATED) as zf:
+                with zf.open("a.pdf", "w") as member:
+                    member.write(self.members["a.pdf"])
+                with zf.open("a.xml", "w") as member:
+                    member.write(b"<article>a</article>")
+        with ZipFile(self.zip_path) as zf:
+            self.assertTrue(zf.getinfo("a.pdf").flag_bits & 0x08)
+
+        replace_zip_members(self.zip_path, {"a.xml": b"<article>b</article>"})
+
+        content = self.read_all()
+        self.assertEqual(self.members["a.pdf"], content["a.pdf"])
+        self.assertEqual(b"<article>b</article>", content["a.xml"])
+
+    def test_original_is_kept_on_error(self):
+        with open(self.zip_path, "rb") as fp:
+            original = fp.read()
+        with patch.object(zip_utils, "copy_raw_member", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                replace_zip_members(self.zip_path, {"a.xml": b"<article/>"})
+        with open(self.zip_path, "rb") as fp:
+            self.assertEqual(original, fp.read())
+        self.assertEqual(["pkg.zip"], os.listdir(self.tmpdir.name))
+
+    def test_keeps_file_permissions(self):
+        os.chmod(self.zip_path, 0o644)
+        replace_zip_members(self.zip_path, {"a.xml": b"<article/>"})
+        self.assertEqual(0o644, os.stat(self.zip_path).st_mode & 0o777)
+
+
+class NonSeekable:
+    def __init__(self, fp):
+        self.fp = fp
+
+    def write(self, data):
+        return self.fp.write(data)
+
+    def flush(self):
+        self.fp.flush()
@@ -0,0 +1,150 @@
+"""
+Cache, por processo, de XMLWithPre obtidos a partir de arquivos (xml ou zip)
+
+Evita que o mesmo documento seja lido e interpretado várias vezes durante a
+publicação de um artigo (ArticleProc.xml_with_pre, SPSPkg.xml_with_pre,
+SPSPkg.pub_date, XMLVersion.xml_with_pre etc).
+
+A chave é (path, mtime, tamanho) ou (path, finger_print). Quem consulta recebe
+uma cópia do XMLWithPre armazenado, pois os chamadores costumam alterar o
+objeto obtido (v2, order, data de publicação, hrefs dos ativos).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+
+from django.conf import settings
+from lxml import etree
+from packtools.sps.pid_provider.xml_sps_lib import XMLWithPre
+
+XML_WITH_PRE_CACHE_MAX_ITEMS = getattr(settings, "XML_WITH_PRE_CACHE_MAX_ITEMS", 256)
+XML_WITH_PRE_CACHE_MAX_BYTES = getattr(
+    settings, "XML_WITH_PRE_CACHE_MAX_BYTES", 64 * 1024 * 1024
+)
+
+
+class XMLWithPreCache:
+    """
+    LRU limitado pela quantidade de itens e pela soma dos tamanhos (bytes)
+    dos XML armazenados
+    """
+
+    def __init__(self, max_items, max_bytes):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, weight = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, weight):
+        if not self.max_items or weight > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._items[key] = (value, weight)
+            self.total_bytes += weight
+            while (
+                len(self._items) > self.max_items or self.total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_weight) = self._items.popitem(last=False)
+                self.total_bytes -= evicted_weight
+                self.evictions += 1
+
+    def invalidate(self, path):
+        """
+        Remove todas as entradas de path
+        """
+        with self._lock:
+            for key in [key for key in self._items if key[0] == path]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def _discard(self, key):
+        try:
+            _, weight = self._items.pop(key)
+            self.total_bytes -= weight
+        except KeyError:
+            pass
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "items": len(self._items),
+            "bytes": self.total_bytes,
+        }
+
+
+xml_with_pre_cache = XMLWithPreCache(
+    XML_WITH_PRE_CACHE_MAX_ITEMS, XML_WITH_PRE_CACHE_MAX_BYTES
+)
+
+
+def get_xml_with_pre(path, finger_print=None):
+    """
+    Retorna uma cópia do XMLWithPre do primeiro XML encontrado em path
+    (arquivo xml ou zip) ou None se não há XML
+
+    Args:
+        path: caminho do arquivo xml ou zip
+        finger_print: identifica o conteúdo (XMLVersion.finger_print);
+            na ausência, a chave é composta por mtime e tamanho do arquivo
+    """
+    if finger_print:
+        key = (path, finger_print)
+    else:
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+    xml_with_pre = xml_with_pre_cache.get(key)
+    if xml_with_pre is None:
+        for item in XMLWithPre.create(path=path):
+            xml_with_pre = item
+            break
+        if xml_with_pre is None:
+            return None
+        weight = len(etree.tostring(xml_with_pre.xmltree))
+        xml_with_pre_cache.put(key, xml_with_pre, weight)
+    return deepcopy(xml_with_pre)
+
+
+def invalidate(path):
+    """
+    Deve ser chamado quando o arquivo path é regravado ou removido
+    """
+    if not path:
+        return
+    try:
+        xml_with_pre_cache.invalidate(path)
+    except Exception as e:
+        logging.exception(e)
+
+
+def cache_stats():
+    return xml_with_pre_cache.stats
@@ -0,0 +1,144 @@
+"""
+Atualização de membros de arquivos zip sem regravar o pacote inteiro
+
+Os membros que não mudam são copiados como estão (bytes comprimidos), sem
+descompressão nem recompressão; somente os membros substituídos são
+comprimidos. O novo zip é gravado em um arquivo temporário no mesmo
+diretório e renomeado sobre o original (os.replace), de modo que o arquivo
+nunca fica parcialmente gravado.
+"""
+
+import copy
+import os
+import shutil
+import struct
+import tempfile
+import time
+import zipfile
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# bit 3 de flag_bits: tamanhos e CRC gravados após os dados (data descriptor)
+DATA_DESCRIPTOR_FLAG = 0x08
+ENCRYPTED_FLAG = 0x01
+# extra field do zip64, recalculado na gravação
+ZIP64_EXTRA_ID = 1
+
+
+def replace_zip_members(zip_path, replacements, compression=ZIP_DEFLATED):
+    """
+    Substitui (ou acrescenta) membros de zip_path
+
+    Parameters
+    ----------
+    zip_path : str
+    replacements : dict
+        {nome do membro: conteúdo (str ou bytes)}; nomes ausentes no zip
+        são acrescentados ao final
+    compression : int
+        compressão dos membros substituídos
+
+    Returns
+    -------
+    dict
+        {"copied": total de membros copiados sem recompressão,
+         "replaced": total de membros substituídos,
+         "added": total de membros acrescentados}
+    """
+    pending = dict(replacements)
+    stats = {"copied": 0, "replaced": 0, "added": 0}
+    folder = os.path.dirname(os.path.abspath(zip_path))
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(zip_path)}.", suffix=".tmp", dir=folder
+    )
+    try:
+        with os.fdopen(fd, "wb") as tmp_fp:
+            with ZipFile(zip_path) as source, ZipFile(
+                tmp_fp, "w", compression=compression
+            ) as target:
+                for info in source.infolist():
+                    if info.filename in pending:
+                        target.writestr(
+                            get_replacement_info(info, compression),
+                            pending.pop(info.filename),
+                        )
+                        stats["replaced"] += 1
+                    else:
+                        copy_raw_member(source, target, info)
+                        stats["copied"] += 1
+                for name, content in pending.items():
+                    target.writestr(get_replacement_info(ZipInfo(name), compression), content)
+                    stats["added"] += 1
+        shutil.copymode(zip_path, tmp_path)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return stats
+
+
+def get_replacement_info(info, compression):
+    new_info = ZipInfo(info.filename, date_time=time.localtime(time.time())[:6])
+    new_info.compress_type = compression
+    new_info.external_attr = info.external_attr or (0o600 << 16)
+    return new_info
+
+
+def copy_raw_member(source, target, info):
+    """
+    Copia o membro info de source para target sem descomprimi-lo
+
+    Grava um novo cabeçalho local (sem data descriptor, com CRC e tamanhos
+    conhecidos) seguido dos bytes comprimidos do original
+    """
+    if info.flag_bits & ENCRYPTED_FLAG:
+        raise ValueError(f"Unable to copy encrypted zip member {info.filename}")
+
+    new_info = copy.copy(info)
+    new_info.flag_bits &= ~DATA_DESCRIPTOR_FLAG
+    new_info.extra = zipfile._strip_extra(info.extra, (ZIP64_EXTRA_ID,))
+    zip64 = (
+        info.file_size > zipfile.ZIP64_LIMIT
+        or info.compress_size > zipfile.ZIP64_LIMIT
+    )
+
+    source.fp.seek(get_data_offset(source.fp, info))
+
+    new_info.header_offset = target.fp.tell()
+    target.fp.write(new_info.FileHeader(zip64))
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.fp.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated zip member {info.filename}")
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+
+    # registra o membro para que close() grave o diretório central
+    target.filelist.append(new_info)
+    target.NameToInfo[new_info.filename] = new_info
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+def get_data_offset(fp, info):
+    """
+    Posição, no arquivo, do início dos dados comprimidos do membro info
+    """
+    fp.seek(info.header_offset)
+    header = fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader:
+        raise zipfile.BadZipFile(f"Truncated file header of {info.filename}")
+    header = struct.unpack(zipfile.structFileHeader, header)
+    if header[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad magic number for file header of {info.filename}")
+    return (
+        info.header_offset
+        + zipfile.sizeFileHeader
+        + header[zipfile._FH_FILENAME_LENGTH]
+        + header[zipfile._FH_EXTRA_FIELD_LENGTH]
+    )
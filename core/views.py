@@ -1,4 +1,6 @@
-from django.http import HttpResponseRedirect
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden, HttpResponseRedirect
+from django.utils.crypto import constant_time_compare
 
 from django.utils.translation import gettext_lazy as _
 from wagtail.snippets.views.snippets import CreateView, EditView, SnippetViewSet
@@ -40,3 +42,29 @@ class CommonControlFieldViewSet(SnippetViewSet):
     # Define as views customizadas
     add_view_class = UserTrackingCreateView
     edit_view_class = UserTrackingEditView
+
+
+def profiling_metrics(request):
+    """
+    Métricas agregadas de profiling do processo que atende a requisição,
+    no formato texto do Prometheus
+
+    Acesso: usuário staff ou Authorization: Bearer <PROFILING_METRICS_TOKEN>
+    """
+    from core.utils import profiling_tools
+
+    if not profiling_tools.PROFILING_ENABLED:
+        raise Http404
+    token = getattr(settings, "PROFILING_METRICS_TOKEN", "")
+    authorized = getattr(request.user, "is_staff", False) or (
+        token
+        and constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        profiling_tools.metrics_registry.to_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
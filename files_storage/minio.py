@@ -3,8 +3,11 @@ import hashlib
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from mimetypes import types_map
 from tempfile import NamedTemporaryFile, TemporaryDirectory
+from zipfile import ZipFile
 
 from minio import Minio
 from minio.error import S3Error
@@ -47,6 +50,22 @@ class MinioStorageSetBucketPolicyError(Exception): ...
 class MinioStorageNoSuchBucketError(Exception): ...
 
 
+class MinioStoragePutContentError(Exception): ...
+
+
+CONTENT_SHA1_METADATA = "content-sha1"
+
+
+def sha1_stream(stream, chunk_size=1024 * 64):
+    _sum = hashlib.sha1()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        _sum.update(chunk)
+    return _sum.hexdigest()
+
+
 def sha1(path):
     logger.debug("Lendo arquivo: %s", path)
     _sum = hashlib.sha1()
@@ -97,19 +116,23 @@ class MinioStorage:
         self.minio_secure = minio_secure
         self.http_client = minio_http_client
         self._client_instance = None
+        # o cliente é compartilhado pelas threads de ZipContentUploader
+        self._client_lock = threading.Lock()
         self.location = location
 
     @property
     def _client(self):
         if not self._client_instance:
-            # Initialize minioClient with an endpoint and access/secret keys
-            self._client_instance = Minio(
-                self.minio_host,
-                access_key=self.minio_access_key,
-                secret_key=self.minio_secret_key,
-                secure=self.minio_secure,
-                http_client=self.http_client,
-            )
+            with self._client_lock:
+                if not self._client_instance:
+                    # Initialize minioClient with an endpoint and access/secret keys
+                    self._client_instance = Minio(
+                        self.minio_host,
+                        access_key=self.minio_access_key,
+                        secret_key=self.minio_secret_key,
+                        secure=self.minio_secure,
+                        http_client=self.http_client,
+                    )
         return self._client_instance
 
     def _create_bucket(self):
@@ -347,6 +370,80 @@ class MinioStorage:
                 "Unable to fput content %s %s %s" % (object_name, type(e), e)
             )
 
+    def put_content(
+        self, stream, length, mimetype, object_name, content_sha1=None
+    ) -> str:
+        """
+        Registra no Minio o conteúdo lido de stream, sem criar arquivo
+        temporário, e retorna o URI.
+        Se o bucket não existe, o cria e tenta novamente o registro
+
+        Parameters
+        ----------
+        stream : file-like object
+            conteúdo do arquivo
+        length : int
+            tamanho do conteúdo
+        mimetype : str
+            tipo do conteúdo
+        object_name : str
+            rota das sub-pastas a serem criadas / atualizadas no Minio
+        content_sha1 : str
+            soma SHA-1 do conteúdo, guardada nos metadados do objeto
+
+        Returns
+        -------
+        str
+
+        Raises
+        ------
+        MinioStoragePutContentError
+        """
+        metadata = None
+        if content_sha1:
+            metadata = {CONTENT_SHA1_METADATA: content_sha1}
+        try:
+            try:
+                self._client.put_object(
+                    self.bucket_root,
+                    object_name,
+                    stream,
+                    length,
+                    content_type=mimetype,
+                    metadata=metadata,
+                )
+            except S3Error as e:
+                if not self._no_such_bucket_error(e):
+                    raise
+                self._create_bucket()
+                self._set_bucket_policy()
+                stream.seek(0)
+                self._client.put_object(
+                    self.bucket_root,
+                    object_name,
+                    stream,
+                    length,
+                    content_type=mimetype,
+                    metadata=metadata,
+                )
+            return self.get_uri(object_name)
+        except Exception as e:
+            raise MinioStoragePutContentError(
+                "Unable to put content %s %s %s" % (object_name, type(e), e)
+            )
+
+    def get_content_sha1(self, object_name):
+        """
+        Retorna a soma SHA-1 registrada nos metadados do objeto
+        ou None se o objeto não existe ou não tem esta informação
+        """
+        try:
+            stat = self._client.stat_object(self.bucket_root, object_name)
+        except S3Error:
+            return None
+        metadata = stat.metadata or {}
+        return metadata.get(f"x-amz-meta-{CONTENT_SHA1_METADATA}")
+
     def _create_tmp_file(self, content=None):
         """
         Cria um arquivo temporário e se fornecido adiciona o conteúdo.
@@ -409,3 +506,70 @@ class MinioStorage:
             raise MinioStorageFgetError(
                 "Unable to fget %s %s %s" % (object_name, type(e), e)
             )
+
+
+class ZipContentUploader:
+    """
+    Registra no Minio os membros de um arquivo zip
+
+    - usa um único cliente (MinioStorage) para todos os membros
+    - envia o conteúdo diretamente do zip (put_object), sem ler o membro
+      inteiro em memória e sem criar arquivo temporário
+    - executa os envios em um pool limitado de threads
+    - não reenvia membros cujo conteúdo já está registrado (SHA-1)
+    - não envia membros vazios (retorna empty, sem uri)
+    """
+
+    def __init__(self, files_storage, zip_file_path, max_workers=4):
+        self.files_storage = files_storage
+        self.zip_file_path = zip_file_path
+        self.max_workers = max_workers
+
+    def upload(self, items):
+        """
+        Parameters
+        ----------
+        items : list of dict
+            member, object_name e mimetype
+
+        Returns
+        -------
+        list of dict
+            para cada item: member, object_name e uri e skipped,
+            ou empty, ou error e error_type
+        """
+        if not items:
+            return []
+        max_workers = max(1, min(self.max_workers, len(items)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.upload_item, items))
+
+    def upload_item(self, item):
+        response = {"member": item["member"], "object_name": item["object_name"]}
+        try:
+            # cada thread usa seu próprio descritor do zip
+            with ZipFile(self.zip_file_path) as zf:
+                file_size = zf.getinfo(item["member"]).file_size
+                if not file_size:
+                    response["empty"] = True
+                    return response
+                with zf.open(item["member"]) as fp:
+                    content_sha1 = sha1_stream(fp)
+                if self.files_storage.get_content_sha1(item["object_name"]) == content_sha1:
+                    response["uri"] = self.files_storage.get_uri(item["object_name"])
+                    response["skipped"] = True
+                    return response
+                with zf.open(item["member"]) as fp:
+                    response["uri"] = self.files_storage.put_content(
+                        fp,
+                        file_size,
+                        item["mimetype"],
+                        item["object_name"],
+                        content_sha1=content_sha1,
+                    )
+                response["skipped"] = False
+        except Exception as e:
+            logger.exception(e)
+            response["error"] = str(e)
+            response["error_type"] = str(type(e))
+        return response
@@ -1,11 +1,19 @@
 # Create your tests here.
 import json
+import os
+import tempfile
+import threading
 from unittest.mock import Mock, patch
+from zipfile import ZipFile
 
 from django.test import TestCase
 from minio.error import S3Error
 
-from files_storage.minio import MinioStorage, MinioStorageNoSuchBucketError
+from files_storage.minio import (
+    MinioStorage,
+    MinioStorageNoSuchBucketError,
+    ZipContentUploader,
+)
 
 
 class MinioStorageTest(TestCase):
@@ -31,6 +39,22 @@ class MinioStorageTest(TestCase):
             http_client=None,
         )
 
+    @patch("files_storage.minio.Minio")
+    def test__client_is_created_once_by_concurrent_threads(self, mock_minio):
+        barrier = threading.Barrier(8)
+
+        def get_client():
+            barrier.wait()
+            return self.minio_storage._client
+
+        threads = [threading.Thread(target=get_client) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_minio.assert_called_once()
+
     @patch("files_storage.minio.Minio.make_bucket")
     def test__create_bucket(self, mock_make_bucket):
         self.minio_storage._create_bucket()
@@ -234,3 +258,120 @@ class MinioStorageTest(TestCase):
             object_name="object_name",
             mimetype="text/xml",
         )
+
+
+class FakeObjectStat:
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+
+class FakeMinioClient:
+    """
+    Armazenamento de objetos em memória com a interface usada por MinioStorage
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.put_count = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, bucket, object_name, data, length, content_type=None, metadata=None):
+        content = data.read()
+        assert len(content) == length
+        with self._lock:
+            self.put_count += 1
+            self.objects[object_name] = {
+                "content": content,
+                "metadata": {
+                    f"x-amz-meta-{k}": v for k, v in (metadata or {}).items()
+                },
+            }
+
+    def stat_object(self, bucket, object_name):
+        try:
+            return FakeObjectStat(self.objects[object_name]["metadata"])
+        except KeyError:
+            raise S3Error(
+                "NoSuchKey", "NoSuchKey", "resource", "request_id", "host_id", "response"
+            )
+
+    def presigned_get_object(self, bucket, object_name):
+        return f"http://minio/{bucket}/{object_name}?X-Amz-Signature=x"
+
+
+class ZipContentUploaderTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.zip_file_path = os.path.join(self.tmpdir.name, "pkg.zip")
+        self.members = {f"image{i}.jpg": os.urandom(1000 + i) for i in range(20)}
+        with ZipFile(self.zip_file_path, "w") as zf:
+            for name, content in self.members.items():
+                zf.writestr(name, content)
+
+        self.client = FakeMinioClient()
+        self.files_storage = MinioStorage(
+            minio_host="localhost",
+            minio_access_key="minio_access_key",
+            minio_secret_key="minio_secret_key",
+            bucket_root="bucket",
+            location="location",
+        )
+        self.files_storage._client_instance = self.client
+        self.items = [
+            {"member": name, "object_name": f"subdir/{name}", "mimetype": "image/jpeg"}
+            for name in self.members
+        ]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_upload_streams_every_member(self):
+        uploader = ZipContentUploader(self.files_storage, self.zip_file_path, max_workers=4)
+        results = uploader.upload(self.items)
+
+        self.assertEqual(self.client.put_count, 20)
+        for item, result in zip(self.items, results):
+            self.assertEqual(result["member"], item["member"])
+            self.assertEqual(result["uri"], f"http://minio/bucket/{item['object_name']}")
+            self.assertFalse(result["skipped"])
+            self.assertEqual(
+                self.client.objects[item["object_name"]]["content"],
+                self.members[item["member"]],
+            )
+
+    def test_upload_skips_objects_with_same_content(self):
+        uploader = ZipContentUploader(self.files_storage, self.zip_file_path, max_workers=4)
+        uploader.upload(self.items)
+        results = uploader.upload(self.items)
+
+        self.assertEqual(self.client.put_count, 20)
+        self.assertTrue(all(result["skipped"] for result in results))
+
+    def test_upload_sends_changed_objects(self):
+        uploader = ZipContentUploader(self.files_storage, self.zip_file_path, max_workers=4)
+        uploader.upload(self.items)
+        self.client.objects["subdir/image0.jpg"]["metadata"] = {}
+        results = uploader.upload(self.items)
+
+        self.assertEqual(self.client.put_count, 21)
+        self.assertFalse(results[0]["skipped"])
+
+    def test_upload_returns_error_of_missing_member(self):
+        uploader = ZipContentUploader(self.files_storage, self.zip_file_path)
+        results = uploader.upload(
+            [{"member": "missing.jpg", "object_name": "subdir/missing.jpg", "mimetype": "image/jpeg"}]
+        )
+        self.assertIn("error", results[0])
+        self.assertIn("error_type", results[0])
+
+    def test_upload_does_not_send_empty_members(self):
+        with ZipFile(self.zip_file_path, "a") as zf:
+            zf.writestr("empty.jpg", b"")
+        uploader = ZipContentUploader(self.files_storage, self.zip_file_path)
+        results = uploader.upload(
+            [{"member": "empty.jpg", "object_name": "subdir/empty.jpg", "mimetype": "image/jpeg"}]
+        )
+        self.assertEqual(self.client.put_count, 0)
+        self.assertTrue(results[0]["empty"])
+        self.assertNotIn("uri", results[0])
+        self.assertNotIn("error", results[0])
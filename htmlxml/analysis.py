@@ -0,0 +1,209 @@
+"""
+Estatísticas do XML e índices para a comparação HTML x XML
+(Html2xmlAnalysis) obtidos percorrendo o XML uma única vez
+
+As chaves de consulta equivalem às expressões XPath de
+get_xpath_for_a_href_stats, get_xpath_for_src_stats e
+get_xpath_for_name_stats:
+
+    ("xref", "rid", rid)        .//xref[@rid=rid]
+    ("xref", "text", text)      .//xref[text()=text]
+    ("graphic", "href", href)   .//graphic[@xlink:href=href]
+    ("*", "id", name)           .//*[@id=name]
+"""
+
+import os
+
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".svg", ".tif", ".tiff"}
+
+# elementos consultados por texto (text()) e por atributo
+INDEXED_TEXT_TAGS = ("xref", "email", "ext-link")
+INDEXED_ATTRIBUTES = {"id": "id", "rid": "rid", XLINK_HREF: "href"}
+
+# Html2xmlAnalysis: campo -> elementos contados
+COUNTED_TAGS = {
+    "supplementary-material": "xml_supplmat_total",
+    "inline-supplementary-material": "xml_supplmat_total",
+    "media": "xml_media_total",
+    "graphic": "xml_graphic_total",
+    "inline-graphic": "xml_inline_graphic_total",
+    "element-citation": "xml_ref_elem_citation_total",
+    "mixed-citation": "xml_ref_mixed_citation_total",
+}
+# contados somente se têm @id
+COUNTED_TAGS_WITH_ID = {
+    "fig": "xml_fig_total",
+    "fig-group": "xml_fig_total",
+    "table-wrap": "xml_table_wrap_total",
+    "disp-formula": "xml_eq_total",
+}
+
+
+class XMLAnalysis:
+    """
+    Percorre o XML uma vez, contando os elementos de Html2xmlAnalysis e
+    indexando os nós por (tag, atributo, valor) e (tag, "text", texto)
+    """
+
+    def __init__(self, xml):
+        self.xml = xml
+        self.totals = {name: 0 for name in COUNTED_TAGS.values()}
+        self.totals.update({name: 0 for name in COUNTED_TAGS_WITH_ID.values()})
+        self.translations = 0
+        self.body = None
+        self._index = {}
+        self._collect()
+
+    def _collect(self):
+        root = self.xml.getroot() if hasattr(self.xml, "getroot") else self.xml
+        # .//* não inclui o elemento raiz
+        for position, node in enumerate(root.iterdescendants()):
+            tag = node.tag
+            if not isinstance(tag, str):
+                # comentários e instruções de processamento
+                continue
+
+            if tag in COUNTED_TAGS:
+                self.totals[COUNTED_TAGS[tag]] += 1
+            elif tag in COUNTED_TAGS_WITH_ID:
+                if node.get("id") is not None:
+                    self.totals[COUNTED_TAGS_WITH_ID[tag]] += 1
+            elif tag == "body":
+                if self.body is None:
+                    self.body = node
+            elif tag == "sub-article":
+                if node.get("article-type") == "translation":
+                    self.translations += 1
+
+            for attr, name in INDEXED_ATTRIBUTES.items():
+                value = node.get(attr)
+                if value is not None:
+                    self._add((tag, name, value), position, node)
+                    self._add(("*", name, value), position, node)
+
+            if tag in INDEXED_TEXT_TAGS:
+                for text in get_child_texts(node):
+                    self._add((tag, "text", text), position, node)
+
+    def _add(self, key, position, node):
+        items = self._index.setdefault(key, [])
+        if not items or items[-1][0] != position:
+            items.append((position, node))
+
+    @property
+    def empty_body(self):
+        return self.body is None or not has_text(self.body)
+
+    @property
+    def text_lang_total(self):
+        return self.translations + 1
+
+    def find(self, keys):
+        """
+        Nós que correspondem a qualquer uma das chaves, sem repetição e na
+        ordem do documento (como a união de XPaths "a|b")
+        """
+        found = {}
+        for key in keys:
+            for position, node in self._index.get(key) or []:
+                found[position] = node
+        return [found[position] for position in sorted(found)]
+
+
+def get_child_texts(node):
+    """
+    Nós texto filhos de node (equivale a node/text())
+    """
+    if node.text:
+        yield node.text
+    for child in node:
+        if child.tail:
+            yield child.tail
+
+
+def has_text(node):
+    """
+    Equivale a bool(node.xpath(".//text()"))
+    """
+    if node.text:
+        return True
+    for child in node.iterdescendants():
+        if isinstance(child.tag, str) and child.text:
+            return True
+        if child.tail:
+            return True
+    return False
+
+
+def get_keys_for_a_href_stats(a, journal_acron):
+    """Chaves equivalentes a get_xpath_for_a_href_stats"""
+    href = (a.get("href") or "").strip()
+    if not href:
+        return []
+
+    text = "".join(a.xpath(".//text()"))
+
+    # Links internos
+    if href.startswith("#"):
+        keys = [("xref", "rid", href[1:])]
+        if text:
+            keys.append(("xref", "text", text))
+        return keys
+
+    # Emails
+    if "@" in href or "@" in text:
+        email = href[7:] if href.startswith("mailto:") else href
+        keys = [("email", "text", email)]
+        if text and text != email:
+            keys.append(("email", "text", text))
+        return keys
+
+    # Imagens e recursos gráficos
+    _, ext = os.path.splitext(href.lower())
+    is_image = (
+        ext in IMAGE_EXTENSIONS
+        or "img/revistas" in href
+        or f"/{journal_acron}/" in href
+    )
+    if is_image:
+        keys = [("graphic", "href", href)]
+        if text:
+            keys.append(("xref", "text", text))
+        return keys
+
+    # Links externos (URLs completas)
+    keys = []
+    if text:
+        keys.append(("ext-link", "text", text))
+    keys.append(("ext-link", "href", href))
+    return keys
+
+
+def get_keys_for_src_stats(element_tag, src, journal_acron):
+    """Chaves equivalentes a get_xpath_for_src_stats"""
+    if ":" in src:
+        return [("ext-link", "text", src)]
+
+    if f"/{journal_acron}/" in src:
+        if element_tag == "img":
+            return [("graphic", "href", src), ("inline-graphic", "href", src)]
+
+    return [("*", "href", src)]
+
+
+def get_keys_for_name_stats(name):
+    """Chaves equivalentes a get_xpath_for_name_stats"""
+    if not name:
+        return []
+
+    if name.isalpha():
+        return [("*", "id", name)]
+    if name.startswith("t") and name[-1].isdigit():
+        return [("table-wrap", "id", name)]
+    if name.startswith("f") and name[-1].isdigit():
+        return [("fig", "id", name)]
+    if name[-1].isdigit():
+        return [("*", "id", name)]
+    return []
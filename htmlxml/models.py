@@ -33,6 +33,12 @@ from tracker import choices as tracker_choices
 from tracker.models import UnexpectedEvent, format_traceback
 
 from . import choices, exceptions
+from .analysis import (
+    XMLAnalysis,
+    get_keys_for_a_href_stats,
+    get_keys_for_name_stats,
+    get_keys_for_src_stats,
+)
 
 
 def escape_xpath_string(text):
@@ -148,6 +154,16 @@ def get_xml_nodes_to_string(xml, xpaths):
     return items
 
 
+def get_indexed_nodes_to_string(xml_analysis, keys):
+    """
+    Equivale a get_xml_nodes_to_string, consultando os índices de
+    XMLAnalysis em vez de executar XPath no XML completo
+    """
+    if not keys:
+        return ""
+    return [xml_node_to_string(item) for item in xml_analysis.find(keys)]
+
+
 # Extrair de Html2xmlAnalysis
 def xml_node_to_string(node):
     """Era Html2xmlAnalysis.tostring()"""
@@ -465,44 +481,56 @@ class Html2xmlAnalysis(models.Model):
             )
         )
 
+    def get_xml_analysis(self, xml):
+        """
+        Percorre o XML uma única vez (XMLAnalysis), reaproveitado por
+        get_xml_stats e html_vs_xml
+        """
+        xml_analysis = getattr(self, "_xml_analysis", None)
+        if xml_analysis is None or xml_analysis.xml is not xml:
+            xml_analysis = XMLAnalysis(xml)
+            self._xml_analysis = xml_analysis
+        return xml_analysis
+
     def get_a_href_stats(self, html, xml, journal_acron):
+        xml_analysis = self.get_xml_analysis(xml)
         for a in html.xpath(".//a[@href]"):
-            xpaths = get_xpath_for_a_href_stats(a, journal_acron)
+            keys = get_keys_for_a_href_stats(a, journal_acron)
             yield {
                 "html": xml_node_to_string(a),
-                "xml": get_xml_nodes_to_string(xml, xpaths),
+                "xml": get_indexed_nodes_to_string(xml_analysis, keys),
             }
 
     def get_src_stats(self, html, xml, journal_acron):
         """
-        Analisa elementos src usando função xpath dedicada.
+        Analisa elementos src usando os índices do XML.
         """
+        xml_analysis = self.get_xml_analysis(xml)
         self.html_img_total = len(html.xpath(".//img[@src]"))
 
         for element in html.xpath(".//*[@src]"):
             src = element.get("src", "")
 
-            # Usar função dedicada para determinar XPaths
-            xpaths = get_xpath_for_src_stats(element.tag, src, journal_acron)
+            keys = get_keys_for_src_stats(element.tag, src, journal_acron)
 
             yield {
                 "html": xml_node_to_string(element),
-                "xml": get_xml_nodes_to_string(xml, xpaths),
+                "xml": get_indexed_nodes_to_string(xml_analysis, keys),
             }
 
     def get_a_name_stats(self, html, xml):
         """
-        Analisa elementos name usando função xpath dedicada.
+        Analisa elementos name usando os índices do XML.
         """
+        xml_analysis = self.get_xml_analysis(xml)
         for node in html.xpath(".//a[@name]"):
             name = node.get("name", "")
 
-            # Usar função dedicada para determinar XPaths
-            xpaths = get_xpath_for_name_stats(name)
+            keys = get_keys_for_name_stats(name)
 
             yield {
                 "html": xml_node_to_string(node),
-                "xml": get_xml_nodes_to_string(xml, xpaths),
+                "xml": get_indexed_nodes_to_string(xml_analysis, keys),
             }
 
     def get_html_stats(self, html):
@@ -510,24 +538,11 @@ class Html2xmlAnalysis(models.Model):
         self.html_img_total = len(html.xpath(".//img[@src]"))
 
     def get_xml_stats(self, xml):
-        body = xml.find(".//body")
-        self.empty_body = body is None or not body.xpath(".//text()")
-        self.xml_supplmat_total = len(xml.xpath(".//supplementary-material")) + len(
-            xml.xpath(".//inline-supplementary-material")
-        )
-        self.xml_media_total = len(xml.xpath(".//media"))
-        self.xml_fig_total = len(xml.xpath(".//fig[@id]")) + len(
-            xml.xpath(".//fig-group[@id]")
-        )
-        self.xml_table_wrap_total = len(xml.xpath(".//table-wrap[@id]"))
-        self.xml_eq_total = len(xml.xpath(".//disp-formula[@id]"))
-        self.xml_graphic_total = len(xml.xpath(".//graphic"))
-        self.xml_inline_graphic_total = len(xml.xpath(".//inline-graphic"))
-        self.xml_ref_elem_citation_total = len(xml.xpath(".//element-citation"))
-        self.xml_ref_mixed_citation_total = len(xml.xpath(".//mixed-citation"))
-        self.xml_text_lang_total = (
-            len(xml.xpath(".//sub-article[@article-type='translation']")) + 1
-        )
+        xml_analysis = self.get_xml_analysis(xml)
+        self.empty_body = xml_analysis.empty_body
+        for name, value in xml_analysis.totals.items():
+            setattr(self, name, value)
+        self.xml_text_lang_total = xml_analysis.text_lang_total
 
     def html_vs_xml(self, html, xml, journal_acron):
         yield from self.get_a_href_stats(html, xml, journal_acron)
@@ -0,0 +1,110 @@
+"""
+Compara a análise HTML x XML (Html2xmlAnalysis) por XPath com a análise
+indexada (XMLAnalysis) em um artigo convertido sintético
+
+Uso:
+    python manage.py runscript htmlxml.scripts.bench_html2xml_analysis \
+        --script-args 1000
+
+Argumento: número de parágrafos (cada um com citação, email e link; a cada
+10 parágrafos, figura, tabela e equação).
+"""
+import time
+
+from lxml import etree
+from lxml import html as lhtml
+
+from htmlxml.analysis import (
+    XMLAnalysis,
+    get_keys_for_a_href_stats,
+    get_keys_for_name_stats,
+    get_keys_for_src_stats,
+)
+from htmlxml.models import (
+    get_indexed_nodes_to_string,
+    get_xml_nodes_to_string,
+    get_xpath_for_a_href_stats,
+    get_xpath_for_name_stats,
+    get_xpath_for_src_stats,
+)
+
+JOURNAL_ACRON = "abc"
+
+
+def get_html_and_xml(total):
+    xml_parts = []
+    html_parts = []
+    for i in range(total):
+        xml_parts.append(
+            f'<p>Text {i} <xref ref-type="bibr" rid="B{i}">{i}</xref> '
+            f"<email>a{i}@x.org</email> "
+            f'<ext-link ext-link-type="uri" xlink:href="http://x.org/{i}">'
+            f"http://x.org/{i}</ext-link></p>"
+        )
+        html_parts.append(
+            f'<p><a href="#B{i}">{i}</a> <a href="mailto:a{i}@x.org">a{i}@x.org</a> '
+            f'<a href="http://x.org/{i}">http://x.org/{i}</a> <a name="B{i}"></a></p>'
+        )
+        if i % 10 == 0:
+            img = f"/img/revistas/{JOURNAL_ACRON}/v1n1/a01f{i}.jpg"
+            xml_parts.append(
+                f'<fig id="f{i}"><graphic xlink:href="{img}"/></fig>'
+                f'<table-wrap id="t{i}"><table/></table-wrap>'
+                f'<disp-formula id="e{i}"><inline-graphic xlink:href="e{i}.gif"/>'
+                f"</disp-formula>"
+            )
+            html_parts.append(
+                f'<a name="f{i}"></a><img src="{img}"/><a name="t{i}"></a><table></table>'
+                f'<a href="{img}">Figure {i}</a>'
+            )
+    refs = "".join(
+        f'<ref id="B{i}"><mixed-citation>Ref {i}</mixed-citation>'
+        f"<element-citation/></ref>"
+        for i in range(total)
+    )
+    xml = etree.fromstring(
+        '<article xmlns:xlink="http://www.w3.org/1999/xlink"><front/>'
+        f'<body><sec>{"".join(xml_parts)}</sec></body>'
+        f"<back><ref-list>{refs}</ref-list></back></article>"
+    )
+    html = lhtml.fromstring(f'<html><body>{"".join(html_parts)}</body></html>')
+    return html, xml
+
+
+def xpath_html_vs_xml(html, xml):
+    for a in html.xpath(".//a[@href]"):
+        xpaths = get_xpath_for_a_href_stats(a, JOURNAL_ACRON)
+        yield get_xml_nodes_to_string(xml, xpaths)
+    for element in html.xpath(".//*[@src]"):
+        xpaths = get_xpath_for_src_stats(element.tag, element.get("src", ""), JOURNAL_ACRON)
+        yield get_xml_nodes_to_string(xml, xpaths)
+    for node in html.xpath(".//a[@name]"):
+        yield get_xml_nodes_to_string(xml, get_xpath_for_name_stats(node.get("name", "")))
+
+
+def indexed_html_vs_xml(html, xml):
+    xml_analysis = XMLAnalysis(xml)
+    for a in html.xpath(".//a[@href]"):
+        keys = get_keys_for_a_href_stats(a, JOURNAL_ACRON)
+        yield get_indexed_nodes_to_string(xml_analysis, keys)
+    for element in html.xpath(".//*[@src]"):
+        keys = get_keys_for_src_stats(element.tag, element.get("src", ""), JOURNAL_ACRON)
+        yield get_indexed_nodes_to_string(xml_analysis, keys)
+    for node in html.xpath(".//a[@name]"):
+        keys = get_keys_for_name_stats(node.get("name", ""))
+        yield get_indexed_nodes_to_string(xml_analysis, keys)
+
+
+def measure(label, func, html, xml):
+    t0 = time.perf_counter()
+    result = list(func(html, xml))
+    print(f"{label}: {time.perf_counter() - t0:.3f}s")
+    return result
+
+
+def run(total="1000"):
+    html, xml = get_html_and_xml(int(total))
+    print(f"xml nodes: {sum(1 for _ in xml.iter())}")
+    expected = measure("xpath", xpath_html_vs_xml, html, xml)
+    result = measure("indexed", indexed_html_vs_xml, html, xml)
+    print(f"same result: {result == expected}")
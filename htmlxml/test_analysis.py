@@ -0,0 +1,143 @@
+from unittest import TestCase
+
+from lxml import etree
+from lxml import html as lhtml
+
+from htmlxml.analysis import (
+    XMLAnalysis,
+    get_keys_for_a_href_stats,
+    get_keys_for_name_stats,
+    get_keys_for_src_stats,
+)
+from htmlxml.models import (
+    Html2xmlAnalysis,
+    get_indexed_nodes_to_string,
+    get_xml_nodes_to_string,
+    get_xpath_for_a_href_stats,
+    get_xpath_for_name_stats,
+    get_xpath_for_src_stats,
+)
+
+XML = """<article xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article">
+<front/>
+<body>
+<sec id="sec1">
+<p>Text <xref ref-type="bibr" rid="B1">1</xref> <xref ref-type="fig" rid="f1">Figure 1</xref>
+<email>a@x.org</email> <ext-link ext-link-type="uri" xlink:href="http://x.org">http://x.org</ext-link></p>
+<fig id="f1"><graphic xlink:href="/img/revistas/abc/v1n1/a01f1.jpg"/></fig>
+<fig-group id="fg1"><fig id="f2"><graphic xlink:href="a01f2.jpg"/></fig></fig-group>
+<table-wrap id="t1"><table/></table-wrap>
+<disp-formula id="e1"><inline-graphic xlink:href="/img/revistas/abc/v1n1/e1.gif"/></disp-formula>
+<disp-formula><inline-graphic xlink:href="e2.gif"/></disp-formula>
+<!-- comentário -->
+<supplementary-material id="s1" xlink:href="s1.pdf"/>
+<p><inline-supplementary-material xlink:href="s2.pdf">s2</inline-supplementary-material></p>
+<media xlink:href="v.mp4"/>
+</sec>
+</body>
+<back>
+<ref-list>
+<ref id="B1"><mixed-citation>Ref 1</mixed-citation><element-citation/></ref>
+<ref id="B2"><mixed-citation>Ref 2</mixed-citation></ref>
+</ref-list>
+</back>
+<sub-article article-type="translation" id="s2"><body><p>Texto</p></body></sub-article>
+<sub-article article-type="reviewer-report" id="s3"><body><p>Review</p></body></sub-article>
+</article>"""
+
+HTML = """<html><body>
+<p><a href="#B1">1</a> <a href="#f1">Figure 1</a> <a href="mailto:a@x.org">a@x.org</a>
+<a href="http://x.org">http://x.org</a> <a href="http://y.org">other</a>
+<a href="/img/revistas/abc/v1n1/a01f1.jpg">Figure 1</a> <a href="">empty</a></p>
+<a name="f1"></a><img src="/img/revistas/abc/v1n1/a01f1.jpg"/>
+<a name="t1"></a><table></table>
+<img src="/img/revistas/abc/v1n1/e1.gif"/><img src="s1.pdf"/><img src="http://y.org/z.png"/>
+<a name="sec"></a><a name="B1"></a><a name="x-y"></a><a name=""></a>
+</body></html>"""
+
+
+def xpath_html_vs_xml(html, xml):
+    for a in html.xpath(".//a[@href]"):
+        yield get_xml_nodes_to_string(xml, get_xpath_for_a_href_stats(a, "abc"))
+    for element in html.xpath(".//*[@src]"):
+        xpaths = get_xpath_for_src_stats(element.tag, element.get("src", ""), "abc")
+        yield get_xml_nodes_to_string(xml, xpaths)
+    for node in html.xpath(".//a[@name]"):
+        yield get_xml_nodes_to_string(xml, get_xpath_for_name_stats(node.get("name", "")))
+
+
+class XMLAnalysisTest(TestCase):
+    def setUp(self):
+        self.xml = etree.fromstring(XML)
+        self.html = lhtml.fromstring(HTML)
+
+    def test_totals(self):
+        xml_analysis = XMLAnalysis(self.xml)
+        self.assertEqual(
+            xml_analysis.totals,
+            {
+                "xml_supplmat_total": 2,
+                "xml_media_total": 1,
+                "xml_fig_total": 3,
+                "xml_table_wrap_total": 1,
+                "xml_eq_total": 1,
+                "xml_graphic_total": 2,
+                "xml_inline_graphic_total": 2,
+                "xml_ref_elem_citation_total": 1,
+                "xml_ref_mixed_citation_total": 2,
+            },
+        )
+        self.assertFalse(xml_analysis.empty_body)
+        self.assertEqual(xml_analysis.text_lang_total, 2)
+
+    def test_empty_body(self):
+        for xml, expected in (
+            ("<article><front/></article>", True),
+            ("<article><body/></article>", True),
+            ("<article><body><!-- c --></body></article>", True),
+            ("<article><body> </body></article>", False),
+            ("<article><body><sec><p/>x</sec></body></article>", False),
+        ):
+            with self.subTest(xml=xml):
+                self.assertEqual(
+                    XMLAnalysis(etree.fromstring(xml)).empty_body, expected
+                )
+
+    def test_find_returns_nodes_in_document_order_without_repetition(self):
+        xml_analysis = XMLAnalysis(self.xml)
+        nodes = xml_analysis.find(
+            [("xref", "text", "Figure 1"), ("xref", "rid", "B1"), ("xref", "rid", "f1")]
+        )
+        self.assertEqual([node.get("rid") for node in nodes], ["B1", "f1"])
+
+    def test_html_vs_xml_equals_xpath(self):
+        xml_analysis = XMLAnalysis(self.xml)
+        result = []
+        for a in self.html.xpath(".//a[@href]"):
+            keys = get_keys_for_a_href_stats(a, "abc")
+            result.append(get_indexed_nodes_to_string(xml_analysis, keys))
+        for element in self.html.xpath(".//*[@src]"):
+            keys = get_keys_for_src_stats(element.tag, element.get("src", ""), "abc")
+            result.append(get_indexed_nodes_to_string(xml_analysis, keys))
+        for node in self.html.xpath(".//a[@name]"):
+            keys = get_keys_for_name_stats(node.get("name", ""))
+            result.append(get_indexed_nodes_to_string(xml_analysis, keys))
+
+        expected = list(xpath_html_vs_xml(self.html, self.xml))
+        self.assertEqual(result, expected)
+        self.assertTrue(any(expected))
+
+
+class Html2xmlAnalysisTest(TestCase):
+    def test_get_xml_stats_and_html_vs_xml(self):
+        xml = etree.fromstring(XML)
+        html = lhtml.fromstring(HTML)
+        analysis = Html2xmlAnalysis()
+        analysis.get_xml_stats(xml)
+        self.assertEqual(analysis.xml_fig_total, 3)
+        self.assertEqual(analysis.xml_supplmat_total, 2)
+        self.assertEqual(analysis.xml_text_lang_total, 2)
+        self.assertFalse(analysis.empty_body)
+
+        result = [item["xml"] for item in analysis.html_vs_xml(html, xml, "abc")]
+        self.assertEqual(result, list(xpath_html_vs_xml(html, xml)))
@@ -0,0 +1,167 @@
+"""
+Cache, por processo (worker), de objetos derivados de
+ClassicWebsiteConfiguration
+
+- ClassicWebsite: chave é o id da configuração; a entrada é descartada
+  quando o registro da configuração é alterado (campo updated) ou após
+  CLASSIC_WEBSITE_CACHE_TIMEOUT segundos
+- lista de PIDs (pid_list_path): frozenset, descartado quando mtime ou
+  tamanho do arquivo mudam
+"""
+
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+CLASSIC_WEBSITE_CACHE_TIMEOUT = getattr(settings, "CLASSIC_WEBSITE_CACHE_TIMEOUT", 600)
+
+
+class ClassicWebsiteCache:
+    """
+    Instâncias de ClassicWebsite por id de ClassicWebsiteConfiguration
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._items = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, config_id, version):
+        """
+        Retorna o ClassicWebsite armazenado para config_id ou None se não há,
+        se a versão (updated da configuração) mudou ou se expirou
+        """
+        with self._lock:
+            item = self._items.get(config_id)
+            if item:
+                value, item_version, created = item
+                if item_version == version and not self._expired(created):
+                    self.hits += 1
+                    return value
+                del self._items[config_id]
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, config_id, version, value):
+        if not self.timeout:
+            return
+        with self._lock:
+            self._items[config_id] = (value, version, time.monotonic())
+
+    def invalidate(self, config_id):
+        with self._lock:
+            if self._items.pop(config_id, None):
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def _expired(self, created):
+        return self.timeout > 0 and time.monotonic() - created > self.timeout
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "items": len(self._items),
+        }
+
+
+class PidListCache:
+    """
+    Conteúdo dos arquivos de lista de PIDs, validado por mtime e tamanho
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, path):
+        """
+        Retorna frozenset com os PIDs do arquivo path
+
+        Raises
+        ------
+        FileNotFoundError
+        """
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            item = self._items.get(path)
+            if item:
+                if item[0] == version:
+                    self.hits += 1
+                    return item[1]
+                self.invalidations += 1
+            self.misses += 1
+
+        with open(path, "r") as fp:
+            pids = frozenset(fp.read().split())
+
+        with self._lock:
+            self._items[path] = (version, pids)
+        return pids
+
+    def invalidate(self, path):
+        with self._lock:
+            if self._items.pop(path, None):
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "items": len(self._items),
+            "pids": sum(len(pids) for _, pids in list(self._items.values())),
+        }
+
+
+classic_website_cache = ClassicWebsiteCache(CLASSIC_WEBSITE_CACHE_TIMEOUT)
+pid_list_cache = PidListCache()
+
+
+def get_pid_list(path):
+    """
+    Retorna frozenset com os PIDs do arquivo path
+    (frozenset vazio se o arquivo não existe ou não pode ser lido)
+    """
+    try:
+        return pid_list_cache.get(path)
+    except FileNotFoundError:
+        pid_list_cache.invalidate(path)
+        logging.warning("pid_list_path file not found: %s", path)
+    except Exception as e:
+        logging.exception("Error reading pid_list_path %s: %s", path, e)
+    return frozenset()
+
+
+def cache_stats():
+    return {
+        "classic_website": classic_website_cache.stats,
+        "pid_list": pid_list_cache.stats,
+    }
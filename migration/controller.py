@@ -30,6 +30,8 @@ from journal.models import (
     Subject,
 )
 from location.models import Location
+from migration.cache import classic_website_cache
+from migration.file_migration import IssueFilesMigrator
 from migration.models import IdFileRecord, JournalAcronIdFile, MigratedFile
 from scielo_classic_website import classic_ws
 from scielo_classic_website.iid2json.id2json3 import get_doc_records
@@ -398,22 +400,11 @@ def get_classic_website(collection_acron):
         config = ClassicWebsiteConfiguration.objects.get(
             collection__acron=collection_acron
         )
-        bases_path = ""
-        if config.bases_work_path:
-            bases_path = os.path.join(os.path.dirname(config.bases_work_path), "bases")
-        return classic_ws.ClassicWebsite(
-            bases_path=bases_path,
-            bases_work_path=config.bases_work_path,
-            bases_translation_path=config.bases_translation_path,
-            bases_pdf_path=config.bases_pdf_path,
-            bases_xml_path=config.bases_xml_path,
-            htdocs_img_revistas_path=config.htdocs_img_revistas_path,
-            serial_path=config.serial_path,
-            cisis_path=None,
-            title_path=config.title_path,
-            issue_path=config.issue_path,
-            alternative_paths=config.alternative_htdocs_img_revistas_path,
-        )
+        classic_website = classic_website_cache.get(config.id, config.updated)
+        if classic_website is None:
+            classic_website = create_classic_website(config)
+            classic_website_cache.put(config.id, config.updated, classic_website)
+        return classic_website
     except Exception as e:
         exc_type, exc_value, exc_traceback = sys.exc_info()
         UnexpectedEvent.create(
@@ -426,6 +417,25 @@ def get_classic_website(collection_acron):
         )
 
 
+def create_classic_website(config):
+    bases_path = ""
+    if config.bases_work_path:
+        bases_path = os.path.join(os.path.dirname(config.bases_work_path), "bases")
+    return classic_ws.ClassicWebsite(
+        bases_path=bases_path,
+        bases_work_path=config.bases_work_path,
+        bases_translation_path=config.bases_translation_path,
+        bases_pdf_path=config.bases_pdf_path,
+        bases_xml_path=config.bases_xml_path,
+        htdocs_img_revistas_path=config.htdocs_img_revistas_path,
+        serial_path=config.serial_path,
+        cisis_path=None,
+        title_path=config.title_path,
+        issue_path=config.issue_path,
+        alternative_paths=config.alternative_htdocs_img_revistas_path,
+    )
+
+
 def check_component_type(file):
     if file["type"] == "pdf":
         check = file["name"]
@@ -444,8 +454,18 @@ def check_component_type(file):
 
 
 def migrate_issue_files(user, collection, journal_acron, issue_folder, force_update):
+    """
+    Registra em MigratedFile os arquivos do fascículo (IssueFilesMigrator)
+
+    Returns
+    -------
+    dict
+        exceptions, migrated (ids de MigratedFile) e stats (quantidades de
+        arquivos skipped, touched, copied, linked e failed)
+    """
     exceptions = []
     migrated_ids = []
+    stats = {}
     try:
         PARTS = {
             "before": "1",
@@ -457,12 +477,13 @@ def migrate_issue_files(user, collection, journal_acron, issue_folder, force_upd
                 "error": f"Classic website not found for collection {collection.acron}",
                 "type": "ValueError"
             })
-            return {"exceptions": exceptions, "migrated": migrated_ids}
+            return {"exceptions": exceptions, "migrated": migrated_ids, "stats": stats}
         
         files_and_exceptions = classic_website.get_issue_folder_content(
             journal_acron,
             issue_folder,
         )
+        items = []
         for file in files_and_exceptions:
             exception = {}
             try:
@@ -478,21 +499,18 @@ def migrate_issue_files(user, collection, journal_acron, issue_folder, force_upd
                 component_type = check_component_type(file)
                 part = file.get("part")
 
-                migrated_ids.append(
-                    MigratedFile.create_or_update(
-                        user=user,
-                        collection=collection,
+                items.append(
+                    dict(
                         original_path=file["relative_path"],
                         source_path=file["path"],
                         component_type=component_type,
                         lang=file.get("lang"),
                         part=part and PARTS.get(part),
                         pkg_name=file.get("key"),
-                        force_update=force_update,
                         content=file.get("content"),
                         file_datetime_iso=file.get("modified_date"),
                         basename=file.get("name"),
-                    ).id
+                    )
                 )
 
             except Exception as e:
@@ -500,6 +518,11 @@ def migrate_issue_files(user, collection, journal_acron, issue_folder, force_upd
                 exception["type"] = str(type(e))
                 exceptions.append(exception)
 
+        migrator = IssueFilesMigrator(user, collection, force_update)
+        migrated_ids = migrator.migrate(items)
+        exceptions.extend(migrator.exceptions)
+        stats = migrator.stats
+
     except Exception as e:
         exceptions.append(
             {
@@ -508,12 +531,72 @@ def migrate_issue_files(user, collection, journal_acron, issue_folder, force_upd
                 "type": str(type(e)),
             }
         )
-    return {"exceptions": exceptions, "migrated": migrated_ids}
+    return {"exceptions": exceptions, "migrated": migrated_ids, "stats": stats}
+
+
+def normalize_asset_stem(name):
+    return os.path.splitext(os.path.basename(name))[0].lower()
+
+
+class IssueAssetIndex:
+    """
+    Índice em memória dos MigratedFile de um fascículo, obtidos com uma única
+    consulta, para localizar os ativos digitais e as manifestações (pdf)
+    de todos os artigos sem consultar o banco de dados a cada href
+
+    Os arquivos são indexados pelo nome exato (original_name), pelos prefixos
+    que antecedem cada "." do nome (equivale a original_name__startswith) e
+    pelo nome sem extensão em minúsculas
+    """
+
+    def __init__(self, migrated_files):
+        self.files = list(migrated_files)
+        self.by_name = {}
+        self.by_prefix = {}
+        self.by_normalized_stem = {}
+        for item in self.files:
+            original_name = item.original_name
+            if not original_name:
+                continue
+            self.by_name.setdefault(original_name, []).append(item)
+            for i, c in enumerate(original_name):
+                if c == ".":
+                    self.by_prefix.setdefault(original_name[:i], []).append(item)
+            self.by_normalized_stem.setdefault(
+                normalize_asset_stem(original_name), []
+            ).append(item)
+
+    @classmethod
+    def from_issue_proc(cls, issue_proc):
+        return cls(issue_proc.issue_files.all())
+
+    def find(self, basename, name=None):
+        """
+        Retorna os arquivos cujo nome é basename ou começa com name + ".";
+        se não há nenhum, compara os nomes sem extensão e sem distinção de
+        maiúsculas e minúsculas
+        """
+        if not name:
+            name, ext = os.path.splitext(basename)
+        found = {}
+        for item in self.by_name.get(basename, []) + self.by_prefix.get(name, []):
+            found[item.id] = item
+        if found:
+            return list(found.values())
+        return list(self.by_normalized_stem.get(normalize_asset_stem(name), []))
+
+    def get_renditions(self, pkg_name):
+        return [
+            item
+            for item in self.files
+            if item.pkg_name == pkg_name and item.component_type == "rendition"
+        ]
 
 
 class PkgZipBuilder:
-    def __init__(self, xml_with_pre):
+    def __init__(self, xml_with_pre, asset_index=None):
         self.xml_with_pre = xml_with_pre
+        self.asset_index = asset_index
         self.sps_pkg_name = xml_with_pre.sps_pkg_name
         self.components = {}
         self.texts = {}
@@ -603,16 +686,21 @@ class PkgZipBuilder:
     def _build_sps_package_add_assets(self, zf, issue_proc):
         self.replacements = {}
         not_found = []
+        if self.asset_index is None:
+            self.asset_index = IssueAssetIndex.from_issue_proc(issue_proc)
         xml_assets = ArticleAssets(self.xml_with_pre.xmltree)
         for xml_graphic in xml_assets.items:
             try:
                 if self.replacements.get(xml_graphic.xlink_href):
                     continue
                 basename = os.path.basename(xml_graphic.xlink_href)
-                name, ext = os.path.splitext(basename)                
-                items = issue_proc.find_asset(basename, name)
+                name, ext = os.path.splitext(basename)
+                items = self.asset_index.find(basename, name)
+                if not items:
+                    # procura a "imagem" no contexto do "journal"
+                    items = list(issue_proc.find_journal_asset(name))
 
-                if not items.exists():
+                if not items:
                     not_found.append(xml_graphic.xlink_href)
                     continue
 
@@ -707,9 +795,13 @@ def import_journal_acron_id_records(
     article_proc_model,
     journal_proc,
     force_update,
+    batch_size=None,
 ):
     """
     Para um dado JournalAcronIdFile, criar itens em IdFileRecord
+
+    Os registros são gravados em lotes (IdFileRecord.bulk_create_or_update)
+    e stats informa as quantidades inserted, updated e unchanged
     """
     detail = {}
     stats = {}
@@ -749,18 +841,19 @@ def import_journal_acron_id_records(
                 _("IdFileRecord is already up-to-date with acron.id")
             )
 
-        for item in get_bases_work_acron_id_file_records(
+        IdFileRecord.bulk_create_or_update(
             user,
-            source_path,
-            classic_website,
-            journal_proc,
-        ):
-            item["force_update"] = force_update
-            IdFileRecord.create_or_update(
+            journal_id_file,
+            get_bases_work_acron_id_file_records(
                 user,
-                journal_id_file,
-                **item,
-            )
+                source_path,
+                classic_website,
+                journal_proc,
+            ),
+            force_update=force_update,
+            batch_size=batch_size,
+            stats=stats,
+        )
 
         issue_pids = IdFileRecord.objects.filter(
             item_type="article", todo=True, parent=journal_id_file,
@@ -768,19 +861,28 @@ def import_journal_acron_id_records(
             pid_sliced=Substr("item_pid", 2, Length("item_pid") - 6)
         ).values_list("pid_sliced", flat=True).distinct()
 
+        # importado aqui: proc.models importa migration.controller
+        from proc.models import ProcStatusRollup
+
         selected_issue_procs = journal_proc.issueproc_set.filter(
             pid__in=issue_pids,
         ).exclude(
             docs_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO
-        ).update(
+        )
+        selected_issue_proc_ids = list(
+            selected_issue_procs.values_list("id", flat=True)
+        )
+        ProcStatusRollup.update_queryset(
+            selected_issue_procs.model.objects.filter(id__in=selected_issue_proc_ids),
             docs_status=tracker_choices.PROGRESS_STATUS_REPROC,
             updated_by=user,
         )
-        article_proc_model.objects.filter(
-            issue_proc__in=selected_issue_procs or []
-        ).exclude(
-            xml_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO
-        ).update(
+        ProcStatusRollup.update_queryset(
+            article_proc_model.objects.filter(
+                issue_proc__in=selected_issue_proc_ids
+            ).exclude(
+                xml_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO
+            ),
             xml_status=tracker_choices.PROGRESS_STATUS_REPROC,
             updated_by=user,
         )
@@ -0,0 +1,275 @@
+"""
+Migração dos arquivos de um fascículo (imagens, PDFs, HTML e XML)
+
+Para cada arquivo do site clássico:
+
+- skipped: tamanho e data de modificação iguais aos registrados
+- touched: data de modificação diferente, mas conteúdo (SHA-1) igual;
+  atualiza somente os dados do registro
+- copied: conteúdo novo ou alterado; copiado para o storage em blocos
+  (memória limitada)
+- linked: como copied, mas com hardlink (MIGRATED_FILE_HARDLINK e
+  storage em sistema de arquivos)
+
+A leitura, o cálculo do SHA-1 e a cópia são executados em um pool de
+threads (MIGRATE_ISSUE_FILES_MAX_WORKERS); as gravações no banco de dados
+são feitas na thread principal, em lote.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from migration.models import MigratedFile, get_file_size, modified_date
+
+SKIPPED = "skipped"
+TOUCHED = "touched"
+COPIED = "copied"
+LINKED = "linked"
+
+CHUNK_SIZE = 1024 * 64
+
+
+def sha1_file(file_path, chunk_size=CHUNK_SIZE):
+    _sum = hashlib.sha1()
+    with open(file_path, "rb") as fp:
+        while True:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                break
+            _sum.update(chunk)
+    return _sum.hexdigest()
+
+
+def sha1_content(content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha1(content).hexdigest()
+
+
+class IssueFilesMigrator:
+    """
+    Registra em MigratedFile os arquivos de um fascículo, copiando para o
+    storage somente os arquivos novos ou alterados
+
+        migrator = IssueFilesMigrator(user, collection, force_update)
+        migrated_ids = migrator.migrate(items)
+        migrator.stats, migrator.exceptions
+    """
+
+    def __init__(
+        self, user, collection, force_update=False, max_workers=None, hardlink=None
+    ):
+        self.user = user
+        self.collection = collection
+        self.force_update = force_update
+        self.max_workers = max_workers or getattr(
+            settings, "MIGRATE_ISSUE_FILES_MAX_WORKERS", 4
+        )
+        if hardlink is None:
+            hardlink = getattr(settings, "MIGRATED_FILE_HARDLINK", False)
+        self.hardlink = hardlink
+        self.registered = {}
+        self.exceptions = []
+        self.stats = {SKIPPED: 0, TOUCHED: 0, COPIED: 0, LINKED: 0, "failed": 0}
+
+    def migrate(self, items):
+        """
+        Parameters
+        ----------
+        items : list of dict
+            original_path, source_path, component_type, lang, part,
+            pkg_name, content, file_datetime_iso e basename
+            (parâmetros de MigratedFile.create_or_update)
+
+        Returns
+        -------
+        list
+            ids dos MigratedFile
+        """
+        items = list(items)
+        if not items:
+            return []
+        self.registered = self.get_registered(
+            [item["original_path"] for item in items]
+        )
+        max_workers = max(1, min(self.max_workers, len(items)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self.process_item, items))
+        return self.save(results)
+
+    def get_registered(self, original_paths):
+        registered = {}
+        for obj in MigratedFile.objects.filter(
+            collection=self.collection, original_path__in=original_paths
+        ).order_by("-updated"):
+            # evita consultar collection em migrated_files_directory_path
+            obj.collection = self.collection
+            registered.setdefault(obj.original_path, obj)
+        return registered
+
+    def process_item(self, item):
+        """
+        Executado nas threads: não acessa o banco de dados
+        """
+        response = {"item": item}
+        try:
+            source_path = item["source_path"]
+            content = item.get("content")
+            file_datetime_iso = item.get("file_datetime_iso") or modified_date(
+                source_path
+            )
+            if content:
+                file_size = len(content)
+            else:
+                file_size = get_file_size(source_path)
+            response["file_datetime_iso"] = file_datetime_iso
+            response["file_size"] = file_size
+
+            obj = self.registered.get(item["original_path"])
+            if obj and not self.force_update:
+                if obj.is_up_to_date(file_datetime_iso) and (
+                    obj.file_size is None or obj.file_size == file_size
+                ):
+                    response["action"] = SKIPPED
+                    response["obj"] = obj
+                    return response
+
+            if content:
+                content_sha1 = sha1_content(content)
+            else:
+                content_sha1 = sha1_file(source_path)
+            response["content_sha1"] = content_sha1
+
+            if (
+                obj
+                and not self.force_update
+                and obj.content_sha1 == content_sha1
+                and obj.file_size == file_size
+                and obj.file
+            ):
+                response["action"] = TOUCHED
+                response["obj"] = obj
+                return response
+
+            if not obj:
+                obj = MigratedFile(
+                    collection=self.collection,
+                    original_path=item["original_path"],
+                    creator=self.user,
+                )
+                obj.original_href = obj.get_original_href(item["original_path"])
+                obj.original_name = item.get("basename") or os.path.basename(
+                    source_path
+                )
+            response["obj"] = obj
+            response["action"] = self.store_file(obj, source_path, content)
+        except Exception as e:
+            logging.exception(e)
+            response["action"] = None
+            response["error"] = e
+        return response
+
+    def store_file(self, obj, source_path, content=None):
+        """
+        Grava o arquivo no storage sem carregar todo o conteúdo em memória
+        """
+        try:
+            obj.file.delete(save=False)
+        except Exception:
+            pass
+
+        if content:
+            obj.file.save(obj.original_name, ContentFile(content), save=False)
+            return COPIED
+
+        if self.hardlink and isinstance(obj.file.storage, FileSystemStorage):
+            try:
+                self.link_file(obj, source_path)
+                return LINKED
+            except OSError as e:
+                # ex.: origem e destino em sistemas de arquivos diferentes
+                logging.info(f"Unable to link {source_path}: {e}")
+
+        with open(source_path, "rb") as fp:
+            obj.file.save(obj.original_name, File(fp), save=False)
+        return COPIED
+
+    def link_file(self, obj, source_path):
+        field = obj.file.field
+        storage = obj.file.storage
+        name = storage.get_available_name(
+            field.generate_filename(obj, obj.original_name),
+            max_length=field.max_length,
+        )
+        path = storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.link(source_path, path)
+        obj.file.name = name
+
+    def save(self, results):
+        """
+        Grava os registros novos e alterados em lote
+        """
+        now = datetime.now(timezone.utc)
+        to_create = []
+        to_update = []
+        for response in results:
+            item = response["item"]
+            action = response.get("action")
+            if not action:
+                e = response["error"]
+                self.stats["failed"] += 1
+                self.exceptions.append(
+                    {
+                        "file": item.get("source_path"),
+                        "error": str(e),
+                        "type": str(type(e)),
+                    }
+                )
+                continue
+            self.stats[action] += 1
+            if action == SKIPPED:
+                continue
+
+            obj = response["obj"]
+            obj.pkg_name = item.get("pkg_name")
+            obj.lang = item.get("lang")
+            obj.part = item.get("part")
+            obj.component_type = item.get("component_type")
+            obj.file_datetime_iso = response["file_datetime_iso"]
+            obj.file_size = response["file_size"]
+            obj.content_sha1 = response["content_sha1"]
+            if obj.pk:
+                obj.updated_by = self.user
+                obj.updated = now
+                to_update.append(obj)
+            else:
+                to_create.append(obj)
+
+        MigratedFile.objects.bulk_create(to_create)
+        MigratedFile.objects.bulk_update(
+            to_update,
+            [
+                "file",
+                "pkg_name",
+                "lang",
+                "part",
+                "component_type",
+                "file_datetime_iso",
+                "file_size",
+                "content_sha1",
+                "updated",
+                "updated_by",
+            ],
+        )
+        return [
+            response["obj"].id for response in results if response.get("action")
+        ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("migration", "0013_alter_classicwebsiteconfiguration_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idfilerecord",
+            name="data_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
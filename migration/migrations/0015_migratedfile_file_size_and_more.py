@@ -0,0 +1,22 @@
+# Generated by Django 5.2.3 on 2026-10-17 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("migration", "0014_idfilerecord_data_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="migratedfile",
+            name="content_sha1",
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.AddField(
+            model_name="migratedfile",
+            name="file_size",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
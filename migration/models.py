@@ -1,10 +1,14 @@
+import hashlib
+import json
 import logging
 import os
 import sys
 from datetime import datetime, timezone
 
+from django.conf import settings
+from django.core.files import File
 from django.core.files.base import ContentFile
-from django.db import DataError, IntegrityError, models
+from django.db import DataError, IntegrityError, models, transaction
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
@@ -21,6 +25,7 @@ from tracker import choices as tracker_choices
 from tracker.models import UnexpectedEvent
 
 from . import exceptions
+from .cache import get_pid_list
 
 
 def now():
@@ -61,6 +66,15 @@ def has_changed(file_path, other_file_size, other_file_modified_date):
     return False
 
 
+def get_data_hash(data):
+    """
+    Retorna o sha256 do conteúdo serializado de forma canônica
+    (chaves ordenadas) para comparar registros sem carregar o JSON do banco
+    """
+    content = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
 class ClassicWebsiteConfiguration(CommonControlField):
     collection = models.ForeignKey(
         Collection, on_delete=models.SET_NULL, null=True, blank=True
@@ -179,23 +193,15 @@ class ClassicWebsiteConfiguration(CommonControlField):
 
     def get_pid_list(self):
         """
-        Reads and returns a set of article PIDs from the file
+        Returns a frozenset of article PIDs from the file
         indicated by pid_list_path.
+
+        The content is cached per process and reloaded when the file
+        changes (mtime or size).
         """
         if not self.pid_list_path:
-            return set()
-        try:
-            with open(self.pid_list_path, "r") as fp:
-                return set(fp.read().split())
-        except FileNotFoundError:
-            logging.warning(
-                "pid_list_path file not found: %s", self.pid_list_path
-            )
-        except Exception as e:
-            logging.exception(
-                "Error reading pid_list_path %s: %s", self.pid_list_path, e
-            )
-        return set()
+            return frozenset()
+        return get_pid_list(self.pid_list_path)
 
     @property
     def pid_list(self):
@@ -254,6 +260,34 @@ class MigratedData(CommonControlField):
             and self.data == data
         )
 
+    @classmethod
+    def get_classic_website_status(cls, data):
+        """
+        Retorna migration_status, isis_created_date e isis_updated_date
+        obtidos de data (registro do site clássico)
+        """
+        try:
+            if not data:
+                raise ValueError("no data")
+            classic_ws_obj = cls.get_data_from_classic_website(data)
+        except Exception:
+            classic_ws_obj = None
+
+        if not classic_ws_obj:
+            return tracker_choices.PROGRESS_STATUS_PENDING, None, None
+
+        status = tracker_choices.PROGRESS_STATUS_TODO
+        try:
+            if classic_ws_obj.is_press_release:
+                status = tracker_choices.PROGRESS_STATUS_IGNORED
+        except AttributeError:
+            pass
+        return (
+            status,
+            classic_ws_obj.isis_created_date,
+            classic_ws_obj.isis_updated_date,
+        )
+
     @classmethod
     def register_classic_website_data(
         cls,
@@ -264,26 +298,9 @@ class MigratedData(CommonControlField):
         content_type,
         force_update=False,
     ):
-        try:
-            if not data:
-                raise ValueError(f"register_classic_website_data {collection} {pid}: no data")
-            classic_ws_obj = cls.get_data_from_classic_website(data)
-        except Exception as e:
-            classic_ws_obj = None
-
-        if classic_ws_obj:
-            status = tracker_choices.PROGRESS_STATUS_TODO
-            isis_created_date = classic_ws_obj.isis_created_date
-            isis_updated_date = classic_ws_obj.isis_updated_date
-            try:
-                if classic_ws_obj.is_press_release:
-                    status = tracker_choices.PROGRESS_STATUS_IGNORED
-            except AttributeError:
-                pass
-        else:
-            status = tracker_choices.PROGRESS_STATUS_PENDING
-            isis_created_date = None
-            isis_updated_date = None
+        status, isis_created_date, isis_updated_date = (
+            cls.get_classic_website_status(data)
+        )
         return cls.create_or_update_migrated_data(
             collection=collection,
             pid=pid,
@@ -296,6 +313,126 @@ class MigratedData(CommonControlField):
             force_update=force_update,
         )
 
+    @classmethod
+    def bulk_register_classic_website_data(
+        cls,
+        user,
+        collection,
+        items,
+        content_type,
+        force_update=False,
+        batch_size=None,
+    ):
+        """
+        Equivale a register_classic_website_data para cada item (pid, data),
+        obtendo os registros existentes com uma consulta e gravando as
+        alterações com bulk_update
+
+        Os registros novos são gravados um a um (herança multi-tabela não
+        permite bulk_create), em uma única transação
+
+        Returns
+        -------
+        dict
+            pid -> MigratedData
+        """
+        items = list(items)
+        found = {}
+        duplicated = []
+        for obj in cls.objects.filter(
+            collection=collection, pid__in=[pid for pid, data in items]
+        ).order_by("-updated"):
+            if obj.pid in found:
+                duplicated.append(obj.pk)
+            else:
+                found[obj.pid] = obj
+
+        registered = {}
+        to_create = []
+        to_update = []
+        for pid, data in items:
+            status, isis_created_date, isis_updated_date = (
+                cls.get_classic_website_status(data)
+            )
+            obj = found.get(pid)
+            if obj:
+                if obj.is_up_to_date(isis_updated_date, data) and not force_update:
+                    registered[pid] = obj
+                    continue
+                obj.updated_by = user
+                obj.updated = datetime.now(timezone.utc)
+                to_update.append(obj)
+            else:
+                obj = cls(collection=collection, pid=pid, creator=user)
+                to_create.append(obj)
+            obj.set_migrated_data(
+                collection=collection,
+                pid=pid,
+                data=data,
+                migration_status=status,
+                isis_created_date=isis_created_date,
+                isis_updated_date=isis_updated_date,
+                content_type=content_type,
+            )
+            registered[pid] = obj
+
+        try:
+            with transaction.atomic():
+                if duplicated:
+                    cls.objects.filter(pk__in=duplicated).delete()
+                for obj in to_create:
+                    obj.save()
+                if to_update:
+                    cls.objects.bulk_update(
+                        to_update,
+                        [
+                            "updated",
+                            "updated_by",
+                            "content_type",
+                            "collection",
+                            "pid",
+                            "migration_status",
+                            "data",
+                            "isis_created_date",
+                            "isis_updated_date",
+                        ],
+                        batch_size=batch_size,
+                    )
+        except Exception as e:
+            raise exceptions.CreateOrUpdateMigratedError(
+                _("Unable to bulk_register_classic_website_data {} {} {}").format(
+                    collection, type(e), e
+                )
+            )
+        return registered
+
+    def set_migrated_data(
+        self,
+        collection=None,
+        pid=None,
+        data=None,
+        migration_status=None,
+        isis_created_date=None,
+        isis_updated_date=None,
+        content_type=None,
+    ):
+        self.content_type = content_type or self.content_type
+        self.collection = collection or self.collection
+        self.pid = pid or self.pid
+        self.migration_status = migration_status or self.migration_status
+        self.data = data or self.data
+
+        self.isis_created_date = isis_created_date or self.isis_created_date
+        self.isis_updated_date = isis_updated_date or self.isis_updated_date
+
+        _date = now()[:10].replace("-", "")
+
+        if self.isis_created_date:
+            if not self.isis_updated_date:
+                self.isis_updated_date = _date
+        else:
+            self.isis_created_date = _date
+
     @classmethod
     def create_or_update_migrated_data(
         cls,
@@ -328,22 +465,15 @@ class MigratedData(CommonControlField):
             obj.creator = user
 
         try:
-            obj.content_type = content_type or obj.content_type
-            obj.collection = collection or obj.collection
-            obj.pid = pid or obj.pid
-            obj.migration_status = migration_status or obj.migration_status
-            obj.data = data or obj.data
-
-            obj.isis_created_date = isis_created_date or obj.isis_created_date
-            obj.isis_updated_date = isis_updated_date or obj.isis_updated_date
-
-            _date = now()[:10].replace("-", "")
-
-            if obj.isis_created_date:
-                if not obj.isis_updated_date:
-                    obj.isis_updated_date = _date
-            else:
-                obj.isis_created_date = _date
+            obj.set_migrated_data(
+                collection=collection,
+                pid=pid,
+                data=data,
+                migration_status=migration_status,
+                isis_created_date=isis_created_date,
+                isis_updated_date=isis_updated_date,
+                content_type=content_type,
+            )
             obj.save()
             return obj
         except Exception as e:
@@ -407,6 +537,9 @@ class MigratedFile(CommonControlField):
     lang = models.CharField(_("Language"), max_length=2, null=True, blank=True)
     pkg_name = models.CharField(_("Pkg name"), max_length=100, null=True, blank=True)
     part = models.CharField(_("Part"), max_length=1, null=True, blank=True)
+    # tamanho e SHA-1 do arquivo de origem para identificar alterações
+    file_size = models.BigIntegerField(null=True, blank=True)
+    content_sha1 = models.CharField(max_length=40, null=True, blank=True)
 
     autocomplete_search_field = "original_path"
 
@@ -525,8 +658,7 @@ class MigratedFile(CommonControlField):
 
         if not content:
             try:
-                with open(source_path, "rb") as fp:
-                    content = fp.read()
+                fp = open(source_path, "rb")
             except Exception as e:
                 logging.info(
                     f"MigratedFile.create_or_update - {source_path} - readfile"
@@ -544,7 +676,12 @@ class MigratedFile(CommonControlField):
                 raise e
 
         try:
-            obj.save_file(obj.original_name, content or "")
+            if content:
+                obj.save_file(obj.original_name, content)
+            else:
+                # grava em blocos, sem carregar o arquivo inteiro em memória
+                with fp:
+                    obj.save_file(obj.original_name, File(fp))
         except Exception as e:
             logging.info(f"MigratedFile.create_or_update - {source_path} - save_file")
             logging.exception(e)
@@ -595,7 +732,9 @@ class MigratedFile(CommonControlField):
             self.file.delete(save=save)
         except Exception as e:
             pass
-        self.file.save(name, ContentFile(content))
+        if not isinstance(content, File):
+            content = ContentFile(content)
+        self.file.save(name, content)
 
     def is_up_to_date(self, file_datetime_iso):
         return bool(
@@ -878,6 +1017,7 @@ class IdFileRecord(CommonControlField, Orderable):
     item_pid = models.CharField(_("PID"), max_length=23)
     item_type = models.CharField(_("Type"), max_length=10)
     todo = models.BooleanField(default=True)
+    data_hash = models.CharField(max_length=64, null=True, blank=True)
 
     panels = [
         FieldPanel("item_pid", read_only=True),
@@ -940,6 +1080,7 @@ class IdFileRecord(CommonControlField, Orderable):
                 item_type=item_type,
                 item_pid=item_pid,
                 data=data,
+                data_hash=get_data_hash(data),
                 todo=todo,
             )
             obj.save()
@@ -989,6 +1130,7 @@ class IdFileRecord(CommonControlField, Orderable):
             obj.updated_by = user
             obj.updated = datetime.now(timezone.utc)
             obj.data = data
+            obj.data_hash = get_data_hash(data)
             obj.todo = True
             obj.save()
             return obj
@@ -1002,6 +1144,130 @@ class IdFileRecord(CommonControlField, Orderable):
                 todo,
             )
 
+    @classmethod
+    def get_data_hashes(cls, parent):
+        """
+        Obtém, em uma única consulta, os hashes dos registros de parent
+        indexados por (item_type, item_pid)
+        """
+        return {
+            (item_type, item_pid): data_hash
+            for item_type, item_pid, data_hash in cls.objects.filter(
+                parent=parent
+            ).values_list("item_type", "item_pid", "data_hash")
+        }
+
+    @classmethod
+    def bulk_create_or_update(
+        cls,
+        user,
+        parent,
+        items,
+        force_update=None,
+        batch_size=None,
+        stats=None,
+    ):
+        """
+        Cria / atualiza IdFileRecord em lotes.
+
+        Compara o hash do conteúdo de cada item com o hash registrado e
+        grava somente os registros novos ou alterados, com
+        bulk_create(update_conflicts=True) em lotes de batch_size.
+
+        Args:
+            items: iterável de dict(item_type, item_pid, data)
+
+        Returns:
+            dict com as quantidades inserted, updated, unchanged e, se
+            houver registros inválidos (UnexpectedEvent), failed
+        """
+        batch_size = batch_size or settings.ID_FILE_RECORD_BATCH_SIZE
+        if stats is None:
+            stats = {}
+        stats.setdefault("inserted", 0)
+        stats.setdefault("updated", 0)
+        stats.setdefault("unchanged", 0)
+
+        known_hashes = cls.get_data_hashes(parent)
+
+        batch = {}
+        for item in items:
+            key = (item["item_type"], item["item_pid"])
+            data_hash = get_data_hash(item["data"])
+            if key in known_hashes:
+                if not force_update and known_hashes[key] == data_hash:
+                    stats["unchanged"] += 1
+                    continue
+                operation = "updated"
+            else:
+                operation = "inserted"
+            known_hashes[key] = data_hash
+
+            obj = cls(
+                creator=user,
+                updated_by=user,
+                parent=parent,
+                item_type=item["item_type"],
+                item_pid=item["item_pid"],
+                data=item["data"],
+                data_hash=data_hash,
+                todo=True,
+            )
+            batch[key] = (obj, operation)
+            if len(batch) >= batch_size:
+                cls._bulk_upsert(user, batch.values(), batch_size, stats)
+                batch = {}
+
+        if batch:
+            cls._bulk_upsert(user, batch.values(), batch_size, stats)
+        return stats
+
+    @classmethod
+    def _bulk_upsert(cls, user, items, batch_size, stats):
+        """
+        Grava o lote items (obj, operation); se o lote falha (DataError),
+        grava um a um, registrando e ignorando os registros inválidos
+        """
+        items = list(items)
+        try:
+            with transaction.atomic():
+                cls._upsert([obj for obj, operation in items], batch_size)
+        except DataError:
+            for obj, operation in items:
+                try:
+                    with transaction.atomic():
+                        cls._upsert([obj], batch_size)
+                except DataError as e:
+                    exc_type, exc_value, exc_traceback = sys.exc_info()
+                    UnexpectedEvent.create(
+                        e=e,
+                        exc_traceback=exc_traceback,
+                        detail={
+                            "task": "migration.models.IdFileRecord.bulk_create_or_update",
+                            "user_id": user.id,
+                            "username": user.username,
+                            "item_type": obj.item_type,
+                            "item_pid": obj.item_pid,
+                            "data": obj.data,
+                        },
+                    )
+                    stats["failed"] = stats.get("failed", 0) + 1
+                else:
+                    stats[operation] += 1
+        else:
+            for obj, operation in items:
+                stats[operation] += 1
+
+    @classmethod
+    def _upsert(cls, objs, batch_size):
+        cls.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["parent", "item_type", "item_pid"],
+            update_fields=["data", "data_hash", "todo", "updated", "updated_by"],
+        )
+
     def get_record_data(self, journal_data=None, issue_data=None):
         data = {}
         data["title"] = journal_data
@@ -1035,6 +1301,57 @@ class IdFileRecord(CommonControlField, Orderable):
             "todo": self.todo,
         }
 
+    @classmethod
+    def get_records_data(cls, records, journal_data=None, issue_data=None):
+        """
+        Equivale a get_record_data para cada registro de records, obtendo
+        os registros de fascículo e de parágrafo com uma consulta cada
+
+        Returns
+        -------
+        list of dict
+            data, pid e todo ou, se não há registro de fascículo, pid e error
+        """
+        records = list(records)
+        parent_ids = {record.parent_id for record in records}
+
+        issues = {}
+        if not issue_data:
+            for parent_id, item_pid, data in cls.objects.filter(
+                parent_id__in=parent_ids,
+                item_pid__in={record.item_pid[1:-5] for record in records},
+                item_type="issue",
+            ).values_list("parent_id", "item_pid", "data"):
+                issues[(parent_id, item_pid)] = data
+
+        paragraphs = {}
+        for parent_id, item_pid, data in cls.objects.filter(
+            parent_id__in=parent_ids,
+            item_pid__in=[record.item_pid for record in records],
+            item_type="paragraph",
+        ).values_list("parent_id", "item_pid", "data"):
+            paragraphs[(parent_id, item_pid)] = data
+
+        items = []
+        for record in records:
+            data = {"title": journal_data}
+            if issue_data:
+                data["issue"] = issue_data
+            else:
+                try:
+                    data["issue"] = issues[(record.parent_id, record.item_pid[1:-5])]
+                except KeyError:
+                    items.append(
+                        {"pid": record.item_pid, "error": "issue record not found"}
+                    )
+                    continue
+            paragraph = paragraphs.get((record.parent_id, record.item_pid))
+            if paragraph is not None:
+                data["paragraph"] = paragraph
+            data["article"] = record.data
+            items.append({"data": data, "pid": record.item_pid, "todo": record.todo})
+        return items
+
     @classmethod
     def document_records_to_migrate(cls, collection, issue_pid, force_update):
         params = {}
@@ -0,0 +1,109 @@
+"""
+Mede a gravação de IdFileRecord a partir de um arquivo acron.id sintético
+
+Uso:
+    python manage.py runscript migration.scripts.bench_id_file_records \
+        --script-args 100000 1000 false
+
+Todas as gravações são desfeitas ao final (transaction rollback).
+"""
+import os
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from scielo_classic_website.iid2json.id2json3 import get_doc_records
+
+from migration.models import IdFileRecord, JournalAcronIdFile
+
+User = get_user_model()
+
+ISSN = "0000-0000"
+ARTICLES_BY_ISSUE = 100
+
+
+class Rollback(Exception): ...
+
+
+def write_id_file(file_path, total):
+    """
+    Gera acron.id com total registros (1 registro de fascículo para cada
+    ARTICLES_BY_ISSUE registros de artigo)
+    """
+    mfn = 0
+    with open(file_path, "w", encoding="iso-8859-1") as fp:
+        for i in range(total):
+            issue_order = f"{2000 + i // (ARTICLES_BY_ISSUE * 10):04d}{i // ARTICLES_BY_ISSUE % 10 + 1:04d}"
+            if i % ARTICLES_BY_ISSUE == 0:
+                mfn += 1
+                fp.write(f"!ID {mfn:07d}\n")
+                fp.write("!v706!i\n")
+                fp.write(f"!v035!{ISSN}\n")
+                fp.write(f"!v036!{issue_order}\n")
+                fp.write(f"!v880!{ISSN}{issue_order}\n")
+            mfn += 1
+            pid = f"S{ISSN}{issue_order}{i % ARTICLES_BY_ISSUE + 1:05d}"
+            fp.write(f"!ID {mfn:07d}\n")
+            fp.write("!v706!h\n")
+            fp.write(f"!v880!{pid}\n")
+            fp.write(f"!v012!Title {i}^len\n")
+            fp.write(f"!v010!^nName{i}^sSurname{i}\n")
+
+
+def legacy_import(user, parent, items):
+    for item in items:
+        IdFileRecord.create_or_update(user, parent, **item)
+
+
+def bulk_import(user, parent, items, batch_size):
+    return IdFileRecord.bulk_create_or_update(
+        user, parent, items, batch_size=batch_size
+    )
+
+
+def read_items(file_path):
+    for item in get_doc_records(file_path):
+        if item.get("doc_id"):
+            yield dict(
+                item_type="article", item_pid=item["doc_id"], data=item["doc_data"]
+            )
+        elif item.get("issue_id"):
+            yield dict(
+                item_type="issue", item_pid=item["issue_id"], data=item["issue_data"]
+            )
+
+
+def measure(label, func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - t0
+    print(f"{label}: {elapsed:.2f}s {result or ''}")
+    return elapsed
+
+
+def run(total="100000", batch_size="1000", legacy="false"):
+    total = int(total)
+    batch_size = int(batch_size)
+    user = User.objects.filter(is_superuser=True).first()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        file_path = os.path.join(tmpdir, "bench.id")
+        write_id_file(file_path, total)
+        items = list(read_items(file_path))
+        print(f"records: {len(items)}")
+
+        try:
+            with transaction.atomic():
+                parent = JournalAcronIdFile.objects.create(
+                    creator=user,
+                    journal_acron="bench",
+                    source_path=file_path,
+                )
+                measure("bulk (insert)", bulk_import, user, parent, items, batch_size)
+                measure("bulk (unchanged)", bulk_import, user, parent, items, batch_size)
+                if legacy == "true":
+                    measure("legacy (unchanged)", legacy_import, user, parent, items)
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,150 @@
+"""
+Mede a migração dos arquivos de um fascículo (IssueFilesMigrator) a partir
+de uma árvore htdocs sintética
+
+Uso:
+    python manage.py runscript migration.scripts.bench_issue_files \
+        --script-args 5000 20000 4 false
+
+Argumentos: total de arquivos, tamanho de cada arquivo (bytes), número de
+threads e se executa também o modo legado (MigratedFile.create_or_update).
+
+Todas as gravações são desfeitas ao final (transaction rollback) e os
+arquivos são gravados em MEDIA_ROOT temporário.
+"""
+import os
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import override_settings
+
+from collection.models import Collection
+from migration.file_migration import IssueFilesMigrator
+from migration.models import MigratedFile
+
+User = get_user_model()
+
+FILES_BY_ARTICLE = 10
+
+
+class Rollback(Exception): ...
+
+
+def write_htdocs_tree(root, total, file_size):
+    """
+    Gera htdocs/img/revistas/bench/v1n1 com total arquivos de file_size bytes
+
+    Returns
+    -------
+    list of dict
+        parâmetros de IssueFilesMigrator.migrate
+    """
+    folder = os.path.join(root, "htdocs", "img", "revistas", "bench", "v1n1")
+    os.makedirs(folder)
+    items = []
+    for i in range(total):
+        pkg_name = f"a{i // FILES_BY_ARTICLE + 1:04d}"
+        name = f"{pkg_name}f{i % FILES_BY_ARTICLE + 1}.jpg"
+        path = os.path.join(folder, name)
+        with open(path, "wb") as fp:
+            fp.write(os.urandom(file_size))
+        items.append(
+            dict(
+                original_path=f"htdocs/img/revistas/bench/v1n1/{name}",
+                source_path=path,
+                component_type="asset",
+                pkg_name=pkg_name,
+                basename=name,
+            )
+        )
+    return items
+
+
+def legacy_migrate(user, collection, items):
+    for item in items:
+        MigratedFile.create_or_update(
+            user=user,
+            collection=collection,
+            original_path=item["original_path"],
+            source_path=item["source_path"],
+            component_type=item["component_type"],
+            pkg_name=item["pkg_name"],
+        )
+
+
+def migrate(user, collection, items, max_workers, hardlink=False):
+    migrator = IssueFilesMigrator(
+        user, collection, max_workers=max_workers, hardlink=hardlink
+    )
+    migrator.migrate(items)
+    return migrator.stats
+
+
+def measure(label, func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - t0
+    print(f"{label}: {elapsed:.2f}s {result or ''}")
+    return elapsed
+
+
+def touch(items):
+    for item in items:
+        os.utime(item["source_path"], (1700000000, 1700000000))
+
+
+def run(total="5000", file_size="20000", max_workers="4", legacy="false"):
+    total = int(total)
+    file_size = int(file_size)
+    max_workers = int(max_workers)
+    user = User.objects.filter(is_superuser=True).first()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        items = write_htdocs_tree(tmpdir, total, file_size)
+        print(f"files: {len(items)} ({total * file_size / 1024 / 1024:.1f} MB)")
+
+        with override_settings(MEDIA_ROOT=os.path.join(tmpdir, "media")):
+            try:
+                with transaction.atomic():
+                    collection = Collection.objects.create(
+                        acron="bench", name="bench", creator=user
+                    )
+                    if legacy == "true":
+                        measure(
+                            "legacy (copy)", legacy_migrate, user, collection, items
+                        )
+                        MigratedFile.objects.filter(collection=collection).delete()
+                    measure(
+                        "copy", migrate, user, collection, items, max_workers
+                    )
+                    measure(
+                        "unchanged", migrate, user, collection, items, max_workers
+                    )
+                    touch(items)
+                    measure(
+                        "touched", migrate, user, collection, items, max_workers
+                    )
+                    if legacy == "true":
+                        touch(items[: len(items) // 2])
+                        measure(
+                            "legacy (touched)",
+                            legacy_migrate,
+                            user,
+                            collection,
+                            items,
+                        )
+                    MigratedFile.objects.filter(collection=collection).delete()
+                    measure(
+                        "hardlink",
+                        migrate,
+                        user,
+                        collection,
+                        items,
+                        max_workers,
+                        True,
+                    )
+                    raise Rollback
+            except Rollback:
+                pass
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from migration import cache
+from migration.cache import ClassicWebsiteCache, PidListCache
+from migration.models import ClassicWebsiteConfiguration
+
+
+class ClassicWebsiteCacheTest(TestCase):
+    def test_get_returns_stored_instance_for_same_version(self):
+        classic_website_cache = ClassicWebsiteCache(timeout=60)
+        self.assertIsNone(classic_website_cache.get(1, "v1"))
+        classic_website_cache.put(1, "v1", "CW")
+        self.assertEqual(classic_website_cache.get(1, "v1"), "CW")
+        self.assertEqual(classic_website_cache.stats["hits"], 1)
+        self.assertEqual(classic_website_cache.stats["misses"], 1)
+
+    def test_configuration_change_invalidates(self):
+        classic_website_cache = ClassicWebsiteCache(timeout=60)
+        classic_website_cache.put(1, "v1", "CW")
+        self.assertIsNone(classic_website_cache.get(1, "v2"))
+        self.assertEqual(classic_website_cache.stats["invalidations"], 1)
+        self.assertEqual(classic_website_cache.stats["items"], 0)
+
+    def test_expired(self):
+        classic_website_cache = ClassicWebsiteCache(timeout=60)
+        with patch("migration.cache.time.monotonic", return_value=1000):
+            classic_website_cache.put(1, "v1", "CW")
+        with patch("migration.cache.time.monotonic", return_value=1061):
+            self.assertIsNone(classic_website_cache.get(1, "v1"))
+
+    def test_timeout_zero_disables_cache(self):
+        classic_website_cache = ClassicWebsiteCache(timeout=0)
+        classic_website_cache.put(1, "v1", "CW")
+        self.assertIsNone(classic_website_cache.get(1, "v1"))
+
+
+class PidListCacheTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "pids.txt")
+
+    def write(self, content, mtime):
+        with open(self.path, "w") as fp:
+            fp.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_file_is_read_once(self):
+        pid_list_cache = PidListCache()
+        self.write("S1\nS2\n", 1700000000)
+        self.assertEqual(pid_list_cache.get(self.path), frozenset({"S1", "S2"}))
+        with patch("builtins.open") as mock_open:
+            self.assertEqual(
+                pid_list_cache.get(self.path), frozenset({"S1", "S2"})
+            )
+            mock_open.assert_not_called()
+        self.assertEqual(pid_list_cache.stats["hits"], 1)
+        self.assertEqual(pid_list_cache.stats["pids"], 2)
+
+    def test_file_change_reloads(self):
+        pid_list_cache = PidListCache()
+        self.write("S1\n", 1700000000)
+        pid_list_cache.get(self.path)
+        self.write("S1\nS3\n", 1700000100)
+        self.assertEqual(pid_list_cache.get(self.path), frozenset({"S1", "S3"}))
+        self.assertEqual(pid_list_cache.stats["invalidations"], 1)
+
+    def test_missing_file(self):
+        self.assertEqual(cache.get_pid_list(self.path), frozenset())
+
+    def test_classic_website_configuration_pid_list(self):
+        self.write("S1 S2", 1700000000)
+        config = ClassicWebsiteConfiguration(pid_list_path=self.path)
+        self.assertEqual(config.pid_list, frozenset({"S1", "S2"}))
+        self.assertEqual(ClassicWebsiteConfiguration().pid_list, frozenset())
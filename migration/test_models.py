@@ -1,7 +1,18 @@
 import unittest
 from unittest.mock import MagicMock, Mock, patch
 
-from migration.models import MigratedData
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from migration.models import (
+    IdFileRecord,
+    JournalAcronIdFile,
+    MigratedData,
+    get_data_hash,
+)
+from tracker.models import UnexpectedEvent
+
+User = get_user_model()
 
 
 class MigratedDataCreateOrUpdateTestCase(unittest.TestCase):
@@ -77,3 +88,95 @@ class MigratedDataCreateOrUpdateTestCase(unittest.TestCase):
         mock_exclude_qs.delete.assert_called_once()
         # Verify the most recent was kept and saved
         mock_recent.save.assert_called_once()
+
+
+class IdFileRecordBulkCreateOrUpdateTestCase(TestCase):
+    """Test cases for IdFileRecord.bulk_create_or_update()."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="migration", password="x")
+        self.parent = JournalAcronIdFile.objects.create(
+            creator=self.user, source_path="/bases-work/acron/acron.id"
+        )
+
+    def _items(self):
+        return [
+            {"item_type": "issue", "item_pid": "0034-891020040001", "data": [{"v": 1}]},
+            {"item_type": "article", "item_pid": "S0034-89102004000100001", "data": [{"v": 2}]},
+            {"item_type": "article", "item_pid": "S0034-89102004000100002", "data": [{"v": 3}]},
+        ]
+
+    def _records(self):
+        return {
+            (item.item_type, item.item_pid): item.data
+            for item in IdFileRecord.objects.filter(parent=self.parent)
+        }
+
+    def test_counts_inserted_updated_and_unchanged(self):
+        items = self._items()
+        IdFileRecord.bulk_create_or_update(
+            self.user, self.parent, items[:2], batch_size=10
+        )
+        items[1]["data"] = [{"v": "new"}]
+
+        stats = IdFileRecord.bulk_create_or_update(
+            self.user, self.parent, items, batch_size=10
+        )
+
+        self.assertEqual(stats, {"inserted": 1, "updated": 1, "unchanged": 1})
+        self.assertEqual(
+            {
+                ("issue", "0034-891020040001"): [{"v": 1}],
+                ("article", "S0034-89102004000100001"): [{"v": "new"}],
+                ("article", "S0034-89102004000100002"): [{"v": 3}],
+            },
+            self._records(),
+        )
+
+    def test_force_update_writes_unchanged_records(self):
+        IdFileRecord.bulk_create_or_update(
+            self.user, self.parent, self._items()[:1], batch_size=10
+        )
+        IdFileRecord.objects.filter(parent=self.parent).update(todo=False)
+
+        stats = IdFileRecord.bulk_create_or_update(
+            self.user, self.parent, self._items(), force_update=True, batch_size=10
+        )
+
+        self.assertEqual(stats, {"inserted": 2, "updated": 1, "unchanged": 0})
+        self.assertEqual(
+            3, IdFileRecord.objects.filter(parent=self.parent, todo=True).count()
+        )
+
+    def test_writes_in_chunks_of_batch_size(self):
+        with patch.object(
+            IdFileRecord, "_upsert", wraps=IdFileRecord._upsert
+        ) as mock_upsert:
+            IdFileRecord.bulk_create_or_update(
+                self.user, self.parent, self._items(), batch_size=2
+            )
+
+        self.assertEqual(mock_upsert.call_count, 2)
+        self.assertEqual(3, len(self._records()))
+
+    def test_invalid_record_is_skipped_and_registered(self):
+        items = self._items()
+        # item_pid maior que max_length (23) invalida o lote
+        items.insert(1, {"item_type": "article", "item_pid": "X" * 30, "data": []})
+        total_events = UnexpectedEvent.objects.count()
+
+        stats = IdFileRecord.bulk_create_or_update(
+            self.user, self.parent, items, batch_size=10
+        )
+
+        self.assertEqual(
+            stats, {"inserted": 3, "updated": 0, "unchanged": 0, "failed": 1}
+        )
+        self.assertEqual(3, len(self._records()))
+        self.assertEqual(total_events + 1, UnexpectedEvent.objects.count())
+
+    def test_data_hash_ignores_key_order(self):
+        self.assertEqual(
+            get_data_hash({"a": 1, "b": [1, 2]}),
+            get_data_hash({"b": [1, 2], "a": 1}),
+        )
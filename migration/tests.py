@@ -1,14 +1,21 @@
+import os
+import tempfile
 from unittest.mock import Mock, PropertyMock
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from lxml import etree
 
 from core.users.models import User
 
+from .controller import IssueAssetIndex, PkgZipBuilder
+from .file_migration import IssueFilesMigrator
 from .models import (
     Collection,
     JournalAcronIdFile,
+    MigratedFile,
     extract_relative_path,
     migrated_files_directory_path,
+    modified_date,
 )
 
 # Create your tests here.
@@ -59,3 +66,174 @@ class TestMigratedFilesDirectoryPath(TestCase):
                 mock_instance.collection.acron = "spa"
                 path = migrated_files_directory_path(mock_instance, "test.xml")
                 self.assertEqual(path, f"classic_website/spa/{path_relative}")
+
+
+class IssueAssetIndexTest(TestCase):
+    def _file(self, id, original_name, pkg_name=None, component_type="asset"):
+        return MigratedFile(
+            id=id,
+            original_name=original_name,
+            pkg_name=pkg_name,
+            component_type=component_type,
+        )
+
+    def test_find_by_name_and_prefix(self):
+        index = IssueAssetIndex(
+            [
+                self._file(1, "a01f1.jpg"),
+                self._file(2, "a01f1.tif"),
+                self._file(3, "a01f10.jpg"),
+            ]
+        )
+        self.assertEqual(
+            [item.id for item in index.find("a01f1.jpg")], [1, 2]
+        )
+        self.assertEqual([item.id for item in index.find("a01f1.gif")], [1, 2])
+
+    def test_find_by_normalized_stem(self):
+        index = IssueAssetIndex([self._file(1, "a01f1.jpg")])
+        self.assertEqual([item.id for item in index.find("A01F1.JPG")], [1])
+        self.assertEqual(index.find("a01f2.jpg"), [])
+
+    def test_get_renditions(self):
+        index = IssueAssetIndex(
+            [
+                self._file(1, "a01.pdf", "a01", "rendition"),
+                self._file(2, "en_a01.pdf", "a01", "rendition"),
+                self._file(3, "a02.pdf", "a02", "rendition"),
+                self._file(4, "a01f1.jpg", "a01", "asset"),
+            ]
+        )
+        self.assertEqual([item.id for item in index.get_renditions("a01")], [1, 2])
+
+
+class PkgZipBuilderAddAssetsTest(TestCase):
+    TOTAL = 100
+
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        for i in range(1, self.TOTAL + 1):
+            MigratedFile.objects.create(
+                creator=self.user,
+                original_name=f"a01f{i}.jpg",
+                original_href=f"/img/revistas/acron/v1n1/a01f{i}.jpg",
+                file=f"classic_website/spa/htdocs/img/revistas/acron/v1n1/a01f{i}.jpg",
+                pkg_name="a01",
+                component_type="asset",
+            )
+        figs = "".join(
+            f'<fig id="f{i}"><graphic xlink:href="a01f{i}.jpg"/></fig>'
+            for i in range(1, self.TOTAL + 1)
+        )
+        xml = (
+            '<article xmlns:xlink="http://www.w3.org/1999/xlink" xml:lang="en">'
+            f"<body>{figs}</body></article>"
+        )
+        self.xml_with_pre = Mock()
+        self.xml_with_pre.xmltree = etree.fromstring(xml).getroottree()
+        self.xml_with_pre.sps_pkg_name = "1234-5678-acron-01-01-1"
+
+        self.issue_proc = Mock()
+        self.issue_proc.issue_files = MigratedFile.objects.filter(pkg_name="a01")
+
+    def test_resolves_all_assets_with_one_query(self):
+        builder = PkgZipBuilder(self.xml_with_pre)
+        zf = Mock()
+        with self.assertNumQueries(1):
+            builder._build_sps_package_add_assets(zf, self.issue_proc)
+
+        self.assertEqual(len(builder.replacements), self.TOTAL)
+        self.assertEqual(zf.write.call_count, self.TOTAL)
+        self.issue_proc.find_asset.assert_not_called()
+        self.issue_proc.find_journal_asset.assert_not_called()
+
+
+class IssueFilesMigratorTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        self.collection = Collection.objects.create(
+            acron="scl", name="SciELO", creator=self.user
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.source_dir = os.path.join(self.tmpdir.name, "htdocs", "img", "revistas")
+        os.makedirs(self.source_dir)
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmpdir.name, "media"))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def write(self, name, content):
+        path = os.path.join(self.source_dir, name)
+        with open(path, "wb") as fp:
+            fp.write(content)
+        return path
+
+    def item(self, name):
+        return dict(
+            original_path=f"htdocs/img/revistas/{name}",
+            source_path=os.path.join(self.source_dir, name),
+            component_type="asset",
+            pkg_name="a01",
+        )
+
+    def migrate(self, names, **kwargs):
+        migrator = IssueFilesMigrator(
+            self.user, self.collection, max_workers=2, **kwargs
+        )
+        ids = migrator.migrate([self.item(name) for name in names])
+        return ids, migrator.stats
+
+    def test_new_files_are_copied(self):
+        self.write("a01f1.jpg", b"image 1")
+        self.write("a01f2.jpg", b"image 2")
+        ids, stats = self.migrate(["a01f1.jpg", "a01f2.jpg"])
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(stats["copied"], 2)
+        obj = MigratedFile.objects.get(original_name="a01f1.jpg")
+        self.assertEqual(obj.file_size, 7)
+        self.assertIsNotNone(obj.content_sha1)
+        self.assertEqual(obj.original_href, "/img/revistas/a01f1.jpg")
+        with open(obj.file.path, "rb") as fp:
+            self.assertEqual(fp.read(), b"image 1")
+
+    def test_unchanged_files_are_skipped(self):
+        self.write("a01f1.jpg", b"image 1")
+        first_ids, stats = self.migrate(["a01f1.jpg"])
+        with self.assertNumQueries(1):
+            ids, stats = self.migrate(["a01f1.jpg"])
+        self.assertEqual(ids, first_ids)
+        self.assertEqual(stats["skipped"], 1)
+
+    def test_files_with_new_date_and_same_content_are_not_copied(self):
+        path = self.write("a01f1.jpg", b"image 1")
+        self.migrate(["a01f1.jpg"])
+        file_name = MigratedFile.objects.get().file.name
+        os.utime(path, (1700000000, 1700000000))
+        ids, stats = self.migrate(["a01f1.jpg"])
+        self.assertEqual(stats["touched"], 1)
+        obj = MigratedFile.objects.get()
+        self.assertEqual(obj.file.name, file_name)
+        self.assertEqual(obj.file_datetime_iso, modified_date(path))
+
+    def test_changed_files_are_copied(self):
+        path = self.write("a01f1.jpg", b"image 1")
+        self.migrate(["a01f1.jpg"])
+        self.write("a01f1.jpg", b"image 1 changed")
+        os.utime(path, (1700000000, 1700000000))
+        ids, stats = self.migrate(["a01f1.jpg"])
+        self.assertEqual(stats["copied"], 1)
+        obj = MigratedFile.objects.get()
+        with open(obj.file.path, "rb") as fp:
+            self.assertEqual(fp.read(), b"image 1 changed")
+
+    def test_hardlink(self):
+        path = self.write("a01.pdf", b"%PDF")
+        ids, stats = self.migrate(["a01.pdf"], hardlink=True)
+        self.assertEqual(stats["linked"], 1)
+        obj = MigratedFile.objects.get()
+        self.assertEqual(os.stat(obj.file.path).st_ino, os.stat(path).st_ino)
+
+    def test_missing_file(self):
+        ids, stats = self.migrate(["missing.jpg"])
+        self.assertEqual(ids, [])
+        self.assertEqual(stats["failed"], 1)
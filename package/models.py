@@ -3,12 +3,13 @@ import mimetypes
 import os
 import sys
 import glob
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from shutil import copyfile
 from datetime import datetime
 from tempfile import TemporaryDirectory
 from zipfile import ZIP_DEFLATED, ZipFile
 
+from django.conf import settings
 from django.core.files.base import ContentFile
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -28,8 +29,11 @@ from wagtail.models import Orderable
 from collection.models import Language
 from core.widgets import ReadOnlyPrettyJSONWidget
 from core.models import CommonControlField
+from core.utils import xml_cache
 from core.utils.requester import fetch_data
 from core.utils.file_utils import delete_files
+from core.utils.zip_utils import replace_zip_members
+from files_storage.minio import ZipContentUploader
 from files_storage.models import FileLocation, MinioConfiguration
 from package import choices
 from pid_provider.requester import PidRequester
@@ -37,6 +41,8 @@ from pid_provider.requester import PidRequester
 
 pid_provider_app = PidRequester()
 
+HTML_GENERATION_MAX_WORKERS = getattr(settings, "HTML_GENERATION_MAX_WORKERS", 2)
+
 
 class SPSPkgOptimizeError(Exception):
     ...
@@ -93,17 +99,47 @@ class PreviewArticlePageFileSaveError(Exception):
 
 
 def update_zip_file(zip_xml_file_path, filename, xml_with_pre):
-    new_xml = xml_with_pre.tostring(pretty_print=True)
-    with TemporaryDirectory() as targetdir:
-        new_zip_path = os.path.join(targetdir, os.path.basename(zip_xml_file_path))
-        with ZipFile(new_zip_path, "a", compression=ZIP_DEFLATED) as new_zfp:
-            with ZipFile(zip_xml_file_path) as zfp:
-                for item in zfp.namelist():
-                    if item == filename:
-                        new_zfp.writestr(item, new_xml)
-                    else:
-                        new_zfp.writestr(item, zfp.read(item))
-        copyfile(new_zip_path, zip_xml_file_path)
+    # somente o XML é regravado; os demais membros são copiados sem recompressão
+    replace_zip_members(
+        zip_xml_file_path, {filename: xml_with_pre.tostring(pretty_print=True)}
+    )
+    xml_cache.invalidate(zip_xml_file_path)
+
+
+def get_pub_date(xml_with_pre):
+    # esta data deveria ser completa (AAAA-MM-DD)
+    if not xml_with_pre:
+        return None
+    pub_date = xml_with_pre.article_publication_date
+    if not pub_date:
+        return None
+    if len(pub_date) == 10:
+        return pub_date
+    # em caso de data incompleta, tenta retornar a data completa, completando
+    # com 06 o mes ausente e com 15 o dia ausente
+    return xml_with_pre.get_complete_publication_date()
+
+
+def generate_html_pages(xmltree, max_workers=None):
+    """
+    Gera o HTML de cada idioma do XML
+
+    A árvore (xmltree) e o XSLT compilado são compartilhados entre os
+    idiomas, gerados em paralelo por até max_workers threads
+
+    Returns
+    -------
+    dict
+        {lang: html}, na ordem de HTMLGenerator.languages
+    """
+    generator = HTMLGenerator.parse(xmltree, valid_only=False, xslt="3.0")
+    langs = list(generator.languages)
+    max_workers = min(max_workers or HTML_GENERATION_MAX_WORKERS, len(langs))
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pages = executor.map(lambda lang: str(generator.generate(lang)), langs)
+            return dict(zip(langs, pages))
+    return {lang: str(generator.generate(lang)) for lang in langs}
 
 
 def basic_xml_directory_path(instance, filename):
@@ -138,8 +174,7 @@ class BasicXMLFile(models.Model):
     @property
     def xml_with_pre(self):
         try:
-            for item in XMLWithPre.create(path=self.file.path):
-                return item
+            return xml_cache.get_xml_with_pre(self.file.path)
         except Exception as e:
             raise XMLVersionXmlWithPreError(
                 _("Unable to get xml with pre (XMLVersion) {}: {} {}").format(
@@ -150,6 +185,7 @@ class BasicXMLFile(models.Model):
     def save_file(self, name, content, delete_existing=False):
         if delete_existing:
             try:
+                xml_cache.invalidate(self.file.path)
                 delete_files(self.file.path)
             except Exception as e:
                 pass
@@ -367,8 +403,7 @@ class SPSPkg(CommonControlField, ClusterableModel):
 
     @property
     def xml_with_pre(self):
-        for item in XMLWithPre.create(path=self.file.path):
-            return item
+        return xml_cache.get_xml_with_pre(self.file.path)
 
     @property
     def is_migrated(self):
@@ -376,7 +411,7 @@ class SPSPkg(CommonControlField, ClusterableModel):
 
     @property
     def pdfs(self):
-        for item in self.components.filter(component_type="rendition"):
+        for item in self.components.select_related("lang").filter(component_type="rendition"):
             yield {
                 "lang": item.lang and item.lang.code2,
                 "url": item.uri,
@@ -386,12 +421,12 @@ class SPSPkg(CommonControlField, ClusterableModel):
 
     @property
     def htmls(self):
-        for item in self.components.filter(component_type="html"):
+        for item in self.components.select_related("lang").filter(component_type="html"):
             yield {"lang": item.lang and item.lang.code2, "url": item.uri}
 
     @property
     def supplementary_materials(self):
-        for item in self.components.filter(component_type="supplementary-material"):
+        for item in self.components.select_related("lang").filter(component_type="supplementary-material"):
             yield {
                 "lang": item.lang and item.lang.code2,
                 "url": item.uri,
@@ -451,10 +486,17 @@ class SPSPkg(CommonControlField, ClusterableModel):
         original_pkg_components,
         texts,
         article_proc,
+        sps_pkg=None,
     ):
+        """
+        sps_pkg : SPSPkg
+            já registrado com o PID v3 de sps_pkg_zip_path (add_pid_v3_to_zips)
+        """
         try:
             operation = article_proc.start(user, "SPSPkg.create_or_update")
-            obj = cls.add_pid_v3_to_zip(user, sps_pkg_zip_path, is_public, article_proc)
+            obj = sps_pkg or cls.add_pid_v3_to_zip(
+                user, sps_pkg_zip_path, is_public, article_proc
+            )
             if not obj:
                 operation.finish(user, completed=False, detail=sps_pkg_zip_path)
                 return
@@ -558,37 +600,102 @@ class SPSPkg(CommonControlField, ClusterableModel):
         """
         try:
             response = None
-            operation = None
             for response in pid_provider_app.request_pid_for_xml_zip(
                 xml_zip_path,
                 user,
                 is_published=is_public,
                 article_proc=article_proc,
-            ):  
-                operation = article_proc.start(user, "request_pid_for_xml_zip")
-
-                if response.get("error_type"):
-                    raise Exception(_("Unable to register pid"))
+            ):
+                return cls._register_pid_response(
+                    user, zip_xml_file_path, article_proc, response
+                )
+        except SPSPkgAddPidV3ToZipFileError:
+            raise
+        except Exception as e:
+            raise SPSPkgAddPidV3ToZipFileError(
+                f"Unable to add pid v3 to {zip_xml_file_path}, got {response}. Exception {type(e)} {e}"
+            )
 
-                xml_with_pre = response.pop("xml_with_pre")
+    @classmethod
+    def add_pid_v3_to_zips(cls, user, items, is_public):
+        """
+        Solicita PID versão 3 para os XML de vários pacotes, com uma única
+        requisição ao Core (PidRequester.request_pids_for_xml_batch)
+
+        Parameters
+        ----------
+        items : list of tuple (zip_xml_file_path, article_proc)
+
+        Returns
+        -------
+        list
+            SPSPkg de cada item (None, se não foi registrado), na mesma
+            ordem de items
+        """
+        results = [None] * len(items)
+        xml_items = []
+        positions = []
+        for i, (zip_xml_file_path, article_proc) in enumerate(items):
+            try:
+                xml_with_pre = list(XMLWithPre.create(path=zip_xml_file_path))[0]
+            except Exception as e:
+                logging.exception(e)
+                continue
+            xml_items.append((xml_with_pre, article_proc))
+            positions.append(i)
+        if not xml_items:
+            return results
 
-                obj = cls._get_or_create(
-                    user=user,
-                    pid_v3=response["v3"],
-                    sps_pkg_name=response["pkg_name"],
-                    registered_in_core=response.get("registered_in_core"),
-                    pid_v2=response["v2"],
+        try:
+            responses = pid_provider_app.request_pids_for_xml_batch(
+                xml_items, user, is_published=is_public
+            )
+        except Exception as e:
+            # os itens seguem o registro individual (add_pid_v3_to_zip)
+            logging.exception(e)
+            return results
+        for i, response in zip(positions, responses):
+            zip_xml_file_path, article_proc = items[i]
+            try:
+                results[i] = cls._register_pid_response(
+                    user, zip_xml_file_path, article_proc, response
                 )
+            except SPSPkgAddPidV3ToZipFileError as e:
+                logging.exception(e)
+        return results
+
+    @classmethod
+    def _register_pid_response(cls, user, zip_xml_file_path, article_proc, response):
+        """
+        Cria / atualiza SPSPkg com a resposta do registro do PID v3 e
+        atualiza o XML do pacote, se mudou
+        """
+        operation = None
+        try:
+            operation = article_proc.start(user, "request_pid_for_xml_zip")
 
-                if response.get("changed"):
-                    update_zip_file(zip_xml_file_path, response["filename"], xml_with_pre)
+            if response.get("error_type"):
+                raise Exception(_("Unable to register pid"))
 
-                operation.finish(
-                    user,
-                    completed=obj.registered_in_core,
-                    detail=response,
-                )
-                return obj
+            xml_with_pre = response.pop("xml_with_pre")
+
+            obj = cls._get_or_create(
+                user=user,
+                pid_v3=response["v3"],
+                sps_pkg_name=response["pkg_name"],
+                registered_in_core=response.get("registered_in_core"),
+                pid_v2=response["v2"],
+            )
+
+            if response.get("changed"):
+                update_zip_file(zip_xml_file_path, response["filename"], xml_with_pre)
+
+            operation.finish(
+                user,
+                completed=obj.registered_in_core,
+                detail=response,
+            )
+            return obj
         except Exception as e:
             exc_type, exc_value, exc_traceback = sys.exc_info()
             if operation:
@@ -625,6 +732,7 @@ class SPSPkg(CommonControlField, ClusterableModel):
 
     def save_file(self, name, content):
         try:
+            xml_cache.invalidate(self.file.path)
             delete_files(self.file.path)
         except Exception as e:
             pass
@@ -653,7 +761,7 @@ class SPSPkg(CommonControlField, ClusterableModel):
             self.upload_zip_content_to_the_cloud,
             **{"original_pkg_components": original_pkg_components},
         )
-        self.upload_items_to_the_cloud(
+        xml_with_pre = self.upload_items_to_the_cloud(
             user,
             article_proc,
             "upload_xml_to_the_cloud",
@@ -665,6 +773,8 @@ class SPSPkg(CommonControlField, ClusterableModel):
             article_proc,
             "upload_article_page_to_the_cloud",
             self.upload_article_page_to_the_cloud,
+            # HTML a partir do XML enviado, sem obtê-lo novamente de xml_uri
+            **{"xml_with_pre": xml_with_pre if self.xml_uri else None},
         )
         self.valid_components = not self.components.filter(uri__isnull=True).exists()
         self.save()
@@ -718,6 +828,30 @@ class SPSPkg(CommonControlField, ClusterableModel):
             error = str(e)
             error_type = str(type(e))
 
+        return self._add_component(
+            user,
+            response,
+            filename,
+            uri,
+            component_type,
+            lang=lang,
+            legacy_uri=legacy_uri,
+            error=error,
+            error_type=error_type,
+        )
+
+    def _add_component(
+        self,
+        user,
+        response,
+        filename,
+        uri,
+        component_type,
+        lang=None,
+        legacy_uri=None,
+        error=None,
+        error_type=None,
+    ):
         if error:
             response.update(
                 dict(
@@ -765,32 +899,71 @@ class SPSPkg(CommonControlField, ClusterableModel):
     def upload_components_to_the_cloud(self, user, original_pkg_components, zip_file_path):
         xml_with_pre = None
         items = []
+        to_upload = []
 
         with ZipFile(zip_file_path) as optimised_fp:
-            for item in set(optimised_fp.namelist()):
-                name, ext = os.path.splitext(item)
-                content = optimised_fp.read(item)
+            for member in set(optimised_fp.namelist()):
+                name, ext = os.path.splitext(member)
                 if ext == ".xml":
-                    xml_with_pre = get_xml_with_pre(content.decode("utf-8"))
-
-                else:
-                    component = original_pkg_components.get(item) or {}
-                    if not ext:
-                        legacy_uri = component.get("legacy_uri")
-                        if legacy_uri:
-                            _, ext = os.path.splitext(legacy_uri)
-                            if ext:
-                                item = item + ext
-                    result = self.upload_to_the_cloud(
-                        user=user,
-                        filename=item,
-                        ext=ext,
-                        content=content,
-                        component_type=component.get("component_type") or "asset",
-                        lang=component.get("lang"),
-                        legacy_uri=component.get("legacy_uri"),
+                    xml_with_pre = get_xml_with_pre(
+                        optimised_fp.read(member).decode("utf-8")
                     )
-                    items.append(result)
+                    continue
+
+                component = original_pkg_components.get(member) or {}
+                filename = member
+                if not ext:
+                    legacy_uri = component.get("legacy_uri")
+                    if legacy_uri:
+                        _, ext = os.path.splitext(legacy_uri)
+                        if ext:
+                            filename = member + ext
+                to_upload.append(
+                    {
+                        "member": member,
+                        "filename": filename,
+                        "object_name": f"{self.subdir}/{filename}",
+                        "mimetype": mimetypes.types_map.get(ext.lower())
+                        or "application/octet-stream",
+                        "component": component,
+                    }
+                )
+
+        try:
+            files_storage = MinioConfiguration.get_files_storage(name="website")
+            uploader = ZipContentUploader(
+                files_storage,
+                zip_file_path,
+                max_workers=settings.MINIO_UPLOAD_MAX_WORKERS,
+            )
+            results = uploader.upload(to_upload)
+        except Exception as e:
+            logging.exception(e)
+            results = [
+                {"error": str(e), "error_type": str(type(e))} for item in to_upload
+            ]
+
+        # os registros em banco de dados são feitos na thread principal
+        for item, result in zip(to_upload, results):
+            component = item["component"]
+            response = {}
+            if result.get("uri"):
+                response["uri"] = result["uri"]
+            if result.get("skipped"):
+                response["skipped"] = True
+            items.append(
+                self._add_component(
+                    user,
+                    response,
+                    item["filename"],
+                    result.get("uri"),
+                    component.get("component_type") or "asset",
+                    lang=component.get("lang"),
+                    legacy_uri=component.get("legacy_uri"),
+                    error=result.get("error"),
+                    error_type=result.get("error_type"),
+                )
+            )
         return {"xml_with_pre": xml_with_pre, "items": items}
 
     def upload_xml_to_the_cloud(self, user, xml_with_pre):
@@ -813,24 +986,20 @@ class SPSPkg(CommonControlField, ClusterableModel):
         )
         self.xml_uri = result.get("uri")
         self.save()
-        return {"items": [result]}
+        return {"items": [result], "xml_with_pre": xml_with_pre}
 
-    def generate_article_html_pages(self):
+    def generate_article_html_pages(self, xml_with_pre=None):
+        """
+        Gera o HTML de cada idioma a partir de xml_with_pre (o XML enviado
+        por upload_xml_to_the_cloud) ou, se ausente, do conteúdo de xml_uri
+        """
         try:
-            generator = HTMLGenerator.parse(
-                etree.parse(BytesIO(fetch_data(self.xml_uri))),
-                valid_only=False,
-                xslt="3.0",
-            )
-            for lang in generator.languages:
-                suffix = f"-{lang}"
-                yield {
-                    "filename": f"{self.sps_pkg_name}{suffix}.html",
-                    "content": str(generator.generate(lang)),
-                    "lang": lang,
-                    "ext": ".html",
-                    "component_type": "html",
-                }
+            if xml_with_pre:
+                # mesmo conteúdo enviado para xml_uri
+                content = xml_with_pre.tostring(pretty_print=True).encode("utf-8")
+            else:
+                content = fetch_data(self.xml_uri)
+            pages = generate_html_pages(etree.parse(BytesIO(content)))
         except Exception as exc:
             for lang in self.texts["xml_langs"]:
                 suffix = f"-{lang}"
@@ -843,10 +1012,21 @@ class SPSPkg(CommonControlField, ClusterableModel):
                     "ext": ".html",
                     "component_type": "html",
                 }
+            return
+
+        for lang, html in pages.items():
+            suffix = f"-{lang}"
+            yield {
+                "filename": f"{self.sps_pkg_name}{suffix}.html",
+                "content": html,
+                "lang": lang,
+                "ext": ".html",
+                "component_type": "html",
+            }
 
-    def upload_article_page_to_the_cloud(self, user):
+    def upload_article_page_to_the_cloud(self, user, xml_with_pre=None):
         items = []
-        for item in self.generate_article_html_pages():
+        for item in self.generate_article_html_pages(xml_with_pre):
             lang = item["lang"]
             try:
                 content = item["content"].encode("utf-8")
@@ -900,17 +1080,7 @@ class SPSPkg(CommonControlField, ClusterableModel):
 
     @property
     def pub_date(self):
-        # esta data deveria ser completa (AAAA-MM-DD)
-        xml_with_pre = self.xml_with_pre
-        if not xml_with_pre:
-            return None
-        pub_date = xml_with_pre.article_publication_date
-        if not pub_date:
-            return None
-        if len(pub_date) == 10:
-            return pub_date
-        # em caso de data incompleta, tenta retornar a data completa, completando com 06 o mes ausente e com 15 o dia ausente
-        return xml_with_pre.get_complete_publication_date()
+        return get_pub_date(self.xml_with_pre)
     
     @classmethod
     def complete_pid_v2(cls, user, sps_pkg_id_list=None):
@@ -0,0 +1,88 @@
+"""
+Compara o tempo e o pico de memória da substituição do XML de um pacote
+zip regravando todos os membros (implementação anterior de
+update_zip_file) e copiando os membros inalterados sem recompressão
+(core.utils.zip_utils.replace_zip_members)
+
+Uso:
+    python manage.py runscript package.scripts.bench_zip_update \
+        --script-args 50,500 2
+
+Argumentos: tamanhos dos pacotes (MB, separados por vírgula) e tamanho de
+cada imagem / pdf (MB).
+
+Os pacotes são gravados em um diretório temporário.
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from shutil import copyfile
+from tempfile import TemporaryDirectory
+from zipfile import ZIP_DEFLATED, ZipFile
+
+from core.utils.zip_utils import replace_zip_members
+
+XML_NAME = "1234-5678-bench-01-01.xml"
+
+
+def legacy_update_zip_file(zip_xml_file_path, filename, new_xml):
+    with TemporaryDirectory() as targetdir:
+        new_zip_path = os.path.join(targetdir, os.path.basename(zip_xml_file_path))
+        with ZipFile(new_zip_path, "a", compression=ZIP_DEFLATED) as new_zfp:
+            with ZipFile(zip_xml_file_path) as zfp:
+                for item in zfp.namelist():
+                    if item == filename:
+                        new_zfp.writestr(item, new_xml)
+                    else:
+                        new_zfp.writestr(item, zfp.read(item))
+        copyfile(new_zip_path, zip_xml_file_path)
+
+
+def incremental_update_zip_file(zip_xml_file_path, filename, new_xml):
+    replace_zip_members(zip_xml_file_path, {filename: new_xml})
+
+
+def write_package(path, size, member_size):
+    """
+    Grava um pacote com um XML e imagens / pdfs de member_size bytes
+    (conteúdo aleatório, pouco compressível) até totalizar size bytes
+    """
+    with ZipFile(path, "w", compression=ZIP_DEFLATED) as zf:
+        zf.writestr(XML_NAME, get_xml(0))
+        total = 0
+        i = 0
+        while total < size:
+            i += 1
+            ext = ".pdf" if i % 5 == 0 else ".jpg"
+            zf.writestr(f"1234-5678-bench-01-01-g{i}{ext}", os.urandom(member_size))
+            total += member_size
+
+
+def get_xml(i):
+    return f"<article><front><article-id>{i}</article-id></front></article>"
+
+
+def measure(label, func, path):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func(path, XML_NAME, get_xml(1))
+    elapsed = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    with ZipFile(path) as zf:
+        assert zf.read(XML_NAME).decode() == get_xml(1)
+    print(f"  {label}: {elapsed:.2f}s peak={peak / 1024 / 1024:.1f} MB")
+
+
+def run(sizes="50,500", member_size="2"):
+    member_size = int(float(member_size) * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in sizes.split(","):
+            size_bytes = int(float(size) * 1024 * 1024)
+            path = os.path.join(tmpdir, "pkg.zip")
+            write_package(path, size_bytes, member_size)
+            print(f"package: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+            measure("legacy (rewrite all members)", legacy_update_zip_file, path)
+            measure("incremental (raw copy)", incremental_update_zip_file, path)
+            os.unlink(path)
@@ -1,3 +1,159 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest.mock import Mock, patch
+from zipfile import ZipFile
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from packtools.sps.pid_provider.xml_sps_lib import XMLWithPre
+
+from collection.models import Language
+from core.utils.query_budget import QueryBudgetTestMixin
+from package.models import SPSPkg, SPSPkgComponent, generate_html_pages
+
+User = get_user_model()
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+XML_PATH = os.path.join(
+    ROOT_DIR,
+    "migration/fixtures/classic_website/bases/xml/rsp/v56/1518-8787-rsp-56-9.xml",
+)
+
+
+class FakeStorage:
+    """
+    Substitui o MinIO: guarda o conteúdo enviado por object_name
+    """
+
+    def __init__(self):
+        self.objects = {}
+
+    def push(self, content, mimetype, object_name):
+        uri = f"https://fake.storage/{object_name}"
+        self.objects[uri] = content
+        return {"uri": uri}
+
+    def fetch(self, uri, **kwargs):
+        return self.objects[uri]
+
+
+class GenerateArticleHtmlPagesTest(TestCase):
+    def setUp(self):
+        for xml_with_pre in XMLWithPre.create(path=XML_PATH):
+            self.xml_with_pre = xml_with_pre
+        self.storage = FakeStorage()
+        self.sps_pkg = SPSPkg(
+            sps_pkg_name="1518-8787-rsp-56-9",
+            texts={"xml_langs": ["en", "pt"]},
+        )
+        response = self.storage.push(
+            self.xml_with_pre.tostring(pretty_print=True).encode("utf-8"),
+            "application/xml",
+            "1518-8787-rsp-56-9.xml",
+        )
+        self.sps_pkg.xml_uri = response["uri"]
+
+    def test_html_from_memory_is_identical_to_html_from_xml_uri(self):
+        with patch("package.models.fetch_data", side_effect=self.storage.fetch):
+            expected = list(self.sps_pkg.generate_article_html_pages())
+
+        with patch("package.models.fetch_data") as mock_fetch_data:
+            result = list(self.sps_pkg.generate_article_html_pages(self.xml_with_pre))
+            mock_fetch_data.assert_not_called()
+
+        self.assertGreater(len(expected), 1)
+        self.assertNotIn("error", expected[0])
+        self.assertEqual(expected, result)
+
+    def test_parallel_and_sequential_generation_are_identical(self):
+        xmltree = self.xml_with_pre.xmltree.getroottree()
+        self.assertEqual(
+            generate_html_pages(xmltree, max_workers=1),
+            generate_html_pages(xmltree, max_workers=4),
+        )
+
+    def test_error_items_for_each_language(self):
+        with patch("package.models.fetch_data", side_effect=Exception("timeout")):
+            result = list(self.sps_pkg.generate_article_html_pages())
+        self.assertEqual(["en", "pt"], [item["lang"] for item in result])
+        self.assertTrue(all(item["error"] == "timeout" for item in result))
+
+
+class SPSPkgComponentsQueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="user", password="pass")
+        self.sps_pkg = SPSPkg.objects.create(sps_pkg_name="pkg", creator=user)
+        for lang in ("en", "pt", "es"):
+            language = Language.objects.create(code2=lang, creator=user)
+            for component_type in ("rendition", "html", "supplementary-material"):
+                SPSPkgComponent.objects.create(
+                    sps_pkg=self.sps_pkg,
+                    component_type=component_type,
+                    lang=language,
+                    basename=f"pkg-{lang}-{component_type}",
+                    uri=f"https://fake.storage/pkg-{lang}-{component_type}",
+                    creator=user,
+                )
+
+    def test_pdfs_does_not_query_each_language(self):
+        with self.assertQueryBudget(max_queries=1):
+            pdfs = list(self.sps_pkg.pdfs)
+        self.assertEqual({"en", "pt", "es"}, {item["lang"] for item in pdfs})
+
+    def test_htmls_does_not_query_each_language(self):
+        with self.assertQueryBudget(max_queries=1):
+            htmls = list(self.sps_pkg.htmls)
+        self.assertEqual({"en", "pt", "es"}, {item["lang"] for item in htmls})
+
+    def test_supplementary_materials_does_not_query_each_language(self):
+        with self.assertQueryBudget(max_queries=1):
+            items = list(self.sps_pkg.supplementary_materials)
+        self.assertEqual(3, len(items))
+
+
+class AddPidV3ToZipsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="pass")
+        tmpdir = TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.items = []
+        for name in ("a", "b"):
+            zip_path = os.path.join(tmpdir.name, f"{name}.zip")
+            with ZipFile(zip_path, "w") as zf:
+                zf.write(XML_PATH, f"{name}.xml")
+            self.items.append((zip_path, Mock()))
+
+    @patch("package.models.pid_provider_app.request_pids_for_xml_batch")
+    def test_one_request_for_all_packages(self, mock_batch):
+        def batch(xml_items, user, **kwargs):
+            return [
+                {"error_type": "ValueError", "error_msg": "x"},
+                {
+                    "v3": "V3b",
+                    "v2": "S1518-87872022000100901",
+                    "pkg_name": "pkg-b",
+                    "registered_in_core": True,
+                    "filename": xml_items[1][0].filename,
+                    "xml_with_pre": xml_items[1][0],
+                    "changed": False,
+                },
+            ]
+
+        mock_batch.side_effect = batch
+
+        result = SPSPkg.add_pid_v3_to_zips(self.user, self.items, is_public=True)
+
+        mock_batch.assert_called_once()
+        self.assertEqual(
+            ["a.xml", "b.xml"],
+            [item[0].filename for item in mock_batch.call_args[0][0]],
+        )
+        self.assertIsNone(result[0])
+        self.assertEqual("V3b", result[1].pid_v3)
+        self.assertTrue(result[1].registered_in_core)
 
-# Create your tests here.
+    @patch("package.models.pid_provider_app.request_pids_for_xml_batch")
+    def test_batch_failure_returns_none_for_each_package(self, mock_batch):
+        mock_batch.side_effect = Exception("timeout")
+        result = SPSPkg.add_pid_v3_to_zips(self.user, self.items, is_public=True)
+        self.assertEqual([None, None], result)
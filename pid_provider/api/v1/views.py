@@ -0,0 +1,53 @@
+from tempfile import NamedTemporaryFile
+
+from rest_framework import status, viewsets
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.parsers import FileUploadParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from pid_provider.provider import PidProvider
+
+
+class PidProviderBatchViewSet(viewsets.ViewSet):
+    """
+    Registra os XMLs de um arquivo zip enviado no corpo da requisição
+
+    curl -X POST -S \\
+        -H "Content-Type: application/zip" \\
+        -H "Content-Disposition: attachment; filename=batch.zip" \\
+        -H "Authorization: Bearer eyJ0b2tlb" \\
+        --data-binary @batch.zip \\
+        http://localhost:8000/api/v1/pid_provider_batch/
+
+    Retorna uma lista com o resultado de cada XML, identificado por
+    "filename" (BasePidProvider.provide_pid_for_xml_batch)
+    """
+
+    authentication_classes = [
+        JWTAuthentication,
+        SessionAuthentication,
+        BasicAuthentication,
+    ]
+    permission_classes = [IsAuthenticated]
+    parser_classes = [FileUploadParser]
+    http_method_names = ["post"]
+
+    def create(self, request):
+        uploaded = request.data.get("file")
+        if not uploaded:
+            return Response(
+                {"error_msg": "Missing zip file", "error_type": "ValueError"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with NamedTemporaryFile(suffix=".zip") as fp:
+            for chunk in uploaded.chunks():
+                fp.write(chunk)
+            fp.flush()
+            results = PidProvider().provide_pid_for_xml_batch(
+                fp.name,
+                request.user,
+                caller=request.query_params.get("caller"),
+            )
+        return Response(results)
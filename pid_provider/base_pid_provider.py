@@ -1,5 +1,7 @@
 import sys
 
+from django.db import transaction
+
 # from django.utils.translation import gettext_lazy as _
 from packtools.sps.pid_provider.xml_sps_lib import XMLWithPre, get_xml_with_pre
 
@@ -143,6 +145,90 @@ class BasePidProvider:
                 "error_type": str(type(e)),
             }
 
+    @profile_method
+    def provide_pid_for_xml_batch(
+        self,
+        zip_xml_file_path,
+        user,
+        origin_date=None,
+        force_update=None,
+        is_published=None,
+        registered_in_core=None,
+        caller=None,
+        auto_solve_pid_conflict=True,
+    ):
+        """
+        Fornece / Valida PID para cada XML de um arquivo compactado
+
+        Diferente de provide_pid_for_xml_zip, o erro em um XML não interrompe
+        o registro dos demais e o resultado pode ser serializado em JSON
+        (não contém xml_with_pre)
+
+        Returns
+        -------
+            list of dict
+                um item por XML, identificado por "filename"
+        """
+        results = []
+        try:
+            xml_items = list(XMLWithPre.create(path=zip_xml_file_path))
+            # reserva, de uma vez, os v3 dos XML que ainda não têm v3
+            PidProviderXML.reserve_v3(
+                len([xml_with_pre for xml_with_pre in xml_items if not xml_with_pre.v3])
+            )
+            for xml_with_pre in xml_items:
+                results.append(
+                    self._provide_pid_for_batch_item(
+                        xml_with_pre,
+                        user,
+                        origin_date=origin_date,
+                        force_update=force_update,
+                        is_published=is_published,
+                        origin=zip_xml_file_path,
+                        registered_in_core=registered_in_core,
+                        caller=caller,
+                        auto_solve_pid_conflict=auto_solve_pid_conflict,
+                    )
+                )
+        except Exception as e:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            UnexpectedEvent.create(
+                exception=e,
+                exc_traceback=exc_traceback,
+                detail={
+                    "operation": "PidProvider.provide_pid_for_xml_batch",
+                    "input": dict(
+                        zip_xml_file_path=zip_xml_file_path,
+                        user=user.username,
+                        total=len(results),
+                    ),
+                },
+            )
+            results.append(
+                {
+                    "error_msg": f"Unable to provide pid for {zip_xml_file_path} {e}",
+                    "error_type": str(type(e)),
+                }
+            )
+        return results
+
+    def _provide_pid_for_batch_item(self, xml_with_pre, user, **kwargs):
+        filename = xml_with_pre.filename
+        try:
+            # savepoint por XML: com ATOMIC_REQUESTS, o erro de banco de dados
+            # de um XML não invalida a transação (nem o registro) dos demais
+            with transaction.atomic():
+                response = dict(
+                    self.provide_pid_for_xml_with_pre(
+                        xml_with_pre, filename, user, **kwargs
+                    )
+                )
+            response.pop("xml_with_pre", None)
+        except Exception as e:
+            response = {"error_msg": str(e), "error_type": str(type(e))}
+        response["filename"] = filename
+        return response
+
     @profile_method
     def provide_pid_for_xml_uri(
         self,
@@ -3,6 +3,8 @@ import os
 import sys
 import traceback
 from tempfile import TemporaryDirectory
+from urllib.parse import urlsplit, urlunsplit
+from zipfile import ZIP_DEFLATED, ZipFile
 
 from django.utils.translation import gettext_lazy as _
 from packtools.sps.pid_provider.xml_sps_lib import (
@@ -20,10 +22,33 @@ from pid_provider.models import PidProviderConfig
 LOGGER = logging.getLogger(__name__)
 LOGGER_FMT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
+# rota de pid_provider.api.v1.views.PidProviderBatchViewSet (config.api_router)
+PID_PROVIDER_BATCH_PATH = "/api/v1/pid_provider_batch/"
+
 
 class IncorrectPidV2RegisteredInCoreException(Exception): ...
 
 
+class FileBody:
+    """
+    Corpo de requisição lido do arquivo em partes, sem carregá-lo na
+    memória; pode ser reenviado (post_data repete a requisição em caso de
+    falha de rede)
+    """
+
+    def __init__(self, path, chunk_size=64 * 1024):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return os.path.getsize(self.path)
+
+    def __iter__(self):
+        with open(self.path, "rb") as fp:
+            while chunk := fp.read(self.chunk_size):
+                yield chunk
+
+
 class PidProviderAPIClient:
     """
     Interface com o pid provider do Core
@@ -80,6 +105,25 @@ class PidProviderAPIClient:
                 self._fix_pid_v2_url = None
         return self._fix_pid_v2_url
 
+    @property
+    def batch_url(self):
+        """
+        URL de registro em lote (PID_PROVIDER_BATCH_PATH) no mesmo servidor
+        de pid_provider_api_post_xml
+        """
+        if not hasattr(self, "_batch_url") or not self._batch_url:
+            try:
+                parts = urlsplit(self.pid_provider_api_post_xml)
+            except (AttributeError, TypeError, ValueError):
+                parts = None
+            if parts and parts.scheme and parts.netloc:
+                self._batch_url = urlunsplit(
+                    (parts.scheme, parts.netloc, PID_PROVIDER_BATCH_PATH, "", "")
+                )
+            else:
+                self._batch_url = None
+        return self._batch_url
+
     def provide_pid_and_handle_incorrect_pid_v2(self, xml_with_pre, registered):
         try:
             return self.provide_pid(
@@ -125,6 +169,153 @@ class PidProviderAPIClient:
                 ],
             }
 
+    def provide_pids(self, items):
+        """
+        Solicita os PIDs de vários XML em uma única requisição
+
+        Parameters
+        ----------
+        items : list of tuple (xml_with_pre, registered)
+            registered: resposta de PidRequester.get_registration_demand
+            (ou dict vazio); os nomes de arquivo (xml_with_pre.filename)
+            devem ser únicos
+
+        Returns
+        -------
+        dict
+            filename: resposta (ou erro) do pid provider para o XML;
+            se a requisição falha como um todo (ex.: endpoint inexistente),
+            o erro de cada XML tem batch_error=True
+        """
+        items_by_name = {}
+        for xml_with_pre, registered in items:
+            if xml_with_pre.filename in items_by_name:
+                raise ValueError(
+                    f"PidProviderAPIClient.provide_pids: duplicated {xml_with_pre.filename}"
+                )
+            items_by_name[xml_with_pre.filename] = (xml_with_pre, registered or {})
+
+        try:
+            self.token = self.token or self._get_token(
+                username=self.api_username,
+                password=self.api_password,
+                timeout=self.timeout,
+            )
+            response = self._prepare_and_post_batch(items_by_name.values())
+            if not isinstance(response, list):
+                raise exceptions.APIPidProviderPostError(
+                    f"Unexpected pid provider response: {response}"
+                )
+        except Exception as e:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            error = {
+                "error_msg": str(e),
+                "error_type": str(type(e)),
+                "traceback": [
+                    str(item) for item in traceback.extract_tb(exc_traceback)
+                ],
+                "batch_error": True,
+            }
+            return {name: dict(error) for name in items_by_name}
+
+        results = {}
+        for item in response:
+            name = item.get("filename")
+            if name not in items_by_name:
+                LOGGER.error(f"Unexpected pid provider response item: {item}")
+                continue
+            xml_with_pre, registered = items_by_name[name]
+            results[name] = self._process_batch_item_response(
+                item, xml_with_pre, registered
+            )
+        for name in items_by_name:
+            results.setdefault(
+                name,
+                {
+                    "error_msg": f"Missing pid provider response for {name}",
+                    "error_type": str(exceptions.APIPidProviderPostError),
+                },
+            )
+        return results
+
+    def _process_batch_item_response(self, item, xml_with_pre, registered):
+        if item.get("error_type") or item.get("error_msg"):
+            return item
+        try:
+            self._process_post_xml_response(
+                item, xml_with_pre, registered.get("created")
+            )
+            return item
+        except IncorrectPidV2RegisteredInCoreException:
+            # conserta valor de pid v2 no core e registra novamente
+            return self.provide_pid_and_handle_incorrect_pid_v2(
+                xml_with_pre, registered
+            )
+        except Exception as e:
+            return {"error_msg": str(e), "error_type": str(type(e))}
+
+    def _prepare_and_post_batch(self, items):
+        """
+        items : iterable of tuple (xml_with_pre, registered)
+        """
+        with TemporaryDirectory() as tmpdirname:
+            zip_xml_file_path = os.path.join(tmpdirname, "batch.zip")
+            with ZipFile(zip_xml_file_path, "w", compression=ZIP_DEFLATED) as zf:
+                for xml_with_pre, registered in items:
+                    zf.writestr(
+                        xml_with_pre.filename,
+                        xml_with_pre.tostring(pretty_print=True),
+                    )
+
+            response = self._post_batch(zip_xml_file_path, self.token, self.timeout)
+            try:
+                if response["code"] == "token_not_valid":
+                    self.token = self._get_token(
+                        username=self.api_username,
+                        password=self.api_password,
+                        timeout=self.timeout,
+                    )
+                    return self._post_batch(
+                        zip_xml_file_path, self.token, self.timeout
+                    )
+            except (TypeError, KeyError):
+                pass
+            return response
+
+    def _post_batch(self, zip_xml_file_path, token, timeout):
+        """
+        curl -X POST -S \
+            -H "Content-Type: application/zip" \
+            -H "Content-Disposition: attachment; filename=batch.zip" \
+            -H 'Authorization: Bearer eyJ0b2tlb' \
+            --data-binary @batch.zip \
+            http://localhost:8000/api/v1/pid_provider_batch/
+        """
+        try:
+            basename = os.path.basename(zip_xml_file_path)
+            header = {
+                "Authorization": "Bearer " + token,
+                "Content-Type": "application/zip",
+                "Content-Disposition": "attachment; filename=%s" % basename,
+            }
+            return post_data(
+                self.batch_url,
+                data=FileBody(zip_xml_file_path),
+                headers=header,
+                timeout=timeout,
+                verify=self.verify,
+                json=True,
+            )
+        except Exception as e:
+            raise exceptions.APIPidProviderPostError(
+                _("Unable to get pid from pid provider {} {} {} {}").format(
+                    self.batch_url,
+                    zip_xml_file_path,
+                    type(e),
+                    e,
+                )
+            )
+
     def _get_token(self, username, password, timeout):
         """
         curl -X POST 127.0.0.1:8000/api-token-auth/ \
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pid_provider", "0013_alter_xmlurl_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pidproviderxml",
+            name="title_tokens",
+            field=models.TextField(blank=True, null=True, verbose_name="title tokens"),
+        ),
+    ]
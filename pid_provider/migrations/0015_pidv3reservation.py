@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pid_provider", "0014_pidproviderxml_title_tokens"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PidV3Reservation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "v3",
+                    models.CharField(max_length=23, unique=True, verbose_name="v3"),
+                ),
+                ("token", models.CharField(db_index=True, max_length=32)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
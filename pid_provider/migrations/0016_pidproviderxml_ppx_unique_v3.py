@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-17 18:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicated_v3(apps, schema_editor):
+    # ppx_unique_v3 não pode ser criada se há v3 repetido; os registros não
+    # são corrigidos automaticamente porque v3 é um identificador público e
+    # não há como decidir aqui qual documento o mantém
+    PidProviderXML = apps.get_model("pid_provider", "PidProviderXML")
+    duplicated = list(
+        PidProviderXML.objects.filter(v3__isnull=False)
+        .values("v3")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("v3", flat=True)
+    )
+    if not duplicated:
+        return
+    items = [
+        f"{v3}: "
+        + ", ".join(
+            f"id={pk} pkg_name={pkg_name}"
+            for pk, pkg_name in PidProviderXML.objects.filter(v3=v3)
+            .order_by("id")
+            .values_list("id", "pkg_name")
+        )
+        for v3 in duplicated[:50]
+    ]
+    raise RuntimeError(
+        f"Unable to create ppx_unique_v3: {len(duplicated)} v3 values are "
+        "used by more than one PidProviderXML. Keep each v3 in only one "
+        "record and run the migration again:\n" + "\n".join(items)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pid_provider", "0015_pidv3reservation"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicated_v3, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="pidproviderxml",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("v3__isnull", False)),
+                fields=("v3",),
+                name="ppx_unique_v3",
+            ),
+        ),
+    ]
@@ -2,15 +2,21 @@ import io
 import logging
 import os
 import sys
+import threading
+import time
 import traceback
 import zipfile
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 from functools import cached_property
+from uuid import uuid4
 from zlib import crc32
 
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django.db.models import Q, Count
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
@@ -29,7 +35,8 @@ from core.utils.profiling_tools import (  # ajuste o import conforme sua estrutu
     profile_property,
     profile_staticmethod,
 )
-from core.utils.similarity import how_similar
+from core.utils import xml_cache
+from core.utils.similarity import get_title_tokens, how_similar
 from pid_provider import choices, exceptions
 from pid_provider.query_params import (
     get_score,
@@ -84,6 +91,9 @@ class PidProviderXMLPidV2ConflictError(Exception): ...
 class PidProviderXMLPidAOPConflictError(Exception): ...
 
 
+class PidV3ReservationError(Exception): ...
+
+
 def string_to_5_digits(input_string):
     return (crc32(input_string.encode()) & 0xFFFFFFFF) % 100000
 
@@ -145,6 +155,7 @@ class XMLVersion(CommonControlField):
 
     def save_file(self, filename, content):
         try:
+            xml_cache.invalidate(self.file.path)
             self.file.delete(save=False)
         except Exception as e:
             logging.exception(e)
@@ -158,8 +169,7 @@ class XMLVersion(CommonControlField):
     @property
     def xml_with_pre(self):
         try:
-            for item in XMLWithPre.create(path=self.file.path):
-                return item
+            return xml_cache.get_xml_with_pre(self.file.path, self.finger_print)
         except Exception as e:
             raise XMLVersionXmlWithPreError(
                 _("Unable to get xml with pre (XMLVersion) {}: {} {}").format(
@@ -342,6 +352,239 @@ class OtherPid(CommonControlField):
         return self.updated or self.created
 
 
+class PidV3Reservation(models.Model):
+    """
+    PIDs v3 gerados e reservados para novos registros de PidProviderXML
+
+    A restrição de unicidade de v3 garante que workers concorrentes nunca
+    recebam o mesmo valor. Reservas antigas podem ser apagadas (prune), pois
+    os v3 usados ficam registrados em PidProviderXML.v3.
+    """
+
+    v3 = models.CharField(_("v3"), max_length=23, unique=True)
+    token = models.CharField(max_length=32, db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.v3
+
+    @staticmethod
+    def get_registered_v3(candidates):
+        """
+        Retorna, em uma única consulta, os candidatos que já são v3 de
+        PidProviderXML, pid_in_xml de OtherPid ou estão reservados
+        """
+        candidates = list(candidates)
+        return set(
+            PidProviderXML.objects.filter(v3__in=candidates)
+            .values_list("v3", flat=True)
+            .union(
+                OtherPid.objects.filter(pid_in_xml__in=candidates).values_list(
+                    "pid_in_xml", flat=True
+                ),
+                PidV3Reservation.objects.filter(v3__in=candidates).values_list(
+                    "v3", flat=True
+                ),
+            )
+        )
+
+    @classmethod
+    @profile_classmethod
+    def reserve(cls, total, max_attempts=10):
+        """
+        Gera e reserva total PIDs v3 inéditos
+
+        Cada tentativa executa: uma consulta para excluir os candidatos já
+        registrados, uma inserção em lote que ignora conflitos (reservas
+        feitas em paralelo por outros workers) e uma consulta que obtém os
+        valores efetivamente reservados.
+
+        Returns
+        -------
+        list of str
+
+        Raises
+        ------
+        PidV3ReservationError
+        """
+        reserved = []
+        for attempt in range(max_attempts):
+            missing = total - len(reserved)
+            if missing <= 0:
+                break
+            candidates = {v3_gen.generates() for i in range(missing)}
+            candidates -= cls.get_registered_v3(candidates)
+            if not candidates:
+                continue
+            token = uuid4().hex
+            cls.objects.bulk_create(
+                [cls(v3=v3, token=token) for v3 in candidates],
+                ignore_conflicts=True,
+            )
+            reserved.extend(
+                cls.objects.filter(token=token).values_list("v3", flat=True)
+            )
+        if len(reserved) < total:
+            raise PidV3ReservationError(
+                f"Unable to reserve {total} v3 after {max_attempts} attempts "
+                f"(reserved: {len(reserved)})"
+            )
+        return reserved
+
+    @classmethod
+    def prune(cls, days=None):
+        """
+        Apaga as reservas criadas há mais de days dias
+        (padrão: PID_V3_RESERVATION_RETENTION_DAYS)
+        """
+        days = int(days or getattr(settings, "PID_V3_RESERVATION_RETENTION_DAYS", 7))
+        deleted, _details = cls.objects.filter(
+            created__lt=timezone.now() - timedelta(days=days)
+        ).delete()
+        return deleted
+
+
+class PidV3Batch:
+    """
+    Valores reservados por PidV3Reservation.reserve em uma mesma chamada
+
+    Se a reserva foi feita dentro de uma transação, os valores só podem ser
+    usados por outras conexões depois do commit (on_commit); se a transação
+    (ou o savepoint) for desfeita, as reservas deixam de existir e os valores
+    são descartados.
+    """
+
+    __slots__ = ("values", "reserved_at", "connection", "committed")
+
+    def __init__(self, values, connection):
+        self.values = deque(values)
+        self.reserved_at = time.monotonic()
+        self.connection = connection
+        self.committed = False
+
+    def __call__(self):
+        # executado por transaction.on_commit
+        self.committed = True
+
+    def is_available(self, connection):
+        """
+        Retorna True (pode ser usado), False (reserva desfeita) ou None
+        (pendente de commit na transação de outra conexão)
+        """
+        if self.committed:
+            return True
+        if self.connection is not connection:
+            return None
+        # on_commit pendente: a transação (e o savepoint) da reserva continua
+        # ativa; caso contrário, foi desfeita (rollback)
+        return any(item[1] is self for item in connection.run_on_commit)
+
+
+class PidV3Pool:
+    """
+    PIDs v3 reservados (PidV3Reservation) e ainda não usados pelo processo
+
+    Obtém batch_size valores por vez; valores guardados há mais de ttl
+    segundos são descartados, pois a reserva pode ter sido apagada (prune).
+    Valores cuja reserva foi desfeita (rollback da transação em que foi
+    criada) também são descartados (PidV3Batch).
+    """
+
+    def __init__(self, batch_size, ttl):
+        self.batch_size = max(batch_size, 1)
+        self.ttl = ttl
+        self._batches = deque()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.discarded = 0
+
+    def _pop(self):
+        current = transaction.get_connection()
+        now = time.monotonic()
+        for batch in list(self._batches):
+            if not batch.values or now - batch.reserved_at > self.ttl:
+                self.expired += len(batch.values)
+                self._batches.remove(batch)
+                continue
+            available = batch.is_available(current)
+            if available is None:
+                continue
+            if not available:
+                self.discarded += len(batch.values)
+                self._batches.remove(batch)
+                continue
+            return batch.values.popleft()
+
+    def _reserve(self, total):
+        batch = PidV3Batch(
+            PidV3Reservation.reserve(total), transaction.get_connection()
+        )
+        transaction.on_commit(batch)
+        return batch
+
+    def get(self):
+        with self._lock:
+            v3 = self._pop()
+            if v3:
+                self.hits += 1
+                return v3
+            self.misses += 1
+            batch = self._reserve(self.batch_size)
+            v3 = batch.values.popleft()
+            self._batches.append(batch)
+            return v3
+
+    def reserve(self, total):
+        """
+        Garante, com uma única reserva, total valores disponíveis para
+        os próximos get (ex.: registro de um lote de XML)
+        """
+        with self._lock:
+            current = transaction.get_connection()
+            now = time.monotonic()
+            available = sum(
+                len(batch.values)
+                for batch in self._batches
+                if now - batch.reserved_at <= self.ttl
+                and batch.is_available(current)
+            )
+            missing = total - available
+            if missing > 0:
+                self.misses += 1
+                self._batches.append(self._reserve(missing))
+            return max(missing, 0)
+
+    def clear(self):
+        with self._lock:
+            self._batches.clear()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.discarded = 0
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "discarded": self.discarded,
+            "items": sum(len(batch.values) for batch in self._batches),
+        }
+
+
+pid_v3_pool = PidV3Pool(
+    batch_size=getattr(settings, "PID_V3_RESERVATION_BATCH_SIZE", 50),
+    ttl=getattr(settings, "PID_V3_RESERVATION_TTL", 3600),
+)
+
+
+def cache_stats():
+    return {"pid_v3_pool": pid_v3_pool.stats}
+
+
 class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
     """
     Tem responsabilidade de garantir a atribuição do PID da versão 3,
@@ -395,6 +638,9 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
     z_partial_body = models.CharField(
         _("partial_body"), max_length=64, null=True, blank=True
     )
+    # palavras dos títulos, usadas por best_matches sem precisar interpretar
+    # o XML de cada candidato (None: registro ainda não indexado)
+    title_tokens = models.TextField(_("title tokens"), null=True, blank=True)
     # data de atualização / criação do registro fonte
     origin_date = models.CharField(
         _("Origin date"), max_length=10, null=True, blank=True
@@ -434,6 +680,7 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
         FieldPanel("z_collab"),
         FieldPanel("z_links"),
         FieldPanel("z_partial_body"),
+        FieldPanel("title_tokens", read_only=True),
     ]
 
     edit_handler = TabbedInterface(
@@ -514,6 +761,13 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
             # Para otimizar queries com current_version
             models.Index(fields=["current_version"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["v3"],
+                condition=Q(v3__isnull=False),
+                name="ppx_unique_v3",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.pkg_name} {self.v3}"
@@ -981,11 +1235,13 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
         return cls.objects.get(id=sorted(matched)[-1][-1])
 
     @profile_method
-    def match(self, xml_adapter):
+    def match(self, xml_adapter, xml_title_tokens=None):
         """
+        xml_title_tokens: get_title_tokens dos títulos de xml_adapter,
+        calculado uma única vez por quem compara vários candidatos
         """
         labels = []
-        score = self.title_similarity(xml_adapter) * 100
+        score = self.title_similarity(xml_adapter, xml_title_tokens) * 100
         if score > 50:
             labels.append("title")
         if score_item := get_score(self.z_surnames, xml_adapter.z_surnames, 10, 100):
@@ -1002,32 +1258,66 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
             score += score_item
         return {"score": score, "labels": labels}
 
-    def title_similarity(self, xml_adapter):
-        try:
-            registered = self.xml_with_pre.article_titles_texts
-        except Exception:
-            registered = []
-        xml_adapter_titles = xml_adapter.xml_with_pre.article_titles_texts
-        if xml_adapter_titles == registered:
+    def title_similarity(self, xml_adapter, xml_title_tokens=None):
+        if xml_title_tokens is None:
+            xml_title_tokens = get_title_tokens(
+                xml_adapter.xml_with_pre.article_titles_texts
+            )
+        if self.title_tokens is None:
+            # registro ainda não indexado (add_title_index)
+            try:
+                registered = get_title_tokens(self.xml_with_pre.article_titles_texts)
+            except Exception:
+                registered = ""
+        else:
+            registered = self.title_tokens or ""
+        if xml_title_tokens == registered:
             return 1
-        if not xml_adapter_titles:
+        if not xml_title_tokens:
             return 0
         if not registered:
             return 0
-        words1 = set()
-        for item in xml_adapter_titles:
-            words1.update(item.split())
-        words2 = set()
-        for item in registered:
-            words2.update(item.split())
-        return how_similar(" ".join(sorted(words1)), " ".join(sorted(words2)))
+        return how_similar(xml_title_tokens, registered)
+
+    def add_title_index(self, titles):
+        self.title_tokens = get_title_tokens(titles)
+
+    @classmethod
+    def backfill_title_index(cls, batch_size=500):
+        """
+        Completa title_tokens dos registros que não os têm
+
+        Os registros cujo XML não pôde ser lido continuam sem title_tokens
+        (None), ou seja, best_matches continua obtendo os títulos do XML
+        """
+        total = 0
+        items = []
+        qs = cls.objects.filter(title_tokens__isnull=True).select_related(
+            "current_version"
+        )
+        for item in qs.iterator(chunk_size=batch_size):
+            try:
+                item.add_title_index(item.xml_with_pre.article_titles_texts)
+            except Exception as e:
+                logging.exception(f"backfill_title_index {item}: {e}")
+                continue
+            items.append(item)
+            if len(items) >= batch_size:
+                total += cls.objects.bulk_update(items, ["title_tokens"])
+                items = []
+        if items:
+            total += cls.objects.bulk_update(items, ["title_tokens"])
+        return total
 
     @classmethod
     def best_matches(cls, results, xml_adapter):
         data = []
         matched = []
+        xml_title_tokens = get_title_tokens(
+            xml_adapter.xml_with_pre.article_titles_texts
+        )
         for item in results.iterator():
-            response = item.match(xml_adapter)
+            response = item.match(xml_adapter, xml_title_tokens)
             score = response["score"]
 
             if xml_adapter.v2:
@@ -1084,6 +1374,7 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
         self.z_collab = xml_adapter.z_collab
         self.z_links = xml_adapter.z_links
         self.z_partial_body = xml_adapter.z_partial_body
+        self.add_title_index(xml_adapter.xml_with_pre.article_titles_texts)
 
     @profile_method
     def _add_dates(self, xml_adapter, origin_date, available_since):
@@ -1177,16 +1468,25 @@ class PidProviderXML(BasePidProviderXML, CommonControlField, ClusterableModel):
     @profile_classmethod
     def _get_unique_v3(cls):
         """
-        Generate v3 and return it only if it is new
+        Return a new v3, reserved in batches (PidV3Reservation)
 
         Returns
         -------
             str
         """
-        while True:
-            generated = v3_gen.generates()
-            if not cls._is_registered_pid(v3=generated):
-                return generated
+        return pid_v3_pool.get()
+
+    @classmethod
+    def reserve_v3(cls, total):
+        """
+        Reserve, at once, total new v3 for a batch of registrations;
+        they are used by the next calls of _get_unique_v3
+
+        Returns
+        -------
+            int (number of new reservations)
+        """
+        return pid_v3_pool.reserve(total)
 
     @classmethod
     @profile_classmethod
@@ -1674,6 +1974,18 @@ class XMLURL(CommonControlField):
             return cls.objects.get(url=url)
         raise ValueError("XMLURL.get() requires a url parameter")
 
+    @classmethod
+    def get_loaded(cls, urls):
+        """
+        Retorna {url: updated} dos urls já carregados com sucesso,
+        com uma única consulta
+        """
+        return dict(
+            cls.objects.filter(
+                url__in=urls, status=choices.XMLURL_STATUS_SUCCESS
+            ).values_list("url", "updated")
+        )
+
     @classmethod
     def create(
         cls,
@@ -125,6 +125,127 @@ class PidRequester(BasePidProvider):
         registered["changed"] = check_xml_changed(original, registered)
         return registered
 
+    def request_pids_for_xml_batch(
+        self,
+        items,
+        user,
+        origin_date=None,
+        force_update=None,
+        is_published=None,
+        origin=None,
+    ):
+        """
+        Equivale a request_pid_for_xml_with_pre para vários XML, mas solicita
+        os PIDs ao Core em uma única requisição (remote_batch_registration)
+
+        Parameters
+        ----------
+        items : list of tuple (xml_with_pre, article_proc)
+
+        Returns
+        -------
+        list of dict
+            resultado de cada item, na mesma ordem de items
+        """
+        originals = []
+        demands = []
+        for xml_with_pre, article_proc in items:
+            originals.append(
+                {
+                    "v3": xml_with_pre.v3,
+                    "v2": xml_with_pre.v2,
+                    "aop_pid": xml_with_pre.aop_pid,
+                }
+            )
+            demands.append(
+                PidRequester.get_registration_demand(user, article_proc, xml_with_pre)
+            )
+
+        self.remote_batch_registration(user, items, demands)
+
+        results = []
+        for (xml_with_pre, article_proc), original, registered in zip(
+            items, originals, demands
+        ):
+            if registered.get("error_type"):
+                results.append(registered)
+                continue
+            self.local_registration(
+                user,
+                article_proc,
+                xml_with_pre,
+                registered,
+                origin_date,
+                force_update,
+                is_published,
+                origin,
+            )
+            if registered.get("error_type"):
+                results.append(registered)
+                continue
+            registered["xml_with_pre"] = xml_with_pre
+            registered["filename"] = xml_with_pre.filename
+            registered["changed"] = check_xml_changed(original, registered)
+            results.append(registered)
+        return results
+
+    def remote_batch_registration(self, user, items, demands):
+        """
+        Solicita ao Core, em uma única requisição, os PIDs dos itens que
+        precisam de registro remoto; atualiza demands com as respostas
+
+        Se a requisição falha como um todo (ex.: Core sem o endpoint de
+        lote), solicita os PIDs item a item (remote_registration)
+
+        Parameters
+        ----------
+        items : list of tuple (xml_with_pre, article_proc)
+        demands : list of dict
+            respostas de get_registration_demand, na mesma ordem de items
+        """
+        pending = [
+            (xml_with_pre, article_proc, registered)
+            for (xml_with_pre, article_proc), registered in zip(items, demands)
+            if not registered.get("error_type")
+            and registered.get("do_remote_registration")
+        ]
+        if not pending:
+            return
+
+        operations = [
+            article_proc.start(user, ">>> core registration")
+            for xml_with_pre, article_proc, registered in pending
+        ]
+        if not self.pid_provider_api.enabled:
+            exc = CorePidProviderUnabledException(
+                "Core pid provider is not enabled. Complete core pid provider configuration to enable it"
+            )
+            for op, (xml_with_pre, article_proc, registered) in zip(
+                operations, pending
+            ):
+                op.finish(user, completed=False, exception=exc)
+            return
+
+        responses = self.pid_provider_api.provide_pids(
+            [
+                (xml_with_pre, registered)
+                for xml_with_pre, article_proc, registered in pending
+            ]
+        )
+        for op, (xml_with_pre, article_proc, registered) in zip(operations, pending):
+            response = responses[xml_with_pre.filename]
+            if response.get("batch_error"):
+                op.finish(user, completed=False, detail=response)
+                self.remote_registration(user, article_proc, xml_with_pre, registered)
+                continue
+            if response.get("error_type"):
+                op.finish(user, completed=False, detail=response)
+                continue
+            response["registered_in_core"] = True
+            response["do_local_registration"] = True
+            op.finish(user, completed=True, detail=response)
+            registered.update(response)
+
     @staticmethod
     def get_registration_demand(user, article_proc, xml_with_pre):
         """
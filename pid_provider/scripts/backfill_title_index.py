@@ -0,0 +1,10 @@
+from pid_provider.tasks import task_backfill_title_index
+
+
+def run(username=None, batch_size=None):
+    task_backfill_title_index.apply_async(
+        kwargs={
+            "username": username,
+            "batch_size": batch_size and int(batch_size),
+        }
+    )
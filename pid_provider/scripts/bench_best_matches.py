@@ -0,0 +1,89 @@
+"""
+Compara a latência de PidProviderXML.best_matches com e sem o índice de
+títulos (title_tokens) em um fascículo com muitos
+candidatos quase duplicados
+
+Uso:
+    python manage.py runscript pid_provider.scripts.bench_best_matches \
+        --script-args 300
+
+Todas as gravações são desfeitas ao final (transaction rollback).
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from packtools.sps.pid_provider import v3_gen, xml_sps_adapter
+from packtools.sps.pid_provider.xml_sps_lib import get_xml_with_pre
+
+from core.utils import xml_cache
+from pid_provider.models import PidProviderXML, XMLVersion
+
+User = get_user_model()
+
+XML = """<article xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article"
+ dtd-version="1.1" specific-use="sps-1.9" xml:lang="en">
+<front>
+<journal-meta>
+<journal-id journal-id-type="publisher-id">bench</journal-id>
+<issn pub-type="epub">0000-0000</issn>
+</journal-meta>
+<article-meta>
+<article-id pub-id-type="publisher-id" specific-use="scielo-v3">{v3}</article-id>
+<title-group>
+<article-title>Near duplicate title number {i} about public health in Brazil</article-title>
+</title-group>
+<pub-date publication-format="electronic" date-type="pub"><day>01</day><month>01</month><year>2024</year></pub-date>
+<volume>1</volume>
+<issue>1</issue>
+<fpage>{i}</fpage>
+<lpage>{i}</lpage>
+</article-meta>
+</front>
+</article>"""
+
+
+class Rollback(Exception): ...
+
+
+def measure(label, xml_adapter):
+    xml_cache.xml_with_pre_cache.clear()
+    results = PidProviderXML.objects.filter(issn_electronic="0000-0000")
+    t0 = time.perf_counter()
+    matched = PidProviderXML.best_matches(results, xml_adapter)
+    elapsed = time.perf_counter() - t0
+    print(f"{label}: {elapsed:.3f}s candidates={results.count()} matched={len(matched)}")
+
+
+def run(total="300"):
+    total = int(total)
+    user = User.objects.filter(is_superuser=True).first()
+    try:
+        with transaction.atomic():
+            for i in range(total):
+                xml_with_pre = get_xml_with_pre(XML.format(v3=v3_gen.generates(), i=i))
+                obj = PidProviderXML(
+                    creator=user,
+                    v3=xml_with_pre.v3,
+                    pkg_name=f"bench-{i}",
+                    issn_electronic="0000-0000",
+                    pub_year="2024",
+                    volume="1",
+                    number="1",
+                )
+                obj.add_title_index(xml_with_pre.article_titles_texts)
+                obj.save()
+                obj.current_version = XMLVersion.create(user, obj, xml_with_pre)
+                obj.save()
+
+            xml_adapter = xml_sps_adapter.PidProviderXMLAdapter(
+                get_xml_with_pre(XML.format(v3=v3_gen.generates(), i=total))
+            )
+            measure("indexed titles", xml_adapter)
+            PidProviderXML.objects.filter(issn_electronic="0000-0000").update(
+                title_tokens=None
+            )
+            measure("titles from XML", xml_adapter)
+            raise Rollback
+    except Rollback:
+        pass
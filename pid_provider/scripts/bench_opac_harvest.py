@@ -0,0 +1,152 @@
+"""
+Compara a coleta do endpoint counter_dict do OPAC uma página por vez
+(algoritmo anterior) com OPACHarvester.harvest_pages (páginas seguintes
+obtidas em paralelo), usando um servidor HTTP local que simula o OPAC, e
+informa quantas mensagens seriam enfileiradas com uma tarefa por documento
+e com lotes de documentos
+
+Uso:
+    python manage.py runscript pid_provider.scripts.bench_opac_harvest \
+        --script-args 36500 100 200 4 20 5
+
+Argumentos: total de documentos (ex.: um ano de uma coleção), documentos
+por página, latência de cada página (ms), páginas obtidas em paralelo,
+documentos por tarefa e custo de processamento de cada página (ms; ex.:
+consulta a XMLURL e enfileiramento).
+
+Não grava no banco de dados nem enfileira tarefas.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from urllib.parse import parse_qs, urlsplit
+
+from core.utils.harvesters import OPACHarvester
+
+
+class FakeOPACHandler(BaseHTTPRequestHandler):
+    """
+    Simula /api/v1/counter_dict com total documentos, limit por página
+    """
+
+    protocol_version = "HTTP/1.1"
+    total = 0
+    latency = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        params = parse_qs(urlsplit(self.path).query)
+        limit = int(params["limit"][0])
+        page = int(params["page"][0])
+        time.sleep(self.latency)
+        first = (page - 1) * limit
+        documents = {
+            f"pid{i:08d}": {
+                "journal_acronym": "bench",
+                "status": "true",
+                "update": "Mon, 15 Jan 2024 10:00:00 GMT",
+            }
+            for i in range(first, min(first + limit, self.total))
+        }
+        content = json.dumps(
+            {"pages": ceil(self.total / limit), "documents": documents}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeOPACServer:
+    def __init__(self, total, latency=0):
+        handler = type(
+            "Handler", (FakeOPACHandler,), {"total": total, "latency": latency}
+        )
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def domain(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def sequential_pages(harvester):
+    """Algoritmo anterior: a página seguinte é obtida após processar a atual"""
+    page = 1
+    total_pages = 0
+    while True:
+        response = harvester.fetch_page(page)
+        total_pages = total_pages or response.get("pages") or 0
+        documents = response.get("documents") or {}
+        if not total_pages or not documents:
+            break
+        yield list(documents.items())
+        page += 1
+        if page > total_pages:
+            break
+
+
+def measure(label, pages, page_cost, chunk_size):
+    t0 = time.perf_counter()
+    documents = 0
+    messages_per_document = 0
+    messages_per_chunk = 0
+    for page in pages:
+        # simula o processamento da página (XMLURL e enfileiramento)
+        time.sleep(page_cost)
+        documents += len(page)
+        messages_per_document += len(page)
+        messages_per_chunk += ceil(len(page) / chunk_size)
+    elapsed = time.perf_counter() - t0
+    print(
+        f"{label}: {documents} documents in {elapsed:.2f}s "
+        f"({documents / elapsed:.0f} documents/s) "
+        f"tasks: {messages_per_document} (1/document) "
+        f"{messages_per_chunk} ({chunk_size}/task)"
+    )
+
+
+def run(
+    total="36500",
+    limit="100",
+    latency="200",
+    max_prefetch="4",
+    chunk_size="20",
+    page_cost="5",
+):
+    total = int(total)
+    limit = int(limit)
+    chunk_size = int(chunk_size)
+    page_cost = int(page_cost) / 1000
+    with FakeOPACServer(total, int(latency) / 1000) as server:
+        harvester = OPACHarvester(
+            domain=server.domain, limit=limit, timeout=30, max_prefetch=1
+        )
+        measure("sequential", sequential_pages(harvester), page_cost, chunk_size)
+
+        harvester = OPACHarvester(
+            domain=server.domain,
+            limit=limit,
+            timeout=30,
+            max_prefetch=int(max_prefetch),
+        )
+        measure(
+            f"prefetch ({max_prefetch})",
+            harvester.harvest_pages(),
+            page_cost,
+            chunk_size,
+        )
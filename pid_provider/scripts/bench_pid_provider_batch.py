@@ -0,0 +1,172 @@
+"""
+Compara a vazão (artigos/segundo) da solicitação de PIDs ao Core um XML por
+requisição (PidProviderAPIClient.provide_pid) e em lotes
+(PidProviderAPIClient.provide_pids), usando um servidor HTTP local que
+simula o pid provider do Core
+
+Uso:
+    python manage.py runscript pid_provider.scripts.bench_pid_provider_batch \
+        --script-args 500 100 20 1
+
+Argumentos: total de XMLs, tamanho do lote, latência de cada requisição
+(ms) e custo de registro de cada XML no servidor (ms).
+
+Não grava no banco de dados.
+"""
+import io
+import json
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from zipfile import ZipFile
+
+from packtools.sps.pid_provider import v3_gen
+from packtools.sps.pid_provider.xml_sps_lib import get_xml_with_pre
+
+from pid_provider.client import PidProviderAPIClient
+
+XML = """<article xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article"
+ dtd-version="1.1" specific-use="sps-1.9" xml:lang="en">
+<front>
+<article-meta>
+<article-id pub-id-type="publisher-id" specific-use="scielo-v2">S0000-00002024000100{i:03d}</article-id>
+<title-group>
+<article-title>Benchmark article {i}</article-title>
+</title-group>
+<volume>1</volume>
+<issue>1</issue>
+<fpage>{i}</fpage>
+</article-meta>
+</front>
+</article>"""
+
+
+class FakeCoreHandler(BaseHTTPRequestHandler):
+    """
+    Simula os endpoints api-token-auth, pid_provider e pid_provider_batch
+    """
+
+    latency = 0
+    item_cost = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.latency)
+        if "api-token-auth" in self.path:
+            return self.send_json({"access": "token"})
+        if "pid_provider_batch" in self.path:
+            return self.send_json(self.register(body))
+        if "pid_provider" in self.path:
+            return self.send_json(self.register(self.get_multipart_file(body)))
+        self.send_error(404)
+
+    def get_multipart_file(self, body):
+        message = BytesParser().parsebytes(
+            b"Content-Type: "
+            + self.headers["Content-Type"].encode()
+            + b"\r\n\r\n"
+            + body
+        )
+        for part in message.iter_parts():
+            return part.get_payload(decode=True)
+
+    def register(self, content):
+        results = []
+        with ZipFile(io.BytesIO(content)) as zf:
+            for name in zf.namelist():
+                zf.read(name)
+                time.sleep(self.item_cost)
+                results.append(
+                    {
+                        "filename": name,
+                        "v3": v3_gen.generates(),
+                        "record_status": "created",
+                    }
+                )
+        return results
+
+    def send_json(self, data):
+        content = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeCoreServer:
+    def __init__(self, latency=0, item_cost=0):
+        handler = type(
+            "Handler",
+            (FakeCoreHandler,),
+            {"latency": latency, "item_cost": item_cost},
+        )
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def get_client(url):
+    return PidProviderAPIClient(
+        pid_provider_api_post_xml=f"{url}/api/v2/pid/pid_provider/",
+        pid_provider_api_get_token=f"{url}/api-token-auth/",
+        api_username="user",
+        api_password="pass",
+    )
+
+
+def get_items(total):
+    items = []
+    for i in range(1, total + 1):
+        xml_with_pre = get_xml_with_pre(XML.format(i=i))
+        xml_with_pre.filename = f"bench-{i:05d}.xml"
+        items.append(xml_with_pre)
+    return items
+
+
+def single(client, items, batch_size):
+    return [client.provide_pid(item, item.filename) for item in items]
+
+
+def batch(client, items, batch_size):
+    responses = []
+    for start in range(0, len(items), batch_size):
+        chunk = items[start : start + batch_size]
+        responses.extend(client.provide_pids([(item, {}) for item in chunk]).values())
+    return responses
+
+
+def measure(label, func, client, items, batch_size):
+    t0 = time.perf_counter()
+    responses = func(client, items, batch_size)
+    elapsed = time.perf_counter() - t0
+    errors = sum(1 for item in responses if item.get("error_type"))
+    print(
+        f"{label}: {len(items)} in {elapsed:.2f}s "
+        f"({len(items) / elapsed:.1f} articles/s) errors={errors}"
+    )
+
+
+def run(total="500", batch_size="100", latency="20", item_cost="1"):
+    items = get_items(int(total))
+    batch_size = int(batch_size)
+    with FakeCoreServer(int(latency) / 1000, int(item_cost) / 1000) as server:
+        client = get_client(server.url)
+        measure("single", single, client, items, batch_size)
+        measure(f"batch ({batch_size})", batch, client, items, batch_size)
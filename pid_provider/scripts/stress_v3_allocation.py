@@ -0,0 +1,149 @@
+"""
+Registra, em paralelo, milhares de XMLs sintéticos sem v3 e informa a
+latência de obtenção de v3 e de registro, além das colisões (mesmo v3
+atribuído a mais de um documento)
+
+Uso:
+    python manage.py runscript pid_provider.scripts.stress_v3_allocation \
+        --script-args 2000 8 register
+
+Argumentos: total de XMLs, número de threads e modo:
+    allocate: somente obtém v3 (PidProviderXML._get_unique_v3)
+    legacy: somente obtém v3 com uma consulta por candidato (algoritmo anterior)
+    register: registra os XMLs (PidProviderXML.register)
+
+As gravações precisam ser confirmadas para que os workers concorram entre
+si; por isso os registros criados (ISSN 0000-0000) e as reservas são
+apagados ao final.
+"""
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from packtools.sps.pid_provider import v3_gen
+from packtools.sps.pid_provider.xml_sps_lib import get_xml_with_pre
+
+from pid_provider.models import PidProviderXML, PidV3Reservation
+
+User = get_user_model()
+
+ISSN = "0000-0000"
+
+XML = """<article xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article"
+ dtd-version="1.1" specific-use="sps-1.9" xml:lang="en">
+<front>
+<journal-meta>
+<journal-id journal-id-type="publisher-id">stress</journal-id>
+<issn pub-type="epub">{issn}</issn>
+</journal-meta>
+<article-meta>
+<article-id pub-id-type="doi">10.0000/stress.{i}</article-id>
+<title-group>
+<article-title>Stress test article {i}</article-title>
+</title-group>
+<contrib-group>
+<contrib contrib-type="author"><name><surname>Author{i}</surname><given-names>A</given-names></name></contrib>
+</contrib-group>
+<pub-date publication-format="electronic" date-type="pub"><day>01</day><month>01</month><year>2024</year></pub-date>
+<volume>1</volume>
+<issue>1</issue>
+<fpage>{i}</fpage>
+<lpage>{i}</lpage>
+</article-meta>
+</front>
+</article>"""
+
+
+def legacy_get_unique_v3():
+    while True:
+        generated = v3_gen.generates()
+        if not PidProviderXML._is_registered_pid(v3=generated):
+            return generated
+
+
+def allocate(i, user, mode):
+    t0 = time.perf_counter()
+    try:
+        if mode == "legacy":
+            v3 = legacy_get_unique_v3()
+        else:
+            v3 = PidProviderXML._get_unique_v3()
+        error = None
+    except Exception as e:
+        v3 = None
+        error = f"{type(e).__name__}: {e}"
+    return v3, time.perf_counter() - t0, error
+
+
+def register(i, user, mode):
+    xml_with_pre = get_xml_with_pre(XML.format(issn=ISSN, i=i))
+    t0 = time.perf_counter()
+    try:
+        response = PidProviderXML.register(
+            xml_with_pre, f"stress-{i}.xml", user, origin="stress_v3_allocation"
+        )
+        v3 = response.get("v3")
+        error = response.get("error_message")
+    except Exception as e:
+        v3 = None
+        error = f"{type(e).__name__}: {e}"
+    return v3, time.perf_counter() - t0, error
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def report(label, results, elapsed):
+    latencies = [item[1] for item in results]
+    v3s = [item[0] for item in results if item[0]]
+    errors = Counter(item[2] for item in results if item[2])
+    collisions = sum(total - 1 for total in Counter(v3s).values() if total > 1)
+    print(
+        f"{label}: {len(results)} in {elapsed:.2f}s "
+        f"({len(results) / elapsed:.1f}/s) collisions={collisions} "
+        f"errors={sum(errors.values())}"
+    )
+    if latencies:
+        print(
+            "latency (ms): "
+            f"mean={statistics.mean(latencies) * 1000:.1f} "
+            f"p50={percentile(latencies, 50) * 1000:.1f} "
+            f"p95={percentile(latencies, 95) * 1000:.1f} "
+            f"p99={percentile(latencies, 99) * 1000:.1f} "
+            f"max={max(latencies) * 1000:.1f}"
+        )
+    for error, total in errors.most_common(5):
+        print(f"  {total} x {error}")
+
+
+def cleanup(started):
+    PidV3Reservation.objects.filter(created__gte=started).delete()
+    PidProviderXML.objects.filter(issn_electronic=ISSN).delete()
+
+
+def run(total="2000", max_workers="8", mode="register"):
+    total = int(total)
+    max_workers = int(max_workers)
+    user = User.objects.filter(is_superuser=True).first()
+    func = register if mode == "register" else allocate
+    started = timezone.now()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(
+                lambda i: func(i, user, mode),
+                range(1, total + 1),
+            )
+        )
+    elapsed = time.perf_counter() - t0
+
+    report(f"{mode} ({max_workers} threads)", results, elapsed)
+    cleanup(started)
@@ -1,11 +1,13 @@
 import logging
 import sys
+import time
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
 from config import celery_app
 from core.utils.harvesters import OPACHarvester
-from pid_provider.models import XMLURL
+from pid_provider.models import XMLURL, PidProviderXML, PidV3Reservation
 from pid_provider.provider import PidProvider
 from pid_provider.requester import PidRequester
 from proc.models import ArticleProc
@@ -69,6 +71,47 @@ def subtask_fix_pid_v2(
     article_proc.fix_pid_v2(user)
 
 
+def get_documents_to_load(harvester, page, force_update=None, exceptions=None):
+    """
+    Seleciona os documentos públicos de uma página do OPAC que ainda não
+    foram carregados com sucesso em XMLURL (ou que foram atualizados no OPAC
+    depois do carregamento), com uma única consulta a XMLURL por página
+
+    Returns
+    -------
+    tuple
+        (documentos a carregar, total de documentos já carregados)
+    """
+    documents = []
+    for pid_v3, item in page:
+        try:
+            document = harvester.format_raw(pid_v3, item)
+            if document.get("is_public"):
+                documents.append(document)
+        except Exception as e:
+            if exceptions is not None:
+                exceptions.append({"error": str(e), "type": str(type(e))})
+
+    if force_update or not documents:
+        return documents, 0
+
+    loaded = XMLURL.get_loaded([document["url"] for document in documents])
+    selected = [
+        document
+        for document in documents
+        if not is_loaded(document, loaded.get(document["url"]))
+    ]
+    return selected, len(documents) - len(selected)
+
+
+def is_loaded(document, loaded_at):
+    if not loaded_at:
+        return False
+    origin_date = document.get("origin_date")
+    # origin_date tem somente a data; no mesmo dia, carrega novamente
+    return not origin_date or origin_date < loaded_at.date().isoformat()
+
+
 @celery_app.task(bind=True)
 def task_load_records_from_counter_dict(
     self,
@@ -83,13 +126,18 @@ def task_load_records_from_counter_dict(
     opac_domain=None,
     stop=None,
     journal_acron=None,
+    chunk_size=None,
+    max_prefetch=None,
 ):
     """
     Coleta documentos de uma coleção via endpoint counter_dict do OPAC e
-    enfileira task_load_record_from_xml_url para cada documento público.
+    enfileira task_load_records_from_xml_urls para lotes de documentos
+    públicos.
 
-    Utiliza OPACHarvester para percorrer a API do novo site SciELO. Documentos
-    marcados como não públicos (is_public=False) são ignorados.
+    Utiliza OPACHarvester para percorrer a API do novo site SciELO, obtendo
+    as páginas seguintes em paralelo. Documentos marcados como não públicos
+    (is_public=False) são ignorados; documentos já carregados com sucesso
+    (XMLURL) são ignorados, exceto se force_update.
 
     Args:
         self: Instância da tarefa Celery.
@@ -104,25 +152,57 @@ def task_load_records_from_counter_dict(
         force_update (bool, optional): Força atualização mesmo se o registro
             já existe.
         opac_domain (str, optional): Domínio do OPAC (padrão: "www.scielo.br").
-        stop (int, optional): Quantidade máxima de subtarefas disparadas.
+        stop (int, optional): Quantidade máxima de documentos enfileirados.
             Se None, processa todos os documentos disponíveis.
         journal_acron (str, optional): Acrônimo do periódico para filtrar
             a coleta (ex: "rsp").
+        chunk_size (int, optional): Documentos por subtarefa
+            (padrão: settings.XML_URL_LOAD_CHUNK_SIZE). Os lotes são formados
+            com documentos de páginas consecutivas.
+        max_prefetch (int, optional): Páginas obtidas em paralelo
+            (padrão: settings.OPAC_HARVEST_MAX_PREFETCH).
 
     Side Effects:
-        - Dispara task_load_record_from_xml_url para cada documento público.
+        - Dispara task_load_records_from_xml_urls para cada lote de documentos.
         - Registra UnexpectedEvent em caso de erro.
     """
     count = 0
+    skipped = 0
+    chunks = 0
     invalid_items = []
     exceptions = []
+    pending = []
+
+    def dispatch(chunk):
+        nonlocal chunks
+        try:
+            task_load_records_from_xml_urls.apply_async(
+                kwargs={
+                    "username": username,
+                    "user_id": user_id,
+                    "collection_acron": collection_acron,
+                    "force_update": force_update,
+                    "documents": [
+                        {
+                            "pid_v3": document["pid_v3"],
+                            "xml_url": document["url"],
+                            "origin_date": document.get("origin_date"),
+                            "document_item": document.get("item") or {},
+                        }
+                        for document in chunk
+                    ],
+                },
+                time_limit=get_xml_urls_time_limit(len(chunk)),
+            )
+            chunks += 1
+        except Exception as e:
+            exceptions.append({"error": str(e), "type": str(type(e))})
 
     try:
-        user = _get_user(self.request, username=username, user_id=user_id)
-
         # Define coleção padrão se não especificada (apenas Brasil)
         if not collection_acron:
             collection_acron = "scl"
+        chunk_size = chunk_size or getattr(settings, "XML_URL_LOAD_CHUNK_SIZE", 20)
 
         # Cria harvester do OPAC
         harvester = OPACHarvester(
@@ -133,36 +213,35 @@ def task_load_records_from_counter_dict(
             limit=limit or 100,
             timeout=timeout or 5,
             journal_acron=journal_acron,
+            max_prefetch=max_prefetch
+            or getattr(settings, "OPAC_HARVEST_MAX_PREFETCH", 4),
         )
 
-        # Itera sobre documentos e dispara tarefas individuais
-        for pid_v3, item in harvester.harvest_documents():
-            try:
-                document = harvester.format_raw(pid_v3, item)
-
-                url = document.get("url")
-                origin_date = document.get("origin_date")
-                if not document.get("is_public"):
-                    continue
-
-                document_item = document.get("item") or {}
-
-                task_load_record_from_xml_url.delay(
-                    username=username,
-                    user_id=user_id,
-                    collection_acron=collection_acron,
-                    pid_v3=pid_v3,
-                    xml_url=url,
-                    origin_date=origin_date,
-                    force_update=force_update,
-                    document_item=document_item,
-                )
-                if stop:
-                    count += 1
-                    if count >= stop:
-                        break
-            except Exception as e:
-                exceptions.append({"error": str(e), "type": str(type(e))})
+        # Itera sobre as páginas e dispara tarefas por lote de documentos
+        for page in harvester.harvest_pages():
+            documents, page_skipped = get_documents_to_load(
+                harvester, page, force_update, exceptions
+            )
+            skipped += page_skipped
+            if stop:
+                documents = documents[: stop - count]
+
+            # lotes completos; o restante aguarda os documentos da próxima página
+            pending.extend(documents)
+            while len(pending) >= chunk_size:
+                dispatch(pending[:chunk_size])
+                pending = pending[chunk_size:]
+
+            count += len(documents)
+            if stop and count >= stop:
+                break
+        if pending:
+            dispatch(pending)
+
+        logging.info(
+            f"task_load_records_from_counter_dict: {count} documents in "
+            f"{chunks} tasks, {skipped} already loaded"
+        )
         if exceptions or invalid_items:
             raise ValueError(f"There are exceptions or invalid items")
     except Exception as e:
@@ -184,6 +263,73 @@ def task_load_records_from_counter_dict(
         )
 
 
+def get_xml_urls_time_limit(total_documents):
+    """
+    time_limit (segundos) de task_load_records_from_xml_urls para um lote
+    de total_documents documentos
+    """
+    return total_documents * getattr(
+        settings, "XML_URL_LOAD_SECONDS_PER_DOCUMENT", 15
+    ) + getattr(settings, "XML_URL_LOAD_TIME_LIMIT_MARGIN", 60)
+
+
+def load_record_from_xml_url(
+    user,
+    collection_acron=None,
+    pid_v3=None,
+    xml_url=None,
+    origin_date=None,
+    force_update=None,
+    document_item=None,
+    pid_provider=None,
+):
+    """
+    Carrega um registro em PidProviderXML a partir de uma URL de XML
+    (ver task_load_record_from_xml_url)
+    """
+    try:
+        pid_provider = pid_provider or PidProvider()
+
+        # provide_pid_for_xml_uri cria/atualiza PidProviderXML mas não cria Article
+        result = pid_provider.provide_pid_for_xml_uri(
+            xml_uri=xml_url,
+            name=f"{collection_acron}_{pid_v3}",
+            user=user,
+            origin_date=origin_date,
+            force_update=force_update,
+            is_published=None,
+            registered_in_core=False,
+            auto_solve_pid_conflict=False,
+            document_item=document_item,
+        )
+
+        if result.get("error_msg"):
+            logging.error(
+                f"Error loading record {pid_v3}: {result.get('error_msg')}"
+            )
+        else:
+            logging.info(
+                f"Successfully loaded record {pid_v3} - "
+                f"v3={result.get('v3')}, created={result.get('created')}"
+            )
+        return result
+
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            exception=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "task_load_record_from_xml_url",
+                "collection_acron": collection_acron,
+                "pid_v3": pid_v3,
+                "xml_url": xml_url,
+                "origin_date": origin_date,
+                "force_update": force_update,
+            },
+        )
+
+
 @celery_app.task(bind=True)
 def task_load_record_from_xml_url(
     self,
@@ -223,35 +369,7 @@ def task_load_record_from_xml_url(
         - Registra UnexpectedEvent em caso de erro.
     """
     try:
-        pid_provider = None
         user = _get_user(self.request, username=username, user_id=user_id)
-
-        # Usa PidProvider para processar XML e criar registro em PidProviderXML
-        pid_provider = PidProvider()
-        
-        # provide_pid_for_xml_uri cria/atualiza PidProviderXML mas não cria Article
-        result = pid_provider.provide_pid_for_xml_uri(
-            xml_uri=xml_url,
-            name=f"{collection_acron}_{pid_v3}",
-            user=user,
-            origin_date=origin_date,
-            force_update=force_update,
-            is_published=None,
-            registered_in_core=False,
-            auto_solve_pid_conflict=False,
-            document_item=document_item,
-        )
-
-        if result.get("error_msg"):
-            logging.error(
-                f"Error loading record {pid_v3}: {result.get('error_msg')}"
-            )
-        else:
-            logging.info(
-                f"Successfully loaded record {pid_v3} - "
-                f"v3={result.get('v3')}, created={result.get('created')}"
-            )
-
     except Exception as e:
         exc_type, exc_value, exc_traceback = sys.exc_info()
         UnexpectedEvent.create(
@@ -262,10 +380,91 @@ def task_load_record_from_xml_url(
                 "collection_acron": collection_acron,
                 "pid_v3": pid_v3,
                 "xml_url": xml_url,
-                "origin_date": origin_date,
-                "force_update": force_update,
             },
         )
+        return
+    load_record_from_xml_url(
+        user,
+        collection_acron=collection_acron,
+        pid_v3=pid_v3,
+        xml_url=xml_url,
+        origin_date=origin_date,
+        force_update=force_update,
+        document_item=document_item,
+    )
+
+
+@celery_app.task(bind=True)
+def task_load_records_from_xml_urls(
+    self,
+    username=None,
+    user_id=None,
+    collection_acron=None,
+    force_update=None,
+    documents=None,
+):
+    """
+    Carrega um lote de registros em PidProviderXML a partir de URLs de XML,
+    reaproveitando o usuário e o PidProvider entre os documentos
+
+    O lote tem XML_URL_LOAD_SECONDS_PER_DOCUMENT segundos por documento;
+    esgotado este tempo, os documentos restantes são enfileirados um a um
+    em task_load_record_from_xml_url, antes que time_limit
+    (get_xml_urls_time_limit) interrompa a tarefa
+
+    Args:
+        documents (list[dict]): itens com pid_v3, xml_url, origin_date e
+            document_item (ver task_load_record_from_xml_url)
+
+    Side Effects:
+        - Cria ou atualiza registros em PidProviderXML.
+        - Registra UnexpectedEvent para cada documento com erro.
+    """
+    try:
+        user = _get_user(self.request, username=username, user_id=user_id)
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            exception=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "task_load_records_from_xml_urls",
+                "collection_acron": collection_acron,
+                "documents": [item.get("xml_url") for item in documents or []],
+            },
+        )
+        return
+
+    documents = documents or []
+    deadline = time.monotonic() + len(documents) * getattr(
+        settings, "XML_URL_LOAD_SECONDS_PER_DOCUMENT", 15
+    )
+    pid_provider = PidProvider()
+    for i, document in enumerate(documents):
+        if i and time.monotonic() >= deadline:
+            for item in documents[i:]:
+                task_load_record_from_xml_url.delay(
+                    username=username,
+                    user_id=user_id,
+                    collection_acron=collection_acron,
+                    force_update=force_update,
+                    **item,
+                )
+            logging.info(
+                f"task_load_records_from_xml_urls: {len(documents) - i} "
+                "documents dispatched to task_load_record_from_xml_url"
+            )
+            break
+        load_record_from_xml_url(
+            user,
+            collection_acron=collection_acron,
+            pid_v3=document.get("pid_v3"),
+            xml_url=document.get("xml_url"),
+            origin_date=document.get("origin_date"),
+            force_update=force_update,
+            document_item=document.get("document_item"),
+            pid_provider=pid_provider,
+        )
 
 
 @celery_app.task(bind=True)
@@ -362,3 +561,55 @@ def task_retry_xml_urls_by_status(
             },
         )
 
+
+@celery_app.task(bind=True)
+def task_backfill_title_index(
+    self,
+    username=None,
+    user_id=None,
+    batch_size=None,
+):
+    """
+    Completa PidProviderXML.title_tokens dos registros criados antes da
+    existência deste campo
+    """
+    try:
+        total = PidProviderXML.backfill_title_index(batch_size=batch_size or 500)
+        logging.info(f"task_backfill_title_index: {total} updated")
+        return total
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            exception=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "task_backfill_title_index",
+                "batch_size": batch_size,
+            },
+        )
+
+
+@celery_app.task(bind=True)
+def task_prune_pid_v3_reservations(
+    self,
+    username=None,
+    user_id=None,
+    days=None,
+):
+    """
+    Apaga as reservas de v3 (PidV3Reservation) antigas
+    """
+    try:
+        total = PidV3Reservation.prune(days=days)
+        logging.info(f"task_prune_pid_v3_reservations: {total} deleted")
+        return total
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            exception=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "task_prune_pid_v3_reservations",
+                "days": days,
+            },
+        )
@@ -0,0 +1,269 @@
+import io
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from zipfile import ZipFile
+
+from django.db import connection
+from django.test import TestCase as DBTestCase
+
+from core.users.models import User
+from pid_provider.base_pid_provider import BasePidProvider
+from pid_provider.client import FileBody, PidProviderAPIClient
+from pid_provider.requester import PidRequester
+
+
+def get_xml_with_pre(filename, v3=None):
+    xml_with_pre = Mock()
+    xml_with_pre.filename = filename
+    xml_with_pre.v3 = v3
+    xml_with_pre.tostring.return_value = f"<article>{filename}</article>"
+    return xml_with_pre
+
+
+def get_client():
+    client = PidProviderAPIClient(
+        pid_provider_api_post_xml="http://core/api/v2/pid/pid_provider/",
+        pid_provider_api_get_token="http://core/api-token-auth/",
+        api_username="user",
+        api_password="pass",
+    )
+    client.token = "token"
+    return client
+
+
+class PidProviderAPIClientBatchTest(TestCase):
+    @patch("pid_provider.client.post_data")
+    def test_provide_pids_posts_once_and_maps_results(self, mock_post_data):
+        posted = {}
+
+        def post(url, data=None, **kwargs):
+            with ZipFile(io.BytesIO(b"".join(data))) as zf:
+                posted["names"] = zf.namelist()
+            posted["url"] = url
+            return [
+                {"filename": "b.xml", "v3": "B", "xml_changed": {"pid_v3": "B"}},
+                {"filename": "a.xml", "v3": "A"},
+            ]
+
+        mock_post_data.side_effect = post
+        a = get_xml_with_pre("a.xml", v3="A")
+        b = get_xml_with_pre("b.xml")
+
+        result = get_client().provide_pids([(a, {}), (b, {})])
+
+        mock_post_data.assert_called_once()
+        self.assertEqual("http://core/api/v1/pid_provider_batch/", posted["url"])
+        self.assertEqual(["a.xml", "b.xml"], posted["names"])
+        self.assertEqual("A", result["a.xml"]["v3"])
+        self.assertEqual("B", result["b.xml"]["v3"])
+        self.assertEqual("B", b.v3)
+
+    @patch("pid_provider.client.post_data")
+    def test_provide_pids_returns_errors_by_item(self, mock_post_data):
+        mock_post_data.return_value = [
+            {"filename": "a.xml", "error_type": "ValueError", "error_msg": "x"},
+        ]
+        result = get_client().provide_pids(
+            [(get_xml_with_pre("a.xml"), {}), (get_xml_with_pre("b.xml"), {})]
+        )
+        self.assertEqual("x", result["a.xml"]["error_msg"])
+        self.assertIn("Missing pid provider response", result["b.xml"]["error_msg"])
+
+    @patch("pid_provider.client.post_data")
+    def test_provide_pids_post_failure(self, mock_post_data):
+        mock_post_data.side_effect = Exception("timeout")
+        result = get_client().provide_pids(
+            [(get_xml_with_pre("a.xml"), {}), (get_xml_with_pre("b.xml"), {})]
+        )
+        self.assertEqual({"a.xml", "b.xml"}, set(result))
+        self.assertTrue(all(item.get("error_type") for item in result.values()))
+        self.assertTrue(all(item.get("batch_error") for item in result.values()))
+
+    def test_batch_url_replaces_only_the_path(self):
+        client = PidProviderAPIClient(
+            pid_provider_api_post_xml="https://pid_provider.org/api/v2/pid/pid_provider/?x=1",
+        )
+        self.assertEqual(
+            "https://pid_provider.org/api/v1/pid_provider_batch/", client.batch_url
+        )
+
+    def test_batch_url_without_post_xml_url(self):
+        self.assertIsNone(PidProviderAPIClient().batch_url)
+
+    def test_provide_pids_rejects_duplicated_filename(self):
+        with self.assertRaises(ValueError):
+            get_client().provide_pids(
+                [(get_xml_with_pre("a.xml"), {}), (get_xml_with_pre("a.xml"), {})]
+            )
+
+
+class FileBodyTest(TestCase):
+    def test_can_be_read_again(self):
+        with patch("pid_provider.client.os.path.getsize", return_value=3):
+            body = FileBody(__file__, chunk_size=10)
+            self.assertEqual(3, len(body))
+        self.assertEqual(b"".join(body), b"".join(body))
+
+
+class BasePidProviderBatchTest(DBTestCase):
+    @patch("pid_provider.base_pid_provider.XMLWithPre.create")
+    def test_error_in_one_item_does_not_stop_batch(self, mock_create):
+        mock_create.return_value = [
+            get_xml_with_pre("a.xml"),
+            get_xml_with_pre("b.xml"),
+        ]
+        provider = BasePidProvider()
+        with patch.object(
+            provider,
+            "provide_pid_for_xml_with_pre",
+            side_effect=[
+                Exception("conflict"),
+                {"v3": "B", "xml_with_pre": Mock()},
+            ],
+        ):
+            result = provider.provide_pid_for_xml_batch("batch.zip", Mock())
+
+        self.assertEqual(
+            [
+                {
+                    "error_msg": "conflict",
+                    "error_type": str(Exception),
+                    "filename": "a.xml",
+                },
+                {"v3": "B", "filename": "b.xml"},
+            ],
+            result,
+        )
+
+    @patch("pid_provider.base_pid_provider.XMLWithPre.create")
+    def test_database_error_in_one_item_does_not_abort_the_others(self, mock_create):
+        mock_create.return_value = [
+            get_xml_with_pre("a.xml"),
+            get_xml_with_pre("b.xml"),
+        ]
+
+        def provide(xml_with_pre, filename, user, **kwargs):
+            if filename == "a.xml":
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT * FROM pid_provider_missing_table")
+            return {"v3": "B", "total_users": User.objects.count()}
+
+        provider = BasePidProvider()
+        with patch.object(
+            provider, "provide_pid_for_xml_with_pre", side_effect=provide
+        ):
+            result = provider.provide_pid_for_xml_batch("batch.zip", Mock())
+
+        self.assertEqual("a.xml", result[0]["filename"])
+        self.assertIn("error_type", result[0])
+        self.assertEqual({"v3": "B", "total_users": 0, "filename": "b.xml"}, result[1])
+
+
+class PidRequesterBatchTest(TestCase):
+    def setUp(self):
+        self.requester = PidRequester()
+        self.user = Mock()
+        self.demands = {
+            # não registrado no Core
+            "a.xml": {"do_remote_registration": True, "do_local_registration": True},
+            # igual ao registrado no Core
+            "b.xml": {"do_remote_registration": False, "do_local_registration": False},
+            # falha ao verificar o registro
+            "c.xml": {"error_type": "ValueError", "error_msg": "x"},
+            "d.xml": {"do_remote_registration": True, "do_local_registration": True},
+        }
+        patcher = patch.object(
+            PidRequester,
+            "get_registration_demand",
+            side_effect=lambda user, article_proc, xml_with_pre: dict(
+                self.demands[xml_with_pre.filename]
+            ),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.items = [
+            (get_xml_with_pre(name), Mock())
+            for name in ("a.xml", "b.xml", "c.xml", "d.xml")
+        ]
+        for xml_with_pre, article_proc in self.items:
+            xml_with_pre.v2 = None
+            xml_with_pre.aop_pid = None
+
+    def request(self):
+        with patch.object(self.requester, "local_registration") as local:
+            results = self.requester.request_pids_for_xml_batch(
+                self.items, self.user
+            )
+        return results, local
+
+    @patch.object(PidProviderAPIClient, "enabled", True)
+    @patch.object(PidProviderAPIClient, "provide_pids")
+    def test_registers_in_core_with_one_request(self, mock_provide_pids):
+        mock_provide_pids.return_value = {
+            "a.xml": {"v3": "A", "v2": None, "aop_pid": None},
+            "d.xml": {"error_type": "HTTPError", "error_msg": "500"},
+        }
+
+        results, local = self.request()
+
+        mock_provide_pids.assert_called_once()
+        sent = [item[0].filename for item in mock_provide_pids.call_args[0][0]]
+        self.assertEqual(["a.xml", "d.xml"], sent)
+        self.assertEqual(
+            ["a.xml", "b.xml", None, "d.xml"],
+            [item.get("filename") for item in results],
+        )
+        self.assertEqual("A", results[0]["v3"])
+        self.assertTrue(results[0]["registered_in_core"])
+        self.assertTrue(results[0]["changed"])
+        self.assertFalse(results[1]["changed"])
+        self.assertEqual("x", results[2]["error_msg"])
+        self.assertNotIn("registered_in_core", results[3])
+        # o item com erro na verificação do registro não é registrado
+        self.assertEqual(3, local.call_count)
+
+    @patch.object(PidProviderAPIClient, "enabled", True)
+    @patch.object(PidProviderAPIClient, "provide_pid_and_handle_incorrect_pid_v2")
+    @patch.object(PidProviderAPIClient, "provide_pids")
+    def test_batch_failure_falls_back_to_one_request_per_item(
+        self, mock_provide_pids, mock_provide_pid
+    ):
+        error = {"error_type": "HTTPError", "error_msg": "404", "batch_error": True}
+        mock_provide_pids.return_value = {"a.xml": dict(error), "d.xml": dict(error)}
+        mock_provide_pid.side_effect = lambda xml_with_pre, registered: {
+            "v3": xml_with_pre.filename[0].upper(),
+            "v2": None,
+            "aop_pid": None,
+        }
+
+        results, local = self.request()
+
+        self.assertEqual(
+            ["a.xml", "d.xml"],
+            [call.args[0].filename for call in mock_provide_pid.call_args_list],
+        )
+        self.assertEqual("A", results[0]["v3"])
+        self.assertTrue(results[0]["registered_in_core"])
+        self.assertEqual("D", results[3]["v3"])
+        self.assertTrue(results[3]["registered_in_core"])
+
+    @patch.object(PidProviderAPIClient, "enabled", False)
+    @patch.object(PidProviderAPIClient, "provide_pids")
+    def test_core_disabled(self, mock_provide_pids):
+        results, local = self.request()
+
+        mock_provide_pids.assert_not_called()
+        self.assertEqual(4, len(results))
+        operation = self.items[0][1].start.return_value
+        self.assertFalse(operation.finish.call_args.kwargs["completed"])
+
+    @patch.object(PidProviderAPIClient, "provide_pids")
+    def test_nothing_to_register_in_core(self, mock_provide_pids):
+        self.demands = {
+            name: {"do_remote_registration": False, "do_local_registration": False}
+            for name in self.demands
+        }
+        results, local = self.request()
+
+        mock_provide_pids.assert_not_called()
+        self.assertEqual(4, len(results))
@@ -4,6 +4,7 @@ from unittest import mock
 from unittest.mock import ANY, MagicMock, Mock, call, patch
 
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from lxml import etree
 from xmlsps.xml_sps_lib import XMLWithPre
@@ -1027,3 +1028,139 @@ class BasePidProviderXMLURITest(TestCase):
         xmlurl = models.XMLURL.get(url="http://example.com/article2.xml")
         self.assertEqual(xmlurl.status, "pid_provider_xml_failed")
         self.assertEqual(xmlurl.pid, "test_v3_pid")
+
+
+class PidV3ReservationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        models.PidProviderXML.objects.create(
+            creator=self.user, v3="reg456789012345678901v3"
+        )
+        models.OtherPid.objects.create(
+            creator=self.user, pid_type="pid_v3", pid_in_xml="oth456789012345678901v3"
+        )
+        models.PidV3Reservation.objects.create(
+            v3="res456789012345678901v3", token="x"
+        )
+
+    def test_get_registered_v3(self):
+        result = models.PidV3Reservation.get_registered_v3(
+            [
+                "reg456789012345678901v3",
+                "oth456789012345678901v3",
+                "res456789012345678901v3",
+                "new456789012345678901v3",
+            ]
+        )
+        self.assertEqual(
+            {
+                "reg456789012345678901v3",
+                "oth456789012345678901v3",
+                "res456789012345678901v3",
+            },
+            result,
+        )
+
+    @patch("pid_provider.models.v3_gen.generates")
+    def test_reserve_skips_registered_and_reserved(self, mock_generates):
+        mock_generates.side_effect = [
+            "reg456789012345678901v3",
+            "oth456789012345678901v3",
+            "res456789012345678901v3",
+            "new456789012345678901v3",
+            "new456789012345678901v3",
+            "new456789012345678901v3",
+            "abc456789012345678901v3",
+            "def456789012345678901v3",
+            "ghi456789012345678901v3",
+        ]
+        result = models.PidV3Reservation.reserve(3)
+        self.assertEqual(
+            {
+                "new456789012345678901v3",
+                "abc456789012345678901v3",
+                "def456789012345678901v3",
+            },
+            set(result[:3]),
+        )
+        self.assertTrue(
+            models.PidV3Reservation.objects.filter(
+                v3="abc456789012345678901v3"
+            ).exists()
+        )
+
+    def test_reserve_runs_constant_number_of_queries(self):
+        # consulta de candidatos, inserção e leitura das reservas
+        with self.assertNumQueries(3):
+            result = models.PidV3Reservation.reserve(200)
+        self.assertEqual(200, len(set(result)))
+
+    @patch("pid_provider.models.v3_gen.generates")
+    def test_reserve_raises_error(self, mock_generates):
+        mock_generates.return_value = "reg456789012345678901v3"
+        with self.assertRaises(models.PidV3ReservationError):
+            models.PidV3Reservation.reserve(1, max_attempts=2)
+
+    def test_pool_reuses_reserved_batch(self):
+        pool = models.PidV3Pool(batch_size=10, ttl=60)
+        with self.assertNumQueries(3):
+            values = [pool.get() for i in range(10)]
+        self.assertEqual(10, len(set(values)))
+        self.assertEqual(
+            {"hits": 9, "misses": 1, "expired": 0, "discarded": 0, "items": 0},
+            pool.stats,
+        )
+
+    def test_pool_discards_values_of_rolled_back_reservation(self):
+        pool = models.PidV3Pool(batch_size=5, ttl=60)
+        try:
+            with transaction.atomic():
+                rolled_back = pool.get()
+                raise ValueError("rollback")
+        except ValueError:
+            pass
+        self.assertFalse(
+            models.PidV3Reservation.objects.filter(v3=rolled_back).exists()
+        )
+
+        v3 = pool.get()
+
+        self.assertEqual(4, pool.stats["discarded"])
+        self.assertEqual(2, pool.stats["misses"])
+        self.assertTrue(models.PidV3Reservation.objects.filter(v3=v3).exists())
+
+    def test_pool_keeps_values_of_active_transaction(self):
+        pool = models.PidV3Pool(batch_size=5, ttl=60)
+        with transaction.atomic():
+            pool.get()
+            pool.get()
+        self.assertEqual(1, pool.stats["hits"])
+        self.assertEqual(0, pool.stats["discarded"])
+
+    def test_reserve_v3_fills_pool_with_one_reservation(self):
+        models.pid_v3_pool.clear()
+        self.addCleanup(models.pid_v3_pool.clear)
+        with self.assertNumQueries(3):
+            models.PidProviderXML.reserve_v3(20)
+        with self.assertNumQueries(0):
+            values = [models.PidProviderXML._get_unique_v3() for i in range(20)]
+        self.assertEqual(20, len(set(values)))
+
+    def test_v3_is_unique(self):
+        models.PidProviderXML.objects.create(
+            v3="dup456789012345678901v3", creator=self.user
+        )
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                models.PidProviderXML.objects.create(
+                    v3="dup456789012345678901v3", creator=self.user
+                )
+
+    def test_pool_discards_expired(self):
+        pool = models.PidV3Pool(batch_size=2, ttl=60)
+        with patch("pid_provider.models.time.monotonic", return_value=1000):
+            pool.get()
+        with patch("pid_provider.models.time.monotonic", return_value=1061):
+            pool.get()
+        self.assertEqual(1, pool.stats["expired"])
+        self.assertEqual(2, pool.stats["misses"])
@@ -0,0 +1,157 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.utils.harvesters import OPACHarvester
+from pid_provider import choices, tasks
+from pid_provider.models import XMLURL
+
+User = get_user_model()
+
+
+def get_item(journal_acron="jtest", status="true", update="Mon, 15 Jan 2024 10:00:00 GMT"):
+    return {"journal_acronym": journal_acron, "status": status, "update": update}
+
+
+def get_url(pid_v3):
+    return f"http://www.example.com/j/jtest/a/{pid_v3}/?format=xml"
+
+
+class GetDocumentsToLoadTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="pass")
+        self.harvester = OPACHarvester(domain="www.example.com")
+        for pid_v3 in ("loaded", "updated"):
+            XMLURL.create(
+                self.user,
+                url=get_url(pid_v3),
+                status=choices.XMLURL_STATUS_SUCCESS,
+                pid=pid_v3,
+            )
+        XMLURL.create(
+            self.user,
+            url=get_url("failed"),
+            status=choices.XMLURL_STATUS_XML_FETCH_FAILED,
+            pid="failed",
+        )
+        self.page = [
+            ("loaded", get_item()),
+            ("updated", get_item(update="Fri, 01 Jan 2100 10:00:00 GMT")),
+            ("failed", get_item()),
+            ("new", get_item()),
+            ("private", get_item(status="false")),
+        ]
+
+    def test_skips_loaded_and_private_documents_with_one_query(self):
+        with self.assertNumQueries(1):
+            documents, skipped = tasks.get_documents_to_load(self.harvester, self.page)
+
+        self.assertEqual(
+            ["updated", "failed", "new"], [item["pid_v3"] for item in documents]
+        )
+        self.assertEqual(1, skipped)
+
+    def test_force_update_does_not_query(self):
+        with self.assertNumQueries(0):
+            documents, skipped = tasks.get_documents_to_load(
+                self.harvester, self.page, force_update=True
+            )
+        self.assertEqual(4, len(documents))
+        self.assertEqual(0, skipped)
+
+    def test_is_loaded(self):
+        loaded_at = datetime(2024, 2, 1, tzinfo=timezone.utc)
+        self.assertTrue(tasks.is_loaded({"origin_date": "2024-01-31"}, loaded_at))
+        self.assertFalse(tasks.is_loaded({"origin_date": "2024-02-01"}, loaded_at))
+        self.assertFalse(tasks.is_loaded({"origin_date": "2024-01-31"}, None))
+
+
+class TaskLoadRecordsFromCounterDictTest(TestCase):
+    def setUp(self):
+        self.pages = [
+            [(f"pid{page}-{i}", get_item()) for i in range(5)] for page in range(3)
+        ]
+
+    @patch("pid_provider.tasks.task_load_records_from_xml_urls.apply_async")
+    @patch.object(OPACHarvester, "harvest_pages")
+    @override_settings(
+        XML_URL_LOAD_SECONDS_PER_DOCUMENT=10, XML_URL_LOAD_TIME_LIMIT_MARGIN=5
+    )
+    def test_dispatches_documents_in_chunks(self, mock_harvest_pages, mock_delay):
+        mock_harvest_pages.return_value = iter(self.pages)
+
+        tasks.task_load_records_from_counter_dict(
+            user_id=1, opac_domain="www.example.com", chunk_size=4
+        )
+
+        # 3 páginas de 5 documentos, em lotes de 4 que atravessam as páginas
+        chunks = [
+            [item["pid_v3"] for item in call.kwargs["kwargs"]["documents"]]
+            for call in mock_delay.call_args_list
+        ]
+        self.assertEqual([4, 4, 4, 3], [len(chunk) for chunk in chunks])
+        self.assertEqual(
+            ["pid0-4", "pid1-0", "pid1-1", "pid1-2"], chunks[1]
+        )
+        self.assertEqual(
+            [45, 45, 45, 35],
+            [call.kwargs["time_limit"] for call in mock_delay.call_args_list],
+        )
+        self.assertEqual(
+            {"pid_v3", "xml_url", "origin_date", "document_item"},
+            set(mock_delay.call_args_list[0].kwargs["kwargs"]["documents"][0]),
+        )
+
+    @patch("pid_provider.tasks.task_load_records_from_xml_urls.apply_async")
+    @patch.object(OPACHarvester, "harvest_pages")
+    def test_stop(self, mock_harvest_pages, mock_delay):
+        mock_harvest_pages.return_value = iter(self.pages)
+
+        tasks.task_load_records_from_counter_dict(
+            user_id=1, opac_domain="www.example.com", chunk_size=4, stop=7
+        )
+
+        documents = [
+            item["pid_v3"]
+            for call in mock_delay.call_args_list
+            for item in call.kwargs["kwargs"]["documents"]
+        ]
+        self.assertEqual(7, len(documents))
+
+    @patch("pid_provider.tasks.load_record_from_xml_url")
+    @patch("pid_provider.tasks.PidProvider")
+    def test_chunk_task_reuses_pid_provider(self, mock_pid_provider, mock_load):
+        user = User.objects.create_user(username="user", password="pass")
+        documents = [
+            {"pid_v3": f"pid{i}", "xml_url": get_url(f"pid{i}")} for i in range(3)
+        ]
+
+        tasks.task_load_records_from_xml_urls(user_id=user.id, documents=documents)
+
+        mock_pid_provider.assert_called_once()
+        self.assertEqual(3, mock_load.call_count)
+        for call in mock_load.call_args_list:
+            self.assertIs(mock_pid_provider.return_value, call.kwargs["pid_provider"])
+
+    @override_settings(XML_URL_LOAD_SECONDS_PER_DOCUMENT=0)
+    @patch("pid_provider.tasks.task_load_record_from_xml_url.delay")
+    @patch("pid_provider.tasks.load_record_from_xml_url")
+    @patch("pid_provider.tasks.PidProvider")
+    def test_chunk_task_dispatches_remaining_documents_when_out_of_time(
+        self, mock_pid_provider, mock_load, mock_delay
+    ):
+        user = User.objects.create_user(username="user", password="pass")
+        documents = [
+            {"pid_v3": f"pid{i}", "xml_url": get_url(f"pid{i}")} for i in range(3)
+        ]
+
+        tasks.task_load_records_from_xml_urls(user_id=user.id, documents=documents)
+
+        # o primeiro documento é sempre carregado pelo lote
+        self.assertEqual(1, mock_load.call_count)
+        self.assertEqual(
+            ["pid1", "pid2"],
+            [call.kwargs["pid_v3"] for call in mock_delay.call_args_list],
+        )
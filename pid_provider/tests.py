@@ -1,3 +1,81 @@
+from unittest.mock import Mock, PropertyMock, patch
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from core.utils.similarity import get_title_tokens
+from pid_provider.models import PidProviderXML
+
+
+def get_xml_adapter(titles):
+    xml_adapter = Mock()
+    xml_adapter.xml_with_pre.article_titles_texts = titles
+    return xml_adapter
+
+
+class PidProviderXMLTitleSimilarityTest(TestCase):
+    def _registered(self, titles):
+        obj = PidProviderXML()
+        obj.add_title_index(titles)
+        return obj
+
+    @patch.object(PidProviderXML, "xml_with_pre", new_callable=PropertyMock)
+    def test_uses_indexed_tokens_without_parsing_registered_xml(self, mock_xml):
+        obj = self._registered(["Saúde pública no Brasil"])
+        result = obj.title_similarity(get_xml_adapter(["Saúde pública no Brasil"]))
+        self.assertEqual(result, 1)
+        mock_xml.assert_not_called()
+
+    @patch.object(PidProviderXML, "xml_with_pre", new_callable=PropertyMock)
+    def test_falls_back_to_xml_when_title_tokens_is_missing(self, mock_xml):
+        mock_xml.return_value.article_titles_texts = ["Saúde pública"]
+        obj = PidProviderXML()
+        result = obj.title_similarity(get_xml_adapter(["Saúde pública"]))
+        self.assertEqual(result, 1)
+        mock_xml.assert_called_once()
+
+    def test_indexed_and_xml_scores_are_equal(self):
+        registered_titles = ["Sistema nacional de inovação em saúde", "National system"]
+        xml_titles = ["Sistema nacional de inovação", "National health system"]
+
+        indexed = self._registered(registered_titles)
+        with patch.object(
+            PidProviderXML, "xml_with_pre", new_callable=PropertyMock
+        ) as mock_xml:
+            mock_xml.return_value.article_titles_texts = registered_titles
+            not_indexed = PidProviderXML()
+            expected = not_indexed.title_similarity(get_xml_adapter(xml_titles))
+
+        self.assertEqual(
+            indexed.title_similarity(get_xml_adapter(xml_titles)), expected
+        )
+
+    def test_returns_zero_if_registered_has_no_title(self):
+        obj = self._registered([])
+        self.assertEqual(obj.title_similarity(get_xml_adapter(["Title"])), 0)
+
+
+class TitleIndexTest(TestCase):
+    def test_get_title_tokens_sorts_and_removes_repetitions(self):
+        self.assertEqual(
+            get_title_tokens(["b a", "a c"]),
+            "a b c",
+        )
+
+
+class BackfillTitleIndexTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(username="user")
+        self.obj = PidProviderXML.objects.create(creator=user, pkg_name="pkg")
+
+    def test_keeps_title_tokens_null_if_xml_is_not_available(self):
+        self.assertEqual(PidProviderXML.backfill_title_index(), 0)
+        self.obj.refresh_from_db()
+        self.assertIsNone(self.obj.title_tokens)
+
+    @patch.object(PidProviderXML, "xml_with_pre", new_callable=PropertyMock)
+    def test_fills_title_tokens(self, mock_xml):
+        mock_xml.return_value.article_titles_texts = ["b a"]
+        self.assertEqual(PidProviderXML.backfill_title_index(), 1)
+        self.obj.refresh_from_db()
+        self.assertEqual(self.obj.title_tokens, "a b")
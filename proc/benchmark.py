@@ -0,0 +1,758 @@
+"""
+Benchmark do fluxo de migração e publicação de artigos
+
+classic website → ArticleProc → pacote SPS → PID → armazenamento → publicação
+
+Gera uma árvore sintética do site clássico (acron.id, bases-work, htdocs,
+imagens, PDFs e XML), executa as etapas com armazenamento local (no lugar do
+Minio) e um servidor HTTP local (no lugar do pid provider do Core e da API
+do site) e mede, por etapa, o tempo, a quantidade de consultas SQL e o pico
+de memória (RSS).
+
+O relatório é gravado em JSON para comparar versões (compare_reports).
+
+Uso: proc/scripts/bench_pipeline.py
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import psutil
+from django.db import connection
+
+from files_storage.minio import MinioStorage
+
+ISSN = "0000-0000"
+JOURNAL_ACRON = "bench"
+TOKEN = "bench-token"
+
+MB = 1024 * 1024
+
+
+###########################################
+# Métricas
+###########################################
+
+
+class QueryCounter:
+    """
+    Conta as consultas SQL executadas na conexão (connection.execute_wrapper)
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        return execute(sql, params, many, context)
+
+
+class PeakRSSSampler:
+    """
+    Obtém o pico de memória (RSS) do processo, amostrado em uma thread
+    """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.sample()
+        return self.peak
+
+
+@contextmanager
+def measure_stage(results, name, rss_interval=0.01):
+    """
+    Mede a etapa name e adiciona o resultado em results
+
+    O bloco pode atualizar items, failures e errors do resultado
+    """
+    result = {"name": name, "items": 0, "failures": 0, "errors": []}
+    counter = QueryCounter()
+    sampler = PeakRSSSampler(rss_interval)
+    rss_start = sampler.peak
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counter):
+            yield result
+    finally:
+        result["wall_time"] = round(time.perf_counter() - started, 4)
+        result["queries"] = counter.total
+        peak = sampler.stop()
+        result["rss_start_mb"] = round(rss_start / MB, 1)
+        result["peak_rss_mb"] = round(peak / MB, 1)
+        if result["items"] and result["wall_time"]:
+            result["items_per_second"] = round(
+                result["items"] / result["wall_time"], 2
+            )
+        results.append(result)
+
+
+def add_failure(result, e, max_errors=5):
+    result["failures"] += 1
+    if len(result["errors"]) < max_errors:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+
+
+###########################################
+# Site clássico sintético
+###########################################
+
+
+def get_issue_folder(i):
+    return f"v{i + 1}n1"
+
+
+def get_issue_pid(i):
+    return f"{ISSN}{2000 + i:04d}0001"
+
+
+def get_article_key(j):
+    return f"a{j + 1:02d}"
+
+
+def get_article_pid(i, j):
+    return f"S{get_issue_pid(i)}{j + 1:05d}"
+
+
+def get_article_xml(i, j):
+    pid = get_article_pid(i, j)
+    key = get_article_key(j)
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE article PUBLIC "-//NLM//DTD JATS (Z39.96) Journal Publishing DTD v1.1 20151215//EN"
+ "https://jats.nlm.nih.gov/publishing/1.1/JATS-journalpublishing1.dtd">
+<article xmlns:xlink="http://www.w3.org/1999/xlink" article-type="research-article"
+ dtd-version="1.1" specific-use="sps-1.9" xml:lang="en">
+<front>
+<journal-meta>
+<journal-id journal-id-type="publisher-id">{JOURNAL_ACRON}</journal-id>
+<journal-title-group><journal-title>Bench Journal</journal-title></journal-title-group>
+<issn pub-type="epub">{ISSN}</issn>
+<publisher><publisher-name>SciELO</publisher-name></publisher>
+</journal-meta>
+<article-meta>
+<article-id specific-use="scielo-v2" pub-id-type="publisher-id">{pid}</article-id>
+<title-group><article-title>Article {i}.{j}</article-title></title-group>
+<contrib-group>
+<contrib contrib-type="author"><name><surname>Surname{j}</surname><given-names>Name{j}</given-names></name></contrib>
+</contrib-group>
+<pub-date publication-format="electronic" date-type="pub">
+<day>01</day><month>01</month><year>{2000 + i}</year></pub-date>
+<pub-date publication-format="electronic" date-type="collection"><year>{2000 + i}</year></pub-date>
+<volume>{i + 1}</volume>
+<issue>1</issue>
+<fpage>{j * 10 + 1}</fpage>
+<lpage>{j * 10 + 9}</lpage>
+</article-meta>
+</front>
+<body>
+<sec><title>Introduction</title><p>Text {pid}</p>
+<fig id="f1"><label>Figure 1</label><caption><title>Figure</title></caption>
+<graphic xlink:href="{key}f1.jpg"/></fig>
+</sec>
+</body>
+</article>
+"""
+
+
+def write_id_file(file_path, issues, articles):
+    """
+    Gera acron.id com issues registros de fascículo, cada um seguido de
+    articles registros de artigo
+    """
+    mfn = 0
+    with open(file_path, "w", encoding="iso-8859-1") as fp:
+        for i in range(issues):
+            issue_pid = get_issue_pid(i)
+            mfn += 1
+            fp.write(f"!ID {mfn:07d}\n")
+            fp.write("!v706!i\n")
+            fp.write(f"!v031!{i + 1}\n")
+            fp.write("!v032!1\n")
+            fp.write(f"!v035!{ISSN}\n")
+            fp.write(f"!v036!{issue_pid[-8:]}\n")
+            fp.write(f"!v065!{2000 + i}0101\n")
+            fp.write(f"!v880!{issue_pid}\n")
+            fp.write(f"!v930!{JOURNAL_ACRON.upper()}\n")
+            for j in range(articles):
+                key = get_article_key(j)
+                mfn += 1
+                fp.write(f"!ID {mfn:07d}\n")
+                fp.write("!v706!h\n")
+                fp.write(f"!v702!{JOURNAL_ACRON}/{get_issue_folder(i)}/{key}.xml\n")
+                fp.write(f"!v880!{get_article_pid(i, j)}\n")
+                fp.write(f"!v035!{ISSN}\n")
+                fp.write(f"!v031!{i + 1}\n")
+                fp.write("!v032!1\n")
+                fp.write("!v040!en\n")
+                fp.write(f"!v065!{2000 + i}0101\n")
+                fp.write(f"!v012!Article {i}.{j}^len\n")
+                fp.write(f"!v010!^nName{j}^sSurname{j}\n")
+                fp.write(f"!v014!^f{j * 10 + 1}^l{j * 10 + 9}\n")
+
+
+def write_file(file_path, content):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(file_path, mode) as fp:
+        fp.write(content)
+
+
+def write_classic_website_tree(root, issues, articles, image_size=20000):
+    """
+    Cria em root a estrutura de pastas do site clássico
+
+    Returns
+    -------
+    dict
+        caminhos a serem usados em ClassicWebsiteConfiguration
+    """
+    paths = dict(
+        title_path=os.path.join(root, "bases", "title", "title.id"),
+        issue_path=os.path.join(root, "bases", "issue", "issue.id"),
+        serial_path=os.path.join(root, "serial"),
+        bases_work_path=os.path.join(root, "bases-work"),
+        bases_pdf_path=os.path.join(root, "bases", "pdf"),
+        bases_translation_path=os.path.join(root, "bases", "translation"),
+        bases_xml_path=os.path.join(root, "bases", "xml"),
+        htdocs_img_revistas_path=os.path.join(root, "htdocs", "img", "revistas"),
+    )
+    for name in ("title_path", "issue_path"):
+        write_file(paths[name], "")
+    for name in ("serial_path", "bases_translation_path"):
+        os.makedirs(paths[name], exist_ok=True)
+
+    write_id_file(
+        os.path.join(paths["bases_work_path"], JOURNAL_ACRON, f"{JOURNAL_ACRON}.id"),
+        issues,
+        articles,
+    )
+    image = b"\xff\xd8\xff\xe0" + b"\0" * image_size
+    pdf = b"%PDF-1.4\n" + b"0" * image_size + b"\n%%EOF\n"
+    for i in range(issues):
+        issue_folder = get_issue_folder(i)
+        for j in range(articles):
+            key = get_article_key(j)
+            write_file(
+                os.path.join(
+                    paths["bases_xml_path"], JOURNAL_ACRON, issue_folder, f"{key}.xml"
+                ),
+                get_article_xml(i, j),
+            )
+            write_file(
+                os.path.join(
+                    paths["htdocs_img_revistas_path"],
+                    JOURNAL_ACRON,
+                    issue_folder,
+                    f"{key}f1.jpg",
+                ),
+                image,
+            )
+            write_file(
+                os.path.join(
+                    paths["bases_pdf_path"], JOURNAL_ACRON, issue_folder, f"{key}.pdf"
+                ),
+                pdf,
+            )
+    return paths
+
+
+###########################################
+# Armazenamento local (no lugar do Minio)
+###########################################
+
+
+class LocalObjectStore:
+    """
+    Substitui o cliente Minio de MinioStorage, gravando os objetos em root
+    """
+
+    def __init__(self, root, base_url="http://files.bench.local"):
+        self.root = root
+        self.base_url = base_url
+        self.metadata = {}
+        self.stats = {"put": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, bucket_name, object_name):
+        return os.path.join(self.root, bucket_name, object_name)
+
+    def _registered(self, bucket_name, object_name, metadata):
+        path = self._path(bucket_name, object_name)
+        with self._lock:
+            self.metadata[path] = {
+                f"x-amz-meta-{k}": v for k, v in (metadata or {}).items()
+            }
+            self.stats["put"] += 1
+            self.stats["bytes"] += os.path.getsize(path)
+
+    def put_object(
+        self, bucket_name, object_name, data, length, content_type=None, metadata=None
+    ):
+        path = self._path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fp:
+            shutil.copyfileobj(data, fp)
+        self._registered(bucket_name, object_name, metadata)
+
+    def fput_object(
+        self, bucket_name, object_name, file_path, content_type=None, metadata=None
+    ):
+        path = self._path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(file_path, path)
+        self._registered(bucket_name, object_name, metadata)
+
+    def fget_object(self, bucket_name, object_name, file_path):
+        shutil.copyfile(self._path(bucket_name, object_name), file_path)
+
+    def stat_object(self, bucket_name, object_name):
+        return SimpleNamespace(
+            metadata=self.metadata.get(self._path(bucket_name, object_name), {})
+        )
+
+    def presigned_get_object(self, bucket_name, object_name):
+        return f"{self.base_url}/{bucket_name}/{object_name}"
+
+    def remove_object(self, bucket_name, object_name):
+        path = self._path(bucket_name, object_name)
+        self.metadata.pop(path, None)
+        if os.path.isfile(path):
+            os.remove(path)
+
+    def make_bucket(self, bucket_name, *args, **kwargs):
+        os.makedirs(os.path.join(self.root, bucket_name), exist_ok=True)
+
+    def set_bucket_policy(self, bucket_name, policy):
+        pass
+
+
+def get_local_files_storage(root):
+    files_storage = MinioStorage(
+        minio_host="files.bench.local",
+        minio_access_key=None,
+        minio_secret_key=None,
+        bucket_root=JOURNAL_ACRON,
+        location=None,
+        minio_secure=False,
+    )
+    files_storage._client_instance = LocalObjectStore(root)
+    return files_storage
+
+
+###########################################
+# Servidor HTTP local (pid provider do Core e API do site)
+###########################################
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def get_data(self):
+        path = self.path.split("?")[0]
+        if "token" in path or "auth" in path:
+            return {"access": TOKEN, "token": TOKEN}
+        if "fix_pid_v2" in path:
+            return {"fixed_in_core": True}
+        if "pid_provider" in path:
+            return [{"xml_changed": None}]
+        return {"id": "bench", "failed": False}
+
+    def send_data(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.register(self.command, self.path)
+        self.send_data({})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.register(self.command, self.path)
+        self.send_data(self.get_data())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeBackendServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def register(self, method, path):
+        key = f"{method} {path.split('?')[0]}"
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+
+class FakeBackend:
+    """
+    Servidor HTTP local que responde como o pid provider do Core e
+    como a API do site
+
+        with FakeBackend() as backend:
+            backend.url("/api/v2/pid/pid_provider/")
+    """
+
+    def __init__(self):
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        self.server = FakeBackendServer(("127.0.0.1", 0), FakeBackendHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def requests(self):
+        return dict(self.server.requests)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+
+###########################################
+# Fluxo
+###########################################
+
+
+def setup_collection(user, paths, backend, issues):
+    """
+    Cria coleção, configurações, periódico e fascículos usados no benchmark
+    """
+    from collection import choices as collection_choices
+    from collection.models import Collection, WebSiteConfiguration
+    from journal.models import Journal, OfficialJournal
+    from issue.models import Issue
+    from migration.models import (
+        ClassicWebsiteConfiguration,
+        MigratedIssue,
+        MigratedJournal,
+    )
+    from pid_provider.models import PidProviderConfig
+    from proc.models import IssueProc, JournalProc
+    from tracker import choices as tracker_choices
+
+    collection = Collection.objects.create(
+        acron=JOURNAL_ACRON, name="Benchmark", creator=user
+    )
+    ClassicWebsiteConfiguration.objects.create(
+        collection=collection, creator=user, **paths
+    )
+
+    config = PidProviderConfig.get_or_create(creator=user)
+    config.pid_provider_api_post_xml = backend.url("/api/v2/pid/pid_provider/")
+    config.pid_provider_api_get_token = backend.url("/api/v2/auth/token/")
+    config.api_username = "bench"
+    config.api_password = "bench"
+    config.timeout = 10
+    config.save()
+
+    WebSiteConfiguration.objects.create(
+        collection=collection,
+        url=backend.url(""),
+        purpose=collection_choices.QA,
+        api_url_article=backend.url("/api/v1/article"),
+        api_url_issue=backend.url("/api/v1/issue"),
+        api_url_journal=backend.url("/api/v1/journal"),
+        api_get_token_url=backend.url("/api/v1/auth"),
+        api_username="bench",
+        api_password="bench",
+        enabled=True,
+        creator=user,
+    )
+
+    official_journal = OfficialJournal.create_or_update(
+        user, issn_electronic=ISSN, title="Bench Journal"
+    )
+    journal = Journal.create_or_update(
+        user,
+        official_journal=official_journal,
+        title="Bench Journal",
+        short_title="Bench",
+        journal_acron=JOURNAL_ACRON,
+    )
+    journal_proc = JournalProc.objects.create(
+        collection=collection,
+        pid=ISSN,
+        acron=JOURNAL_ACRON,
+        journal=journal,
+        migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+        migrated_data=MigratedJournal.create_or_update_migrated_data(
+            user=user,
+            collection=collection,
+            pid=ISSN,
+            data={
+                "v100": [{"_": "Bench Journal"}],
+                "v068": [{"_": JOURNAL_ACRON}],
+                "v935": [{"_": ISSN}],
+            },
+            content_type="journal",
+            migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+        ),
+        creator=user,
+    )
+    issue_procs = []
+    for i in range(issues):
+        pid = get_issue_pid(i)
+        issue = Issue.get_or_create(
+            journal=journal,
+            volume=str(i + 1),
+            supplement=None,
+            number="1",
+            publication_year=str(2000 + i),
+            user=user,
+            issue_pid_suffix="0001",
+        )
+        issue_procs.append(
+            IssueProc.objects.create(
+                collection=collection,
+                journal_proc=journal_proc,
+                issue=issue,
+                pid=pid,
+                issue_folder=get_issue_folder(i),
+                migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+                migrated_data=MigratedIssue.create_or_update_migrated_data(
+                    user=user,
+                    collection=collection,
+                    pid=pid,
+                    data={
+                        "v031": [{"_": str(i + 1)}],
+                        "v032": [{"_": "1"}],
+                        "v035": [{"_": ISSN}],
+                        "v036": [{"_": pid[-8:]}],
+                        "v880": [{"_": pid}],
+                    },
+                    content_type="issue",
+                    migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+                ),
+                creator=user,
+            )
+        )
+    return journal_proc, issue_procs
+
+
+def run_pipeline(user, paths, backend, issues, rss_interval=0.01):
+    """
+    Executa as etapas do fluxo e retorna as métricas de cada etapa
+    """
+    from collection import choices as collection_choices
+    from migration import controller
+    from proc.models import ArticleProc
+    from publication.api.document import publish_article
+    from publication.api.publication import get_api_data
+    from tracker import choices as tracker_choices
+
+    results = []
+    with measure_stage(results, "setup", rss_interval) as result:
+        journal_proc, issue_procs = setup_collection(user, paths, backend, issues)
+        result["items"] = len(issue_procs)
+
+    with measure_stage(results, "import_journal_acron_id_records", rss_interval) as result:
+        detail = controller.import_journal_acron_id_records(
+            user, ArticleProc, journal_proc, force_update=True
+        )
+        result["items"] = detail.get("stats", {}).get("total_id_file_records") or 0
+        if detail.get("output", {}).get("traceback"):
+            result["failures"] += 1
+            result["errors"].append(detail["output"]["traceback"][-500:])
+
+    with measure_stage(results, "migrate_document_records", rss_interval) as result:
+        for issue_proc in issue_procs:
+            try:
+                result["items"] += issue_proc.migrate_document_records(user, True)
+            except Exception as e:
+                add_failure(result, e)
+
+    with measure_stage(results, "migrate_issue_files", rss_interval) as result:
+        for issue_proc in issue_procs:
+            try:
+                issue_proc.migrate_document_files(
+                    user, True, controller.migrate_issue_files
+                )
+                # as falhas são registradas na operação, sem exceção;
+                # conta os arquivos associados ao fascículo
+                result["items"] += issue_proc.issue_files.count()
+                if issue_proc.files_status == tracker_choices.PROGRESS_STATUS_BLOCKED:
+                    result["failures"] += 1
+            except Exception as e:
+                add_failure(result, e)
+
+    article_procs = ArticleProc.objects.filter(
+        issue_proc__journal_proc=journal_proc
+    ).order_by("pid")
+    with measure_stage(results, "migrate_article", rss_interval) as result:
+        for article_proc in article_procs:
+            try:
+                if article_proc.migrate_article(user, True):
+                    result["items"] += 1
+                else:
+                    result["failures"] += 1
+            except Exception as e:
+                add_failure(result, e)
+
+    with measure_stage(results, "publish_article", rss_interval) as result:
+        api_data = get_api_data(
+            journal_proc.collection, "article", collection_choices.QA
+        )
+        for article_proc in article_procs.filter(sps_pkg__isnull=False):
+            try:
+                response = article_proc.publish(
+                    user,
+                    publish_article,
+                    content_type="article",
+                    website_kind=collection_choices.QA,
+                    api_data=api_data,
+                    force_update=True,
+                )
+                if response.get("completed"):
+                    result["items"] += 1
+                else:
+                    result["failures"] += 1
+            except Exception as e:
+                add_failure(result, e)
+    return results
+
+
+###########################################
+# Relatório
+###########################################
+
+
+def get_code_version():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "describe", "--always", "--dirty"],
+                stderr=subprocess.DEVNULL,
+            )
+            .decode("utf-8")
+            .strip()
+        )
+    except Exception:
+        return None
+
+
+def build_report(stages, params=None, http_requests=None, storage_stats=None):
+    return {
+        "version": get_code_version(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "params": params or {},
+        "stages": stages,
+        "total": {
+            "wall_time": round(sum(s["wall_time"] for s in stages), 4),
+            "queries": sum(s["queries"] for s in stages),
+            "peak_rss_mb": max((s["peak_rss_mb"] for s in stages), default=0),
+            "failures": sum(s["failures"] for s in stages),
+        },
+        "http_requests": http_requests or {},
+        "storage": storage_stats or {},
+    }
+
+
+def save_report(report, file_path):
+    with open(file_path, "w") as fp:
+        json.dump(report, fp, indent=2)
+
+
+def load_report(file_path):
+    with open(file_path) as fp:
+        return json.load(fp)
+
+
+def compare_reports(baseline, current, tolerance=0.2):
+    """
+    Compara as etapas de current com as de baseline
+
+    Uma etapa é considerada regressão se o tempo aumentou mais que
+    tolerance (proporção), ou se a quantidade de consultas aumentou
+
+    Returns
+    -------
+    list of dict
+    """
+    baseline_stages = {s["name"]: s for s in baseline.get("stages") or []}
+    items = []
+    for stage in current.get("stages") or []:
+        previous = baseline_stages.get(stage["name"])
+        if not previous:
+            continue
+        wall_time_ratio = None
+        if previous["wall_time"]:
+            wall_time_ratio = round(stage["wall_time"] / previous["wall_time"], 2)
+        item = {
+            "name": stage["name"],
+            "wall_time": [previous["wall_time"], stage["wall_time"]],
+            "wall_time_ratio": wall_time_ratio,
+            "queries": [previous["queries"], stage["queries"]],
+            "peak_rss_mb": [previous["peak_rss_mb"], stage["peak_rss_mb"]],
+        }
+        item["regression"] = bool(
+            (wall_time_ratio and wall_time_ratio > 1 + tolerance)
+            or stage["queries"] > previous["queries"]
+        )
+        items.append(item)
+    return items
+
+
+def format_report(report):
+    lines = [f"version: {report.get('version')} params: {report.get('params')}"]
+    for stage in report["stages"]:
+        lines.append(
+            f"{stage['name']}: {stage['wall_time']:.2f}s "
+            f"queries={stage['queries']} "
+            f"peak_rss={stage['peak_rss_mb']}MB "
+            f"items={stage['items']} failures={stage['failures']}"
+        )
+        for error in stage["errors"]:
+            logging.info(f"  {stage['name']}: {error}")
+    return "\n".join(lines)
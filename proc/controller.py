@@ -3,7 +3,7 @@ Facade para manter compatibilidade com o código existente.
 Este módulo importa todas as funções dos novos módulos especializados.
 """
 
-from proc.models import JournalProc, IssueProc, ArticleProc
+from proc.models import ProcStatusRollup
 
 # Imports de Exceptions
 from proc.exceptions import (
@@ -82,9 +82,19 @@ def ensure_issue_proc_exists(user, issue):
 
 
 def get_total_status_data(journal_proc_id, total_status_data):
-    journal_total_status = JournalProc.get_total_status(journal_proc_id)
-    issue_total_status = IssueProc.get_total_status(journal_proc_id, "article")
-    article_total_status = ArticleProc.get_total_status(journal_proc_id)
+    """
+    Totais por etapa e status ({stage: {status: total}}) do periódico, de
+    seus fascículos e artigos, lidos de ProcStatusRollup
+    """
+    journal_total_status = ProcStatusRollup.get_totals(
+        "journal", journal_proc_id=journal_proc_id
+    )
+    issue_total_status = ProcStatusRollup.get_totals(
+        "issue", journal_proc_id=journal_proc_id
+    )
+    article_total_status = ProcStatusRollup.get_totals(
+        "article", journal_proc_id=journal_proc_id
+    )
     
     total_status_data_updated = {}
     if journal_total_status != total_status_data.get("journal"):
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.3 on 2026-10-17 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("collection", "0005_alter_websiteconfiguration_api_get_token_url_and_more"),
+        ("proc", "0015_alter_articleproc_migration_status_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcStatusRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("proc_type", models.CharField(max_length=8, verbose_name="Proc type")),
+                ("stage", models.CharField(max_length=16, verbose_name="Stage")),
+                (
+                    "status",
+                    models.CharField(
+                        blank=True, max_length=8, null=True, verbose_name="Status"
+                    ),
+                ),
+                ("total", models.IntegerField(default=0, verbose_name="Total")),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Last update date"
+                    ),
+                ),
+                (
+                    "collection",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="collection.collection",
+                    ),
+                ),
+                (
+                    "issue_proc",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="proc.issueproc",
+                    ),
+                ),
+                (
+                    "journal_proc",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="proc.journalproc",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["journal_proc", "proc_type"],
+                        name="proc_rollup_journal_idx",
+                    ),
+                    models.Index(
+                        fields=["collection", "proc_type"],
+                        name="proc_rollup_collection_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "proc_type",
+                            "collection",
+                            "journal_proc",
+                            "issue_proc",
+                            "stage",
+                            "status",
+                        ),
+                        name="proc_status_rollup_unique",
+                        nulls_distinct=False,
+                    )
+                ],
+            },
+        ),
+    ]
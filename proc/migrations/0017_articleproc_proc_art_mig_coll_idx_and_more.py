@@ -0,0 +1,102 @@
+# Generated by Django 5.2.3 on 2026-10-17 15:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não pode ser executado em transação
+    atomic = False
+
+    dependencies = [
+        ("proc", "0016_procstatusrollup"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="articleproc",
+            index=models.Index(
+                fields=["migration_status", "collection"],
+                name="proc_art_mig_coll_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="articleproc",
+            index=models.Index(
+                condition=models.Q(("migration_status", "DONE")),
+                fields=["qa_ws_status", "collection"],
+                name="proc_art_qa_todo_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="articleproc",
+            index=models.Index(
+                condition=models.Q(("qa_ws_status", "DONE")),
+                fields=["public_ws_status", "collection"],
+                name="proc_art_pub_todo_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="articleproc",
+            index=models.Index(
+                condition=models.Q(
+                    ("qa_ws_status__in", ["REPROC", "TODO", "DOING", "PENDING", "BLOCKED"])
+                ),
+                fields=["qa_ws_status"],
+                name="proc_art_qa_open_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="articleproc",
+            index=models.Index(
+                condition=models.Q(
+                    ("public_ws_status__in", ["REPROC", "TODO", "DOING", "PENDING", "BLOCKED"])
+                ),
+                fields=["public_ws_status"],
+                name="proc_art_pub_open_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="issueproc",
+            index=models.Index(
+                fields=["migration_status", "collection"],
+                name="proc_iss_mig_coll_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="issueproc",
+            index=models.Index(
+                condition=models.Q(("migration_status", "DONE")),
+                fields=["qa_ws_status", "collection"],
+                name="proc_iss_qa_todo_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="issueproc",
+            index=models.Index(
+                condition=models.Q(("qa_ws_status", "DONE")),
+                fields=["public_ws_status", "collection"],
+                name="proc_iss_pub_todo_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="issueproc",
+            index=models.Index(
+                condition=models.Q(
+                    ("qa_ws_status__in", ["REPROC", "TODO", "DOING", "PENDING", "BLOCKED"])
+                ),
+                fields=["qa_ws_status"],
+                name="proc_iss_qa_open_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="issueproc",
+            index=models.Index(
+                condition=models.Q(
+                    ("public_ws_status__in", ["REPROC", "TODO", "DOING", "PENDING", "BLOCKED"])
+                ),
+                fields=["public_ws_status"],
+                name="proc_iss_pub_open_idx",
+            ),
+        ),
+    ]
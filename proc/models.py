@@ -3,12 +3,14 @@ import logging
 import os
 import sys
 import traceback
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timezone
 from tempfile import TemporaryDirectory
 
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import IntegrityError, models
-from django.db.models import Count, Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
 from django.utils.translation import gettext_lazy as _
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
@@ -28,6 +30,7 @@ from collection import choices as collection_choices
 from collection.models import Collection
 from core.widgets import ReadOnlyPrettyJSONWidget
 from core.models import CommonControlField
+from core.utils import xml_cache
 from core.utils.file_utils import delete_files
 from core.utils.sanitize import sanitize_for_json
 from htmlxml.models import HTMLXML
@@ -36,6 +39,7 @@ from journal.choices import JOURNAL_AVAILABILTY_STATUS
 from journal.models import Journal
 from migration import choices as migration_choices
 from migration.controller import (
+    IssueAssetIndex,
     PkgZipBuilder,
     XMLVersionXmlWithPreError,
     create_or_update_article,
@@ -54,13 +58,65 @@ from proc import exceptions
 from proc.forms import IssueProcAdminModelForm, ProcAdminModelForm
 from publication.api.publication import get_api_data
 from tracker import choices as tracker_choices
-from tracker.models import UnexpectedEvent, format_traceback
+from tracker import event_buffer
+from tracker.models import UnexpectedEvent, delete_in_batches, format_traceback
+
+# status que ainda exigem processamento; usados nos índices parciais de
+# ArticleProc e IssueProc (os seletores de itens a processar / publicar
+# filtram por estes valores)
+OPEN_STATUS = [
+    tracker_choices.PROGRESS_STATUS_REPROC,
+    tracker_choices.PROGRESS_STATUS_TODO,
+    tracker_choices.PROGRESS_STATUS_DOING,
+    tracker_choices.PROGRESS_STATUS_PENDING,
+    tracker_choices.PROGRESS_STATUS_BLOCKED,
+]
+
+
+def get_status_indexes(prefix):
+    """
+    Índices para BaseProc.items_to_register, items_to_process,
+    items_to_publish_on_qa, items_to_publish_on_public e select_items
+    """
+    return [
+        models.Index(
+            fields=["migration_status", "collection"],
+            name=f"{prefix}_mig_coll_idx",
+        ),
+        models.Index(
+            fields=["qa_ws_status", "collection"],
+            name=f"{prefix}_qa_todo_idx",
+            condition=Q(migration_status=tracker_choices.PROGRESS_STATUS_DONE),
+        ),
+        models.Index(
+            fields=["public_ws_status", "collection"],
+            name=f"{prefix}_pub_todo_idx",
+            condition=Q(qa_ws_status=tracker_choices.PROGRESS_STATUS_DONE),
+        ),
+        models.Index(
+            fields=["qa_ws_status"],
+            name=f"{prefix}_qa_open_idx",
+            condition=Q(qa_ws_status__in=OPEN_STATUS),
+        ),
+        models.Index(
+            fields=["public_ws_status"],
+            name=f"{prefix}_pub_open_idx",
+            condition=Q(public_ws_status__in=OPEN_STATUS),
+        ),
+    ]
 
 
 class NoDocumentRecordsToMigrateError(Exception):
     ...
 
 
+def get_concrete_subclasses(model):
+    for subclass in model.__subclasses__():
+        if not subclass._meta.abstract and not subclass._meta.proxy:
+            yield subclass
+        yield from get_concrete_subclasses(subclass)
+
+
 class Operation(CommonControlField):
     """
     Modelo que registra operações executadas durante o processamento.
@@ -148,17 +204,58 @@ class Operation(CommonControlField):
         obj.proc = proc
         obj.name = name
         obj.creator = user
-        obj.save()
+        event_buffer.save(obj)
         return obj
 
     @classmethod
     def exclude_events(cls, user, proc, name):
         # apaga todas as ocorrências que foram armazenadas no arquivo
+        buffer = event_buffer.get_current_buffer()
+        if buffer is not None:
+            # com gravação em lote, descarta as ocorrências ainda em memória
+            # e adia a exclusão no banco de dados para antes da gravação
+            cls._exclude_buffered_events(buffer, proc, name)
+            buffer.before_flush(
+                (cls, proc.pk, name),
+                lambda: cls._exclude_events(proc, name),
+            )
+            return
+        cls._exclude_events(proc, name)
+
+    @classmethod
+    def _exclude_events(cls, proc, name):
         item = cls.objects.filter(proc=proc, name=name).order_by("-created").first()
         if item:
             created = item.created
             cls.objects.filter(proc=proc, created__gte=created).order_by("-created").delete()
 
+    @classmethod
+    def _exclude_buffered_events(cls, buffer, proc, name):
+        # como _exclude_events: a partir da ocorrência mais recente de name
+        buffer.discard_from_last(
+            lambda obj: type(obj) is cls and obj.proc_id == proc.pk,
+            lambda obj: obj.name == name,
+        )
+
+    @classmethod
+    def prune(cls, before, batch_size=None):
+        """
+        Apaga as operações anteriores a before que já têm uma ocorrência
+        mais recente (mesmos proc e name) em todas as subclasses concretas
+        """
+        total = 0
+        for model in get_concrete_subclasses(cls):
+            newer = model.objects.filter(
+                proc=OuterRef("proc"),
+                name=OuterRef("name"),
+                created__gt=OuterRef("created"),
+            )
+            total += delete_in_batches(
+                model.objects.filter(created__lt=before).filter(Exists(newer)),
+                batch_size,
+            )
+        return total
+
     @classmethod
     def start(
         cls,
@@ -219,11 +316,14 @@ class Operation(CommonControlField):
         except Exception as exc_detail:
             detail = str(detail)
 
+        if event_buffer.get_current_buffer() is not None:
+            # em lote, a gravação é adiada e o erro não chega ao except abaixo
+            detail = sanitize_for_json(detail)
         self.detail = detail
         self.completed = completed
         self.updated_by = user
         try:
-            self.save()
+            event_buffer.save(self)
         except Exception:
             try:
                 self.detail = sanitize_for_json(detail)
@@ -481,6 +581,12 @@ class BaseProc(CommonControlField):
     # MigratedDataClass = MigratedData
     base_form_class = ProcAdminModelForm
 
+    # ProcStatusRollup: tipo, campos de status e a chave
+    # (collection_id, journal_proc_id, issue_proc_id) a partir do proc
+    ROLLUP_TYPE = None
+    ROLLUP_STAGES = ("migration_status", "qa_ws_status", "public_ws_status")
+    ROLLUP_KEY_LOOKUPS = {}
+
     panel_data = [
         FieldPanel("collection"),
         FieldPanel("pid"),
@@ -554,6 +660,43 @@ class BaseProc(CommonControlField):
         except IntegrityError:
             return cls.get(collection, pid)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rollup_state = instance.get_rollup_state()
+        return instance
+
+    def get_rollup_state(self):
+        """
+        Valores (carregados) dos campos de status e da chave do rollup
+        """
+        names = list(self.ROLLUP_STAGES) + [
+            lookup
+            for lookup in self.ROLLUP_KEY_LOOKUPS.values()
+            if lookup and "__" not in lookup
+        ]
+        return {name: self.__dict__[name] for name in names if name in self.__dict__}
+
+    def get_rollup_key(self, state):
+        return {
+            name: state.get(lookup) if lookup else None
+            for name, lookup in self.ROLLUP_KEY_LOOKUPS.items()
+        }
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not self.ROLLUP_TYPE:
+            return
+        previous = None if adding else getattr(self, "_rollup_state", None)
+        if adding or previous is not None:
+            current = self.get_rollup_state()
+            try:
+                ProcStatusRollup.register_change(self, previous, current)
+            except Exception as e:
+                logging.exception(e)
+            self._rollup_state = current
+
     def start(self, user, name):
         # self.save()
         # operation = Operation.start(user, name)
@@ -741,10 +884,10 @@ class BaseProc(CommonControlField):
                 | Q(migration_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
 
-        cls.objects.filter(
-            q,
-            **params,
-        ).update(migration_status=tracker_choices.PROGRESS_STATUS_TODO)
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(q, **params),
+            migration_status=tracker_choices.PROGRESS_STATUS_TODO,
+        )
 
         # seleciona os registros MigratedData
         return cls.objects.filter(
@@ -829,8 +972,9 @@ class BaseProc(CommonControlField):
                 | Q(qa_ws_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
 
-        cls.objects.filter(q, **params).update(
-            qa_ws_status=tracker_choices.PROGRESS_STATUS_TODO
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(q, **params),
+            qa_ws_status=tracker_choices.PROGRESS_STATUS_TODO,
         )
         items = cls.objects.filter(
             qa_ws_status=tracker_choices.PROGRESS_STATUS_TODO, **params
@@ -1019,8 +1163,9 @@ class BaseProc(CommonControlField):
                 | Q(public_ws_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
 
-        cls.objects.filter(q, **params).update(
-            public_ws_status=tracker_choices.PROGRESS_STATUS_TODO
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(q, **params),
+            public_ws_status=tracker_choices.PROGRESS_STATUS_TODO,
         )
 
         items = cls.objects.filter(
@@ -1074,6 +1219,12 @@ class JournalProc(BaseProc, ClusterableModel):
     journal = models.ForeignKey(Journal, on_delete=models.SET_NULL, null=True)
 
     ProcResult = JournalProcResult
+    ROLLUP_TYPE = "journal"
+    ROLLUP_KEY_LOOKUPS = {
+        "collection_id": "collection_id",
+        "journal_proc_id": "id",
+        "issue_proc_id": None,
+    }
     base_form_class = ProcAdminModelForm
 
     panel_data = BaseProc.panel_data + [
@@ -1201,18 +1352,6 @@ class JournalProc(BaseProc, ClusterableModel):
     def issn_electronic(self):
         return self.journal and self.journal.issn_electronic
 
-    @classmethod
-    def get_total_status(cls, journal_proc_id):
-        return list(
-            cls.objects.filter(id=journal_proc_id).values(
-                "migration_status",
-                "qa_ws_status",
-                "public_ws_status"
-            ).annotate(
-                total=Count("id"),
-            ).order_by("-total")
-        )
-
 
 ################################################
 class IssueGetOrCreateError(Exception): ...
@@ -1309,6 +1448,13 @@ class IssueProc(BaseProc, ClusterableModel):
     MigratedDataClass = MigratedIssue
     base_form_class = IssueProcAdminModelForm
     ProcResult = IssueProcResult
+    ROLLUP_TYPE = "issue"
+    ROLLUP_STAGES = BaseProc.ROLLUP_STAGES + ("docs_status", "files_status")
+    ROLLUP_KEY_LOOKUPS = {
+        "collection_id": "collection_id",
+        "journal_proc_id": "journal_proc_id",
+        "issue_proc_id": "id",
+    }
 
     panel_status = [
         FieldPanel("migration_status"),
@@ -1359,7 +1505,8 @@ class IssueProc(BaseProc, ClusterableModel):
         # Otimiza a atualização de ArticleProc para docs_status
         if self.docs_status == tracker_choices.PROGRESS_STATUS_REPROC:
             # Atualiza diretamente os artigos relacionados em massa
-            ArticleProc.objects.filter(issue_proc=self).update(
+            ProcStatusRollup.update_queryset(
+                ArticleProc.objects.filter(issue_proc=self),
                 migration_status=tracker_choices.PROGRESS_STATUS_REPROC,
                 qa_ws_status=tracker_choices.PROGRESS_STATUS_REPROC,  # Propaga status de doc para migration e qa
                 public_ws_status=tracker_choices.PROGRESS_STATUS_REPROC,  # Propaga status de doc para public
@@ -1368,7 +1515,8 @@ class IssueProc(BaseProc, ClusterableModel):
         # Otimiza a atualização de ArticleProc para files_status
         if self.files_status == tracker_choices.PROGRESS_STATUS_REPROC:
             # Atualiza diretamente os artigos relacionados em massa
-            ArticleProc.objects.filter(issue_proc=self).update(
+            ProcStatusRollup.update_queryset(
+                ArticleProc.objects.filter(issue_proc=self),
                 xml_status=tracker_choices.PROGRESS_STATUS_REPROC,
                 sps_pkg_status=tracker_choices.PROGRESS_STATUS_REPROC,  # Propaga status de xml para sps_pkg
                 migration_status=tracker_choices.PROGRESS_STATUS_REPROC,  # Propaga status de sps_pkg para migration
@@ -1404,7 +1552,7 @@ class IssueProc(BaseProc, ClusterableModel):
             models.Index(fields=["issue_folder"]),
             models.Index(fields=["docs_status"]),
             models.Index(fields=["files_status"]),
-        ]
+        ] + get_status_indexes("proc_iss")
 
     def update(
         self,
@@ -1470,13 +1618,22 @@ class IssueProc(BaseProc, ClusterableModel):
 
         selected = cls.objects.filter(**params)
         if force_update:
-            selected.exclude(migration_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO).update(migration_status=tracker_choices.PROGRESS_STATUS_REPROC)
+            ProcStatusRollup.update_queryset(
+                selected.exclude(migration_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO),
+                migration_status=tracker_choices.PROGRESS_STATUS_REPROC,
+            )
 
         if force_migrate_document_records:
-            selected.exclude(docs_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO).update(docs_status=tracker_choices.PROGRESS_STATUS_REPROC)
+            ProcStatusRollup.update_queryset(
+                selected.exclude(docs_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO),
+                docs_status=tracker_choices.PROGRESS_STATUS_REPROC,
+            )
 
         if force_migrate_document_files:
-            selected.exclude(files_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO).update(files_status=tracker_choices.PROGRESS_STATUS_REPROC)
+            ProcStatusRollup.update_queryset(
+                selected.exclude(files_status__in=tracker_choices.PROGRESS_STATUS_REGULAR_TODO),
+                files_status=tracker_choices.PROGRESS_STATUS_REPROC,
+            )
 
         q = Q()
         if article_status_list:
@@ -1540,11 +1697,14 @@ class IssueProc(BaseProc, ClusterableModel):
                 | Q(files_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
 
-        cls.objects.filter(
-            q,
-            collection=collection,
-            migration_status=tracker_choices.PROGRESS_STATUS_DONE,
-        ).update(files_status=tracker_choices.PROGRESS_STATUS_TODO)
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(
+                q,
+                collection=collection,
+                migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+            ),
+            files_status=tracker_choices.PROGRESS_STATUS_TODO,
+        )
 
         params = {}
         if publication_year:
@@ -1591,7 +1751,7 @@ class IssueProc(BaseProc, ClusterableModel):
                     message="Files already migrated",
                     detail={"migrated": self.issue_files.count()},
                 )
-                return
+                return self.issue_files.count()
 
             self.files_status = tracker_choices.PROGRESS_STATUS_DOING
             self.save()
@@ -1622,7 +1782,11 @@ class IssueProc(BaseProc, ClusterableModel):
                 user,
                 completed=(self.files_status == tracker_choices.PROGRESS_STATUS_DONE),
                 message="Files",
-                detail={"migrated": self.issue_files.count(), "failures": failures},
+                detail={
+                    "migrated": self.issue_files.count(),
+                    "failures": failures,
+                    "stats": migration_result.get("stats"),
+                },
             )
             return self.issue_files.count()
 
@@ -1671,11 +1835,14 @@ class IssueProc(BaseProc, ClusterableModel):
                 | Q(docs_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
 
-        cls.objects.filter(
-            q,
-            collection=collection,
-            migration_status=tracker_choices.PROGRESS_STATUS_DONE,
-        ).update(docs_status=tracker_choices.PROGRESS_STATUS_TODO)
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(
+                q,
+                collection=collection,
+                migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+            ),
+            docs_status=tracker_choices.PROGRESS_STATUS_TODO,
+        )
 
         params = {}
         if publication_year:
@@ -1700,10 +1867,13 @@ class IssueProc(BaseProc, ClusterableModel):
         if items.exists():
             return items
         # procura a "imagem" no contexto do "journal"
+        return self.find_journal_asset(name)
+
+    def find_journal_asset(self, name):
         return MigratedFile.find(
             collection=self.collection,
             journal_acron=self.journal_proc.acron,
-            name=name,  
+            name=name,
         )
 
     @classmethod
@@ -1792,25 +1962,38 @@ class IssueProc(BaseProc, ClusterableModel):
             journal_data = self.journal_proc.migrated_data.data
             issue_data = self.migrated_data.data
             exceptions = {}
-            for record in id_file_records:
-                try:
-                    data = None
-                    data = record.get_record_data(
-                        journal_data,
-                        issue_data,
-                    )
-                    article_proc = ArticleProc.create_or_update(
-                        issue_proc=self,
-                        user=user,
-                        pid=record.item_pid,
-                        data=data["data"],
-                        force_update=force_update,
-                    )
-                    total += 1
-                    if not article_proc:
-                        raise ValueError(f"Unable to create ArticleProc for PID {record.item_pid}")
-                except Exception as e:
-                    exceptions[record.item_pid] = traceback.format_exc()
+            batch_size = getattr(settings, "DOCUMENT_RECORDS_BATCH_SIZE", 200)
+            if batch_size:
+                detail["batch_size"] = batch_size
+                total = self.migrate_document_records_in_batches(
+                    user,
+                    id_file_records,
+                    journal_data,
+                    issue_data,
+                    force_update,
+                    batch_size,
+                    exceptions,
+                )
+            else:
+                for record in id_file_records:
+                    try:
+                        data = None
+                        data = record.get_record_data(
+                            journal_data,
+                            issue_data,
+                        )
+                        article_proc = ArticleProc.create_or_update(
+                            issue_proc=self,
+                            user=user,
+                            pid=record.item_pid,
+                            data=data["data"],
+                            force_update=force_update,
+                        )
+                        total += 1
+                        if not article_proc:
+                            raise ValueError(f"Unable to create ArticleProc for PID {record.item_pid}")
+                    except Exception:
+                        exceptions[record.item_pid] = traceback.format_exc()
 
             detail["exceptions"] = exceptions
             detail["total failed"] = len(exceptions)
@@ -1840,6 +2023,56 @@ class IssueProc(BaseProc, ClusterableModel):
             )
         return total
 
+    def migrate_document_records_in_batches(
+        self,
+        user,
+        id_file_records,
+        journal_data,
+        issue_data,
+        force_update,
+        batch_size,
+        exceptions,
+    ):
+        """
+        Cria / atualiza ArticleProc a partir de id_file_records em lotes de
+        batch_size registros: os registros de fascículo e de parágrafo de
+        cada lote são obtidos com uma consulta cada e MigratedArticle e
+        ArticleProc são gravados com operações em lote
+
+        Returns
+        -------
+        int
+            Número de registros processados (como no modo registro a registro)
+        """
+        total = 0
+        records = id_file_records.order_by("item_pid")
+        offset = 0
+        while True:
+            batch = list(records[offset : offset + batch_size])
+            if not batch:
+                break
+            offset += batch_size
+
+            items = []
+            for item in IdFileRecord.get_records_data(
+                batch, journal_data, issue_data
+            ):
+                if item.get("error"):
+                    exceptions[item["pid"]] = item["error"]
+                else:
+                    items.append(item)
+            try:
+                article_procs, errors = ArticleProc.bulk_create_or_update(
+                    self, user, items, force_update, batch_size
+                )
+            except Exception:
+                for item in items:
+                    exceptions[item["pid"]] = traceback.format_exc()
+                continue
+            exceptions.update(errors)
+            total += len(article_procs)
+        return total
+
     def get_new_docs_status(self, total_document_records=None, total_migrated_articles=None):
         if total_document_records is None:
             total_document_records = IdFileRecord.document_records_to_migrate(
@@ -1870,27 +2103,6 @@ class IssueProc(BaseProc, ClusterableModel):
             return ""
         return "-".join([self.journal_proc.pid, self.issue.bundle_id_suffix])
 
-    @classmethod
-    def get_total_status(cls, journal_proc_id, item_type):
-        if item_type == "article":
-            return list(
-                cls.objects.filter(journal_proc_id=journal_proc_id).values(
-                    "docs_status",
-                    "files_status",
-                ).annotate(
-                    total=Count("id"),
-                ).order_by("-total")
-            )
-        return list(
-            cls.objects.filter(journal_proc_id=journal_proc_id).values(
-                "migration_status",
-                "qa_ws_status",
-                "public_ws_status"
-            ).annotate(
-                total=Count("id"),
-            ).order_by("-total")
-        )
-
 
 class ArticleEventCreateError(Exception): ...
 
@@ -1988,6 +2200,13 @@ class ArticleProc(BaseProc, ClusterableModel):
 
     base_form_class = ProcAdminModelForm
     ProcResult = ArticleProcResult
+    ROLLUP_TYPE = "article"
+    ROLLUP_STAGES = BaseProc.ROLLUP_STAGES + ("xml_status", "sps_pkg_status")
+    ROLLUP_KEY_LOOKUPS = {
+        "collection_id": "collection_id",
+        "journal_proc_id": "issue_proc__journal_proc_id",
+        "issue_proc_id": "issue_proc_id",
+    }
 
     panel_files = [
         FieldPanel("pkg_name", read_only=True),
@@ -2022,7 +2241,7 @@ class ArticleProc(BaseProc, ClusterableModel):
             models.Index(fields=["pid_status"]),
             models.Index(fields=["xml_status"]),
             models.Index(fields=["sps_pkg_status"]),
-        ]
+        ] + get_status_indexes("proc_art")
 
     # ── static / class ──
 
@@ -2073,6 +2292,154 @@ class ArticleProc(BaseProc, ClusterableModel):
         )
         return article_proc
 
+    @classmethod
+    def bulk_create_or_update(
+        cls, issue_proc, user, items, force_update, batch_size=None
+    ):
+        """
+        Equivale a create_or_update para cada item (dict com pid e data),
+        com consultas e gravações em lote
+
+        Returns
+        -------
+        tuple
+            (dict pid -> ArticleProc, dict pid -> mensagem de erro)
+        """
+        collection = issue_proc.collection
+        items = list(items)
+        pids = [item["pid"] for item in items]
+        exceptions = {}
+
+        procs = {}
+        duplicated = []
+        for obj in (
+            cls.objects.filter(collection=collection, pid__in=pids)
+            .select_related("migrated_data")
+            .order_by("-created")
+        ):
+            if obj.pid in procs:
+                duplicated.append(obj)
+            else:
+                procs[obj.pid] = obj
+        for obj in duplicated:
+            obj.delete()
+
+        # registra os dados do site clássico dos procs novos, dos procs
+        # ainda por fazer ou de todos (force_update),
+        # como em register_classic_website_data
+        to_register = []
+        for item in items:
+            obj = procs.get(item["pid"])
+            if (
+                not obj
+                or obj.migration_status == tracker_choices.PROGRESS_STATUS_TODO
+                or force_update
+            ):
+                if item["data"]:
+                    to_register.append((item["pid"], item["data"]))
+        registered = MigratedArticle.bulk_register_classic_website_data(
+            user,
+            collection,
+            to_register,
+            content_type="article",
+            force_update=force_update,
+            batch_size=batch_size,
+        )
+
+        to_create = []
+        to_update = []
+        migrated_to_update = []
+        for item in items:
+            pid = item["pid"]
+            try:
+                obj = procs.get(pid)
+                if obj:
+                    previous = getattr(obj, "_rollup_state", None)
+                    to_update.append(obj)
+                else:
+                    obj = cls(
+                        creator=user,
+                        collection=collection,
+                        pid=pid,
+                        public_ws_status=tracker_choices.PROGRESS_STATUS_TODO,
+                    )
+                    previous = None
+                    to_create.append(obj)
+
+                if pid in registered:
+                    obj.migrated_data = registered[pid]
+
+                pkg_name = None
+                main_lang = None
+                migrated_article = obj.migrated_data
+                if migrated_article:
+                    document = migrated_article.document
+                    pkg_name = document.filename_without_extension
+                    main_lang = document.original_language
+                    if not migrated_article.file_type:
+                        migrated_article.file_type = document.file_type
+                        migrated_to_update.append(migrated_article)
+
+                obj.updated_by = user
+                obj.issue_proc = issue_proc
+                obj.pkg_name = pkg_name
+                obj.main_lang = main_lang
+                obj.migration_status = tracker_choices.PROGRESS_STATUS_TODO
+                if not migrated_article or not migrated_article.data:
+                    obj.pid_status = migration_choices.PID_STATUS_MISSING
+                obj.xml_status = tracker_choices.PROGRESS_STATUS_TODO
+                obj.sps_pkg_status = tracker_choices.PROGRESS_STATUS_TODO
+                obj.qa_ws_status = tracker_choices.PROGRESS_STATUS_TODO
+                obj.public_ws_status = tracker_choices.PROGRESS_STATUS_TODO
+                obj._bulk_previous_state = previous
+            except Exception:
+                exceptions[pid] = traceback.format_exc()
+                if obj in to_create:
+                    to_create.remove(obj)
+                elif obj in to_update:
+                    to_update.remove(obj)
+
+        now = datetime.now(timezone.utc)
+        for obj in to_update:
+            obj.updated = now
+        with transaction.atomic():
+            if migrated_to_update:
+                MigratedArticle.objects.bulk_update(
+                    migrated_to_update, ["file_type"], batch_size=batch_size
+                )
+            cls.objects.bulk_create(to_create, batch_size=batch_size)
+            cls.objects.bulk_update(
+                to_update,
+                [
+                    "updated",
+                    "updated_by",
+                    "migrated_data",
+                    "issue_proc",
+                    "pkg_name",
+                    "main_lang",
+                    "migration_status",
+                    "pid_status",
+                    "xml_status",
+                    "sps_pkg_status",
+                    "qa_ws_status",
+                    "public_ws_status",
+                ],
+                batch_size=batch_size,
+            )
+
+        # bulk_create / bulk_update não executam save
+        changes = []
+        for obj in to_create + to_update:
+            current = obj.get_rollup_state()
+            changes.append((obj, obj._bulk_previous_state, current))
+            obj._rollup_state = current
+        try:
+            ProcStatusRollup.register_changes(cls.ROLLUP_TYPE, changes)
+        except Exception as e:
+            logging.exception(e)
+
+        return {obj.pid: obj for obj in to_create + to_update}, exceptions
+
     @classmethod
     def mark_for_reprocessing(
         cls, issue_proc, article_pids=None, article_proc_ids=None
@@ -2082,7 +2449,8 @@ class ArticleProc(BaseProc, ClusterableModel):
             params["pid__in"] = article_pids
         if article_proc_ids:
             params["id__in"] = article_proc_ids
-        cls.objects.filter(**params).update(
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(**params),
             xml_status=tracker_choices.PROGRESS_STATUS_REPROC,
             sps_pkg_status=tracker_choices.PROGRESS_STATUS_REPROC,
             migration_status=tracker_choices.PROGRESS_STATUS_REPROC,
@@ -2261,7 +2629,10 @@ class ArticleProc(BaseProc, ClusterableModel):
     @property
     def xml_with_pre(self):
         try:
-            return list(XMLWithPre.create(path=self.processed_xml.path))[0]
+            xml_with_pre = xml_cache.get_xml_with_pre(self.processed_xml.path)
+            if xml_with_pre is None:
+                raise ValueError(f"No XML found in {self.processed_xml.path}")
+            return xml_with_pre
         except Exception as e:
             raise XMLVersionXmlWithPreError(
                 _("Unable to get xml_with_pre for {}: {}").format(self, e)
@@ -2297,6 +2668,7 @@ class ArticleProc(BaseProc, ClusterableModel):
                 )
             detail.update(xml_with_pre.data)
             try:
+                xml_cache.invalidate(self.processed_xml.path)
                 os.unlink(self.processed_xml.path)
             except Exception:
                 pass
@@ -2419,7 +2791,8 @@ class ArticleProc(BaseProc, ClusterableModel):
                 | Q(xml_status=tracker_choices.PROGRESS_STATUS_PENDING)
                 | Q(xml_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
-        cls.objects.filter(q, **params).update(
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(q, **params),
             xml_status=tracker_choices.PROGRESS_STATUS_TODO,
         )
         count = cls.objects.filter(
@@ -2452,7 +2825,8 @@ class ArticleProc(BaseProc, ClusterableModel):
                 | Q(sps_pkg_status=tracker_choices.PROGRESS_STATUS_PENDING)
                 | Q(sps_pkg_status=tracker_choices.PROGRESS_STATUS_BLOCKED)
             )
-        cls.objects.filter(q, **params).update(
+        ProcStatusRollup.update_queryset(
+            cls.objects.filter(q, **params),
             sps_pkg_status=tracker_choices.PROGRESS_STATUS_TODO,
         )
         return cls.objects.filter(
@@ -2525,40 +2899,141 @@ class ArticleProc(BaseProc, ClusterableModel):
 
     # ── SPS package ──
 
-    def generate_sps_package(self, user):
+    def get_asset_index(self, asset_indexes=None):
+        """
+        IssueAssetIndex do fascículo; com asset_indexes (issue_proc_id:
+        IssueAssetIndex), o índice é criado uma vez por fascículo e
+        reaproveitado pelos demais artigos
+        """
+        if asset_indexes is None:
+            return IssueAssetIndex.from_issue_proc(self.issue_proc)
+        if self.issue_proc_id not in asset_indexes:
+            asset_indexes[self.issue_proc_id] = IssueAssetIndex.from_issue_proc(
+                self.issue_proc
+            )
+        return asset_indexes[self.issue_proc_id]
+
+    def generate_sps_package(self, user, asset_indexes=None):
+        with TemporaryDirectory() as output_folder:
+            prepared = self.prepare_sps_package(
+                user, output_folder, asset_indexes=asset_indexes
+            )
+            if not prepared:
+                return None
+            return self.complete_sps_package(user, prepared)
+
+    @classmethod
+    def generate_sps_packages(cls, user, article_procs, asset_indexes=None):
+        """
+        Equivale a generate_sps_package para cada item de article_procs, mas
+        os PIDs v3 são solicitados ao Core em uma única requisição
+        (SPSPkg.add_pid_v3_to_zips); os itens não registrados no lote seguem
+        o registro individual
+
+        Returns
+        -------
+        dict
+            article_proc.id: bool (tem PID v3)
+        """
+        results = {}
+        if asset_indexes is None:
+            asset_indexes = {}
+        with TemporaryDirectory() as output_folder:
+            prepared_items = []
+            for article_proc in article_procs:
+                folder = os.path.join(output_folder, str(article_proc.id))
+                os.makedirs(folder)
+                prepared = article_proc.prepare_sps_package(
+                    user, folder, asset_indexes=asset_indexes
+                )
+                if prepared:
+                    prepared_items.append((article_proc, prepared))
+                else:
+                    results[article_proc.id] = False
+
+            sps_pkgs = SPSPkg.add_pid_v3_to_zips(
+                user,
+                [
+                    (prepared["sps_pkg_zip_path"], article_proc)
+                    for article_proc, prepared in prepared_items
+                ],
+                is_public=True,
+            )
+            for (article_proc, prepared), sps_pkg in zip(prepared_items, sps_pkgs):
+                results[article_proc.id] = bool(
+                    article_proc.complete_sps_package(user, prepared, sps_pkg)
+                )
+        return results
+
+    def prepare_sps_package(self, user, output_folder, asset_indexes=None):
+        """
+        Gera o pacote em output_folder, antes do registro do PID v3
+
+        asset_indexes: issue_proc_id: IssueAssetIndex (get_asset_index)
+
+        Returns
+        -------
+        dict ou None (falhou)
+        """
+        operation = None
         try:
             operation = self.start(user, "generate_sps_package")
             self.sps_pkg_status = tracker_choices.PROGRESS_STATUS_DOING
             self.save()
+            xml_with_pre = self.xml_with_pre
+            asset_index = self.get_asset_index(asset_indexes)
+            builder = PkgZipBuilder(xml_with_pre, asset_index)
+            sps_pkg_zip_path = builder.build_sps_package(
+                output_folder,
+                renditions=asset_index.get_renditions(self.pkg_name),
+                translations=self.translations,
+                main_paragraphs_lang=(
+                    self.migrated_data.n_paragraphs and self.main_lang
+                ),
+                issue_proc=self.issue_proc,
+            )
+            self.fix_pid_v2(user)
+            return {
+                "operation": operation,
+                "builder": builder,
+                "sps_pkg_zip_path": sps_pkg_zip_path,
+            }
+        except Exception as e:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            self.sps_pkg_status = tracker_choices.PROGRESS_STATUS_BLOCKED
+            self.save()
+            if operation:
+                operation.finish(user, exc_traceback=exc_traceback, exception=e)
+
+    def complete_sps_package(self, user, prepared, sps_pkg=None):
+        """
+        Registra o PID v3 (se sps_pkg não foi informado) e grava o pacote
+        gerado por prepare_sps_package
+
+        Returns
+        -------
+        bool (tem PID v3)
+        """
+        operation = prepared["operation"]
+        builder = prepared["builder"]
+        detail = {}
+        try:
             completed = False
             pid_v3 = None
-            detail = {}
-            with TemporaryDirectory() as output_folder:
-                xml_with_pre = self.xml_with_pre
-                builder = PkgZipBuilder(xml_with_pre)
-                sps_pkg_zip_path = builder.build_sps_package(
-                    output_folder,
-                    renditions=list(self.renditions),
-                    translations=self.translations,
-                    main_paragraphs_lang=(
-                        self.migrated_data.n_paragraphs and self.main_lang
-                    ),
-                    issue_proc=self.issue_proc,
-                )
-                self.fix_pid_v2(user)
-                self.sps_pkg = SPSPkg.create_or_update(
-                    user, sps_pkg_zip_path,
-                    origin=package_choices.PKG_ORIGIN_MIGRATION,
-                    is_public=True,
-                    original_pkg_components=builder.components,
-                    texts=builder.texts,
-                    article_proc=self,
-                )
-                detail["replacements"] = builder.replacements
-                if self.sps_pkg:
-                    detail.update(self.sps_pkg.data)
-                    completed = self.sps_pkg.is_complete
-                    pid_v3 = self.sps_pkg.pid_v3
+            self.sps_pkg = SPSPkg.create_or_update(
+                user, prepared["sps_pkg_zip_path"],
+                origin=package_choices.PKG_ORIGIN_MIGRATION,
+                is_public=True,
+                original_pkg_components=builder.components,
+                texts=builder.texts,
+                article_proc=self,
+                sps_pkg=sps_pkg,
+            )
+            detail["replacements"] = builder.replacements
+            if self.sps_pkg:
+                detail.update(self.sps_pkg.data)
+                completed = self.sps_pkg.is_complete
+                pid_v3 = self.sps_pkg.pid_v3
             self.update_sps_pkg_status()
             operation.finish(user, completed=completed, detail=detail)
             return bool(pid_v3)
@@ -2638,14 +3113,90 @@ class ArticleProc(BaseProc, ClusterableModel):
 
     # ── migration flow ──
 
-    def migrate_article(self, user, force_update):
+    def migrate_article(self, user, force_update, asset_indexes=None):
+        if not self.prepare_migration(user, force_update):
+            return None
+        if not self.generate_sps_package(user, asset_indexes=asset_indexes):
+            return None
+        return self.complete_migration(user, force_update)
+
+    @classmethod
+    def migrate_articles(cls, user, article_procs, force_update, batch_size=None):
+        """
+        Equivale a migrate_article para cada item de article_procs, mas os
+        PIDs v3 são solicitados ao Core em lotes de batch_size
+        (PID_PROVIDER_BATCH_SIZE) artigos (generate_sps_packages)
+
+        Com batch_size 0 (ou menor), migra um artigo por vez
+        (migrate_article), sem usar o endpoint de lote do Core
+
+        O IssueAssetIndex de cada fascículo é criado uma única vez
+
+        Returns
+        -------
+        tuple (total processado, {pid: traceback})
+        """
+        if batch_size is None:
+            batch_size = getattr(settings, "PID_PROVIDER_BATCH_SIZE", 20)
+        total_processed = 0
+        exceptions = {}
+        batch = []
+        asset_indexes = {}
+
+        if batch_size <= 0:
+            for article_proc in article_procs:
+                try:
+                    article_proc.migrate_article(
+                        user, force_update, asset_indexes=asset_indexes
+                    )
+                    total_processed += 1
+                except Exception:
+                    exceptions[article_proc.pid] = traceback.format_exc()
+            return total_processed, exceptions
+
+        def migrate_batch():
+            nonlocal total_processed
+            ready = []
+            for article_proc in batch:
+                try:
+                    if article_proc.prepare_migration(user, force_update):
+                        ready.append(article_proc)
+                    else:
+                        total_processed += 1
+                except Exception:
+                    exceptions[article_proc.pid] = traceback.format_exc()
+            try:
+                generated = cls.generate_sps_packages(
+                    user, ready, asset_indexes=asset_indexes
+                )
+            except Exception:
+                for article_proc in ready:
+                    exceptions[article_proc.pid] = traceback.format_exc()
+                return
+            for article_proc in ready:
+                try:
+                    if generated.get(article_proc.id):
+                        article_proc.complete_migration(user, force_update)
+                    total_processed += 1
+                except Exception:
+                    exceptions[article_proc.pid] = traceback.format_exc()
+
+        for article_proc in article_procs:
+            batch.append(article_proc)
+            if len(batch) >= batch_size:
+                migrate_batch()
+                batch = []
+        if batch:
+            migrate_batch()
+        return total_processed, exceptions
+
+    def prepare_migration(self, user, force_update):
         if force_update:
             self.xml_status = tracker_choices.PROGRESS_STATUS_REPROC
             self.propagate_reproc_or_todo_status()
-        if not self.get_xml(user):
-            return None
-        if not self.generate_sps_package(user):
-            return None
+        return self.get_xml(user)
+
+    def complete_migration(self, user, force_update):
         article = self.create_or_update_item(
             user, force_update, create_or_update_article
         )
@@ -2671,22 +3222,266 @@ class ArticleProc(BaseProc, ClusterableModel):
                 user, exc_traceback=exc_traceback, exception=e
             )
 
+    def get_rollup_key(self, state):
+        key = super().get_rollup_key(state)
+        key["journal_proc_id"] = get_issue_journal_proc_id(key["issue_proc_id"])
+        return key
+
     def set_pid_status(self, user, pid_status):
         if pid_status and pid_status != self.pid_status:
             self.pid_status = pid_status
             self.updated_by = user
             self.save()
 
+
+################################################
+# Totais de status (migração, pacote, QA, público)
+################################################
+
+_issue_journal_proc_ids = {}
+
+
+def get_issue_journal_proc_id(issue_proc_id):
+    """
+    journal_proc_id do IssueProc (mantido em memória por processo)
+    """
+    if not issue_proc_id:
+        return None
+    try:
+        return _issue_journal_proc_ids[issue_proc_id]
+    except KeyError:
+        pass
+    if len(_issue_journal_proc_ids) > 10000:
+        _issue_journal_proc_ids.clear()
+    value = (
+        IssueProc.objects.filter(pk=issue_proc_id)
+        .values_list("journal_proc_id", flat=True)
+        .first()
+    )
+    _issue_journal_proc_ids[issue_proc_id] = value
+    return value
+
+
+class ProcStatusRollup(models.Model):
+    """
+    Quantidade de JournalProc, IssueProc e ArticleProc por status de cada
+    etapa (migration_status, xml_status, sps_pkg_status, qa_ws_status,
+    public_ws_status etc), agrupada por coleção, periódico e fascículo.
+
+    É atualizada a cada alteração de status (BaseProc.save, exclusão e
+    ProcStatusRollup.update_queryset) e pode ser reconstruída com
+    ProcStatusRollup.rebuild (proc.tasks.task_rebuild_status_rollup).
+    """
+
+    collection = models.ForeignKey(
+        Collection, on_delete=models.CASCADE, null=True, blank=True
+    )
+    journal_proc = models.ForeignKey(
+        JournalProc, on_delete=models.CASCADE, null=True, blank=True
+    )
+    issue_proc = models.ForeignKey(
+        IssueProc, on_delete=models.CASCADE, null=True, blank=True
+    )
+    proc_type = models.CharField(_("Proc type"), max_length=8)
+    stage = models.CharField(_("Stage"), max_length=16)
+    status = models.CharField(_("Status"), max_length=8, null=True, blank=True)
+    total = models.IntegerField(_("Total"), default=0)
+    updated = models.DateTimeField(verbose_name=_("Last update date"), auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "proc_type",
+                    "collection",
+                    "journal_proc",
+                    "issue_proc",
+                    "stage",
+                    "status",
+                ],
+                name="proc_status_rollup_unique",
+                nulls_distinct=False,
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["journal_proc", "proc_type"], name="proc_rollup_journal_idx"
+            ),
+            models.Index(
+                fields=["collection", "proc_type"], name="proc_rollup_collection_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.proc_type} {self.stage} {self.status} {self.total}"
+
+    @staticmethod
+    def get_proc_models():
+        return (JournalProc, IssueProc, ArticleProc)
+
+    @classmethod
+    def add(cls, proc_type, key, stage, status, total):
+        params = dict(proc_type=proc_type, stage=stage, status=status, **key)
+        if cls.objects.filter(**params).update(total=F("total") + total):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(total=total, **params)
+        except IntegrityError:
+            cls.objects.filter(**params).update(total=F("total") + total)
+
     @classmethod
-    def get_total_status(cls, journal_proc_id):
-        return list(
-            cls.objects.filter(issue_proc__journal_proc_id=journal_proc_id).values(
-                "xml_status",
-                "sps_pkg_status",
-                "migration_status",
-                "qa_ws_status",
-                "public_ws_status"
-            ).annotate(
-                total=Count("id"),
-            ).order_by("-total")
+    def apply_changes(cls, proc_type, changes):
+        """
+        changes: {(tuple(key.items()), stage, status): quantidade}
+        """
+        for (key, stage, status), total in changes.items():
+            if total:
+                cls.add(proc_type, dict(key), stage, status, total)
+
+    @classmethod
+    def register_change(cls, proc, previous, current):
+        """
+        Atualiza os totais a partir dos estados anterior e atual de proc
+        (previous é None para proc novo e current é None para proc apagado)
+        """
+        cls.apply_changes(
+            proc.ROLLUP_TYPE, cls.get_changes(proc, previous, current)
         )
+
+    @classmethod
+    def register_changes(cls, proc_type, items):
+        """
+        Equivale a register_change para cada (proc, previous, current) de
+        items (ex.: procs gravados com bulk_create / bulk_update)
+        """
+        changes = Counter()
+        for proc, previous, current in items:
+            changes.update(cls.get_changes(proc, previous, current))
+        cls.apply_changes(proc_type, changes)
+
+    @staticmethod
+    def get_changes(proc, previous, current):
+        changes = Counter()
+        if proc.ROLLUP_TYPE == "issue" and current and "id" in current:
+            _issue_journal_proc_ids[current["id"]] = current.get("journal_proc_id")
+        if previous == current:
+            return changes
+        for state, signal in ((previous, -1), (current, 1)):
+            if state is None:
+                continue
+            key = tuple(proc.get_rollup_key(state).items())
+            for stage in proc.ROLLUP_STAGES:
+                if stage not in state:
+                    continue
+                if previous is not None and current is not None:
+                    if stage not in previous or stage not in current:
+                        continue
+                changes[(key, stage, state[stage])] += signal
+        return changes
+
+    @classmethod
+    def update_queryset(cls, queryset, **values):
+        """
+        Equivale a queryset.update(**values) para campos de status,
+        atualizando os totais sem recalcular todo o rollup
+        """
+        proc_model = queryset.model
+        lookups = {
+            name: lookup
+            for name, lookup in proc_model.ROLLUP_KEY_LOOKUPS.items()
+            if lookup
+        }
+        stages = [stage for stage in values if stage in proc_model.ROLLUP_STAGES]
+        with transaction.atomic():
+            rows = []
+            if stages:
+                rows = list(
+                    queryset.values(*lookups.values(), *stages).annotate(
+                        total=Count("id")
+                    )
+                )
+            updated = queryset.update(**values)
+
+        changes = Counter()
+        for row in rows:
+            key = {name: None for name in proc_model.ROLLUP_KEY_LOOKUPS}
+            key.update({name: row[lookup] for name, lookup in lookups.items()})
+            key = tuple(key.items())
+            for stage in stages:
+                changes[(key, stage, row[stage])] -= row["total"]
+                changes[(key, stage, values[stage])] += row["total"]
+        try:
+            cls.apply_changes(proc_model.ROLLUP_TYPE, changes)
+        except Exception as e:
+            logging.exception(e)
+        return updated
+
+    @classmethod
+    def rebuild(cls, collection=None):
+        """
+        Recalcula todos os totais (ou os de uma coleção)
+        """
+        response = {}
+        for proc_model in cls.get_proc_models():
+            lookups = {
+                name: lookup
+                for name, lookup in proc_model.ROLLUP_KEY_LOOKUPS.items()
+                if lookup
+            }
+            queryset = proc_model.objects.all()
+            rollup = cls.objects.filter(proc_type=proc_model.ROLLUP_TYPE)
+            if collection:
+                queryset = queryset.filter(collection=collection)
+                rollup = rollup.filter(collection=collection)
+
+            items = []
+            for stage in proc_model.ROLLUP_STAGES:
+                for row in queryset.values(*lookups.values(), stage).annotate(
+                    total=Count("id")
+                ):
+                    key = {name: row[lookup] for name, lookup in lookups.items()}
+                    items.append(
+                        cls(
+                            proc_type=proc_model.ROLLUP_TYPE,
+                            stage=stage,
+                            status=row[stage],
+                            total=row["total"],
+                            **key,
+                        )
+                    )
+            with transaction.atomic():
+                rollup.delete()
+                cls.objects.bulk_create(items, batch_size=1000)
+            response[proc_model.ROLLUP_TYPE] = len(items)
+        return response
+
+    @classmethod
+    def get_totals(cls, proc_type, **key):
+        """
+        Retorna {stage: {status: total}} para proc_type, filtrado por key
+        (collection, journal_proc_id, issue_proc_id etc)
+        """
+        data = {}
+        for row in (
+            cls.objects.filter(proc_type=proc_type, **key)
+            .values("stage", "status")
+            .annotate(total=Sum("total"))
+        ):
+            if row["total"]:
+                data.setdefault(row["stage"], {})[row["status"]] = row["total"]
+        return data
+
+
+def proc_post_delete(sender, instance, **kwargs):
+    previous = getattr(instance, "_rollup_state", None)
+    if previous is None:
+        return
+    try:
+        ProcStatusRollup.register_change(instance, previous, None)
+    except Exception as e:
+        logging.exception(e)
+
+
+for _proc_model in ProcStatusRollup.get_proc_models():
+    models.signals.post_delete.connect(proc_post_delete, sender=_proc_model)
@@ -0,0 +1,71 @@
+"""
+Mede o fluxo classic website → ArticleProc → pacote SPS → PID →
+armazenamento → publicação com um site clássico sintético, armazenamento
+local e um servidor HTTP local (proc.benchmark)
+
+Uso:
+    python manage.py runscript bench_pipeline \
+        --script-args [issues] [articles] [output.json] [baseline.json]
+
+Todas as gravações no banco de dados são desfeitas ao final
+(transaction rollback).
+"""
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import override_settings
+
+from files_storage.models import MinioConfiguration
+from proc import benchmark
+
+User = get_user_model()
+
+
+class Rollback(Exception): ...
+
+
+def run(issues="2", articles="10", output=None, baseline=None):
+    issues = int(issues)
+    articles = int(articles)
+    user = User.objects.filter(is_superuser=True).first()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        paths = benchmark.write_classic_website_tree(
+            os.path.join(tmpdir, "classic"), issues, articles
+        )
+        files_storage = benchmark.get_local_files_storage(
+            os.path.join(tmpdir, "storage")
+        )
+        with (
+            benchmark.FakeBackend() as backend,
+            override_settings(MEDIA_ROOT=os.path.join(tmpdir, "media")),
+            patch.object(
+                MinioConfiguration, "get_files_storage", return_value=files_storage
+            ),
+        ):
+            try:
+                with transaction.atomic():
+                    stages = benchmark.run_pipeline(user, paths, backend, issues)
+                    raise Rollback
+            except Rollback:
+                pass
+            report = benchmark.build_report(
+                stages,
+                params={"issues": issues, "articles": articles},
+                http_requests=backend.requests,
+                storage_stats=files_storage._client.stats,
+            )
+
+    print(benchmark.format_report(report))
+    if output:
+        benchmark.save_report(report, output)
+        print(f"report: {output}")
+    if baseline:
+        comparison = benchmark.compare_reports(
+            benchmark.load_report(baseline), report
+        )
+        print(json.dumps(comparison, indent=2))
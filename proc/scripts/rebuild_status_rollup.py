@@ -0,0 +1,13 @@
+from proc.tasks import task_rebuild_status_rollup
+
+
+def run(collection_acron=None, sync=None):
+    """
+    python manage.py runscript rebuild_status_rollup --script-args [collection_acron] [sync]
+    """
+    if sync:
+        print(task_rebuild_status_rollup(collection_acron=collection_acron))
+        return
+    task_rebuild_status_rollup.apply_async(
+        kwargs=dict(collection_acron=collection_acron)
+    )
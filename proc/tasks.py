@@ -20,11 +20,13 @@ Organização hierárquica das tasks de migração e publicação:
       └─ task_migrate_and_publish_articles_by_journal (por periódico)
           └─ task_migrate_and_publish_articles_by_issue (por fascículo)
               └─ task_publish_issue_articles (publica artigos + sincroniza issue)
-                  ├─ task_publish_article (por artigo, síncrono)
-                  │   └─ task_check_article_webpages (verifica disponibilidade)
-                  │       ├─ task_check_article_page_availability (por webpage, síncrono)
-                  │       └─ task_update_article_proc_availability (callback)
-                  └─ task_sync_issue (sincroniza fascículo no site)
+                  ├─ task_publish_article_lane (group, por lote de artigos)
+                  │   └─ task_publish_article (por artigo, síncrono)
+                  │       └─ task_check_article_webpages (verifica disponibilidade)
+                  │           ├─ task_check_article_page_availability (por webpage, síncrono)
+                  │           └─ task_update_article_proc_availability (callback)
+                  └─ task_finish_issue_articles_publication (callback do chord)
+                      └─ task_sync_issue (sincroniza fascículo no site, síncrono)
 
   Publicação avulsa (somente publicação, sem migração):
     task_publish_articles
@@ -32,9 +34,7 @@ Organização hierárquica das tasks de migração e publicação:
 
   Verificação de disponibilidade (em lote):
     task_check_articles_availability
-      └─ task_check_article_webpages (por artigo × website)
-          ├─ task_check_article_page_availability (por webpage)
-          └─ task_update_article_proc_availability (callback)
+      └─ task_check_articles_webpages (por lote de artigos)
 
   Rastreamento de PIDs do site clássico:
     task_track_classic_website_article_pids
@@ -49,14 +49,20 @@ Organização hierárquica das tasks de migração e publicação:
     task_exclude_invalid_issue_articles
     task_remove_duplicate_issues
     task_check_main_article_page_availability
+    task_prune_events (retenção de eventos)
+    task_rebuild_status_rollup (reconstrói os totais de status)
 """
 
 import logging
 import sys
 import traceback
 import json
+from datetime import datetime, timedelta, timezone
 
+from celery import chord, group
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
@@ -76,12 +82,19 @@ from proc.controller import (
     get_total_status_data,
 )
 from proc.article_controller import ClassicWebsiteArticlePidTracker
-from proc.models import ArticleProc, IssueProc, JournalProc
+from proc.models import (
+    ArticleProc,
+    IssueProc,
+    JournalProc,
+    Operation,
+    ProcStatusRollup,
+)
 from publication.api.document import publish_article
 from publication.api.issue import publish_issue, sync_issue
 from publication.api.journal import publish_journal
 from publication.api.publication import get_api_data
 from tracker import choices as tracker_choices
+from tracker.event_buffer import buffered_events
 from tracker.models import TaskTracker, UnexpectedEvent
 
 User = get_user_model()
@@ -242,9 +255,11 @@ def fix_publication_status(collection):
         else:
             filter_kwargs = {field: tracker_choices.PROGRESS_STATUS_TODO}
             update_kwargs = {field: tracker_choices.PROGRESS_STATUS_IGNORED}
-        JournalProc.objects.filter(collection=collection, **filter_kwargs).update(**update_kwargs)
-        IssueProc.objects.filter(collection=collection, **filter_kwargs).update(**update_kwargs)
-        ArticleProc.objects.filter(collection=collection, **filter_kwargs).update(**update_kwargs)
+        for proc_model in (JournalProc, IssueProc, ArticleProc):
+            ProcStatusRollup.update_queryset(
+                proc_model.objects.filter(collection=collection, **filter_kwargs),
+                **update_kwargs,
+            )
 
 
 ############################################
@@ -1191,6 +1206,7 @@ def task_migrate_and_publish_articles_by_journal(
 
 
 @celery_app.task(bind=True)
+@buffered_events()
 def task_migrate_and_publish_articles_by_issue(
     self,
     user_id=None,
@@ -1272,16 +1288,12 @@ def task_migrate_and_publish_articles_by_issue(
         total_articles_to_process = article_procs.count()
         task_exec.total_to_process = total_articles_to_process
 
-        total_processed = 0
-        exceptions = {}
-        for article_proc in article_procs:
-            try:
-                article = article_proc.migrate_article(user, force_update)
-                total_processed += 1
-            except Exception as e:
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                exceptions[article_proc.pid] = traceback.format_exc()
-                task_exec.add_exception(exceptions[article_proc.pid])
+        # PIDs v3 solicitados ao Core em lotes (PID_PROVIDER_BATCH_SIZE)
+        total_processed, exceptions = ArticleProc.migrate_articles(
+            user, article_procs, force_update
+        )
+        for item in exceptions.values():
+            task_exec.add_exception(item)
 
         task_exec.total_processed = total_processed
         task_exec.add_number("total_processed", total_processed)
@@ -1306,6 +1318,7 @@ def task_migrate_and_publish_articles_by_issue(
 
 
 @celery_app.task(bind=True)
+@buffered_events()
 def task_publish_issue_articles(
     self,
     user_id=None,
@@ -1317,9 +1330,13 @@ def task_publish_issue_articles(
     """
     Publica artigos de um fascículo e sincroniza o fascículo no site.
 
-    Para cada WebSiteConfiguration habilitado da coleção:
-    1. Publica cada artigo via task_publish_article (síncrono).
-    2. Agenda task_sync_issue (assíncrono).
+    Para cada WebSiteConfiguration habilitado da coleção, agenda um chord
+    (dispatch_issue_articles_publication):
+    1. Publica os artigos em até get_publication_concurrency lotes
+       paralelos (task_publish_article_lane); o mesmo limite vale para a
+       coleção como um todo (acquire_publication_slot).
+    2. Ao final de todos os lotes, totaliza os resultados e sincroniza o
+       fascículo (task_finish_issue_articles_publication).
     """
     task_params = {
         "user_id": user_id,
@@ -1354,7 +1371,9 @@ def task_publish_issue_articles(
 
         collection = issue_proc.collection
         fix_publication_status(collection)
-        total_processed = 0
+        concurrency = get_publication_concurrency(collection.acron)
+        task_exec.add_number("concurrency", concurrency)
+        total_dispatched = 0
         total_to_process = 0
         for website in WebSiteConfiguration.objects.filter(
             collection=collection, enabled=True
@@ -1368,35 +1387,289 @@ def task_publish_issue_articles(
             elif website_kind == PUBLIC:
                 query_by_status = Q(public_ws_status__in=status)
 
-            article_ids_to_publish = articles.filter(query_by_status)
-            total_to_process += article_ids_to_publish.count()
+            article_ids_to_publish = list(
+                articles.filter(query_by_status).order_by("id")
+            )
+            total_to_process += len(article_ids_to_publish)
+
+            try:
+                dispatch_issue_articles_publication(
+                    user_id=user_id,
+                    username=username,
+                    issue_proc_id=issue_proc_id,
+                    website_id=website.id,
+                    website_kind=website_kind,
+                    article_proc_ids=article_ids_to_publish,
+                    api_data=api_data,
+                    force_update=force_update,
+                    concurrency=concurrency,
+                    collection_acron=collection.acron,
+                )
+                total_dispatched += len(article_ids_to_publish)
+            except Exception:
+                task_exec.add_exception(traceback.format_exc())
+
+        task_exec.total_to_process = total_to_process
+        task_exec.total_processed = total_dispatched
+        task_exec.finish()
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        task_exec.finish(exception=e, exc_traceback=exc_traceback)
 
-            for article_proc_id in article_ids_to_publish:
-                try:
-                    task_publish_article(
-                        user_id=user_id,
-                        username=username,
-                        website_id=website.id,
-                        website_kind=website_kind,
-                        article_proc_id=article_proc_id,
-                        api_data=api_data,
-                        force_update=force_update,
-                    )
-                    total_processed += 1
-                except Exception as e:
-                    exc_type, exc_value, exc_traceback = sys.exc_info()
-                    task_exec.add_exception(traceback.format_exc())
 
-            task_sync_issue.delay(
+def get_publication_concurrency(collection_acron):
+    """
+    Máximo de lotes de artigos de um fascículo publicados em paralelo
+    (PUBLISH_ISSUE_ARTICLES_CONCURRENCY_BY_COLLECTION ou
+    PUBLISH_ISSUE_ARTICLES_CONCURRENCY)
+    """
+    by_collection = (
+        getattr(settings, "PUBLISH_ISSUE_ARTICLES_CONCURRENCY_BY_COLLECTION", None)
+        or {}
+    )
+    concurrency = by_collection.get(collection_acron) or getattr(
+        settings, "PUBLISH_ISSUE_ARTICLES_CONCURRENCY", 4
+    )
+    return max(1, int(concurrency))
+
+
+def get_publication_slot_key(collection_acron, slot):
+    return f"proc.publish_article_lane.{collection_acron}.{slot}"
+
+
+def get_publication_slot_timeout(time_limit=None):
+    """
+    Validade (segundos) da vaga de publicação: o time_limit da tarefa
+    (padrão: CELERY_TASK_TIME_LIMIT) mais
+    PUBLISH_ISSUE_ARTICLES_SLOT_TIMEOUT_MARGIN
+    """
+    time_limit = time_limit or getattr(settings, "CELERY_TASK_TIME_LIMIT", None)
+    return (time_limit or 300) + getattr(
+        settings, "PUBLISH_ISSUE_ARTICLES_SLOT_TIMEOUT_MARGIN", 60
+    )
+
+
+def acquire_publication_slot(collection_acron, concurrency, timeout=None):
+    """
+    Ocupa uma das concurrency vagas de publicação da coleção, compartilhadas
+    por todos os workers por meio do cache
+
+    A vaga expira após timeout segundos (padrão:
+    get_publication_slot_timeout), caso o worker seja interrompido sem
+    liberá-la
+
+    Returns
+    -------
+    str
+        chave da vaga ocupada ou None se todas estão ocupadas
+    """
+    timeout = timeout or get_publication_slot_timeout()
+    for slot in range(concurrency):
+        key = get_publication_slot_key(collection_acron, slot)
+        if cache.add(key, 1, timeout):
+            return key
+    return None
+
+
+def release_publication_slot(key):
+    cache.delete(key)
+
+
+def split_in_lanes(items, total_lanes):
+    """
+    Divide items em até total_lanes listas contíguas, mantendo a ordem
+    """
+    items = list(items)
+    if not items:
+        return []
+    size = -(-len(items) // max(1, total_lanes))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def dispatch_issue_articles_publication(
+    user_id,
+    username,
+    issue_proc_id,
+    website_id,
+    website_kind,
+    article_proc_ids,
+    api_data,
+    force_update,
+    concurrency,
+    collection_acron=None,
+):
+    """
+    Agenda a publicação dos artigos de um fascículo em um site
+
+    Os artigos são divididos em até concurrency lotes publicados em paralelo
+    (group de task_publish_article_lane); quando todos terminam,
+    task_finish_issue_articles_publication (callback do chord) totaliza os
+    resultados e sincroniza o fascículo
+
+    Com collection_acron, os lotes de todos os fascículos da coleção
+    disputam as mesmas concurrency vagas (acquire_publication_slot)
+    """
+    callback = task_finish_issue_articles_publication.s(
+        user_id=user_id,
+        username=username,
+        issue_proc_id=issue_proc_id,
+        website_kind=website_kind,
+        api_data=api_data,
+    )
+    lanes = split_in_lanes(article_proc_ids, concurrency)
+    if not lanes:
+        return callback.delay([])
+    header = group(
+        task_publish_article_lane.s(
+            user_id=user_id,
+            username=username,
+            website_id=website_id,
+            website_kind=website_kind,
+            article_proc_ids=lane,
+            api_data=api_data,
+            force_update=force_update,
+            collection_acron=collection_acron,
+            concurrency=concurrency,
+        )
+        for lane in lanes
+    )
+    return chord(header)(callback)
+
+
+@celery_app.task(bind=True, max_retries=None)
+@buffered_events()
+def task_publish_article_lane(
+    self,
+    user_id=None,
+    username=None,
+    website_id=None,
+    website_kind=None,
+    article_proc_ids=None,
+    api_data=None,
+    force_update=None,
+    collection_acron=None,
+    concurrency=None,
+):
+    """
+    Publica, em sequência, um lote de artigos (membro do group de
+    dispatch_issue_articles_publication)
+
+    Com collection_acron, aguarda (retry) uma vaga de publicação da coleção
+    antes de iniciar o lote
+
+    Returns
+    -------
+    list of dict
+        {"article_proc_id", "published", "error"*}, na ordem de article_proc_ids
+    """
+    slot_key = None
+    if collection_acron:
+        # a vaga não deve sobreviver ao time_limit (hard) desta tarefa
+        time_limit = (self.request.timelimit or (None, None))[0]
+        slot_key = acquire_publication_slot(
+            collection_acron,
+            concurrency or get_publication_concurrency(collection_acron),
+            timeout=get_publication_slot_timeout(time_limit),
+        )
+        if not slot_key:
+            raise self.retry(
+                countdown=getattr(
+                    settings, "PUBLISH_ISSUE_ARTICLES_SLOT_RETRY_DELAY", 30
+                )
+            )
+    try:
+        return publish_article_lane(
+            user_id,
+            username,
+            website_id,
+            website_kind,
+            article_proc_ids,
+            api_data,
+            force_update,
+        )
+    finally:
+        if slot_key:
+            release_publication_slot(slot_key)
+
+
+def publish_article_lane(
+    user_id,
+    username,
+    website_id,
+    website_kind,
+    article_proc_ids,
+    api_data,
+    force_update,
+):
+    results = []
+    for article_proc_id in article_proc_ids or []:
+        item = {"article_proc_id": article_proc_id, "published": False}
+        try:
+            detail = task_publish_article(
                 user_id=user_id,
                 username=username,
+                website_id=website_id,
                 website_kind=website_kind,
-                issue_proc_id=issue_proc_id,
+                article_proc_id=article_proc_id,
                 api_data=api_data,
+                force_update=force_update,
             )
-        task_exec.total_to_process = total_to_process
-        task_exec.total_processed = total_processed
+            item["published"] = bool(detail and detail.get("published"))
+        except Exception as e:
+            item["error"] = f"{type(e).__name__}: {e}"
+        results.append(item)
+    return results
+
+
+@celery_app.task(bind=True)
+def task_finish_issue_articles_publication(
+    self,
+    lanes_results,
+    user_id=None,
+    username=None,
+    issue_proc_id=None,
+    website_kind=None,
+    api_data=None,
+):
+    """
+    Callback do chord de dispatch_issue_articles_publication: totaliza a
+    publicação dos artigos e sincroniza o fascículo no site
+    """
+    task_params = {
+        "user_id": user_id,
+        "username": username,
+        "issue_proc_id": issue_proc_id,
+        "website_kind": website_kind,
+    }
+    task_exec = TaskExecution(
+        name="proc.tasks.task_finish_issue_articles_publication",
+        item=f"{issue_proc_id}",
+        params=task_params,
+    )
+    try:
+        results = [item for lane in lanes_results or [] for item in lane or []]
+        failures = [item for item in results if not item.get("published")]
+        summary = {
+            "website_kind": website_kind,
+            "total": len(results),
+            "published": len(results) - len(failures),
+            "failed": len(failures),
+            "failures": [item["article_proc_id"] for item in failures],
+        }
+        task_exec.total_to_process = summary["total"]
+        task_exec.total_processed = summary["published"]
+        task_exec.add_number("failed", summary["failed"])
+        task_exec.add_event({"failures": summary["failures"]})
+
+        task_sync_issue(
+            user_id=user_id,
+            username=username,
+            website_kind=website_kind,
+            issue_proc_id=issue_proc_id,
+            api_data=api_data,
+        )
         task_exec.finish()
+        return summary
     except Exception as e:
         exc_type, exc_value, exc_traceback = sys.exc_info()
         task_exec.finish(exception=e, exc_traceback=exc_traceback)
@@ -1414,8 +1687,9 @@ def task_sync_issue(
     """
     Sincroniza a tabela de conteúdo de um fascículo no site (QA ou PUBLIC).
 
-    Chamada de forma assíncrona após ``task_publish_issue_articles``
-    para garantir que o fascículo apareça corretamente no TOC do site.
+    Chamada por ``task_finish_issue_articles_publication``, após a
+    publicação dos artigos, para garantir que o fascículo apareça
+    corretamente no TOC do site.
     """
     try:
         user = _get_user(user_id, username)
@@ -1534,6 +1808,11 @@ def task_publish_article(
     Publica um artigo individual no site QA ou PUBLIC.
 
     Após publicação bem-sucedida, agenda task_check_article_webpages.
+
+    Returns
+    -------
+    dict
+        {"published": bool, "available": bool}
     """
     user = None
     detail = {"published": False, "available": False}
@@ -1597,6 +1876,7 @@ def task_publish_article(
                     "article_proc_id": article_proc_id,
                 },
             )
+    return detail
 
 
 ############################################
@@ -2027,6 +2307,121 @@ def task_update_article_proc_availability(
         )
 
 
+@celery_app.task(bind=True)
+def task_check_articles_webpages(
+    self,
+    user_id=None,
+    username=None,
+    article_proc_ids=None,
+    timeout=None,
+    force_update=None,
+):
+    """
+    Verifica, de uma só vez, as páginas de um lote de artigos.
+
+    As páginas de todos os artigos são verificadas concorrentemente por
+    ``ArticleWebPage.check_pages``; depois, atualiza ``pid_status`` de cada
+    ArticleProc como ``task_check_article_webpages``.
+
+    Cada artigo tem a sua operação (check availability); a falha de um
+    artigo é registrada na sua operação e não interrompe os demais.
+    """
+    try:
+        user = _get_user(user_id, username)
+        article_procs = list(
+            ArticleProc.objects.filter(id__in=article_proc_ids or []).select_related(
+                "article", "collection"
+            )
+        )
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            e=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "proc.tasks.task_check_articles_webpages",
+                "article_proc_ids": article_proc_ids,
+            },
+        )
+        return
+
+    events = {}
+    pages = []
+    for article_proc in article_procs:
+        event = None
+        try:
+            event = article_proc.start(
+                user, f"check availability {article_proc.collection}"
+            )
+            article = article_proc.article
+            if not article:
+                raise ValueError(f"{article_proc} has no article")
+            article.create_or_update_article_collections(user)
+            for art_col in article.article_collections.filter(
+                collection=article_proc.collection
+            ):
+                pages.extend(
+                    art_col.get_pages_to_check(
+                        force_update=force_update or not art_col.pages.exists()
+                    )
+                )
+            events[article_proc.id] = event
+        except Exception as e:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            _finish_check_event(user, event, article_proc, e, exc_traceback)
+
+    try:
+        response = ArticleWebPage.check_pages(
+            user, pages, timeout=timeout, force_update=force_update
+        )
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        for article_proc in article_procs:
+            event = events.get(article_proc.id)
+            if event:
+                event.finish(user, exception=e, exc_traceback=exc_traceback)
+        return
+
+    for article_proc in article_procs:
+        event = events.get(article_proc.id)
+        if not event:
+            continue
+        try:
+            article = article_proc.article
+            responses = [
+                article.available_on_classic_website(article_proc.collection),
+                article.available_on_public_website(article_proc.collection),
+            ]
+            for item in responses:
+                if item.get("valid"):
+                    article_proc.set_pid_status(user, item.get("new_pid_status"))
+            event.finish(
+                user,
+                completed=True,
+                detail={"responses": responses, "availability": article.availability},
+            )
+        except Exception as e:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            _finish_check_event(user, event, article_proc, e, exc_traceback)
+
+    response.pop("pages")
+    return response
+
+
+def _finish_check_event(user, event, article_proc, e, exc_traceback):
+    if event:
+        event.finish(user, exception=e, exc_traceback=exc_traceback)
+        return
+    UnexpectedEvent.create(
+        e=e,
+        exc_traceback=exc_traceback,
+        detail={
+            "task": "proc.tasks.task_check_articles_webpages",
+            "article_proc_id": article_proc.id,
+        },
+    )
+
+
 @celery_app.task(bind=True)
 def task_check_articles_availability(
     self,
@@ -2044,9 +2439,9 @@ def task_check_articles_availability(
     """
     Verificação em lote: busca artigos por filtros e agenda verificação.
 
-    Resolve os artigos que correspondem aos filtros fornecidos, garante a
-    existência de ``ArticleCollection`` para cada um e agenda
-    ``task_check_article_webpages`` (assíncrono) por artigo.
+    Resolve os artigos que correspondem aos filtros fornecidos e agenda
+    ``task_check_articles_webpages`` (assíncrono) para cada lote de
+    ``ARTICLE_PAGE_CHECK_ARTICLES_PER_TASK`` artigos.
 
     Parameters
     ----------
@@ -2089,15 +2484,17 @@ def task_check_articles_availability(
                 issue_proc__journal_proc__journal__official_journal__issn_electronic=issn_electronic
             )
 
-        for article_proc in ArticleProc.objects.filter(
-            q, **article_params
-        ):
-            task_check_article_webpages.delay(
+        article_proc_ids = list(
+            ArticleProc.objects.filter(q, **article_params).values_list(
+                "id", flat=True
+            )
+        )
+        batch_size = getattr(settings, "ARTICLE_PAGE_CHECK_ARTICLES_PER_TASK", 100)
+        for start in range(0, len(article_proc_ids), batch_size):
+            task_check_articles_webpages.delay(
                 user_id=user_id,
                 username=username,
-                article_proc_id=article_proc.id,
-                article_id=article_proc.article.id,
-                collection_id=article_proc.collection_id,
+                article_proc_ids=article_proc_ids[start : start + batch_size],
                 timeout=timeout,
                 force_update=force_update,
             )
@@ -2122,6 +2519,68 @@ def task_check_articles_availability(
         )
 
 
+@celery_app.task(bind=True)
+def task_prune_events(self, username=None, user_id=None, days=None, batch_size=None):
+    """
+    Apaga eventos antigos: UnexpectedEvent, TaskTracker e as operações
+    (subclasses de Operation) que já têm uma ocorrência mais recente.
+
+    Parameters
+    ----------
+    days : int, optional
+        Idade mínima, em dias, dos registros apagados
+        (padrão: TRACKER_EVENT_RETENTION_DAYS).
+    """
+    try:
+        days = int(days or getattr(settings, "TRACKER_EVENT_RETENTION_DAYS", 90))
+        before = datetime.now(timezone.utc) - timedelta(days=days)
+        response = {
+            "before": before.isoformat(),
+            "unexpected_events": UnexpectedEvent.prune(before, batch_size),
+            "task_trackers": TaskTracker.prune(before, batch_size),
+            "operations": Operation.prune(before, batch_size),
+        }
+        logging.info(f"task_prune_events: {response}")
+        return response
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            e=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "proc.tasks.task_prune_events",
+                "days": days,
+            },
+        )
+
+
+@celery_app.task(bind=True)
+def task_rebuild_status_rollup(
+    self, username=None, user_id=None, collection_acron=None
+):
+    """
+    Reconstrói ProcStatusRollup (totais de status) a partir de JournalProc,
+    IssueProc e ArticleProc, de todas as coleções ou de collection_acron.
+    """
+    try:
+        collection = None
+        if collection_acron:
+            collection = Collection.objects.get(acron=collection_acron)
+        response = ProcStatusRollup.rebuild(collection)
+        logging.info(f"task_rebuild_status_rollup: {response}")
+        return response
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        UnexpectedEvent.create(
+            e=e,
+            exc_traceback=exc_traceback,
+            detail={
+                "task": "proc.tasks.task_rebuild_status_rollup",
+                "collection_acron": collection_acron,
+            },
+        )
+
+
 ############################################
 # CLASSIC WEBSITE CHECK (MIGRATION)
 ############################################
@@ -0,0 +1,126 @@
+import io
+import os
+import tempfile
+from unittest import TestCase
+from zipfile import ZipFile
+
+from core.utils.requester import post_data
+from files_storage.minio import ZipContentUploader
+from proc import benchmark
+
+
+class MeasureStageTest(TestCase):
+    def test_result(self):
+        results = []
+        with benchmark.measure_stage(results, "stage") as result:
+            result["items"] = 2
+            benchmark.add_failure(result, ValueError("x"))
+        self.assertEqual(results[0]["name"], "stage")
+        self.assertEqual(results[0]["items"], 2)
+        self.assertEqual(results[0]["failures"], 1)
+        self.assertEqual(results[0]["errors"], ["ValueError: x"])
+        self.assertEqual(results[0]["queries"], 0)
+        self.assertGreaterEqual(
+            results[0]["peak_rss_mb"], results[0]["rss_start_mb"]
+        )
+        self.assertIn("wall_time", results[0])
+
+
+class ClassicWebsiteTreeTest(TestCase):
+    def test_tree(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = benchmark.write_classic_website_tree(tmpdir, 2, 3, image_size=10)
+            with open(
+                os.path.join(paths["bases_work_path"], "bench", "bench.id"),
+                encoding="iso-8859-1",
+            ) as fp:
+                content = fp.read()
+            self.assertEqual(content.count("!v706!i"), 2)
+            self.assertEqual(content.count("!v706!h"), 6)
+            self.assertIn("!v880!S0000-00002001000100003", content)
+            self.assertEqual(
+                sorted(
+                    os.listdir(
+                        os.path.join(paths["htdocs_img_revistas_path"], "bench", "v2n1")
+                    )
+                ),
+                ["a01f1.jpg", "a02f1.jpg", "a03f1.jpg"],
+            )
+            self.assertTrue(
+                os.path.isfile(
+                    os.path.join(paths["bases_pdf_path"], "bench", "v1n1", "a01.pdf")
+                )
+            )
+
+
+class LocalFilesStorageTest(TestCase):
+    def test_put_content_and_sha1(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files_storage = benchmark.get_local_files_storage(tmpdir)
+            uri = files_storage.put_content(
+                io.BytesIO(b"content"), 7, "text/plain", "a/b.txt", content_sha1="x"
+            )
+            self.assertEqual(uri, "http://files.bench.local/bench/a/b.txt")
+            self.assertEqual(files_storage.get_content_sha1("a/b.txt"), "x")
+            self.assertIsNone(files_storage.get_content_sha1("a/c.txt"))
+            self.assertEqual(files_storage._client.stats, {"put": 1, "bytes": 7})
+
+    def test_zip_content_uploader_skips_unchanged_members(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            zip_path = os.path.join(tmpdir, "pkg.zip")
+            with ZipFile(zip_path, "w") as zf:
+                zf.writestr("a.xml", "<article/>")
+            files_storage = benchmark.get_local_files_storage(
+                os.path.join(tmpdir, "storage")
+            )
+            uploader = ZipContentUploader(files_storage, zip_path)
+            items = [{"member": "a.xml", "object_name": "x/a.xml", "mimetype": "text/xml"}]
+            self.assertFalse(uploader.upload(items)[0]["skipped"])
+            self.assertTrue(uploader.upload(items)[0]["skipped"])
+
+
+class FakeBackendTest(TestCase):
+    def test_responses(self):
+        with benchmark.FakeBackend() as backend:
+            token = post_data(backend.url("/api/v2/auth/token/"), json=True)
+            pid = post_data(
+                backend.url("/api/v2/pid/pid_provider/"), data=b"zip", json=True
+            )
+            published = post_data(
+                backend.url("/api/v1/article/?token=x"), data="{}", json=True
+            )
+            requests = backend.requests
+        self.assertEqual(token["access"], benchmark.TOKEN)
+        self.assertEqual(pid, [{"xml_changed": None}])
+        self.assertFalse(published["failed"])
+        self.assertEqual(requests["POST /api/v1/article/"], 1)
+
+
+class CompareReportsTest(TestCase):
+    def stage(self, name, wall_time, queries):
+        return {
+            "name": name,
+            "wall_time": wall_time,
+            "queries": queries,
+            "peak_rss_mb": 100,
+            "items": 1,
+            "failures": 0,
+            "errors": [],
+        }
+
+    def test_regression(self):
+        baseline = benchmark.build_report(
+            [self.stage("a", 1.0, 10), self.stage("b", 1.0, 10)]
+        )
+        current = benchmark.build_report(
+            [
+                self.stage("a", 1.1, 10),
+                self.stage("b", 0.5, 11),
+                self.stage("c", 1.0, 10),
+            ]
+        )
+        result = benchmark.compare_reports(baseline, current, tolerance=0.2)
+        self.assertEqual([item["name"] for item in result], ["a", "b"])
+        self.assertFalse(result[0]["regression"])
+        self.assertTrue(result[1]["regression"])
+        self.assertEqual(current["total"]["queries"], 31)
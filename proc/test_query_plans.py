@@ -0,0 +1,125 @@
+from django.db import connection
+from django.test import TestCase
+
+from collection import choices as collection_choices
+from collection.models import Collection
+from core.users.models import User
+from proc.models import ArticleProc, IssueProc, JournalProc
+from tracker import choices as tracker_choices
+
+DONE = tracker_choices.PROGRESS_STATUS_DONE
+TODO = tracker_choices.PROGRESS_STATUS_TODO
+REPROC = tracker_choices.PROGRESS_STATUS_REPROC
+
+
+class ProcSelectorsQueryPlanTest(TestCase):
+    """
+    Os seletores de itens a processar / publicar não podem depender de
+    Seq Scan nas tabelas de *Proc
+
+    Com enable_seqscan = off, o PostgreSQL só escolhe Seq Scan quando não
+    há índice que atenda ao filtro.
+    """
+
+    TOTAL = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="user")
+        cls.collection = Collection.objects.create(
+            acron="scl", name="SciELO", creator=cls.user
+        )
+        journal_proc = JournalProc.objects.create(
+            collection=cls.collection, pid="1234-5678", acron="abc", creator=cls.user
+        )
+        issue_procs = IssueProc.objects.bulk_create(
+            [
+                IssueProc(
+                    collection=cls.collection,
+                    journal_proc=journal_proc,
+                    pid=f"1234-56782024{i:04d}",
+                    issue_folder=f"v1n{i}",
+                    creator=cls.user,
+                    **cls.get_status(i),
+                )
+                for i in range(cls.TOTAL // 10)
+            ]
+        )
+        ArticleProc.objects.bulk_create(
+            [
+                ArticleProc(
+                    collection=cls.collection,
+                    issue_proc=issue_procs[i % len(issue_procs)],
+                    pid=f"S1234-5678202400{i:05d}",
+                    xml_status=DONE,
+                    sps_pkg_status=DONE,
+                    creator=cls.user,
+                    **cls.get_status(i),
+                )
+                for i in range(cls.TOTAL)
+            ]
+        )
+
+    @staticmethod
+    def get_status(i):
+        # a maioria dos itens está concluída
+        status = {
+            "migration_status": DONE,
+            "qa_ws_status": DONE,
+            "public_ws_status": DONE,
+        }
+        if i % 50 == 0:
+            status["migration_status"] = REPROC
+        elif i % 50 == 1:
+            status["qa_ws_status"] = TODO
+        elif i % 50 == 2:
+            status["public_ws_status"] = REPROC
+        return status
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE proc_articleproc")
+            cursor.execute("ANALYZE proc_issueproc")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertNoSeqScan(self, qs, table):
+        plan = qs.explain()
+        self.assertNotIn(f"Seq Scan on {table}", plan, plan)
+
+    def test_article_items_to_register(self):
+        qs = ArticleProc.items_to_register(self.collection, "article", False)
+        self.assertNoSeqScan(qs, "proc_articleproc")
+
+    def test_article_items_to_process(self):
+        qs = ArticleProc.items_to_process(self.collection, "article", None, False)
+        self.assertNoSeqScan(qs, "proc_articleproc")
+
+    def test_article_items_to_publish_on_qa(self):
+        for collection in (self.collection, None):
+            with self.subTest(collection=collection):
+                qs = ArticleProc.items_to_publish(
+                    collection_choices.QA, "article", collection
+                )
+                self.assertNoSeqScan(qs, "proc_articleproc")
+
+    def test_article_items_to_publish_on_public(self):
+        for collection in (self.collection, None):
+            with self.subTest(collection=collection):
+                qs = ArticleProc.items_to_publish(
+                    collection_choices.PUBLIC, "article", collection
+                )
+                self.assertNoSeqScan(qs, "proc_articleproc")
+
+    def test_article_select_items(self):
+        qs = ArticleProc.select_items(collection_acron="scl", force_update=False)
+        self.assertNoSeqScan(qs, "proc_articleproc")
+
+    def test_issue_items_to_register(self):
+        qs = IssueProc.items_to_register(self.collection, "issue", False)
+        self.assertNoSeqScan(qs, "proc_issueproc")
+
+    def test_issue_items_to_publish(self):
+        for website_kind in (collection_choices.QA, collection_choices.PUBLIC):
+            with self.subTest(website_kind=website_kind):
+                qs = IssueProc.items_to_publish(website_kind, "issue", self.collection)
+                self.assertNoSeqScan(qs, "proc_issueproc")
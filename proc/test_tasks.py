@@ -0,0 +1,145 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from config import celery_app
+from proc import tasks
+
+
+class FakePublisher:
+    """
+    Substitui task_publish_article e task_sync_issue registrando a ordem
+    das chamadas
+    """
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = failures or {}
+
+    def publish(self, article_proc_id=None, **kwargs):
+        self.calls.append(("publish", article_proc_id))
+        failure = self.failures.get(article_proc_id)
+        if failure == "raise":
+            raise ValueError(f"unable to publish {article_proc_id}")
+        return {"published": not failure, "available": False}
+
+    def sync_issue(self, issue_proc_id=None, website_kind=None, **kwargs):
+        self.calls.append(("sync_issue", website_kind))
+
+
+class DispatchIssueArticlesPublicationTest(TestCase):
+    def setUp(self):
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", eager)
+
+    def dispatch(self, publisher, article_proc_ids, concurrency, collection_acron=None):
+        with patch.object(
+            tasks, "task_publish_article", side_effect=publisher.publish
+        ), patch.object(tasks, "task_sync_issue", side_effect=publisher.sync_issue):
+            return tasks.dispatch_issue_articles_publication(
+                user_id=None,
+                username=None,
+                issue_proc_id=1,
+                website_id=1,
+                website_kind="QA",
+                article_proc_ids=article_proc_ids,
+                api_data={},
+                force_update=False,
+                concurrency=concurrency,
+                collection_acron=collection_acron,
+            ).get()
+
+    def test_issue_is_synchronized_after_all_articles(self):
+        publisher = FakePublisher(failures={3: True, 7: "raise"})
+
+        summary = self.dispatch(publisher, list(range(1, 11)), concurrency=3)
+
+        self.assertEqual(
+            [("publish", i) for i in range(1, 11)] + [("sync_issue", "QA")],
+            publisher.calls,
+        )
+        self.assertEqual(
+            {
+                "website_kind": "QA",
+                "total": 10,
+                "published": 8,
+                "failed": 2,
+                "failures": [3, 7],
+            },
+            summary,
+        )
+
+    def test_issue_without_articles_is_synchronized(self):
+        publisher = FakePublisher()
+        summary = self.dispatch(publisher, [], concurrency=3)
+        self.assertEqual([("sync_issue", "QA")], publisher.calls)
+        self.assertEqual(0, summary["total"])
+
+    def test_split_in_lanes_respects_concurrency(self):
+        lanes = tasks.split_in_lanes(range(1, 11), 3)
+        self.assertEqual([[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]], lanes)
+        self.assertEqual([[1], [2]], tasks.split_in_lanes([1, 2], 5))
+        self.assertEqual([], tasks.split_in_lanes([], 5))
+
+    @override_settings(
+        PUBLISH_ISSUE_ARTICLES_CONCURRENCY=4,
+        PUBLISH_ISSUE_ARTICLES_CONCURRENCY_BY_COLLECTION={"scl": 8},
+    )
+    def test_get_publication_concurrency(self):
+        self.assertEqual(8, tasks.get_publication_concurrency("scl"))
+        self.assertEqual(4, tasks.get_publication_concurrency("spa"))
+
+
+class PublicationSlotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", eager)
+
+    def test_slots_are_limited_by_collection(self):
+        keys = [tasks.acquire_publication_slot("scl", 2) for i in range(3)]
+
+        self.assertIsNotNone(keys[0])
+        self.assertIsNotNone(keys[1])
+        self.assertIsNone(keys[2])
+        # outra coleção tem as suas próprias vagas
+        self.assertIsNotNone(tasks.acquire_publication_slot("spa", 2))
+
+        tasks.release_publication_slot(keys[0])
+        self.assertEqual(keys[0], tasks.acquire_publication_slot("scl", 2))
+
+    @override_settings(
+        CELERY_TASK_TIME_LIMIT=300, PUBLISH_ISSUE_ARTICLES_SLOT_TIMEOUT_MARGIN=60
+    )
+    def test_slot_timeout_follows_the_task_time_limit(self):
+        self.assertEqual(360, tasks.get_publication_slot_timeout())
+        self.assertEqual(160, tasks.get_publication_slot_timeout(100))
+        with patch.object(tasks.cache, "add", return_value=True) as mock_add:
+            tasks.acquire_publication_slot("scl", 2)
+        self.assertEqual(360, mock_add.call_args.args[2])
+
+    def test_lanes_release_their_slots(self):
+        publisher = FakePublisher()
+        with patch.object(
+            tasks, "task_publish_article", side_effect=publisher.publish
+        ), patch.object(tasks, "task_sync_issue", side_effect=publisher.sync_issue):
+            summary = tasks.dispatch_issue_articles_publication(
+                user_id=None,
+                username=None,
+                issue_proc_id=1,
+                website_id=1,
+                website_kind="QA",
+                article_proc_ids=list(range(1, 7)),
+                api_data={},
+                force_update=False,
+                concurrency=2,
+                collection_acron="scl",
+            ).get()
+
+        self.assertEqual(6, summary["published"])
+        self.assertIsNotNone(tasks.acquire_publication_slot("scl", 2))
+        self.assertIsNotNone(tasks.acquire_publication_slot("scl", 2))
@@ -1,7 +1,26 @@
 import json
 import unittest
+from unittest.mock import Mock, patch
 
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from collection.models import Collection
+from core.users.models import User
+from core.utils.query_budget import QueryBudgetTestMixin
 from core.utils.sanitize import sanitize_for_json
+from migration.models import (
+    IdFileRecord,
+    JournalAcronIdFile,
+    MigratedFile,
+    MigratedIssue,
+    MigratedJournal,
+)
+from proc.controller import get_total_status_data
+from proc.models import ArticleProc, IssueProc, JournalProc, ProcStatusRollup
+from proc.tasks import fix_publication_status
+from tracker import choices as tracker_choices
 
 
 class SanitizeForJsonTest(unittest.TestCase):
@@ -100,3 +119,429 @@ class SanitizeForJsonTest(unittest.TestCase):
 
 if __name__ == "__main__":
     unittest.main()
+
+
+class ProcStatusRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        self.collection = Collection.objects.create(
+            acron="scl", name="SciELO", creator=self.user
+        )
+        self.journal_proc = JournalProc.objects.create(
+            collection=self.collection, pid="1234-5678", acron="abc", creator=self.user
+        )
+        self.issue_proc = IssueProc.objects.create(
+            collection=self.collection,
+            journal_proc=self.journal_proc,
+            pid="1234-567820240001",
+            issue_folder="v1n1",
+            creator=self.user,
+        )
+        for i in range(3):
+            ArticleProc.objects.create(
+                collection=self.collection,
+                issue_proc=self.issue_proc,
+                pid=f"S1234-5678202400010000{i}",
+                creator=self.user,
+            )
+
+    def totals(self, proc_type):
+        return ProcStatusRollup.get_totals(
+            proc_type, journal_proc_id=self.journal_proc.id
+        )
+
+    def test_totals_of_created_procs(self):
+        self.assertEqual(
+            self.totals("article")["xml_status"], {tracker_choices.PROGRESS_STATUS_TODO: 3}
+        )
+        self.assertEqual(
+            self.totals("issue")["docs_status"], {tracker_choices.PROGRESS_STATUS_TODO: 1}
+        )
+        self.assertEqual(
+            self.totals("journal")["migration_status"],
+            {tracker_choices.PROGRESS_STATUS_TODO: 1},
+        )
+
+    def test_totals_are_updated_when_status_changes(self):
+        article_proc = ArticleProc.objects.filter(issue_proc=self.issue_proc).first()
+        article_proc.xml_status = tracker_choices.PROGRESS_STATUS_DONE
+        article_proc.save()
+        self.assertEqual(
+            self.totals("article")["xml_status"],
+            {
+                tracker_choices.PROGRESS_STATUS_TODO: 2,
+                tracker_choices.PROGRESS_STATUS_DONE: 1,
+            },
+        )
+
+    def test_totals_are_updated_by_update_queryset(self):
+        ProcStatusRollup.update_queryset(
+            ArticleProc.objects.filter(issue_proc=self.issue_proc),
+            migration_status=tracker_choices.PROGRESS_STATUS_REPROC,
+        )
+        self.assertEqual(
+            self.totals("article")["migration_status"],
+            {tracker_choices.PROGRESS_STATUS_REPROC: 3},
+        )
+
+    def assertRollupMatchesRebuild(self):
+        expected = {
+            proc_type: self.totals(proc_type)
+            for proc_type in ("journal", "issue", "article")
+        }
+        ProcStatusRollup.rebuild()
+        for proc_type, totals in expected.items():
+            self.assertEqual(totals, self.totals(proc_type))
+
+    def test_totals_are_updated_by_fix_publication_status(self):
+        fix_publication_status(self.collection)
+        self.assertEqual(
+            self.totals("article")["qa_ws_status"],
+            {tracker_choices.PROGRESS_STATUS_IGNORED: 3},
+        )
+        self.assertRollupMatchesRebuild()
+
+    def test_totals_are_updated_by_mark_for_reprocessing(self):
+        ArticleProc.mark_for_reprocessing(self.issue_proc)
+        self.assertEqual(
+            self.totals("article")["sps_pkg_status"],
+            {tracker_choices.PROGRESS_STATUS_REPROC: 3},
+        )
+        self.assertRollupMatchesRebuild()
+
+    def test_totals_are_updated_when_proc_is_deleted(self):
+        ArticleProc.objects.filter(issue_proc=self.issue_proc).first().delete()
+        self.assertEqual(
+            self.totals("article")["xml_status"], {tracker_choices.PROGRESS_STATUS_TODO: 2}
+        )
+
+    def test_get_total_status_data(self):
+        # como em task_migrate_and_publish_articles_by_journal: o resultado é registrado
+        # com add_event e acumulado em total_status_data
+        total_status_data = get_total_status_data(self.journal_proc.id, {})
+        json.dumps(total_status_data)
+        self.assertEqual({"journal", "issue", "article"}, set(total_status_data))
+        self.assertEqual(
+            {tracker_choices.PROGRESS_STATUS_TODO: 3},
+            total_status_data["article"]["xml_status"],
+        )
+        self.assertEqual(
+            {tracker_choices.PROGRESS_STATUS_TODO: 1},
+            total_status_data["issue"]["docs_status"],
+        )
+
+        ProcStatusRollup.update_queryset(
+            ArticleProc.objects.filter(issue_proc=self.issue_proc),
+            xml_status=tracker_choices.PROGRESS_STATUS_DONE,
+        )
+        updated = get_total_status_data(self.journal_proc.id, total_status_data)
+
+        # somente os totais alterados
+        self.assertEqual(["article"], list(updated))
+        self.assertEqual(
+            {tracker_choices.PROGRESS_STATUS_DONE: 3}, updated["article"]["xml_status"]
+        )
+        total_status_data.update(updated)
+        self.assertEqual(
+            {}, get_total_status_data(self.journal_proc.id, total_status_data)
+        )
+
+    def test_rebuild(self):
+        ArticleProc.objects.filter(issue_proc=self.issue_proc).update(
+            sps_pkg_status=tracker_choices.PROGRESS_STATUS_DONE
+        )
+        ProcStatusRollup.rebuild()
+        self.assertEqual(
+            self.totals("article")["sps_pkg_status"],
+            {tracker_choices.PROGRESS_STATUS_DONE: 3},
+        )
+        self.assertEqual(
+            self.totals("journal")["migration_status"],
+            {tracker_choices.PROGRESS_STATUS_TODO: 1},
+        )
+
+
+class MigrateDocumentRecordsTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        self.collection = Collection.objects.create(
+            acron="scl", name="SciELO", creator=self.user
+        )
+        self.journal_proc = JournalProc.objects.create(
+            collection=self.collection,
+            pid="1234-5678",
+            acron="abc",
+            migrated_data=MigratedJournal.objects.create(
+                collection=self.collection,
+                pid="1234-5678",
+                data={"v068": [{"_": "abc"}]},
+                creator=self.user,
+            ),
+            creator=self.user,
+        )
+        self.id_file = JournalAcronIdFile.objects.create(
+            collection=self.collection, journal_acron="abc", creator=self.user
+        )
+
+    def create_issue_proc(self, number, total):
+        issue_pid = f"1234-56782024{number:04d}"
+        issue_data = {"v035": [{"_": "1234-5678"}], "v880": [{"_": issue_pid}]}
+        issue_proc = IssueProc.objects.create(
+            collection=self.collection,
+            journal_proc=self.journal_proc,
+            pid=issue_pid,
+            issue_folder=f"v1n{number}",
+            migration_status=tracker_choices.PROGRESS_STATUS_DONE,
+            migrated_data=MigratedIssue.objects.create(
+                collection=self.collection,
+                pid=issue_pid,
+                data=issue_data,
+                creator=self.user,
+            ),
+            creator=self.user,
+        )
+        IdFileRecord.objects.create(
+            parent=self.id_file,
+            item_type="issue",
+            item_pid=issue_pid,
+            data=issue_data,
+            creator=self.user,
+        )
+        for i in range(total):
+            pid = f"S{issue_pid}{i + 1:05d}"
+            IdFileRecord.objects.create(
+                parent=self.id_file,
+                item_type="article",
+                item_pid=pid,
+                data={
+                    "v702": [{"_": f"abc/v1n{number}/a{i + 1:02d}.xml"}],
+                    "v880": [{"_": pid}],
+                    "v040": [{"_": "en"}],
+                },
+                creator=self.user,
+            )
+            IdFileRecord.objects.create(
+                parent=self.id_file,
+                item_type="paragraph",
+                item_pid=pid,
+                data=[{"v704": [{"_": "text"}]}],
+                creator=self.user,
+            )
+        return issue_proc
+
+    def migrate(self, issue_proc, force_update=None):
+        with CaptureQueriesContext(connection) as context:
+            total = issue_proc.migrate_document_records(self.user, force_update)
+        return total, len(context)
+
+    def test_article_procs_are_created(self):
+        issue_proc = self.create_issue_proc(1, 3)
+        total, queries = self.migrate(issue_proc)
+        self.assertEqual(total, 3)
+        issue_proc.refresh_from_db()
+        self.assertEqual(issue_proc.docs_status, tracker_choices.PROGRESS_STATUS_DONE)
+        article_procs = ArticleProc.objects.filter(issue_proc=issue_proc)
+        self.assertEqual(article_procs.count(), 3)
+        for article_proc in article_procs:
+            self.assertEqual(
+                article_proc.migration_status, tracker_choices.PROGRESS_STATUS_TODO
+            )
+            self.assertEqual(article_proc.migrated_data.pid, article_proc.pid)
+            self.assertEqual(
+                article_proc.migrated_data.data["paragraph"],
+                [{"v704": [{"_": "text"}]}],
+            )
+        self.assertEqual(
+            ProcStatusRollup.get_totals("article", issue_proc_id=issue_proc.id)[
+                "xml_status"
+            ],
+            {tracker_choices.PROGRESS_STATUS_TODO: 3},
+        )
+        self.assertFalse(
+            IdFileRecord.objects.filter(item_type="article", todo=True).exists()
+        )
+
+    def test_number_of_queries_does_not_depend_on_number_of_records(self):
+        small = self.create_issue_proc(1, 5)
+        large = self.create_issue_proc(2, 25)
+        self.migrate(small)
+        self.migrate(large)
+
+        # atualização dos registros já migrados
+        total_small, queries_small = self.migrate(small, force_update=True)
+        total_large, queries_large = self.migrate(large, force_update=True)
+        self.assertEqual((total_small, total_large), (5, 25))
+        self.assertEqual(queries_small, queries_large)
+
+    def test_migration_does_not_query_each_record(self):
+        issue_proc = self.create_issue_proc(1, 30)
+        with self.assertQueryBudget(max_repeated=10):
+            total = issue_proc.migrate_document_records(self.user)
+        self.assertEqual(total, 30)
+
+    def test_batched_mode_has_the_same_result_as_record_by_record_mode(self):
+        batched = self.create_issue_proc(1, 4)
+        self.migrate(batched)
+        with override_settings(DOCUMENT_RECORDS_BATCH_SIZE=0):
+            one_by_one = self.create_issue_proc(2, 4)
+            self.migrate(one_by_one)
+
+        fields = (
+            "pkg_name",
+            "main_lang",
+            "migration_status",
+            "xml_status",
+            "sps_pkg_status",
+            "qa_ws_status",
+            "public_ws_status",
+            "pid_status",
+            "migrated_data__migration_status",
+            "migrated_data__file_type",
+        )
+        self.assertEqual(
+            list(
+                ArticleProc.objects.filter(issue_proc=batched)
+                .order_by("pid")
+                .values_list(*fields)
+            ),
+            list(
+                ArticleProc.objects.filter(issue_proc=one_by_one)
+                .order_by("pid")
+                .values_list(*fields)
+            ),
+        )
+        batched.refresh_from_db()
+        one_by_one.refresh_from_db()
+        self.assertEqual(batched.docs_status, one_by_one.docs_status)
+
+
+class IssueFilesQueryBudgetTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="user")
+        self.collection = Collection.objects.create(
+            acron="scl", name="SciELO", creator=self.user
+        )
+        journal_proc = JournalProc.objects.create(
+            collection=self.collection, pid="1234-5678", acron="abc", creator=self.user
+        )
+        issue_proc = IssueProc.objects.create(
+            collection=self.collection,
+            journal_proc=journal_proc,
+            pid="1234-567820240001",
+            creator=self.user,
+        )
+        self.article_proc = ArticleProc.objects.create(
+            issue_proc=issue_proc, pid="S1234-56782024000100001", pkg_name="a01",
+            creator=self.user,
+        )
+        files = [
+            MigratedFile.objects.create(
+                collection=self.collection,
+                original_name=f"a01f{i}.jpg",
+                original_href=f"/img/revistas/abc/v1n1/a01f{i}.jpg",
+                component_type="asset",
+                pkg_name="a01",
+                creator=self.user,
+            )
+            for i in range(5)
+        ]
+        for lang in ("en", "es", "pt"):
+            for part in ("1", "2"):
+                files.append(
+                    MigratedFile.objects.create(
+                        collection=self.collection,
+                        original_name=f"{lang}_a01_{part}.htm",
+                        component_type="html",
+                        pkg_name="a01",
+                        lang=lang,
+                        part=part,
+                        creator=self.user,
+                    )
+                )
+        issue_proc.issue_files.add(*files)
+        self.issue_proc_id = issue_proc.id
+
+    def test_find_asset(self):
+        issue_proc = IssueProc.objects.get(id=self.issue_proc_id)
+        with self.assertQueryBudget(max_queries=2):
+            items = list(issue_proc.find_asset("a01f1.jpg"))
+        self.assertEqual(["a01f1.jpg"], [item.original_name for item in items])
+
+    def test_find_asset_in_journal(self):
+        issue_proc = IssueProc.objects.get(id=self.issue_proc_id)
+        # issue_files, journal_proc, collection e MigratedFile.find
+        with self.assertQueryBudget(max_queries=4):
+            items = list(issue_proc.find_asset("a01f9.jpg"))
+        self.assertEqual([], items)
+
+    @patch("proc.models.HTMLContent")
+    @patch.object(MigratedFile, "text", "<p>text</p>")
+    def test_translations_does_not_query_each_file(self, mock_html_content):
+        mock_html_content.return_value.content = "content"
+        article_proc = ArticleProc.objects.get(id=self.article_proc.id)
+        with self.assertQueryBudget(max_queries=2):
+            translations = article_proc.translations
+        self.assertEqual({"en", "es", "pt"}, set(translations))
+
+
+class MigrateArticlesTest(unittest.TestCase):
+    def get_article_procs(self, total):
+        return [Mock(pid=f"S{i}") for i in range(total)]
+
+    @override_settings(PID_PROVIDER_BATCH_SIZE=0)
+    def test_batch_size_zero_migrates_one_article_at_a_time(self):
+        article_procs = self.get_article_procs(3)
+        article_procs[1].migrate_article.side_effect = ValueError("x")
+
+        with patch.object(ArticleProc, "generate_sps_packages") as generate:
+            total, exceptions = ArticleProc.migrate_articles(
+                None, article_procs, False
+            )
+
+        generate.assert_not_called()
+        asset_indexes = article_procs[0].migrate_article.call_args.kwargs[
+            "asset_indexes"
+        ]
+        for article_proc in article_procs:
+            article_proc.migrate_article.assert_called_once_with(
+                None, False, asset_indexes=asset_indexes
+            )
+        self.assertEqual(2, total)
+        self.assertEqual(["S1"], list(exceptions))
+
+    def test_batches_of_batch_size(self):
+        article_procs = self.get_article_procs(5)
+        with patch.object(
+            ArticleProc, "generate_sps_packages", return_value={}
+        ) as generate:
+            total, exceptions = ArticleProc.migrate_articles(
+                None, article_procs, False, batch_size=2
+            )
+
+        self.assertEqual(
+            [2, 2, 1], [len(call.args[1]) for call in generate.call_args_list]
+        )
+        self.assertEqual(
+            1,
+            len({id(call.kwargs["asset_indexes"]) for call in generate.call_args_list}),
+        )
+        self.assertEqual(5, total)
+        self.assertEqual({}, exceptions)
+
+    def test_asset_index_is_built_once_per_issue_proc(self):
+        asset_indexes = {}
+        article_procs = [
+            Mock(issue_proc_id=1),
+            Mock(issue_proc_id=1),
+            Mock(issue_proc_id=2),
+        ]
+        with patch("proc.models.IssueAssetIndex.from_issue_proc") as from_issue_proc:
+            from_issue_proc.side_effect = lambda issue_proc: Mock()
+            indexes = [
+                ArticleProc.get_asset_index(article_proc, asset_indexes)
+                for article_proc in article_procs
+            ]
+
+        self.assertEqual(2, from_issue_proc.call_count)
+        self.assertIs(indexes[0], indexes[1])
+        self.assertIsNot(indexes[0], indexes[2])
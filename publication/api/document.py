@@ -1,5 +1,6 @@
 from django.utils.translation import gettext_lazy as _
 
+from package.models import get_pub_date
 from publication.api.publication import PublicationAPI
 from publication.utils.document import build_article
 
@@ -21,10 +22,20 @@ def publish_article(article_proc, api_data, bundle_id=None, is_public=True):
         raise ValueError("publication.api.document.publish_article requires bundle_id")
 
     order = article_proc.article.position
+    # obtém o XML uma única vez para a data de publicação e para o payload
+    xml_with_pre = article_proc.sps_pkg.xml_with_pre
     # considerar a data de publicação contida no XML seja no QA ou no PUBLIC
-    pub_date = article_proc.sps_pkg.pub_date
-
-    build_article(builder, article_proc.article, bundle_id, order, pub_date, is_public)
+    pub_date = get_pub_date(xml_with_pre)
+
+    build_article(
+        builder,
+        article_proc.article,
+        bundle_id,
+        order,
+        pub_date,
+        is_public,
+        xml_with_pre=xml_with_pre,
+    )
 
     api = PublicationAPI(**api_data)
     kwargs = dict(
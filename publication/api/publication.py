@@ -1,13 +1,27 @@
 import json
 import logging
+import os
 import sys
+import threading
+import time
 import traceback
 import urllib
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 
 from collection.models import WebSiteConfiguration
-from core.utils.requester import post_data
+from core.utils.requester import HTTP_POOL_MAXSIZE, NonRetryableError, post_data
+
+# validade do token em cache (segundos), se o website não informa expires_in
+PUBLICATION_API_TOKEN_TTL = getattr(settings, "PUBLICATION_API_TOKEN_TTL", 3000)
+# requisições simultâneas de PublicationClient.post_many
+PUBLICATION_API_MAX_WORKERS = getattr(settings, "PUBLICATION_API_MAX_WORKERS", 4)
+
+UNAUTHORIZED_STATUS = (401, 403)
+UNAUTHORIZED_WORDS = ("token", "unauthorized", "credentials", "authentication")
 
 
 def get_api(collection, content_type, website_kind):
@@ -29,101 +43,176 @@ def get_api_data(collection, content_type, website_kind=None):
         return {"error": f"Unable to get API data for {content_type} {collection} {website_kind}: {type(e)} {e}"}
 
 
-class PublicationAPI:
+def is_ok(response):
+    return bool(
+        (response.get("id") and response["id"] != "None")
+        or response.get("failed") is False
+    )
+
+
+def is_unauthorized(response):
     """
-    Interface com o site
+    Identifica a resposta de token expirado ou inválido: status 401/403 ou
+    erro (JSON) que menciona token ou credenciais
+    """
+    if response.get("status_code") in UNAUTHORIZED_STATUS:
+        return True
+    if is_ok(response):
+        return False
+    text = json.dumps(response, default=str).lower()
+    return any(word in text for word in UNAUTHORIZED_WORDS)
+
+
+class PublicationClient:
+    """
+    Cliente de longa duração da API de um website, compartilhado no processo
+    por todas as publicações com as mesmas credenciais
+    (ver get_publication_client)
+
+    O token fica em cache até expirar; se o website o rejeita, somente uma
+    thread obtém um novo token, as demais reaproveitam o renovado. As
+    conexões são as do pool de core.utils.requester (keep-alive).
     """
 
     def __init__(
         self,
-        post_data_url=None,
         get_token_url=None,
         username=None,
         password=None,
         timeout=None,
-        token=None,
-        enabled=None,
         verify=False,
+        token_ttl=None,
     ):
-        self.timeout = timeout or 15
-        self.post_data_url = post_data_url
         self.get_token_url = get_token_url
         self.username = username
         self.password = password
-        self.token = token
-        self.enabled = enabled
+        self.timeout = timeout or 15
         self.verify = verify
-        if not token and enabled:
-            self.get_token()
+        self.token_ttl = token_ttl or PUBLICATION_API_TOKEN_TTL
+        self._lock = threading.Lock()
+        self._token = None
+        self._token_expires_at = 0
+        self.token_requests = 0
 
     @property
-    def data(self):
-        return dict(
-            post_data_url=self.post_data_url,
-            get_token_url=self.get_token_url,
-            username=self.username,
-            password=self.password,
-            token=self.token,
-            enabled=self.enabled,
-            verify=self.verify,
-        )
+    def cached_token(self):
+        if self._token and time.monotonic() < self._token_expires_at:
+            return self._token
 
-    def post_data(self, payload, kwargs=None):
+    def _store_token(self, token, ttl=None):
+        try:
+            ttl = float(ttl) if ttl else self.token_ttl
+        except (TypeError, ValueError):
+            ttl = self.token_ttl
+        self._token = token
+        self._token_expires_at = time.monotonic() + ttl
+
+    def set_token(self, token):
+        """
+        Aproveita um token obtido em outro processo (api_data), se não há
+        token em cache
+        """
+        if not token:
+            return
+        with self._lock:
+            if not self.cached_token:
+                self._store_token(token)
+
+    def get_token(self, stale_token=None):
+        """
+        Retorna o token em cache ou obtém um novo
+
+        stale_token : str
+            token rejeitado pelo website; é renovado somente se ainda é o
+            token em cache (outra thread pode tê-lo renovado)
+
+        curl --request POST http://0.0.0.0:8000/api/v1/auth -u "useremail:password"
+        """
+        if not self.get_token_url:
+            return
+
+        token = self.cached_token
+        if token and token != stale_token:
+            return token
+
+        with self._lock:
+            token = self.cached_token
+            if token and token != stale_token:
+                return token
+            resp = post_data(
+                self.get_token_url,
+                auth=(self.username, self.password),
+                timeout=self.timeout,
+                json=True,
+            )
+            self.token_requests += 1
+            token = resp.get("token")
+            if token:
+                self._store_token(token, resp.get("expires_in"))
+            else:
+                self._token = None
+            return token
+
+    def post_data(self, post_data_url, payload, kwargs=None):
         """
         payload : dict
         """
-        # logging.info(f"payload={payload}")
-        response = None
         try:
-            if not self.enabled:
-                raise ValueError(_("Website enabled is False ({})").format(self.post_data_url))
-            if not self.token:
-                self.get_token()
-            response = self._post_data(payload, self.token, kwargs)
-            response = self.format_response(response, payload)
-            if not response.get("result"):
-                self.get_token()
-                response = self._post_data(payload, self.token, kwargs)
-                return self.format_response(response, payload)
-            return response
+            token = self.get_token()
+            response = self._post_data(post_data_url, payload, token, kwargs)
+            if self.get_token_url and is_unauthorized(response):
+                token = self.get_token(stale_token=token)
+                response = self._post_data(post_data_url, payload, token, kwargs)
+            return self.format_response(response, payload)
         except Exception as e:
             exc_type, exc_value, exc_traceback = sys.exc_info()
-            response = {
-                "post_data_url": self.post_data_url,
+            return {
+                "post_data_url": post_data_url,
                 "payload": json.dumps(payload),
                 "traceback": traceback.format_tb(exc_traceback),
                 "error": str(e),
                 "error_type": str(type(e)),
             }
-            return response
+
+    def post_many(self, post_data_url, items, max_workers=None):
+        """
+        Publica vários payloads com no máximo max_workers requisições
+        simultâneas (limitado ao tamanho do pool de conexões)
+
+        items : list of (payload, kwargs)
+
+        Returns
+        -------
+        list
+            respostas de post_data, na ordem de items
+        """
+        items = list(items)
+        max_workers = min(
+            max_workers or PUBLICATION_API_MAX_WORKERS, HTTP_POOL_MAXSIZE, len(items)
+        )
+        if max_workers <= 1:
+            return [
+                self.post_data(post_data_url, payload, kwargs)
+                for payload, kwargs in items
+            ]
+
+        # obtém o token antes de distribuir as requisições
+        self.get_token()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda item: self.post_data(post_data_url, *item),
+                    items,
+                )
+            )
 
     def format_response(self, response, payload):
-        if response.get("id") and response["id"] != "None":
-            response["result"] = "OK"
-        elif response.get("failed") is False:
+        if is_ok(response):
             response["result"] = "OK"
         response["payload"] = json.dumps(payload)
         return response or {}
 
-    def get_token(self):
-        """
-        curl --request POST http://0.0.0.0:8000/api/v1/auth -u "useremail:password"
-        """
-        if not self.get_token_url:
-            return
-
-        resp = post_data(
-            self.get_token_url,
-            # data={"username": self.username, "password": self.password},
-            auth=(self.username, self.password),
-            timeout=self.timeout,
-            json=True,
-        )
-        # logging.info(resp)
-        self.token = resp.get("token")
-        return self.token
-
-    def _post_data(self, payload, token, kwargs=None):
+    def _post_data(self, post_data_url, payload, token, kwargs=None):
         """
         payload : dict
         token : str
@@ -140,20 +229,166 @@ class PublicationAPI:
         else:
             header = {}
 
-        # logging.info(self.post_data_url)
         if kwargs:
             params = "&" + urllib.parse.urlencode(kwargs)
         else:
             params = ""
-        return post_data(
-            f"{self.post_data_url}/?token={token}{params}",
-            data=json.dumps(payload),
-            headers=header,
-            timeout=self.timeout,
+        try:
+            return post_data(
+                f"{post_data_url}/?token={token}{params}",
+                data=json.dumps(payload),
+                headers=header,
+                timeout=self.timeout,
+                verify=self.verify,
+                json=True,
+            )
+        except NonRetryableError as e:
+            # 4xx sem corpo JSON
+            cause = e.__cause__
+            if isinstance(cause, requests.HTTPError) and cause.response is not None:
+                status_code = cause.response.status_code
+                if status_code in UNAUTHORIZED_STATUS:
+                    return {"status_code": status_code, "error": str(cause)}
+            raise
+
+    @property
+    def stats(self):
+        return {
+            "token_requests": self.token_requests,
+            "token_cached": bool(self.cached_token),
+        }
+
+
+class PublicationClientRegistry:
+    """
+    Um PublicationClient por credenciais (get_token_url, usuário, senha),
+    isto é, por coleção e tipo de website, e por processo
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._clients = {}
+
+    def get(self, get_token_url=None, username=None, password=None, timeout=None, verify=False):
+        key = (get_token_url, username, password, timeout, verify)
+        with self._lock:
+            if self._pid != os.getpid():
+                # processo filho (fork): não herda tokens nem locks do pai
+                self._pid = os.getpid()
+                self._clients = {}
+            try:
+                return self._clients[key]
+            except KeyError:
+                client = self._clients[key] = PublicationClient(
+                    get_token_url, username, password, timeout, verify
+                )
+                return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "token_requests": sum(
+                    client.token_requests for client in self._clients.values()
+                ),
+            }
+
+
+publication_clients = PublicationClientRegistry()
+
+
+def get_publication_client(
+    get_token_url=None, username=None, password=None, timeout=None, verify=False
+):
+    return publication_clients.get(get_token_url, username, password, timeout, verify)
+
+
+def cache_stats():
+    return publication_clients.stats
+
+
+class PublicationAPI:
+    """
+    Interface com o site
+
+    Instâncias de curta duração (uma por item publicado) que compartilham o
+    PublicationClient (token e conexões) das mesmas credenciais
+    """
+
+    def __init__(
+        self,
+        post_data_url=None,
+        get_token_url=None,
+        username=None,
+        password=None,
+        timeout=None,
+        token=None,
+        enabled=None,
+        verify=False,
+    ):
+        self.timeout = timeout or 15
+        self.post_data_url = post_data_url
+        self.get_token_url = get_token_url
+        self.username = username
+        self.password = password
+        self.enabled = enabled
+        self.verify = verify
+        self.client = get_publication_client(
+            get_token_url, username, password, timeout, verify
+        )
+        self.client.set_token(token)
+        if not token and enabled:
+            self.get_token()
+
+    @property
+    def token(self):
+        return self.client.cached_token
+
+    @property
+    def data(self):
+        return dict(
+            post_data_url=self.post_data_url,
+            get_token_url=self.get_token_url,
+            username=self.username,
+            password=self.password,
+            token=self.token,
+            enabled=self.enabled,
             verify=self.verify,
-            json=True,
         )
 
+    def post_data(self, payload, kwargs=None):
+        """
+        payload : dict
+        """
+        if not self.enabled:
+            return self._disabled_response(payload)
+        return self.client.post_data(self.post_data_url, payload, kwargs)
+
+    def post_many(self, items, max_workers=None):
+        """
+        items : list of (payload, kwargs)
+        """
+        if not self.enabled:
+            return [self._disabled_response(payload) for payload, kwargs in items]
+        return self.client.post_many(self.post_data_url, items, max_workers)
+
+    def get_token(self):
+        return self.client.get_token()
+
+    def _disabled_response(self, payload):
+        return {
+            "post_data_url": self.post_data_url,
+            "payload": json.dumps(payload),
+            "error": str(_("Website enabled is False ({})").format(self.post_data_url)),
+            "error_type": str(ValueError),
+        }
+
 
 class JournalPublicationAPI(PublicationAPI):
     def __init__(
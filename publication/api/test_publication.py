@@ -0,0 +1,155 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from urllib.parse import parse_qs, urlsplit
+
+from publication.api.publication import (
+    PublicationAPI,
+    PublicationClient,
+    publication_clients,
+)
+
+
+class FakePublicationHandler(BaseHTTPRequestHandler):
+    """
+    Simula a API do website: /auth devolve um token novo a cada chamada;
+    /article aceita somente o token mais recente (os anteriores recebem 401)
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.startswith("/auth"):
+            with server.lock:
+                server.token_requests += 1
+                server.current_token = f"token-{server.token_requests}"
+                token = server.current_token
+            return self.send_json(200, {"token": token})
+
+        token = parse_qs(urlsplit(self.path).query).get("token", [None])[0]
+        with server.lock:
+            server.posts += 1
+            valid = token == server.current_token
+        if not valid:
+            return self.send_json(401, None)
+        return self.send_json(200, {"failed": False, "id": str(server.posts)})
+
+    def send_json(self, status, data):
+        content = json.dumps(data).encode() if data is not None else b"Unauthorized"
+        self.send_response(status)
+        self.send_header(
+            "Content-Type", "application/json" if data is not None else "text/plain"
+        )
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakePublicationServer:
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakePublicationHandler)
+        self.server.lock = threading.Lock()
+        self.server.token_requests = 0
+        self.server.current_token = None
+        self.server.posts = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def token_requests(self):
+        return self.server.token_requests
+
+    def expire_token(self):
+        with self.server.lock:
+            self.server.current_token = None
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PublicationClientTest(TestCase):
+    def setUp(self):
+        self.server = FakePublicationServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        publication_clients.clear()
+        self.addCleanup(publication_clients.clear)
+        self.api_data = dict(
+            post_data_url=f"{self.server.url}/article",
+            get_token_url=f"{self.server.url}/auth",
+            username="user",
+            password="pass",
+            enabled=True,
+        )
+
+    def test_token_is_requested_once_for_many_articles(self):
+        for i in range(20):
+            response = PublicationAPI(**self.api_data).post_data({"_id": i})
+            self.assertEqual("OK", response["result"])
+        self.assertEqual(1, self.server.token_requests)
+
+    def test_token_from_api_data_is_reused(self):
+        api_data = PublicationAPI(**self.api_data).data
+        publication_clients.clear()
+
+        response = PublicationAPI(**api_data).post_data({"_id": 1})
+
+        self.assertEqual("OK", response["result"])
+        self.assertEqual(1, self.server.token_requests)
+
+    def test_token_is_refreshed_once_on_401(self):
+        client = PublicationClient(
+            self.api_data["get_token_url"], "user", "pass", timeout=5
+        )
+        client.post_data(self.api_data["post_data_url"], {"_id": 0})
+        self.server.expire_token()
+
+        responses = client.post_many(
+            self.api_data["post_data_url"],
+            [({"_id": i}, {"order": i}) for i in range(40)],
+            max_workers=8,
+        )
+
+        self.assertEqual(["OK"] * 40, [item.get("result") for item in responses])
+        self.assertEqual(2, self.server.token_requests)
+
+    def test_expired_token_is_refreshed(self):
+        client = PublicationClient(
+            self.api_data["get_token_url"], "user", "pass", token_ttl=0.001
+        )
+        client.get_token()
+        threading.Event().wait(0.01)
+        client.get_token()
+        self.assertEqual(2, self.server.token_requests)
+
+    def test_post_many_keeps_order(self):
+        api = PublicationAPI(**self.api_data)
+        payloads = [({"_id": i}, None) for i in range(10)]
+
+        responses = api.post_many(payloads, max_workers=4)
+
+        self.assertEqual(
+            [json.dumps({"_id": i}) for i in range(10)],
+            [item["payload"] for item in responses],
+        )
+        self.assertEqual(1, self.server.token_requests)
+
+    def test_disabled_website(self):
+        self.api_data["enabled"] = False
+        response = PublicationAPI(**self.api_data).post_data({"_id": 1})
+        self.assertIn("error", response)
+        self.assertEqual(0, self.server.token_requests)
@@ -0,0 +1,54 @@
+"""
+Compara a extração dos dados de ArticlePayload (build_article) a partir do
+documento completo (um modelo do packtools por campo) com
+extract_article_metadata (cópia somente com os metadados, obtida em uma
+única passagem)
+
+Uso:
+    python manage.py runscript publication.scripts.bench_article_metadata \
+        --script-args 200 500 20
+
+Argumentos: número de autores, de referências e de repetições.
+"""
+import time
+
+from lxml import etree
+
+from publication.utils.document import XMLArticle, extract_article_metadata
+from publication.utils.test_document import get_many_authors_xml
+
+
+def legacy_extract(xmltree):
+    # equivalente ao build_article anterior: cada chamada instancia
+    # novamente os modelos do packtools sobre o documento completo
+    return {
+        "main_metadata": XMLArticle(xmltree=xmltree).get_main_metadata(),
+        "article_type": XMLArticle(xmltree=xmltree).main_article_type,
+        "in_issue": XMLArticle(xmltree=xmltree).get_in_issue(),
+        "contribs": XMLArticle(xmltree=xmltree).get_contribs(),
+        "translated_titles": list(XMLArticle(xmltree=xmltree).get_translated_title()),
+        "keywords": list(XMLArticle(xmltree=xmltree).get_keywords()),
+        "doi_with_lang": list(XMLArticle(xmltree=xmltree).get_doi_with_lang()),
+        "related_articles": list(XMLArticle(xmltree=xmltree).get_related_articles()),
+        "abstracts": list(XMLArticle(xmltree=xmltree).get_abstracts()),
+    }
+
+
+def measure(label, func, xmltree, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = func(xmltree)
+    elapsed = (time.perf_counter() - t0) / repeat
+    print(f"{label}: {elapsed * 1000:.1f}ms/article")
+    return elapsed, result
+
+
+def run(authors="200", refs="500", repeat="20"):
+    xmltree = etree.fromstring(get_many_authors_xml(int(authors), int(refs)))
+    print(f"authors: {authors}, references: {refs}")
+    legacy, expected = measure("legacy", legacy_extract, xmltree, int(repeat))
+    current, result = measure(
+        "extract_article_metadata", extract_article_metadata, xmltree, int(repeat)
+    )
+    print(f"speedup: {legacy / current:.1f}x")
+    print(f"same result: {result == expected}")
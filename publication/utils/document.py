@@ -1,10 +1,12 @@
 import logging
+from copy import deepcopy
+from functools import cached_property
 
+from lxml import etree
 from packtools.sps.models.v2.abstract import XMLAbstracts
 from packtools.sps.models.article_and_subarticles import ArticleAndSubArticles
 from packtools.sps.models.article_contribs import ArticleContribs
 from packtools.sps.models.article_doi_with_lang import DoiWithLang
-from packtools.sps.models.article_ids import ArticleIds
 from packtools.sps.models.article_renditions import ArticleRenditions
 from packtools.sps.models.article_titles import ArticleTitles
 from packtools.sps.models.article_toc_sections import ArticleTocSections
@@ -13,11 +15,19 @@ from packtools.sps.models.kwd_group import KwdGroup
 from packtools.sps.models.related_articles import RelatedItems
 
 
-def build_article(builder, article, bundle_id, order, pub_date, is_public=True):
+def build_article(
+    builder,
+    article,
+    bundle_id,
+    order,
+    pub_date,
+    is_public=True,
+    xml_with_pre=None,
+):
     sps_pkg = article.sps_pkg
-    xml_with_pre = sps_pkg.xml_with_pre
+    xml_with_pre = xml_with_pre or sps_pkg.xml_with_pre
 
-    article_xml = XMLArticle(xml_with_pre)
+    metadata = extract_article_metadata(xml_with_pre.xmltree)
 
     # TODO other_pids
     builder.add_identifiers(
@@ -32,12 +42,12 @@ def build_article(builder, article, bundle_id, order, pub_date, is_public=True):
 
     builder.add_xml(xml=sps_pkg.xml_uri)
 
-    metadata = article_xml.get_main_metadata()
+    main_metadata = metadata["main_metadata"]
     for item in sps_pkg.htmls:
         builder.add_html(language=item["lang"], uri=item.get("url"))
     for item in sps_pkg.pdfs:
         # {"lang": item.lang, "url": item.uri, "legacy_uri": item.legacy_uri}
-        lang = item.get("lang") or metadata.get("lang")
+        lang = item.get("lang") or main_metadata.get("lang")
         builder.add_pdf(
             lang=lang,
             url=item["url"],
@@ -56,45 +66,115 @@ def build_article(builder, article, bundle_id, order, pub_date, is_public=True):
             }
         )
 
-    builder.add_main_metadata(**metadata)
-    builder.add_document_type(article_xml.main_article_type)
+    builder.add_main_metadata(**main_metadata)
+    builder.add_document_type(metadata["article_type"])
 
-    builder.add_in_issue(**article_xml.get_in_issue(order))
+    builder.add_in_issue(order=order, **metadata["in_issue"])
 
     builder.add_publication_date(pub_date)
 
-    contribs = article_xml.get_contribs()
+    contribs = metadata["contribs"]
     for item in contribs.get("names") or []:
         builder.add_author(**item)
 
     for item in contribs.get("collabs") or []:
         builder.add_collab(**item)
 
-    for item in article_xml.get_translated_title():
+    for item in metadata["translated_titles"]:
         builder.add_translated_title(**item)
 
     for language, text in article.multilingual_sections.items():
         # pega as seções a partir do Article
         builder.add_section(language=language, text=text, code=None)
 
-    for item in article_xml.get_keywords():
+    for item in metadata["keywords"]:
         builder.add_keywords(**item)
 
-    for item in article_xml.get_doi_with_lang():
+    for item in metadata["doi_with_lang"]:
         builder.add_doi_with_lang(**item)
 
-    for item in article_xml.get_related_articles():
+    for item in metadata["related_articles"]:
         builder.add_related_article(**item)
 
     builder.add_status(is_public)
 
-    for item in article_xml.get_abstracts():
+    for item in metadata["abstracts"]:
         builder.add_abstract(**item)
 
 
+# elementos sem dados para ArticlePayload
+# (texto completo, referências, notas, apêndices etc)
+NOT_FRONT_TAGS = ("body", "back", "floats-group")
+
+
+def get_front_tree(xmltree):
+    """
+    Retorna cópia de xmltree somente com os metadados (front do article e
+    front-stub / front dos sub-article), obtida percorrendo a árvore uma
+    única vez
+    """
+    if hasattr(xmltree, "getroot"):
+        return etree.ElementTree(_copy_front(xmltree.getroot()))
+    return _copy_front(xmltree)
+
+
+def _copy_front(node):
+    copy = etree.Element(node.tag, attrib=dict(node.attrib), nsmap=node.nsmap)
+    copy.text = node.text
+    copy.tail = node.tail
+    for child in node:
+        if child.tag in NOT_FRONT_TAGS:
+            continue
+        if child.tag == "sub-article":
+            copy.append(_copy_front(child))
+        else:
+            copy.append(deepcopy(child))
+    return copy
+
+
+def extract_article_metadata(xmltree, front_only=True):
+    """
+    Extrai do XML todos os dados usados em build_article
+
+    Os modelos do packtools são instanciados uma única vez cada e, com
+    front_only=True, consultam somente a cópia dos metadados
+    (get_front_tree), e não o documento completo (body, referências etc)
+    """
+    if front_only:
+        xmltree = get_front_tree(xmltree)
+    article_xml = XMLArticle(xmltree=xmltree)
+    return {
+        "main_metadata": article_xml.get_main_metadata(),
+        "article_type": article_xml.main_article_type,
+        "in_issue": article_xml.get_in_issue(),
+        "contribs": article_xml.get_contribs(),
+        "translated_titles": list(article_xml.get_translated_title()),
+        "keywords": list(article_xml.get_keywords()),
+        "doi_with_lang": list(article_xml.get_doi_with_lang()),
+        "related_articles": list(article_xml.get_related_articles()),
+        "abstracts": list(article_xml.get_abstracts()),
+    }
+
+
 class XMLArticle:
-    def __init__(self, xml_with_pre):
-        self.xmltree = xml_with_pre.xmltree
+    def __init__(self, xml_with_pre=None, xmltree=None):
+        self.xmltree = xmltree if xmltree is not None else xml_with_pre.xmltree
+
+    @cached_property
+    def article_titles(self):
+        return ArticleTitles(self.xmltree)
+
+    @cached_property
+    def toc_sections(self):
+        return ArticleTocSections(self.xmltree)
+
+    @cached_property
+    def article_and_sub_articles(self):
+        return ArticleAndSubArticles(self.xmltree)
+
+    @cached_property
+    def doi_with_lang(self):
+        return DoiWithLang(self.xmltree)
 
     def get_publication_date(self, pub_date):
         return {
@@ -149,15 +229,13 @@ class XMLArticle:
             }
 
     def get_translated_title(self):
-        xml_article_titles = ArticleTitles(self.xmltree)
-        for item in xml_article_titles.article_title_list[1:]:
+        for item in self.article_titles.article_title_list[1:]:
             yield {"language": item["lang"], "text": item["text"]}
 
     def get_section(self):
-        xml_toc_sections = ArticleTocSections(self.xmltree)
-        for item in xml_toc_sections.article_section:
+        for item in self.toc_sections.article_section:
             yield {"language": item["lang"], "text": item["text"]}
-        for item in xml_toc_sections.sub_article_section:
+        for item in self.toc_sections.sub_article_section:
             yield {"language": item["lang"], "text": item["text"]}
 
     def get_abstracts(self):
@@ -178,43 +256,37 @@ class XMLArticle:
             yield {"language": lang, "keywords": keywords}
 
     def get_doi_with_lang(self):
-        doi_with_lang = DoiWithLang(self.xmltree)
-        for item in doi_with_lang.data:
+        for item in self.doi_with_lang.data:
             if not item["value"]:
                 continue
             yield {"language": item["lang"], "doi": item["value"]}
 
     def get_main_metadata(self):
-        xml_article_titles = ArticleTitles(self.xmltree)
-        xml_toc_section = ArticleTocSections(self.xmltree)
-        root = ArticleAndSubArticles(self.xmltree)
-        xml_doi = DoiWithLang(self.xmltree)
-
         section = None
-        for sec in xml_toc_section.article_section:
+        for sec in self.toc_sections.article_section:
             section = sec.get("text")
             break
 
         return dict(
-            title=(xml_article_titles.article_title or {}).get("text"),
+            title=(self.article_titles.article_title or {}).get("text"),
             section=section,
             abstract=None,
-            lang=root.main_lang,
-            doi=xml_doi.main_doi,
+            lang=self.article_and_sub_articles.main_lang,
+            doi=self.doi_with_lang.main_doi,
         )
 
     @property
     def main_article_type(self):
-        root = ArticleAndSubArticles(self.xmltree)
-        return root.main_article_type
+        return self.article_and_sub_articles.main_article_type
 
-    def get_in_issue(self, order):
-        aids = ArticleIds(self.xmltree)
+    def get_in_issue(self, order=None):
         article_meta_issue = ArticleMetaIssue(self.xmltree)
-        return dict(
-            order=order,
+        data = dict(
             fpage=article_meta_issue.fpage,
             fpage_seq=article_meta_issue.fpage_seq,
             lpage=article_meta_issue.lpage,
             elocation=article_meta_issue.elocation_id,
         )
+        if order is not None:
+            data["order"] = order
+        return data
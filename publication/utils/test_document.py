@@ -1,9 +1,97 @@
+import glob
+import os
 from unittest import TestCase
 from unittest.mock import MagicMock
 
 from lxml import etree
 
-from publication.utils.document import XMLArticle
+from publication.utils.document import (
+    XMLArticle,
+    extract_article_metadata,
+    get_front_tree,
+)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+# XMLs de exemplo do repositório
+SAMPLE_XMLS = sorted(
+    glob.glob(
+        os.path.join(ROOT_DIR, "pid_provider", "fixtures", "**", "*.xml"),
+        recursive=True,
+    )
+    + glob.glob(
+        os.path.join(ROOT_DIR, "migration", "fixtures", "**", "*.xml"),
+        recursive=True,
+    )
+)
+
+MANY_AUTHORS_XML = """<article xmlns:xlink="http://www.w3.org/1999/xlink"
+        article-type="research-article" xml:lang="en">
+    <front>
+        <article-meta>
+            <article-id pub-id-type="doi">10.1590/abc.2024.001</article-id>
+            <article-categories>
+                <subj-group subj-group-type="heading"><subject>Articles</subject></subj-group>
+            </article-categories>
+            <title-group>
+                <article-title>Main <italic>title</italic></article-title>
+                <trans-title-group xml:lang="pt">
+                    <trans-title>Título</trans-title>
+                </trans-title-group>
+            </title-group>
+            <contrib-group>
+                {contribs}
+                <contrib contrib-type="author"><collab>Study group</collab></contrib>
+            </contrib-group>
+            <aff id="aff1"><institution content-type="original">Universidade A, Brasil</institution></aff>
+            <aff id="aff2"><institution content-type="orgname">Universidade B</institution></aff>
+            <fpage>10</fpage>
+            <lpage>20</lpage>
+            <abstract><p>Abstract text</p></abstract>
+            <trans-abstract xml:lang="pt"><p>Resumo</p></trans-abstract>
+            <kwd-group xml:lang="en"><kwd>one</kwd><kwd>two</kwd></kwd-group>
+            <kwd-group xml:lang="pt"><kwd>um</kwd><kwd>dois</kwd></kwd-group>
+            <related-article related-article-type="corrected-article" id="ra1"
+                ext-link-type="doi" xlink:href="10.1590/abc.2023.009"/>
+        </article-meta>
+    </front>
+    <body><sec><p>Text <xref ref-type="bibr" rid="B1">1</xref></p></sec></body>
+    <back><ref-list>{refs}</ref-list></back>
+    <sub-article article-type="translation" id="s1" xml:lang="pt">
+        <front-stub>
+            <article-id pub-id-type="doi">10.1590/abc.2024.001.pt</article-id>
+            <title-group><article-title>Título</article-title></title-group>
+            <abstract><p>Resumo</p></abstract>
+            <kwd-group xml:lang="pt"><kwd>um</kwd></kwd-group>
+        </front-stub>
+        <body><p>Texto</p></body>
+        <back><ref-list><ref id="SB1"><mixed-citation>Ref</mixed-citation></ref></ref-list></back>
+    </sub-article>
+</article>"""
+
+
+def get_many_authors_xml(authors=50, refs=100):
+    contribs = "".join(
+        f"""<contrib contrib-type="author">
+            <contrib-id contrib-id-type="orcid">0000-0000-0000-{i:04d}</contrib-id>
+            <name><surname>Surname{i}</surname><given-names>Name{i}</given-names></name>
+            <xref ref-type="aff" rid="aff{i % 2 + 1}"/>
+        </contrib>"""
+        for i in range(authors)
+    )
+    refs = "".join(
+        f"""<ref id="B{i}"><mixed-citation>Author {i}. Title {i}. 2020.</mixed-citation>
+            <element-citation publication-type="journal">
+                <person-group person-group-type="author">
+                    <name><surname>Author{i}</surname><given-names>A</given-names></name>
+                </person-group>
+                <article-title>Title {i}</article-title>
+                <source>Journal</source><year>2020</year>
+            </element-citation>
+        </ref>"""
+        for i in range(refs)
+    )
+    return MANY_AUTHORS_XML.format(contribs=contribs, refs=refs)
 
 
 def _create_xml_article(xml_string):
@@ -110,3 +198,72 @@ class XMLArticleGetContribsTest(TestCase):
 
         self.assertEqual(result["names"], [])
         self.assertEqual(result["collabs"], [])
+
+
+class GetFrontTreeTest(TestCase):
+    def test_keeps_only_metadata(self):
+        xmltree = etree.fromstring(get_many_authors_xml(authors=3, refs=5))
+        front = get_front_tree(xmltree)
+        self.assertEqual([node.tag for node in front], ["front", "sub-article"])
+        self.assertEqual(
+            [node.tag for node in front.find("sub-article")], ["front-stub"]
+        )
+        self.assertEqual(front.findall(".//ref"), [])
+        self.assertEqual(len(front.findall(".//contrib")), 4)
+        self.assertEqual(front.get("{http://www.w3.org/XML/1998/namespace}lang"), "en")
+        # o original não é alterado
+        self.assertEqual(len(xmltree.findall(".//ref")), 6)
+
+    def test_element_tree(self):
+        xmltree = etree.ElementTree(etree.fromstring(get_many_authors_xml(1, 1)))
+        front = get_front_tree(xmltree)
+        self.assertEqual(front.getroot().tag, "article")
+        self.assertIsNone(front.find(".//body"))
+
+
+class ExtractArticleMetadataEquivalenceTest(TestCase):
+    """
+    extract_article_metadata (front_only) deve produzir os mesmos dados que
+    os modelos do packtools aplicados ao documento completo
+    """
+
+    def assertSameMetadata(self, xmltree):
+        self.assertEqual(
+            extract_article_metadata(xmltree, front_only=True),
+            extract_article_metadata(xmltree, front_only=False),
+        )
+
+    def test_sample_xmls(self):
+        self.assertTrue(SAMPLE_XMLS)
+        for path in SAMPLE_XMLS:
+            with self.subTest(path=os.path.basename(path)):
+                self.assertSameMetadata(etree.parse(path))
+
+    def test_many_authors_and_references(self):
+        self.assertSameMetadata(etree.fromstring(get_many_authors_xml(50, 200)))
+
+    def test_many_authors_and_references_content(self):
+        metadata = extract_article_metadata(
+            etree.fromstring(get_many_authors_xml(5, 10))
+        )
+        self.assertEqual(metadata["article_type"], "research-article")
+        self.assertEqual(metadata["main_metadata"]["lang"], "en")
+        self.assertEqual(metadata["main_metadata"]["doi"], "10.1590/abc.2024.001")
+        self.assertEqual(metadata["in_issue"]["fpage"], "10")
+        self.assertEqual(len(metadata["contribs"]["names"]), 5)
+        self.assertEqual(metadata["contribs"]["collabs"], [{"name": "Study group"}])
+
+    def test_equals_xml_article_methods(self):
+        xmltree = etree.fromstring(get_many_authors_xml(5, 10))
+        article_xml = XMLArticle(xmltree=xmltree)
+        metadata = extract_article_metadata(xmltree)
+        self.assertEqual(metadata["contribs"], article_xml.get_contribs())
+        self.assertEqual(
+            metadata["translated_titles"], list(article_xml.get_translated_title())
+        )
+        self.assertEqual(metadata["keywords"], list(article_xml.get_keywords()))
+        self.assertEqual(metadata["abstracts"], list(article_xml.get_abstracts()))
+        self.assertEqual(
+            metadata["related_articles"], list(article_xml.get_related_articles())
+        )
+        self.assertEqual(metadata["in_issue"], article_xml.get_in_issue())
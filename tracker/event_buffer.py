@@ -0,0 +1,302 @@
+"""
+Gravação em lote de eventos (Operation, TaskTracker, UnexpectedEvent)
+
+Por padrão, cada evento é gravado imediatamente (INSERT / UPDATE). Dentro de
+``buffered_events()``, os eventos novos são mantidos em memória e gravados
+com ``bulk_create`` (ou em uma única transação, para modelos com herança
+multi-tabela) ao final do bloco (inclusive se houver exceção), quando a
+quantidade ou o tempo limite é atingido, ou quando o processo do worker
+termina (``flush_all``).
+
+Enquanto um evento não foi gravado, suas alterações (ex.: ``finish``) apenas
+atualizam o objeto em memória; depois de gravado, voltam a ser UPDATE.
+
+Os campos ``auto_now_add`` / ``auto_now`` (``created``, ``updated``) recebem
+a data e hora em que o evento foi criado ou alterado, e não a da gravação do
+lote: os valores são registrados em memória e reaplicados após a gravação.
+
+É opcional: só tem efeito com ``TRACKER_EVENT_BUFFER_ENABLED = True``.
+
+    @celery_app.task(bind=True)
+    @buffered_events()
+    def task_x(self, ...):
+        ...
+"""
+
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+_current_buffer = ContextVar("tracker_event_buffer", default=None)
+_active_buffers = weakref.WeakSet()
+_active_buffers_lock = threading.Lock()
+_timestamp_fields = {}
+
+
+def get_timestamp_fields(model):
+    """
+    Campos DateTimeField com auto_now_add ou auto_now de model
+    """
+    try:
+        return _timestamp_fields[model]
+    except KeyError:
+        fields = [
+            field
+            for field in model._meta.concrete_fields
+            if isinstance(field, models.DateTimeField)
+            and (field.auto_now or field.auto_now_add)
+        ]
+        _timestamp_fields[model] = fields
+        return fields
+
+
+class EventBuffer:
+    def __init__(self, max_size=None, max_seconds=None):
+        self.max_size = max_size or getattr(
+            settings, "TRACKER_EVENT_BUFFER_MAX_SIZE", 500
+        )
+        self.max_seconds = max_seconds or getattr(
+            settings, "TRACKER_EVENT_BUFFER_MAX_SECONDS", 30
+        )
+        self._lock = threading.RLock()
+        self._items = []
+        self._pending = set()
+        # id(obj) -> {attname: data e hora do evento}
+        self._timestamps = {}
+        # (model, chave) -> função executada antes da gravação
+        self._before_flush = {}
+        self._last_flush = time.monotonic()
+        self.flushed = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, obj):
+        with self._lock:
+            self._items.append(obj)
+            self._pending.add(id(obj))
+            self._stamp(obj, adding=True)
+        self.flush_if_needed()
+
+    def touch(self, obj):
+        """
+        Registra a alteração de obj ainda não gravado (campos auto_now)
+        """
+        with self._lock:
+            if id(obj) in self._pending:
+                self._stamp(obj, adding=False)
+
+    def _stamp(self, obj, adding):
+        now = timezone.now()
+        timestamps = self._timestamps.setdefault(id(obj), {})
+        for field in get_timestamp_fields(type(obj)):
+            if field.auto_now or adding:
+                setattr(obj, field.attname, now)
+                timestamps[field.attname] = now
+
+    def is_pending(self, obj):
+        return id(obj) in self._pending
+
+    def discard(self, condition):
+        """
+        Descarta os eventos ainda não gravados que atendem a condition
+        """
+        with self._lock:
+            items = []
+            for obj in self._items:
+                if condition(obj):
+                    self._pending.discard(id(obj))
+                    self._timestamps.pop(id(obj), None)
+                else:
+                    items.append(obj)
+            self._items = items
+
+    def discard_from_last(self, scope, condition):
+        """
+        Entre os eventos não gravados que atendem a scope, descarta o mais
+        recente que atende a condition e os criados depois dele
+        """
+        with self._lock:
+            last = None
+            for index, obj in enumerate(self._items):
+                if scope(obj) and condition(obj):
+                    last = index
+            if last is None:
+                return
+            discarded = {
+                id(obj) for obj in self._items[last:] if scope(obj)
+            }
+        self.discard(lambda obj: id(obj) in discarded)
+
+    def before_flush(self, key, function):
+        """
+        Registra function para ser executada (uma vez por key) antes
+        da próxima gravação
+        """
+        with self._lock:
+            self._before_flush.setdefault(key, function)
+
+    def flush_if_needed(self):
+        if (
+            len(self._items) >= self.max_size
+            or time.monotonic() - self._last_flush >= self.max_seconds
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            items = self._items
+            timestamps = self._timestamps
+            before_flush = list(self._before_flush.values())
+            self._items = []
+            self._timestamps = {}
+            self._before_flush = {}
+            self._last_flush = time.monotonic()
+
+            for function in before_flush:
+                try:
+                    function()
+                except Exception as e:
+                    logging.exception(e)
+
+            by_model = {}
+            for obj in items:
+                by_model.setdefault(type(obj), []).append(obj)
+            for model, objs in by_model.items():
+                try:
+                    self._bulk_create(model, objs)
+                except Exception as e:
+                    logging.exception(e)
+                    # grava um a um para não perder os demais eventos
+                    for obj in objs:
+                        self._save(obj)
+                try:
+                    self._restore_timestamps(model, objs, timestamps)
+                except Exception as e:
+                    logging.exception(e)
+            for obj in items:
+                self._pending.discard(id(obj))
+            self.flushed += len(items)
+
+    def _bulk_create(self, model, objs):
+        with transaction.atomic():
+            if model._meta.get_parent_list():
+                # bulk_create não aceita herança multi-tabela (ex.: subclasses
+                # de proc.models.Operation); grava em uma única transação
+                for obj in objs:
+                    obj.save()
+                return
+            model.objects.bulk_create(objs, batch_size=self.max_size)
+
+    def _save(self, obj):
+        """
+        Grava obj; se o banco de dados recusa detail (ex.: JSON inválido),
+        grava o evento com "Failed to decode detail", como Operation.finish
+        """
+        try:
+            with transaction.atomic():
+                obj.save()
+            return
+        except Exception as e:
+            logging.exception(e)
+        if not hasattr(obj, "detail"):
+            return
+        obj.detail = "Failed to decode detail"
+        try:
+            with transaction.atomic():
+                obj.save()
+        except Exception as e:
+            logging.exception(e)
+
+    def _restore_timestamps(self, model, objs, timestamps):
+        """
+        Reaplica as datas e horas registradas em memória, substituídas por
+        pre_save (auto_now_add / auto_now) no momento da gravação
+        """
+        # com herança multi-tabela, os campos podem estar na tabela pai
+        by_owner = {}
+        for field in get_timestamp_fields(model):
+            by_owner.setdefault(field.model, []).append(field.attname)
+
+        saved = []
+        for obj in objs:
+            values = timestamps.get(id(obj))
+            if not values or obj.pk is None:
+                continue
+            for attname, value in values.items():
+                setattr(obj, attname, value)
+            saved.append(obj)
+        if not saved:
+            return
+        for owner, attnames in by_owner.items():
+            owner._base_manager.bulk_update(
+                saved, attnames, batch_size=self.max_size
+            )
+
+
+def get_current_buffer():
+    return _current_buffer.get()
+
+
+def is_enabled():
+    return getattr(settings, "TRACKER_EVENT_BUFFER_ENABLED", False)
+
+
+@contextmanager
+def buffered_events(max_size=None, max_seconds=None):
+    """
+    Acumula os eventos criados no bloco e os grava em lote ao final
+    """
+    if not is_enabled() or get_current_buffer() is not None:
+        # desabilitado ou já dentro de um bloco (usa o buffer externo)
+        yield get_current_buffer()
+        return
+
+    buffer = EventBuffer(max_size, max_seconds)
+    token = _current_buffer.set(buffer)
+    with _active_buffers_lock:
+        _active_buffers.add(buffer)
+    try:
+        yield buffer
+    finally:
+        _current_buffer.reset(token)
+        with _active_buffers_lock:
+            _active_buffers.discard(buffer)
+        buffer.flush()
+
+
+def save(obj):
+    """
+    Grava obj, ou o adiciona ao buffer corrente se obj é novo;
+    não faz nada se obj está no buffer aguardando gravação
+    """
+    buffer = get_current_buffer()
+    if buffer is not None:
+        if buffer.is_pending(obj):
+            buffer.touch(obj)
+            buffer.flush_if_needed()
+            return
+        if obj._state.adding:
+            buffer.add(obj)
+            return
+    obj.save()
+
+
+def flush_all():
+    """
+    Grava os eventos de todos os buffers ativos (ex.: término do worker)
+    """
+    with _active_buffers_lock:
+        buffers = list(_active_buffers)
+    for buffer in buffers:
+        try:
+            buffer.flush()
+        except Exception as e:
+            logging.exception(e)
@@ -9,7 +9,7 @@ from wagtail.admin.panels import FieldPanel
 
 from core.widgets import ReadOnlyPrettyJSONWidget
 from core.utils.sanitize import sanitize_for_json
-from tracker import choices
+from tracker import choices, event_buffer
 
 
 class ProcEventCreateError(Exception): ...
@@ -37,6 +37,22 @@ def format_traceback(exc_traceback):
 class EventSaveError(Exception): ...
 
 
+def delete_in_batches(queryset, batch_size=None):
+    """
+    Apaga os registros de queryset em lotes de batch_size (evita transações
+    e bloqueios longos em tabelas grandes). Retorna a quantidade apagada
+    """
+    batch_size = batch_size or 1000
+    model = queryset.model
+    total = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return total
+        deleted, _ = model.objects.filter(pk__in=ids).delete()
+        total += deleted
+
+
 class BaseEvent(models.Model):
     name = models.CharField(_("name"), max_length=200)
     detail = models.JSONField(null=True, blank=True)
@@ -64,7 +80,7 @@ class BaseEvent(models.Model):
         obj.detail = detail
         obj.name = name
         obj.completed = False
-        obj.save()
+        event_buffer.save(obj)
         return obj
 
     def finish(self, completed, detail=None, errors=None, exceptions=None):
@@ -77,7 +93,7 @@ class BaseEvent(models.Model):
                 detail["exceptions"] = exceptions
                 self.completed = False
             self.detail = detail
-            self.save()
+            event_buffer.save(self)
         except Exception as e:
             logging.exception(f"Error finishing Event: {e}")
             raise EventSaveError(f"Unable to create event: {e}")
@@ -125,6 +141,13 @@ class UnexpectedEvent(models.Model):
             return f"{self.action} {self.item} {self.exception_msg}"
         return f"{self.exception_msg}"
 
+    @classmethod
+    def prune(cls, before, batch_size=None):
+        """
+        Apaga os registros criados antes de before
+        """
+        return delete_in_batches(cls.objects.filter(created__lt=before), batch_size)
+
     @property
     def data(self):
         return dict(
@@ -165,7 +188,7 @@ class UnexpectedEvent(models.Model):
 
             if exc_traceback:
                 obj.traceback = traceback.format_tb(exc_traceback)
-            obj.save()
+            event_buffer.save(obj)
             return obj
         except Exception as exc:
             raise UnexpectedEventCreateError(
@@ -208,6 +231,13 @@ class TaskTracker(BaseEvent):
         FieldPanel("detail", widget=ReadOnlyPrettyJSONWidget()),
     ]
 
+    @classmethod
+    def prune(cls, before, batch_size=None):
+        """
+        Apaga os registros atualizados antes de before
+        """
+        return delete_in_batches(cls.objects.filter(updated__lt=before), batch_size)
+
     @classmethod
     def create(
         cls,
@@ -220,7 +250,7 @@ class TaskTracker(BaseEvent):
         obj.name = name
         obj.completed = False
         obj.item = item
-        obj.save()
+        event_buffer.save(obj)
         return obj
 
     def finish(
@@ -258,4 +288,4 @@ class TaskTracker(BaseEvent):
             status = choices.TASK_TRACK_STATUS_INTERRUPTED
         self.completed = completed
         self.status = status
-        self.save()
+        event_buffer.save(self)
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase, override_settings
+from django.utils import timezone as django_timezone
+
+from tracker import choices
+from tracker.event_buffer import EventBuffer, buffered_events
+from tracker.models import TaskTracker, UnexpectedEvent
+
+
+@override_settings(TRACKER_EVENT_BUFFER_ENABLED=True)
+class BufferedEventsTest(TestCase):
+    def test_events_are_saved_at_the_end_of_the_block(self):
+        with buffered_events():
+            for i in range(3):
+                UnexpectedEvent.create(exception=ValueError(i))
+            self.assertEqual(UnexpectedEvent.objects.count(), 0)
+        self.assertEqual(UnexpectedEvent.objects.count(), 3)
+
+    def test_events_are_saved_if_an_exception_is_raised(self):
+        with self.assertRaises(ZeroDivisionError):
+            with buffered_events():
+                UnexpectedEvent.create(exception=ValueError("x"))
+                1 / 0
+        self.assertEqual(UnexpectedEvent.objects.count(), 1)
+
+    def test_events_are_saved_when_max_size_is_reached(self):
+        with buffered_events(max_size=2) as buffer:
+            for i in range(5):
+                UnexpectedEvent.create(exception=ValueError(i))
+            self.assertEqual(UnexpectedEvent.objects.count(), 4)
+            self.assertEqual(len(buffer), 1)
+        self.assertEqual(UnexpectedEvent.objects.count(), 5)
+
+    def test_finish_of_a_pending_event_is_saved_once(self):
+        with buffered_events():
+            task_tracker = TaskTracker.create(name="task", item="item")
+            task_tracker.finish(completed=True, detail={"x": 1})
+        obj = TaskTracker.objects.get()
+        self.assertEqual(obj.status, choices.TASK_TRACK_STATUS_FINISHED)
+        self.assertEqual(obj.detail, {"x": 1})
+
+    def test_timestamps_are_the_event_ones_not_the_flush_ones(self):
+        with buffered_events():
+            task_tracker = TaskTracker.create(name="task", item="item")
+            created = task_tracker.created
+            time.sleep(0.01)
+            task_tracker.finish(completed=True)
+            updated = task_tracker.updated
+            time.sleep(0.01)
+            flushed_after = django_timezone.now()
+        obj = TaskTracker.objects.get()
+        self.assertEqual(obj.created, created)
+        self.assertEqual(obj.updated, updated)
+        self.assertLess(obj.created, obj.updated)
+        self.assertLess(obj.updated, flushed_after)
+
+    def test_detail_rejected_by_the_database_is_replaced(self):
+        with buffered_events():
+            task_tracker = TaskTracker.create(name="task", item="item")
+            # o PostgreSQL não aceita \u0000 em jsonb
+            task_tracker.detail = {"x": "\x00"}
+            TaskTracker.create(name="other", item="item")
+        self.assertEqual(
+            "Failed to decode detail", TaskTracker.objects.get(name="task").detail
+        )
+        self.assertTrue(TaskTracker.objects.filter(name="other").exists())
+
+    def test_discard_from_last_uses_the_most_recent_match(self):
+        buffer = EventBuffer()
+        for name in ("a", "b", "a", "c"):
+            buffer.add(TaskTracker(name=name, item="item"))
+
+        buffer.discard_from_last(lambda obj: True, lambda obj: obj.name == "a")
+
+        self.assertEqual(["a", "b"], [obj.name for obj in buffer._items])
+
+    @override_settings(TRACKER_EVENT_BUFFER_ENABLED=False)
+    def test_disabled(self):
+        with buffered_events() as buffer:
+            UnexpectedEvent.create(exception=ValueError("x"))
+            self.assertIsNone(buffer)
+            self.assertEqual(UnexpectedEvent.objects.count(), 1)
+
+
+class PruneTest(TestCase):
+    def test_prune_unexpected_events(self):
+        old = UnexpectedEvent.create(exception=ValueError("old"))
+        UnexpectedEvent.create(exception=ValueError("new"))
+        UnexpectedEvent.objects.filter(pk=old.pk).update(
+            created=datetime.now(timezone.utc) - timedelta(days=100)
+        )
+        before = datetime.now(timezone.utc) - timedelta(days=90)
+        self.assertEqual(UnexpectedEvent.prune(before, batch_size=1), 1)
+        self.assertEqual(
+            list(UnexpectedEvent.objects.values_list("exception_msg", flat=True)),
+            ["new"],
+        )
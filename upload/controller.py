@@ -191,7 +191,7 @@ def receive_package(user, package):
 
             response = _check_article_and_journal(package, xml_with_pre, user=user)
             logging.info(response)
-            update_zip_file(zip_xml_file_path, response, xml_with_pre)
+            update_zip_file(zip_xml_file_path, xml_with_pre.filename, xml_with_pre)
 
             package.article = response.get("article")
             package.issue = (
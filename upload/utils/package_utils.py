@@ -3,10 +3,9 @@ import logging
 import os
 from datetime import date, datetime, timedelta
 from random import randint
-from shutil import copyfile
-from tempfile import TemporaryDirectory, mkdtemp
+from tempfile import mkdtemp
 from time import sleep
-from zipfile import ZIP_DEFLATED, BadZipFile, ZipFile
+from zipfile import BadZipFile
 
 from django.utils.translation import gettext_lazy as _
 from lxml import etree
@@ -20,6 +19,8 @@ from packtools.sps.models.article_titles import ArticleTitles
 from packtools.sps.models.journal_meta import ISSN
 from packtools.sps.pid_provider.xml_sps_lib import XMLWithPre
 
+from core.utils.zip_utils import replace_zip_members
+
 from .file_utils import (
     create_file_for_xml_etree,
     create_file_for_zip_package,
@@ -328,14 +329,8 @@ def get_article_data_for_comparison(xmltree):
 
 
 def update_zip_file(zip_xml_file_path, xml_with_pre):
-    new_xml = xml_with_pre.tostring(pretty_print=True)
-    with TemporaryDirectory() as targetdir:
-        new_zip_path = os.path.join(targetdir, os.path.basename(zip_xml_file_path))
-        with ZipFile(new_zip_path, "a", compression=ZIP_DEFLATED) as new_zfp:
-            with ZipFile(zip_xml_file_path) as zfp:
-                for item in zfp.namelist():
-                    if item == xml_with_pre.filename:
-                        new_zfp.writestr(item, new_xml)
-                    else:
-                        new_zfp.writestr(item, zfp.read(item))
-        copyfile(new_zip_path, zip_xml_file_path)
+    # somente o XML é regravado; os demais membros são copiados sem recompressão
+    replace_zip_members(
+        zip_xml_file_path,
+        {xml_with_pre.filename: xml_with_pre.tostring(pretty_print=True)},
+    )